@@ -0,0 +1,159 @@
+"""
+Measures the throughput of broadcasting a message to many channels against the rate limited fake Discord API and writes the results as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.broadcast_benchmark --channels 500 --uncached-ratio 0.2 --output broadcast_results.json
+
+The send function does what the owner command `sendnews` does: channels, which aren't cached, get fetched before sending to them. Both requests count against the bot's global rate limit. A run exceeding Discord's global rate limit shows up as global 429 responses in the results.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Set
+
+import aiohttp
+
+from . import fake_discord
+
+
+# ---------- Constants ----------
+
+DEFAULT_CHANNEL_COUNT: int = 300
+DEFAULT_UNCACHED_RATIO: float = 0.2
+RESULTS_VERSION: int = 1
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+
+
+
+# ---------- Functions ----------
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if REPOSITORY_PATH not in sys.path:
+        sys.path.insert(0, REPOSITORY_PATH)
+    from src import broadcast
+    from src import settings
+
+    if args.requests_per_second:
+        settings.BROADCAST_REQUESTS_PER_SECOND = args.requests_per_second
+    channel_ids = fake_discord.create_channel_ids(args.channels, forbidden_ratio=args.forbidden_ratio, missing_ratio=args.missing_ratio, seed=args.seed)
+    uncached_channel_ids = __get_uncached_channel_ids(channel_ids['all'], args.uncached_ratio, args.seed)
+
+    api = fake_discord.FakeDiscordApi(global_limit=args.global_limit, channel_limit=args.channel_limit, channel_window=args.channel_window, latency=args.latency, forbidden_channel_ids=channel_ids['forbidden'], missing_channel_ids=channel_ids['missing'])
+    runner = await fake_discord.start(api, port=0)
+    base_url = fake_discord.get_base_url(runner)
+    jobs_path = tempfile.mkdtemp(prefix='yadc_broadcast_')
+    broadcast.JOBS_PATH = jobs_path
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async def send(channel_id: int, payload: Dict[str, Any]) -> None:
+                if channel_id in uncached_channel_ids:
+                    await broadcast.acquire_global_token()
+                    async with session.get(f'{base_url}/channels/{channel_id}') as response:
+                        await fake_discord.raise_for_status(response)
+                    uncached_channel_ids.discard(channel_id)
+                embed = {'title': payload['title'], 'description': payload['content']}
+                async with session.post(f'{base_url}/channels/{channel_id}/messages', json={'embeds': [embed]}) as response:
+                    await fake_discord.raise_for_status(response)
+
+            job = broadcast.BroadcastJob('benchmark', {'title': 'Benchmark', 'content': 'Lorem ipsum dolor sit amet.'}, channel_ids['all'])
+            started_at = datetime.now(timezone.utc)
+            start = time.perf_counter()
+            await broadcast.run(job, send, concurrency=args.concurrency)
+            duration = time.perf_counter() - start
+    finally:
+        await runner.cleanup()
+        shutil.rmtree(jobs_path, ignore_errors=True)
+
+    delivered_channel_ids = set(api.messages.keys())
+    duplicate_count = sum(len(messages) - 1 for messages in api.messages.values())
+    expected_failed_count = len(channel_ids['forbidden']) + len(channel_ids['missing'])
+    return {
+        'version': RESULTS_VERSION,
+        'started_at': started_at.isoformat(),
+        'parameters': {
+            'channels': args.channels,
+            'uncached_ratio': args.uncached_ratio,
+            'forbidden_ratio': args.forbidden_ratio,
+            'missing_ratio': args.missing_ratio,
+            'concurrency': args.concurrency or settings.BROADCAST_CONCURRENCY,
+            'requests_per_second': settings.BROADCAST_REQUESTS_PER_SECOND,
+            'global_limit': args.global_limit,
+            'channel_limit': args.channel_limit,
+            'channel_window': args.channel_window,
+            'latency': args.latency,
+            'seed': args.seed,
+        },
+        'environment': {
+            'bot_version': settings.VERSION,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        },
+        'duration': duration,
+        'messages_per_second': len(delivered_channel_ids) / duration if duration else None,
+        'sent_count': job.sent_count,
+        'failed_count': job.failed_count,
+        'expected_failed_count': expected_failed_count,
+        'duplicate_count': duplicate_count,
+        'request_count': api.request_count,
+        'global_rate_limited_count': api.global_rate_limited_count,
+        'channel_rate_limited_count': api.channel_rate_limited_count,
+    }
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __get_uncached_channel_ids(channel_ids: list, uncached_ratio: float, seed: int) -> Set[int]:
+    rng = random.Random(seed + 1)
+    return set(rng.sample(channel_ids, int(len(channel_ids) * uncached_ratio)))
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures the throughput of broadcasts against the rate limited fake Discord API.')
+    parser.add_argument('--channels', type=int, default=DEFAULT_CHANNEL_COUNT, help='Number of channels to broadcast to.')
+    parser.add_argument('--uncached-ratio', type=float, default=DEFAULT_UNCACHED_RATIO, help='Share of channels, which need to be fetched before sending.')
+    parser.add_argument('--forbidden-ratio', type=float, default=0.0, help='Share of channels the bot may not send to.')
+    parser.add_argument('--missing-ratio', type=float, default=0.0, help='Share of channels, which don\'t exist anymore.')
+    parser.add_argument('--concurrency', type=int, help='Number of concurrent sends. Defaults to BROADCAST_CONCURRENCY.')
+    parser.add_argument('--requests-per-second', type=float, help='The bot\'s global rate limit. Defaults to BROADCAST_REQUESTS_PER_SECOND.')
+    parser.add_argument('--global-limit', type=int, default=fake_discord.DEFAULT_GLOBAL_LIMIT, help='Requests per second allowed by the fake API.')
+    parser.add_argument('--channel-limit', type=int, default=fake_discord.DEFAULT_CHANNEL_LIMIT, help='Messages per channel allowed by the fake API within the channel window.')
+    parser.add_argument('--channel-window', type=float, default=fake_discord.DEFAULT_CHANNEL_WINDOW)
+    parser.add_argument('--latency', type=float, default=fake_discord.DEFAULT_LATENCY, help='Seconds the fake API waits before answering a request.')
+    parser.add_argument('--seed', type=int, default=fake_discord.DEFAULT_SEED)
+    parser.add_argument('--output', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    print(f'Sent {results["sent_count"]} messages in {results["duration"]:.2f} seconds ({results["messages_per_second"]:.1f} per second) with {results["request_count"]} requests.')
+    print(f'Failed: {results["failed_count"]} (expected {results["expected_failed_count"]}), duplicates: {results["duplicate_count"]}')
+    print(f'Rate limited: {results["global_rate_limited_count"]} global, {results["channel_rate_limited_count"]} per channel')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
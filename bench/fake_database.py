@@ -0,0 +1,163 @@
+"""
+An in-memory stand-in for the serversettings table, which replaces the query functions of the bot's database module. It understands the statements used for reading and writing guild settings, counts them and can simulate an unavailable database.
+
+Use it from the repository root with:
+
+    with fake_database.FakeDatabase(latency=0.002).patch():
+        ...
+"""
+
+import asyncio
+from contextlib import contextmanager
+import re
+from typing import Any, Dict, Iterator, List, Tuple
+from unittest import mock
+
+
+# ---------- Constants ----------
+
+DEFAULT_LATENCY: float = 0.0
+GUILD_ID_COLUMN_NAME: str = 'guildid'
+
+DELETE_PATTERN: re.Pattern = re.compile(r'DELETE FROM serversettings WHERE guildid = \$1;?$')
+INSERT_PATTERN: re.Pattern = re.compile(r'INSERT INTO serversettings \((?P<column_names>[^)]+)\) VALUES \([^)]+\);?$')
+SELECT_PATTERN: re.Pattern = re.compile(r'SELECT (?P<column_names>.+?) FROM serversettings(?: WHERE guildid = \$1)?;?$')
+UPDATE_PATTERN: re.Pattern = re.compile(r'UPDATE serversettings SET (?P<assignments>.+) WHERE guildid = \$1;?$')
+
+
+
+
+
+# ---------- Classes ----------
+
+class FakeDatabase():
+    """
+    Each statement takes `latency` seconds. While the database is down, connecting fails and statements raise ConnectionError.
+    """
+    def __init__(self, latency: float = DEFAULT_LATENCY) -> None:
+        self.__latency: float = latency
+        self.__rows: Dict[int, Dict[str, Any]] = {}
+        self.__is_down: bool = False
+        self.__statement_count: int = 0
+        self.__updated_row_count: int = 0
+
+
+    @property
+    def is_down(self) -> bool:
+        return self.__is_down
+
+    @property
+    def rows(self) -> Dict[int, Dict[str, Any]]:
+        """
+        The rows of the serversettings table by guild id.
+        """
+        return {guild_id: dict(row) for guild_id, row in self.__rows.items()}
+
+    @property
+    def statement_count(self) -> int:
+        """
+        The number of statements sent to the database. A batch executed at once counts as one.
+        """
+        return self.__statement_count
+
+    @property
+    def updated_row_count(self) -> int:
+        return self.__updated_row_count
+
+
+    def add_rows(self, guild_ids: List[int]) -> None:
+        for guild_id in guild_ids:
+            self.__rows.setdefault(guild_id, {GUILD_ID_COLUMN_NAME: guild_id})
+
+
+    async def connect(self) -> bool:
+        return not self.__is_down
+
+
+    async def execute(self, query: str, args: list = None) -> bool:
+        await self.__send_statement()
+        self.__apply(query, args or [])
+        return True
+
+
+    async def executemany(self, query: str, args_list: List[list]) -> None:
+        await self.__send_statement()
+        # Statements executed at once run in a single transaction.
+        rows = self.rows
+        updated_row_count = self.__updated_row_count
+        try:
+            for args in args_list:
+                self.__apply(query, args)
+        except Exception:
+            self.__rows = rows
+            self.__updated_row_count = updated_row_count
+            raise
+
+
+    async def fetchall(self, query: str, args: list = None) -> List[Tuple[Any, ...]]:
+        await self.__send_statement()
+        match = SELECT_PATTERN.match(query)
+        if not match:
+            raise NotImplementedError(f'The fake database doesn\'t understand the query: {query}')
+        if args:
+            rows = [self.__rows[args[0]]] if args[0] in self.__rows else []
+        else:
+            rows = list(self.__rows.values())
+        column_names = match.group('column_names')
+        if column_names == '*':
+            return [tuple(row.values()) for row in rows]
+        column_names = [column_name.strip() for column_name in column_names.split(',')]
+        return [tuple(row.get(column_name) for column_name in column_names) for row in rows]
+
+
+    @contextmanager
+    def patch(self) -> Iterator['FakeDatabase']:
+        """
+        Replaces the query functions of the bot's database module, while in the with-block.
+        """
+        from src import database as db
+
+        with mock.patch.object(db, 'connect', self.connect), \
+                mock.patch.object(db, 'execute', self.execute), \
+                mock.patch.object(db, 'executemany', self.executemany), \
+                mock.patch.object(db, 'fetchall', self.fetchall):
+            yield self
+
+
+    def set_down(self, is_down: bool) -> None:
+        self.__is_down = is_down
+
+
+    def __apply(self, query: str, args: list) -> None:
+        match = UPDATE_PATTERN.match(query)
+        if match:
+            row = self.__rows.get(args[0])
+            if row is not None:
+                column_names = [assignment.split('=')[0].strip() for assignment in match.group('assignments').split(',')]
+                row.update(zip(column_names, args[1:]))
+                self.__updated_row_count += 1
+            return
+
+        match = INSERT_PATTERN.match(query)
+        if match:
+            column_names = [column_name.strip() for column_name in match.group('column_names').split(',')]
+            row = dict(zip(column_names, args))
+            self.__rows[row[GUILD_ID_COLUMN_NAME]] = row
+            return
+
+        if DELETE_PATTERN.match(query):
+            self.__rows.pop(args[0], None)
+            return
+
+        raise NotImplementedError(f'The fake database doesn\'t understand the query: {query}')
+
+
+    async def __send_statement(self) -> None:
+        if self.__is_down:
+            raise ConnectionError('The fake database is down.')
+        self.__statement_count += 1
+        if self.__latency > 0:
+            await asyncio.sleep(self.__latency)
+        # The database may have gone down while the statement was being sent.
+        if self.__is_down:
+            raise ConnectionError('The fake database is down.')
@@ -0,0 +1,398 @@
+"""
+A stand-in for the parts of the Discord REST API used when broadcasting messages. It enforces a global and a per channel rate limit the way Discord does, answering with 429 responses carrying the Retry-After and X-RateLimit-Global headers, so that the bot's rate limit handling can be tested and measured without a bot account.
+
+It also serves a minimal gateway, which lets shards identify and sends them a GUILD_CREATE event for each of their guilds, and the REST routes a bot calls when logging in and syncing its application commands.
+
+Run it from the repository root with:
+
+    python -m bench.fake_discord --port 8081 --global-limit 50 --channel-limit 5 --channel-window 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from aiohttp import ClientResponse, WSMsgType, web
+from discord import errors as discord_errors
+
+
+# ---------- Constants ----------
+
+API_PATH: str = '/api/v10'
+APPLICATION_ID: int = 900000000000000000
+BOT_USER_ID: int = APPLICATION_ID
+GATEWAY_PATH: str = '/gateway'
+
+DEFAULT_CHANNEL_LIMIT: int = 5
+DEFAULT_CHANNEL_WINDOW: float = 5.0
+DEFAULT_GLOBAL_LIMIT: int = 50
+DEFAULT_HOST: str = '127.0.0.1'
+DEFAULT_LATENCY: float = 0.02
+DEFAULT_PORT: int = 8081
+DEFAULT_SEED: int = 1
+
+FIRST_GUILD_ID: int = 110000000000000000
+GLOBAL_WINDOW: float = 1.0
+HEARTBEAT_INTERVAL: int = 41250
+
+OP_DISPATCH: int = 0
+OP_HEARTBEAT: int = 1
+OP_HEARTBEAT_ACK: int = 11
+OP_HELLO: int = 10
+OP_IDENTIFY: int = 2
+
+
+
+
+
+# ---------- Classes ----------
+
+class FakeDiscordApi():
+    """
+    Allows `global_limit` requests per second across all routes and `channel_limit` messages per channel within `channel_window` seconds. Requests for channels in `forbidden_channel_ids` get answered with 403, requests for channels in `missing_channel_ids` with 404.
+
+    Shards connecting to the gateway receive the guilds in `guild_ids`, which belong to them.
+    """
+    def __init__(self, global_limit: int = DEFAULT_GLOBAL_LIMIT, channel_limit: int = DEFAULT_CHANNEL_LIMIT, channel_window: float = DEFAULT_CHANNEL_WINDOW, latency: float = DEFAULT_LATENCY, forbidden_channel_ids: Set[int] = None, missing_channel_ids: Set[int] = None, guild_ids: List[int] = None) -> None:
+        self.__global_limit: int = global_limit
+        self.__channel_limit: int = channel_limit
+        self.__channel_window: float = channel_window
+        self.__latency: float = latency
+        self.__forbidden_channel_ids: Set[int] = set(forbidden_channel_ids or [])
+        self.__missing_channel_ids: Set[int] = set(missing_channel_ids or [])
+        self.__guild_ids: List[int] = list(guild_ids or [])
+
+        self.__application_commands: List[Dict[str, Any]] = []
+        self.__identified_shards: Dict[int, int] = {}
+        self.__global_requests: List[float] = []
+        self.__channel_messages: Dict[int, List[float]] = {}
+        self.__messages: Dict[int, List[Dict[str, Any]]] = {}
+        self.__request_count: int = 0
+        self.__global_rate_limited_count: int = 0
+        self.__channel_rate_limited_count: int = 0
+
+
+    @property
+    def channel_rate_limited_count(self) -> int:
+        return self.__channel_rate_limited_count
+
+    @property
+    def global_rate_limited_count(self) -> int:
+        return self.__global_rate_limited_count
+
+    @property
+    def identified_shards(self) -> Dict[int, int]:
+        """
+        The number of times each shard has identified.
+        """
+        return dict(self.__identified_shards)
+
+    @property
+    def messages(self) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        The messages received per channel.
+        """
+        return {channel_id: list(messages) for channel_id, messages in self.__messages.items()}
+
+    @property
+    def request_count(self) -> int:
+        return self.__request_count
+
+
+    def create_app(self) -> web.Application:
+        result = web.Application()
+        result.router.add_get(f'{API_PATH}/channels/{{channel_id:\\d+}}', self.__handle_get_channel)
+        result.router.add_post(f'{API_PATH}/channels/{{channel_id:\\d+}}/messages', self.__handle_create_message)
+        result.router.add_get(f'{API_PATH}/gateway', self.__handle_get_gateway)
+        result.router.add_get(f'{API_PATH}/gateway/bot', self.__handle_get_gateway)
+        result.router.add_get(f'{API_PATH}/users/@me', self.__handle_get_current_user)
+        result.router.add_get(f'{API_PATH}/applications/{{application_id:\\d+}}/commands', self.__handle_get_application_commands)
+        result.router.add_post(f'{API_PATH}/applications/{{application_id:\\d+}}/commands', self.__handle_create_application_command)
+        result.router.add_put(f'{API_PATH}/applications/{{application_id:\\d+}}/commands', self.__handle_overwrite_application_commands)
+        result.router.add_get(GATEWAY_PATH, self.__handle_gateway_connection)
+        return result
+
+
+    async def __handle_create_application_command(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.__application_commands = [command for command in self.__application_commands if command['name'] != payload['name']]
+        command = _create_application_command(payload, len(self.__application_commands))
+        self.__application_commands.append(command)
+        return _create_json_response(command)
+
+
+    async def __handle_create_message(self, request: web.Request) -> web.Response:
+        channel_id = int(request.match_info['channel_id'])
+        response = await self.__check_request(channel_id)
+        if response is not None:
+            return response
+
+        now = time.monotonic()
+        channel_messages = [sent_at for sent_at in self.__channel_messages.get(channel_id, []) if now - sent_at < self.__channel_window]
+        if len(channel_messages) >= self.__channel_limit:
+            self.__channel_rate_limited_count += 1
+            self.__channel_messages[channel_id] = channel_messages
+            return _create_rate_limited_response(channel_messages[0] + self.__channel_window - now, False)
+        channel_messages.append(now)
+        self.__channel_messages[channel_id] = channel_messages
+
+        payload = await request.json()
+        messages = self.__messages.setdefault(channel_id, [])
+        message = {'id': str(len(messages) + 1), 'channel_id': str(channel_id), 'content': payload.get('content'), 'embeds': payload.get('embeds', [])}
+        messages.append(message)
+        return _create_json_response(message)
+
+
+    async def __handle_gateway_connection(self, request: web.Request) -> web.WebSocketResponse:
+        """
+        Sends HELLO, answers heartbeats and sends READY and a GUILD_CREATE per guild of the shard after it identified. Other messages get ignored.
+        """
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        sequence = 0
+        await ws.send_json({'op': OP_HELLO, 'd': {'heartbeat_interval': HEARTBEAT_INTERVAL}, 's': None, 't': None})
+
+        async for message in ws:
+            if message.type != WSMsgType.TEXT:
+                break
+            payload = json.loads(message.data)
+            if payload.get('op') == OP_HEARTBEAT:
+                await ws.send_json({'op': OP_HEARTBEAT_ACK, 'd': None, 's': None, 't': None})
+            elif payload.get('op') == OP_IDENTIFY:
+                shard_id, shard_count = (payload['d'].get('shard') or [0, 1])[:2]
+                self.__identified_shards[shard_id] = self.__identified_shards.get(shard_id, 0) + 1
+                # Discord assigns guilds to shards by the creation timestamp stored in their ids.
+                guild_ids = [guild_id for guild_id in self.__guild_ids if (guild_id >> 22) % shard_count == shard_id]
+                events = [('READY', _create_ready_data(request, shard_id, shard_count, guild_ids))]
+                events.extend(('GUILD_CREATE', _create_guild_data(guild_id)) for guild_id in guild_ids)
+                for event_name, data in events:
+                    sequence += 1
+                    await ws.send_json({'op': OP_DISPATCH, 'd': data, 's': sequence, 't': event_name})
+        return ws
+
+
+    async def __handle_get_application_commands(self, request: web.Request) -> web.Response:
+        return _create_json_response(self.__application_commands)
+
+
+    async def __handle_get_channel(self, request: web.Request) -> web.Response:
+        channel_id = int(request.match_info['channel_id'])
+        response = await self.__check_request(channel_id)
+        if response is not None:
+            return response
+        return _create_json_response({'id': str(channel_id), 'type': 0, 'name': f'channel-{channel_id}'})
+
+
+    async def __handle_get_current_user(self, request: web.Request) -> web.Response:
+        return _create_json_response(_create_bot_user_data())
+
+
+    async def __handle_get_gateway(self, request: web.Request) -> web.Response:
+        return _create_json_response({
+            'url': _get_gateway_url(request),
+            'shards': max(1, len(self.__guild_ids) // 1000),
+            'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1},
+        })
+
+
+    async def __handle_overwrite_application_commands(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.__application_commands = [_create_application_command(command, index) for index, command in enumerate(payload)]
+        return _create_json_response(self.__application_commands)
+
+
+    async def __check_request(self, channel_id: int) -> Optional[web.Response]:
+        """
+        Counts the request against the global rate limit. Returns the error response, if the request can't be handled.
+        """
+        self.__request_count += 1
+        if self.__latency > 0:
+            await asyncio.sleep(self.__latency)
+
+        now = time.monotonic()
+        self.__global_requests = [requested_at for requested_at in self.__global_requests if now - requested_at < GLOBAL_WINDOW]
+        if len(self.__global_requests) >= self.__global_limit:
+            self.__global_rate_limited_count += 1
+            return _create_rate_limited_response(self.__global_requests[0] + GLOBAL_WINDOW - now, True)
+        self.__global_requests.append(now)
+
+        if channel_id in self.__missing_channel_ids:
+            return _create_json_response({'message': 'Unknown Channel', 'code': 10003}, status=404)
+        if channel_id in self.__forbidden_channel_ids:
+            return _create_json_response({'message': 'Missing Access', 'code': 50001}, status=403)
+        return None
+
+
+
+
+
+# ---------- Functions ----------
+
+def create_channel_ids(count: int, forbidden_ratio: float = 0.0, missing_ratio: float = 0.0, seed: int = DEFAULT_SEED) -> Dict[str, List[int]]:
+    """
+    Returns the ids of `count` channels with the ids of the forbidden and the missing channels among them.
+    """
+    rng = random.Random(seed)
+    channel_ids = [100000000000000000 + index for index in range(count)]
+    shuffled_channel_ids = rng.sample(channel_ids, len(channel_ids))
+    forbidden_count = int(count * forbidden_ratio)
+    missing_count = int(count * missing_ratio)
+    return {
+        'all': channel_ids,
+        'forbidden': sorted(shuffled_channel_ids[:forbidden_count]),
+        'missing': sorted(shuffled_channel_ids[forbidden_count:forbidden_count + missing_count]),
+    }
+
+
+def create_guild_ids(count: int) -> List[int]:
+    """
+    Returns the ids of `count` guilds, which are spread evenly across shards.
+    """
+    return [FIRST_GUILD_ID + (index << 22) for index in range(count)]
+
+
+def get_base_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f'http://{host}:{port}{API_PATH}'
+
+
+async def raise_for_status(response: ClientResponse) -> None:
+    """
+    Raises the exception py-cord would raise for an error response of the Discord API.
+    """
+    if response.status < 400:
+        return
+    try:
+        data = await response.json()
+    except Exception:
+        data = await response.text()
+    if response.status == 403:
+        raise discord_errors.Forbidden(response, data)
+    if response.status == 404:
+        raise discord_errors.NotFound(response, data)
+    if response.status >= 500:
+        raise discord_errors.DiscordServerError(response, data)
+    raise discord_errors.HTTPException(response, data)
+
+
+async def start(api: FakeDiscordApi, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> web.AppRunner:
+    """
+    Starts serving the fake API in the running event loop. Pass 0 as the port to pick a free one.
+
+    Returns the runner, which needs to be cleaned up to stop serving.
+    """
+    result = web.AppRunner(api.create_app(), access_log=None)
+    await result.setup()
+    site = web.TCPSite(result, host, port)
+    await site.start()
+    return result
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_application_command(payload: Dict[str, Any], index: int) -> Dict[str, Any]:
+    result = {'type': 1, 'description': '', 'options': []}
+    result.update(payload)
+    result['id'] = str(APPLICATION_ID + index + 1)
+    result['application_id'] = str(APPLICATION_ID)
+    result['version'] = '1'
+    return result
+
+
+def _create_bot_user_data() -> Dict[str, Any]:
+    return {'id': str(BOT_USER_ID), 'username': 'Fake Bot', 'discriminator': '0001', 'avatar': None, 'bot': True}
+
+
+def _create_guild_data(guild_id: int) -> Dict[str, Any]:
+    return {
+        'id': str(guild_id),
+        'name': f'guild-{guild_id}',
+        'icon': None,
+        'owner_id': str(BOT_USER_ID + 1),
+        'afk_timeout': 300,
+        'verification_level': 0,
+        'default_message_notifications': 0,
+        'explicit_content_filter': 0,
+        'mfa_level': 0,
+        'premium_tier': 0,
+        'nsfw_level': 0,
+        'preferred_locale': 'en-US',
+        'system_channel_flags': 0,
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '104324673', 'position': 0, 'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [{'id': str(guild_id + 1), 'type': 0, 'name': 'general', 'position': 0, 'permission_overwrites': []}],
+        'members': [],
+        'member_count': 1,
+        'emojis': [],
+        'stickers': [],
+        'features': [],
+        'threads': [],
+        'stage_instances': [],
+        'guild_scheduled_events': [],
+        'large': False,
+        'unavailable': False,
+    }
+
+
+def _create_ready_data(request: web.Request, shard_id: int, shard_count: int, guild_ids: List[int]) -> Dict[str, Any]:
+    return {
+        'v': 10,
+        'user': _create_bot_user_data(),
+        'guilds': [{'id': str(guild_id), 'unavailable': True} for guild_id in guild_ids],
+        'session_id': f'session-{shard_id}-{random.getrandbits(32):08x}',
+        'resume_gateway_url': _get_gateway_url(request),
+        'shard': [shard_id, shard_count],
+        'application': {'id': str(APPLICATION_ID), 'flags': 0},
+    }
+
+
+def _create_json_response(data: Any, status: int = 200, headers: Dict[str, str] = None) -> web.Response:
+    """
+    py-cord only parses responses as JSON, if their content type is exactly 'application/json', so there must be no charset.
+    """
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    return web.Response(body=json.dumps(data).encode('utf-8'), status=status, headers=headers)
+
+
+def _create_rate_limited_response(retry_after: float, is_global: bool) -> web.Response:
+    retry_after = round(max(retry_after, 0.001), 3)
+    headers = {'Retry-After': str(retry_after)}
+    if is_global:
+        headers['X-RateLimit-Global'] = 'true'
+    else:
+        headers['X-RateLimit-Scope'] = 'user'
+    return _create_json_response({'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': is_global}, status=429, headers=headers)
+
+
+def _get_gateway_url(request: web.Request) -> str:
+    return f'ws://{request.host}{GATEWAY_PATH}'
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serves a rate limited stand-in for the Discord REST API.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='Seconds to wait before answering a request.')
+    parser.add_argument('--global-limit', type=int, default=DEFAULT_GLOBAL_LIMIT, help='Requests allowed per second across all routes.')
+    parser.add_argument('--channel-limit', type=int, default=DEFAULT_CHANNEL_LIMIT, help='Messages allowed per channel within the channel window.')
+    parser.add_argument('--channel-window', type=float, default=DEFAULT_CHANNEL_WINDOW, help='Length of the per channel rate limit window in seconds.')
+    args = parser.parse_args()
+
+    api = FakeDiscordApi(global_limit=args.global_limit, channel_limit=args.channel_limit, channel_window=args.channel_window, latency=args.latency)
+    print(f'Serving the fake Discord API on http://{args.host}:{args.port}{API_PATH}')
+    web.run_app(api.create_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,782 @@
+"""
+A stand-in for the Pixel Starships API serving generated data, so that the bot's hot paths can be measured without hitting the live API.
+
+Run it from the repository root with:
+
+    python -m bench.fake_pss_api --port 8080 --latency 0.05 --entities 500
+
+and point the bot at it by setting PSS_BASE_API_URL to http://127.0.0.1:8080/. The generated data only depends on the entity count and the seed, so runs with the same parameters are comparable.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import io
+import random
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import quoteattr
+
+from aiohttp import web
+from PIL import Image
+
+
+# ---------- Constants ----------
+
+DEFAULT_DESCRIPTION_LENGTH: int = 80
+DEFAULT_ENTITY_COUNT: int = 200
+DEFAULT_HOST: str = '127.0.0.1'
+DEFAULT_JITTER: float = 0.0
+DEFAULT_LATENCY: float = 0.05
+DEFAULT_PORT: int = 8080
+DEFAULT_SEED: int = 1
+
+ACCESS_TOKEN: str = 'fake-access-token'
+API_DATETIME_FORMAT: str = '%Y-%m-%dT%H:%M:%S'
+
+FLEET_MEMBER_COUNT: int = 50
+SHIP_COLUMNS: int = 20
+SHIP_ROWS: int = 14
+SPRITE_SIZE: int = 25
+
+DESCRIPTION_WORDS: List[str] = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua']
+ENHANCEMENT_TYPES: List[str] = ['Hp', 'Attack', 'Repair', 'Ability', 'Pilot', 'Science', 'Stamina', 'Engine', 'Weapon', 'FireResistance']
+EQUIPMENT_SLOTS: List[Tuple[str, int]] = [('EquipmentHead', 1), ('EquipmentBody', 2), ('EquipmentLeg', 4), ('EquipmentWeapon', 8), ('EquipmentAccessory', 16), ('EquipmentPet', 32)]
+RARITIES: List[str] = ['Common', 'Elite', 'Unique', 'Epic', 'Hero', 'Special', 'Legendary']
+ROOM_TYPES: List[Tuple[str, str, int, int]] = [
+    ('Bridge', 'BRG', 3, 2),
+    ('Reactor', 'RCT', 3, 2),
+    ('Engine', 'ENG', 2, 2),
+    ('Shield', 'SHD', 2, 2),
+    ('Laser', 'LSR', 2, 1),
+    ('Missile', 'MSL', 2, 1),
+    ('Storage', 'STR', 2, 1),
+    ('Lift', 'LFT', 1, 1),
+    ('Wall', 'WAL', 1, 1),
+]
+
+__NAME_PARTS_1: List[str] = ['Plasma', 'Quantum', 'Ion', 'Stellar', 'Void', 'Nova', 'Photon', 'Gravity', 'Solar', 'Nebula', 'Cosmic', 'Astral']
+__NAME_PARTS_2: List[str] = ['Blade', 'Helm', 'Armor', 'Boots', 'Rifle', 'Cape', 'Drone', 'Core', 'Shard', 'Crystal', 'Visor', 'Gauntlet']
+__CREW_NAME_PARTS: List[str] = ['Captain', 'Engineer', 'Pilot', 'Medic', 'Gunner', 'Scientist', 'Scout', 'Mechanic']
+
+
+
+
+
+# ---------- Classes ----------
+
+class FakePssApi():
+    """
+    Generates the responses once and serves them with the configured latency. Responses for entity lists grow with `entity_count`, descriptions with `description_length`.
+    """
+    def __init__(self, entity_count: int = DEFAULT_ENTITY_COUNT, latency: float = DEFAULT_LATENCY, jitter: float = DEFAULT_JITTER, description_length: int = DEFAULT_DESCRIPTION_LENGTH, seed: int = DEFAULT_SEED) -> None:
+        self.__entity_count: int = max(entity_count, 10)
+        self.__latency: float = latency
+        self.__jitter: float = jitter
+        self.__description_length: int = description_length
+        self.__random: random.Random = random.Random(seed)
+        self.__latency_random: random.Random = random.Random(seed)
+
+        self.__request_counts: Dict[str, int] = {}
+        self.__unknown_paths: Dict[str, int] = {}
+        self.__sprites: Dict[str, bytes] = {}
+
+        self.__designs: Dict[str, Tuple[str, str, str, str, List[Dict[str, Any]]]] = {}
+        self.__alliances: List[Dict[str, Any]] = []
+        self.__users: List[Dict[str, Any]] = []
+        self.__generate()
+
+
+    @property
+    def request_counts(self) -> Dict[str, int]:
+        return dict(self.__request_counts)
+
+    @property
+    def unknown_paths(self) -> Dict[str, int]:
+        return dict(self.__unknown_paths)
+
+
+    def create_app(self) -> web.Application:
+        result = web.Application()
+        result.router.add_route('*', '/{endpoint:.*}', self.__handle)
+        return result
+
+
+    def get_designs_xml(self, path: str) -> str:
+        """
+        Returns the response served for the designs at `path`, e.g. 'ItemService/ListItemDesigns2'.
+        """
+        service, action, list_tag, entity_tag, entities = self.__designs[path]
+        return _create_xml_string(service, action, _create_entities_xml(list_tag, entity_tag, entities))
+
+
+    def reset_counts(self) -> None:
+        self.__request_counts.clear()
+        self.__unknown_paths.clear()
+
+
+    async def __handle(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info['endpoint'].strip('/')
+        self.__request_counts[endpoint] = self.__request_counts.get(endpoint, 0) + 1
+        await self.__sleep()
+
+        handler = self.__get_handler(endpoint)
+        if handler is None:
+            self.__unknown_paths[endpoint] = self.__unknown_paths.get(endpoint, 0) + 1
+            return web.Response(status=404, text=f'Unknown endpoint: {endpoint}')
+        return handler(request)
+
+
+    def __get_handler(self, endpoint: str) -> Optional[Callable[[web.Request], web.Response]]:
+        if endpoint in self.__designs:
+            return self.__handle_designs
+        return {
+            'AllianceService/GetAlliance': self.__handle_get_alliance,
+            'AllianceService/ListAlliancesByRanking': self.__handle_list_alliances,
+            'AllianceService/ListAlliancesWithDivision': self.__handle_list_alliances,
+            'AllianceService/ListUsers': self.__handle_list_alliance_users,
+            'AllianceService/SearchAlliances': self.__handle_search_alliances,
+            'CharacterService/PrestigeCharacterFrom': self.__handle_prestige_from,
+            'CharacterService/PrestigeCharacterTo': self.__handle_prestige_to,
+            'FileService/DownloadSprite': self.__handle_download_sprite,
+            'LadderService/ListUsersByRanking': self.__handle_list_users_by_ranking,
+            'LiveOpsService/GetTodayLiveOps': self.__handle_liveops,
+            'SettingService/GetLatestVersion3': self.__handle_latest_settings,
+            'ShipService/InspectShip2': self.__handle_inspect_ship,
+            'UserService/DeviceLogin11': self.__handle_device_login,
+            'UserService/SearchUsers': self.__handle_search_users,
+        }.get(endpoint)
+
+
+    async def __sleep(self) -> None:
+        latency = self.__latency
+        if self.__jitter:
+            latency += self.__latency_random.uniform(-self.__jitter, self.__jitter)
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+
+    def __handle_designs(self, request: web.Request) -> web.Response:
+        service, action, list_tag, entity_tag, entities = self.__designs[request.match_info['endpoint'].strip('/')]
+        return _create_xml_response(service, action, _create_entities_xml(list_tag, entity_tag, entities))
+
+
+    def __handle_device_login(self, request: web.Request) -> web.Response:
+        user = _create_element_xml('User', {'Id': '1', 'Name': ''})
+        return _create_xml_response('UserService', 'UserLogin', user, action_attributes={'accessToken': ACCESS_TOKEN})
+
+
+    def __handle_download_sprite(self, request: web.Request) -> web.Response:
+        sprite_id = request.query.get('spriteId', '0')
+        result = self.__sprites.get(sprite_id)
+        if result is None:
+            result = _create_sprite(sprite_id)
+            self.__sprites[sprite_id] = result
+        return web.Response(body=result, content_type='image/png')
+
+
+    def __handle_get_alliance(self, request: web.Request) -> web.Response:
+        alliance = self.__get_alliance(request.query.get('allianceId'))
+        if alliance is None:
+            return _create_xml_response('AllianceService', 'GetAlliance', '')
+        return _create_xml_response('AllianceService', 'GetAlliance', _create_element_xml('Alliance', alliance))
+
+
+    def __handle_inspect_ship(self, request: web.Request) -> web.Response:
+        user = self.__get_user(request.query.get('userId'))
+        if user is None:
+            return _create_xml_response('ShipService', 'InspectShip', '')
+        ship = self.__create_ship(user)
+        rooms = ship.pop('Rooms')
+        ship_xml = _create_element_xml('Ship', ship, _create_entities_xml('Rooms', 'Room', rooms))
+        return _create_xml_response('ShipService', 'InspectShip', _create_element_xml('User', user) + ship_xml)
+
+
+    def __handle_latest_settings(self, request: web.Request) -> web.Response:
+        utc_now = datetime.now(timezone.utc)
+        items = self.__get_design_entities('ItemService/ListItemDesigns2')
+        characters = self.__get_design_entities('CharacterService/ListAllCharacterDesigns2')
+        setting = {
+            'SettingId': '1',
+            'ProductionServer': f'{request.scheme}://{request.host}',
+            'MaintenanceMessage': '',
+            'News': 'Welcome to the fake Pixel Starships API.',
+            'NewsSpriteId': '1',
+            'CargoItems': '|'.join(f'{item["ItemDesignId"]}x1' for item in items[:3]),
+            'CargoPrices': '|'.join(f'starbux:{index + 1}' for index in range(3)),
+            'CommonCrewId': characters[0]['CharacterDesignId'],
+            'HeroCrewId': characters[-1]['CharacterDesignId'],
+            'DailyRewardType': 'Mineral',
+            'DailyRewardArgument': '5000',
+            'DailyItemRewards': f'{items[1]["ItemDesignId"]}x1',
+            'SaleType': 'Item',
+            'SaleArgument': items[2]['ItemDesignId'],
+            'SaleItemMask': '1',
+            'SaleQuantity': '1',
+            'SaleRewardString': f'item:{items[2]["ItemDesignId"]}x1',
+            'SaleTitle': 'Fake sale',
+            'LimitedCatalogType': 'Item',
+            'LimitedCatalogArgument': items[3]['ItemDesignId'],
+            'LimitedCatalogCurrencyType': 'Starbux',
+            'LimitedCatalogCurrencyAmount': '100',
+            'LimitedCatalogMaxTotal': '1000',
+            'LimitedCatalogExpiryDate': (utc_now + timedelta(days=1)).replace(hour=0, minute=0, second=0).strftime(API_DATETIME_FORMAT),
+        }
+        return _create_xml_response('SettingService', 'GetLatestSetting', _create_element_xml('Setting', setting))
+
+
+    def __handle_list_alliance_users(self, request: web.Request) -> web.Response:
+        alliance_id = request.query.get('allianceId')
+        users = [user for user in self.__users if user['AllianceId'] == alliance_id]
+        return _create_xml_response('AllianceService', 'ListUsers', _create_entities_xml('Users', 'User', users))
+
+
+    def __handle_list_alliances(self, request: web.Request) -> web.Response:
+        take = int(request.query.get('take', len(self.__alliances)))
+        return _create_xml_response('AllianceService', 'ListAlliances', _create_entities_xml('Alliances', 'Alliance', self.__alliances[:take]))
+
+
+    def __handle_list_users_by_ranking(self, request: web.Request) -> web.Response:
+        skip = int(request.query.get('from', 1)) - 1
+        take = int(request.query.get('to', 100))
+        return _create_xml_response('LadderService', 'ListUsersByRanking', _create_entities_xml('Users', 'User', self.__users[skip:take]))
+
+
+    def __handle_liveops(self, request: web.Request) -> web.Response:
+        liveops = {
+            'LiveOpsId': '1',
+            'DailyRewardType': 'Mineral',
+            'DailyRewardArgument': '5000',
+        }
+        return _create_xml_response('LiveOpsService', 'GetTodayLiveOps', _create_element_xml('LiveOps', liveops))
+
+
+    def __handle_prestige_from(self, request: web.Request) -> web.Response:
+        char_design_id = request.query.get('characterDesignId')
+        prestiges = [prestige for prestige in self.__get_prestiges() if char_design_id in (prestige['CharacterDesignId1'], prestige['CharacterDesignId2'])]
+        return _create_xml_response('CharacterService', 'PrestigeCharacterFrom', _create_entities_xml('Prestiges', 'Prestige', prestiges))
+
+
+    def __handle_prestige_to(self, request: web.Request) -> web.Response:
+        char_design_id = request.query.get('characterDesignId')
+        prestiges = [prestige for prestige in self.__get_prestiges() if prestige['ToCharacterDesignId'] == char_design_id]
+        return _create_xml_response('CharacterService', 'PrestigeCharacterTo', _create_entities_xml('Prestiges', 'Prestige', prestiges))
+
+
+    def __handle_search_alliances(self, request: web.Request) -> web.Response:
+        name = request.query.get('name', '').lower()
+        alliances = [alliance for alliance in self.__alliances if name in alliance['AllianceName'].lower()]
+        return _create_xml_response('AllianceService', 'SearchAlliances', _create_entities_xml('Alliances', 'Alliance', alliances))
+
+
+    def __handle_search_users(self, request: web.Request) -> web.Response:
+        name = request.query.get('searchString', '').lower()
+        users = [user for user in self.__users if name in user['Name'].lower()]
+        return _create_xml_response('UserService', 'SearchUsers', _create_entities_xml('Users', 'User', users))
+
+
+    def __add_designs(self, path: str, service: str, action: str, entity_tag: str, entities: List[Dict[str, Any]]) -> None:
+        self.__designs[path] = (service, action, f'{entity_tag}s', entity_tag, entities)
+
+
+    def __create_description(self, name: str) -> str:
+        words = []
+        length = 0
+        while length < self.__description_length:
+            word = self.__random.choice(DESCRIPTION_WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return f'{name}: {" ".join(words)}'[:max(self.__description_length, len(name))]
+
+
+    def __create_ship(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        ship_design_id = user['ShipDesignId']
+        rooms_designs = self.__get_design_entities('RoomService/ListRoomDesigns2')
+        rooms = []
+        row = 0
+        column = 0
+        for index, room_design in enumerate(rooms_designs[:len(ROOM_TYPES) * 3]):
+            columns = int(room_design['Columns'])
+            rows = int(room_design['Rows'])
+            if column + columns > SHIP_COLUMNS:
+                column = 0
+                row += 2
+            if row + rows > SHIP_ROWS:
+                break
+            rooms.append({
+                'RoomId': str(int(user['Id']) * 1000 + index),
+                'RoomDesignId': room_design['RoomDesignId'],
+                'Column': str(column),
+                'Row': str(row),
+                'RoomStatus': 'Normal',
+                'ConstructionStartDate': '',
+            })
+            column += columns
+        return {
+            'ShipId': user['Id'],
+            'UserId': user['Id'],
+            'ShipDesignId': ship_design_id,
+            'ShipStatus': 'Online',
+            'HueValue': '0',
+            'SaturationValue': '0',
+            'BrightnessValue': '0',
+            'Hp': '1000',
+            'Rooms': rooms,
+        }
+
+
+    def __generate(self) -> None:
+        count = self.__entity_count
+        characters = self.__generate_characters(count)
+        collections = self.__generate_collections(max(count // 20, 5), characters)
+        items = self.__generate_items(count)
+        rooms = self.__generate_rooms(max(count // 4, len(ROOM_TYPES) * 3))
+        ships = self.__generate_ships(max(count // 20, 5))
+        trainings = self.__generate_trainings(max(count // 10, 5))
+
+        self.__add_designs('CharacterService/ListAllCharacterDesigns2', 'CharacterService', 'ListAllCharacterDesigns', 'CharacterDesign', characters)
+        self.__add_designs('CollectionService/ListAllCollectionDesigns', 'CollectionService', 'ListAllCollectionDesigns', 'CollectionDesign', collections)
+        self.__add_designs('ItemService/ListItemDesigns2', 'ItemService', 'ListItemDesigns', 'ItemDesign', items)
+        self.__add_designs('RoomService/ListRoomDesigns2', 'RoomService', 'ListRoomDesigns', 'RoomDesign', rooms)
+        self.__add_designs('RoomService/ListRoomDesignPurchase', 'RoomService', 'ListRoomDesignPurchase', 'RoomDesignPurchase', [])
+        self.__add_designs('RoomService/ListMissileDesigns', 'RoomService', 'ListMissileDesigns', 'MissileDesign', [])
+        self.__add_designs('RoomService/ListCraftDesigns', 'RoomService', 'ListCraftDesigns', 'CraftDesign', [])
+        self.__add_designs('RoomDesignSpriteService/ListRoomDesignSprites', 'RoomDesignSpriteService', 'ListRoomDesignSprites', 'RoomDesignSprite', [])
+        self.__add_designs('ShipService/ListAllShipDesigns2', 'ShipService', 'ListAllShipDesigns', 'ShipDesign', ships)
+        self.__add_designs('TrainingService/ListAllTrainingDesigns2', 'TrainingService', 'ListAllTrainingDesigns', 'TrainingDesign', trainings)
+        self.__add_designs('MissionService/ListAllMissionDesigns2', 'MissionService', 'ListAllMissionDesigns', 'MissionDesign', [])
+        self.__add_designs('ResearchService/ListAllResearchDesigns2', 'ResearchService', 'ListAllResearchDesigns', 'ResearchDesign', [])
+        self.__add_designs('SituationService/ListSituationDesigns', 'SituationService', 'ListSituationDesigns', 'SituationDesign', [])
+        self.__add_designs('PromotionService/ListAllPromotionDesigns2', 'PromotionService', 'ListAllPromotionDesigns', 'PromotionDesign', [])
+        self.__add_designs('AchievementService/ListAchievementDesigns2', 'AchievementService', 'ListAchievementDesigns', 'AchievementDesign', [])
+        self.__add_designs('DivisionService/ListAllDivisionDesigns2', 'DivisionService', 'ListAllDivisionDesigns', 'DivisionDesign', self.__generate_divisions())
+        self.__add_designs('LeagueService/ListLeagues2', 'LeagueService', 'ListLeagues', 'League', self.__generate_leagues())
+        self.__add_designs('SettingService/ListAllNewsDesigns', 'SettingService', 'ListAllNewsDesigns', 'NewsDesign', [])
+
+        self.__alliances = self.__generate_alliances(max(count // 10, 5))
+        self.__users = self.__generate_users(self.__alliances, ships)
+
+
+    def __generate_alliances(self, count: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            result.append({
+                'AllianceId': str(index + 1),
+                'AllianceName': get_fleet_name(index),
+                'AllianceDescription': self.__create_description(get_fleet_name(index)),
+                'AllianceSpriteId': str(1000 + index),
+                'DivisionDesignId': str(index % 4 + 1),
+                'MinTrophyRequired': '1000',
+                'NumberOfMembers': str(FLEET_MEMBER_COUNT),
+                'NumberOfApprovedMembers': str(FLEET_MEMBER_COUNT),
+                'Ranking': str(index + 1),
+                'RequiresApproval': 'false',
+                'Score': str(max(0, 5000 - index * 10)),
+                'Trophy': str(max(0, 200000 - index * 500)),
+                'ChampionshipScore': '0',
+                'EnableWars': 'true',
+                'IsPrivate': 'false',
+                'Credits': '0',
+            })
+        return result
+
+
+    def __generate_characters(self, count: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            name = get_character_name(index)
+            rarity = RARITIES[index % len(RARITIES)]
+            stats = {stat: f'{self.__random.uniform(1, 10):.1f}' for stat in ('Hp', 'Pilot', 'Attack', 'Repair', 'Weapon', 'Engine', 'Research', 'Science', 'Ability')}
+            character = {
+                'CharacterDesignId': str(index + 1),
+                'CharacterDesignName': name,
+                'CharacterDesignDescription': self.__create_description(name),
+                'Rarity': rarity,
+                'RaceType': 'Human',
+                'GenderType': 'Male' if index % 2 else 'Female',
+                'ProgressionType': 'EaseIn',
+                'XpRequirementScale': '1',
+                'SpecialAbilityType': 'DamageToCurrentEnemy',
+                'SpecialAbilityArgument': '50',
+                'SpecialAbilityFinalArgument': '100',
+                'FireResistance': '0',
+                'WalkingSpeed': '5',
+                'RunSpeed': '10',
+                'TrainingCapacity': '100',
+                'EquipmentMask': str((index % 63) + 1),
+                'CollectionDesignId': '0',
+                'ProfileSpriteId': str(2000 + index),
+                'MinCombo': '0',
+                'MaxCombo': '0',
+                'CharacterHeadPartId': '0',
+                'CharacterBodyPartId': '0',
+                'CharacterLegPartId': '0',
+                'Flags': '0',
+            }
+            for stat, value in stats.items():
+                character[stat] = value
+                character[f'Final{stat}'] = f'{float(value) * 20:.1f}'
+            result.append(character)
+        return result
+
+
+    def __generate_collections(self, count: int, characters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            collection_design_id = str(index + 1)
+            result.append({
+                'CollectionDesignId': collection_design_id,
+                'CollectionName': f'Collection {index + 1:03d}',
+                'CollectionDescription': self.__create_description(f'Collection {index + 1:03d}'),
+                'CollectionType': 'Combo',
+                'EnhancementType': ENHANCEMENT_TYPES[index % len(ENHANCEMENT_TYPES)],
+                'BaseEnhancementValue': '5',
+                'StepEnhancementValue': '5',
+                'MinCombo': '2',
+                'MaxCombo': '5',
+                'ColorString': '#FFFFFF',
+                'SpriteId': str(3000 + index),
+                'IconSpriteId': str(3000 + index),
+            })
+        for index, character in enumerate(characters):
+            if index % 3 == 0:
+                character['CollectionDesignId'] = str(index // 3 % count + 1)
+        return result
+
+
+    def __generate_divisions(self) -> List[Dict[str, Any]]:
+        return [
+            {'DivisionDesignId': str(index + 1), 'DivisionDesignName': f'Division {letter}', 'DivisionDesignKey': letter, 'MinRank': str(index * 8 + 1), 'MaxRank': str((index + 1) * 8), 'BackgroundColour': '#FFFFFF'}
+            for index, letter in enumerate('ABCD')
+        ]
+
+
+    def __generate_items(self, count: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            name = get_item_name(index)
+            if index % 10 < 7:
+                item_type = 'Equipment'
+                item_sub_type, slot_mask = EQUIPMENT_SLOTS[index % len(EQUIPMENT_SLOTS)]
+            else:
+                item_type = 'Craft' if index % 10 < 9 else 'Mineral'
+                item_sub_type, slot_mask = 'None', 0
+            ingredients = ''
+            if index >= 10 and index % 4 == 0:
+                ingredients = '|'.join(f'{ingredient_index + 1}x{self.__random.randint(1, 3)}' for ingredient_index in sorted(self.__random.sample(range(index), 2)))
+            result.append({
+                'ItemDesignId': str(index + 1),
+                'ItemDesignName': name,
+                'ItemDesignDescription': self.__create_description(name),
+                'ItemType': item_type,
+                'ItemSubType': item_sub_type,
+                'EquipmentMask': str(slot_mask),
+                'EnhancementType': ENHANCEMENT_TYPES[index % len(ENHANCEMENT_TYPES)] if item_type == 'Equipment' else 'None',
+                'EnhancementValue': f'{self.__random.uniform(1, 30):.1f}' if item_type == 'Equipment' else '0',
+                'Rarity': RARITIES[index % len(RARITIES)],
+                'ImageSpriteId': str(4000 + index),
+                'LogoSpriteId': str(4000 + index),
+                'MarketPrice': str(self.__random.randint(10, 10000)),
+                'FairPrice': str(self.__random.randint(10, 10000)),
+                'Flags': '0',
+                'ModuleType': 'None',
+                'ModuleArgument': '0',
+                'RootItemDesignId': '0',
+                'Ingredients': ingredients,
+                'ItemSpace': '0',
+                'BuildTime': '0',
+                'CraftTime': '0',
+                'RequirementString': '',
+            })
+        return result
+
+
+    def __generate_leagues(self) -> List[Dict[str, Any]]:
+        names = ['Bronze', 'Silver', 'Gold', 'Diamond', 'Hero', 'Legend']
+        return [
+            {'LeagueId': str(index + 1), 'LeagueName': name, 'MinTrophy': str(index * 1000), 'MaxTrophy': str((index + 1) * 1000 - 1 if index < len(names) - 1 else 999999), 'BackgroundSpriteId': str(5000 + index)}
+            for index, name in enumerate(names)
+        ]
+
+
+    def __generate_rooms(self, count: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            room_type, short_name, columns, rows = ROOM_TYPES[index % len(ROOM_TYPES)]
+            level = index // len(ROOM_TYPES) + 1
+            result.append({
+                'RoomDesignId': str(index + 1),
+                'RoomName': f'{room_type} Lv{level}',
+                'RoomShortName': f'{short_name}{level}',
+                'RoomDescription': self.__create_description(f'{room_type} Lv{level}'),
+                'RoomType': room_type,
+                'Level': str(level),
+                'Columns': str(columns),
+                'Rows': str(rows),
+                'ImageSpriteId': str(6000 + index),
+                'ConstructionSpriteId': str(6500 + index),
+                'LogoSpriteId': str(7000 + index),
+                'MaxSystemPower': str(level * 2),
+                'MaxPowerGenerated': '0',
+                'Capacity': str(level * 10),
+                'ManufactureCapacity': '0',
+                'ManufactureRate': '0',
+                'ManufactureType': 'None',
+                'DefaultDefenceBonus': '0',
+                'ReloadTime': '0',
+                'RefillUnitCost': '0',
+                'MinShipLevel': str(level),
+                'UpgradeFromRoomDesignId': str(index + 1 - len(ROOM_TYPES)) if level > 1 else '0',
+                'PriceString': f'starbux:{level * 100}',
+                'ConstructionTime': str(level * 60),
+                'RaceId': '0',
+                'CategoryType': 'Defence',
+                'MissileDesignId': '0',
+                'Flags': '0',
+                'EnhancementType': 'None',
+                'SupportedGridTypes': '1',
+                'RequirementString': '',
+            })
+        return result
+
+
+    def __generate_ships(self, count: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            result.append({
+                'ShipDesignId': str(index + 1),
+                'ShipDesignName': f'Ship Lv{index + 1}',
+                'ShipDescription': self.__create_description(f'Ship Lv{index + 1}'),
+                'ShipLevel': str(index + 1),
+                'ShipType': 'Player',
+                'RaceId': '1',
+                'Rows': str(SHIP_ROWS),
+                'Columns': str(SHIP_COLUMNS),
+                'Mask': '1' * (SHIP_ROWS * SHIP_COLUMNS),
+                'InteriorSpriteId': str(8000 + index),
+                'ExteriorSpriteId': str(8500 + index),
+                'MiniShipSpriteId': str(8800 + index),
+                'RoomFrameSpriteId': '9001',
+                'DoorFrameLeftSpriteId': '9002',
+                'DoorFrameRightSpriteId': '9003',
+                'Hp': str((index + 1) * 10),
+                'RepairTime': '0',
+                'UpgradeTime': '0',
+                'MineralCost': '0',
+                'StarbuxCost': '0',
+                'MineralCapacity': '0',
+                'GasCapacity': '0',
+                'EquipmentCapacity': '0',
+                'ItemCapacity': '0',
+                'RequirementString': '',
+                'Flags': '0',
+            })
+        return result
+
+
+    def __generate_trainings(self, count: int) -> List[Dict[str, Any]]:
+        result = []
+        for index in range(count):
+            name = f'Training {index + 1:03d}'
+            result.append({
+                'TrainingDesignId': str(index + 1),
+                'TrainingName': name,
+                'TrainingDescription': self.__create_description(name),
+                'TrainingSpriteId': str(9500 + index),
+                'Rank': str(index % 3 + 1),
+                'Duration': '3600',
+                'Fatigue': '10',
+                'XpChance': '10',
+                'HpChance': str(index % 10),
+                'AttackChance': '0',
+                'RepairChance': '0',
+                'AbilityChance': '0',
+                'PilotChance': '0',
+                'ScienceChance': '0',
+                'StaminaChance': '0',
+                'EngineChance': '0',
+                'WeaponChance': '0',
+                'FireResistanceChance': '0',
+                'RequiredRoomLevel': '1',
+                'RequiredRoomType': 'Gym',
+            })
+        return result
+
+
+    def __generate_users(self, alliances: List[Dict[str, Any]], ships: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        result = []
+        utc_now = datetime.now(timezone.utc).replace(microsecond=0)
+        for index in range(len(alliances) * FLEET_MEMBER_COUNT):
+            alliance = alliances[index // FLEET_MEMBER_COUNT]
+            last_login = (utc_now - timedelta(minutes=index % 600)).strftime(API_DATETIME_FORMAT)
+            result.append({
+                'Id': str(index + 1),
+                'Name': get_user_name(index),
+                'AllianceId': alliance['AllianceId'],
+                'AllianceName': alliance['AllianceName'],
+                'AllianceMembership': 'FleetAdmiral' if index % FLEET_MEMBER_COUNT == 0 else 'Ensign',
+                'AllianceJoinDate': last_login,
+                'AllianceScore': str(index % 100),
+                'AllianceSpriteId': alliance['AllianceSpriteId'],
+                'Trophy': str(max(0, 8000 - index * 3)),
+                'HighestTrophy': str(max(0, 8000 - index * 3)),
+                'LastLoginDate': last_login,
+                'LastHeartBeatDate': last_login,
+                'Created': '2019-01-01T00:00:00',
+                'IconSpriteId': str(9900 + index % 50),
+                'ShipDesignId': ships[index % len(ships)]['ShipDesignId'],
+                'CrewDonated': str(index % 50),
+                'CrewReceived': str(index % 30),
+                'PVPAttackWins': str(index % 20),
+                'PVPAttackLosses': str(index % 10),
+                'PVPAttackDraws': '0',
+                'PVPDefenceWins': str(index % 15),
+                'PVPDefenceLosses': str(index % 5),
+                'PVPDefenceDraws': '0',
+                'ChampionshipScore': '0',
+                'TournamentBonusScore': '0',
+                'Ranking': str(index + 1),
+            })
+        return result
+
+
+    def __get_alliance(self, alliance_id: str) -> Optional[Dict[str, Any]]:
+        for alliance in self.__alliances:
+            if alliance['AllianceId'] == alliance_id:
+                return alliance
+        return None
+
+
+    def __get_design_entities(self, path: str) -> List[Dict[str, Any]]:
+        return self.__designs[path][4]
+
+
+    def __get_prestiges(self) -> List[Dict[str, str]]:
+        """
+        Two crew of the same rarity prestige into a crew of the next rarity.
+        """
+        characters = self.__get_design_entities('CharacterService/ListAllCharacterDesigns2')
+        by_rarity = {}
+        for character in characters:
+            by_rarity.setdefault(character['Rarity'], []).append(character['CharacterDesignId'])
+        result = []
+        for rarity, next_rarity in zip(RARITIES[:4], RARITIES[1:5]):
+            from_ids = by_rarity.get(rarity, [])[:6]
+            to_ids = by_rarity.get(next_rarity, [])
+            for index, (id_1, id_2) in enumerate(zip(from_ids, from_ids[1:])):
+                if to_ids:
+                    result.append({'CharacterDesignId1': id_1, 'CharacterDesignId2': id_2, 'ToCharacterDesignId': to_ids[index % len(to_ids)]})
+        return result
+
+
+    def __get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            index = int(user_id) - 1
+        except (TypeError, ValueError):
+            return None
+        if 0 <= index < len(self.__users):
+            return self.__users[index]
+        return None
+
+
+
+
+
+# ---------- Functions ----------
+
+def get_base_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f'http://{host}:{port}/'
+
+
+def get_character_name(index: int) -> str:
+    return f'{__CREW_NAME_PARTS[index % len(__CREW_NAME_PARTS)]} {index + 1:04d}'
+
+
+def get_fleet_name(index: int) -> str:
+    return f'Fleet {index + 1:04d}'
+
+
+def get_item_name(index: int) -> str:
+    return f'{__NAME_PARTS_1[index % len(__NAME_PARTS_1)]} {__NAME_PARTS_2[index // len(__NAME_PARTS_1) % len(__NAME_PARTS_2)]} {index + 1:04d}'
+
+
+def get_user_name(index: int) -> str:
+    return f'Player {index + 1:05d}'
+
+
+async def start(api: FakePssApi, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> web.AppRunner:
+    """
+    Starts serving the fake API in the running event loop. Pass 0 as the port to pick a free one.
+
+    Returns the runner, which needs to be cleaned up to stop serving.
+    """
+    result = web.AppRunner(api.create_app(), access_log=None)
+    await result.setup()
+    site = web.TCPSite(result, host, port)
+    await site.start()
+    return result
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_element_xml(tag: str, attributes: Dict[str, Any], content: str = '') -> str:
+    attributes_xml = ' '.join(f'{name}={quoteattr(str(value))}' for name, value in attributes.items())
+    if content:
+        return f'<{tag} {attributes_xml}>{content}</{tag}>'
+    return f'<{tag} {attributes_xml} />'
+
+
+def _create_entities_xml(list_tag: str, entity_tag: str, entities: List[Dict[str, Any]]) -> str:
+    return f'<{list_tag}>{"".join(_create_element_xml(entity_tag, entity) for entity in entities)}</{list_tag}>'
+
+
+def _create_sprite(sprite_id: str) -> bytes:
+    """
+    Creates a single coloured sprite. The colour depends on the sprite id.
+    """
+    seed = sum(ord(char) for char in sprite_id)
+    colour = (seed * 37 % 256, seed * 59 % 256, seed * 83 % 256, 255)
+    image = Image.new('RGBA', (SPRITE_SIZE * 2, SPRITE_SIZE * 2), colour)
+    result = io.BytesIO()
+    image.save(result, format='PNG')
+    return result.getvalue()
+
+
+def _create_xml_response(service: str, action: str, content: str, action_attributes: Dict[str, Any] = None) -> web.Response:
+    return web.Response(text=_create_xml_string(service, action, content, action_attributes=action_attributes), content_type='application/xml')
+
+
+def _create_xml_string(service: str, action: str, content: str, action_attributes: Dict[str, Any] = None) -> str:
+    if action_attributes:
+        action_xml = _create_element_xml(action, action_attributes, content or ' ')
+    else:
+        action_xml = f'<{action}>{content}</{action}>'
+    return f'<{service}>{action_xml}</{service}>'
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serves generated data in place of the Pixel Starships API.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='Seconds to wait before answering a request.')
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER, help='Maximum random deviation from the latency in seconds.')
+    parser.add_argument('--entities', type=int, default=DEFAULT_ENTITY_COUNT, help='Number of items and crew. The number of other entities scales with it.')
+    parser.add_argument('--description-length', type=int, default=DEFAULT_DESCRIPTION_LENGTH, help='Length of generated descriptions in characters.')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    args = parser.parse_args()
+
+    api = FakePssApi(entity_count=args.entities, latency=args.latency, jitter=args.jitter, description_length=args.description_length, seed=args.seed)
+    print(f'Serving the fake PSS API on http://{args.host}:{args.port}/')
+    web.run_app(api.create_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,725 @@
+"""
+Measures the work done by the bot's commands against the fake PSS API and writes the results as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.run_benchmarks --iterations 20 --latency 0.05 --entities 500 --output bench_results.json
+
+Each scenario makes the same calls as the slash command it's named after, except for sending the responses to Discord. The first run of a scenario is reported separately as the cold run, since it fills the caches used by the following runs. Pass a previous result file with --baseline to print the change of the median durations.
+
+The scenarios writing sheets also get run once more while tracing allocations, to report their peak memory.
+
+With --cold-start, the startup of the bot and the first /item get measured in new processes, once without and once with cache snapshots written by a previous process.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from . import fake_pss_api
+
+
+# ---------- Constants ----------
+
+AUTODAILY_TICK_COUNT: int = 10
+COLD_START_MODES: Tuple[str, ...] = ('without-snapshots', 'with-snapshots')
+DEFAULT_COLD_START_RUNS: int = 3
+DEFAULT_ITERATIONS: int = 10
+EXPORT_FLEET_COUNT: int = 100
+EXPORT_FLEET_MEMBER_COUNT: int = 100
+LAYOUT_REPLAY_USER_COUNT: int = 10
+MAX_TOURNEY_BATTLE_ATTEMPTS: int = 6
+PEAK_MEMORY_SCENARIOS: Tuple[str, ...] = ('fleet_sheets', 'fleets_sheet_csv', 'raw_export')
+# The first generated crew is Common and prestiges with other Common crew into the second one, which is Elite. See `fake_pss_api.FakePssApi`.
+PRESTIGE_FROM_CHARACTER_INDEX: int = 0
+PRESTIGE_TO_CHARACTER_INDEX: int = 1
+# Every fourth generated item from the eleventh on has a recipe, see `fake_pss_api.FakePssApi`.
+RECIPE_ITEM_INDEX: int = 48
+RESULTS_VERSION: int = 1
+# The tournament fleets and their members in a daily tournament data snapshot, see `create_targets_tourney_data`.
+TARGETS_FLEET_COUNT: int = 100
+TARGETS_USER_COUNT: int = 100000
+# Division, star value, trophies and highest trophies, like passed to /targets.
+TARGETS_QUERIES: List[Tuple[str, Optional[str], Optional[str], Optional[int]]] = [
+    ('A', None, None, None),
+    ('A', '5', '3000', None),
+    ('B', '5-10', '3000-4000', None),
+    ('C', '5-10', '3000-4000', 5000),
+    ('D', '12', None, None),
+]
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+Scenario = Callable[[SimpleNamespace], Awaitable[Any]]
+ScenarioPreparation = Callable[[], Awaitable[None]]
+
+
+
+
+
+# ---------- Scenarios ----------
+
+def create_scenarios(as_embed: bool) -> Dict[str, Scenario]:
+    """
+    The bot's modules may only be imported after the environment has been set up, see `set_up_environment`.
+    """
+    from src import excel
+    from src import pss_crew as crew
+    from src import pss_daily as daily
+    from src import pss_dropship as dropship
+    from src import pss_fleet as fleet
+    from src import pss_item as item
+    from src import pss_raw as raw
+    from src import pss_room as room
+    from src import pss_lookups as lookups
+    from src import pss_ship as ship
+    from src import pss_top as top
+    from src import pss_user as user
+    from src import utils
+
+    create_fleet_sheet_xl = getattr(fleet, '__create_fleet_sheet_xl')
+    flatten_raw_dict_for_excel = getattr(raw, '__flatten_raw_dict_for_excel')
+    # Before the columns got fixed once per column, every field got fixed while flattening.
+    fix_columns = getattr(excel, 'fix_columns', None)
+    fleets_users_data = create_fleets_users_data(EXPORT_FLEET_COUNT, EXPORT_FLEET_MEMBER_COUNT)
+    daily_change_counter = itertools.count(1)
+    raw_export_retrievers = {
+        'crew': crew.characters_designs_retriever,
+        'item': item.items_designs_retriever,
+        'room': room.rooms_designs_retriever,
+    }
+
+    async def autodaily(ctx: SimpleNamespace) -> Any:
+        # Every tick of the autodaily loop retrieves the daily info and creates the output, while the daily changes only a few times a day.
+        for _ in range(AUTODAILY_TICK_COUNT):
+            daily_info = await daily.get_daily_info()
+            await dropship.get_dropship_text(daily_info=daily_info)
+
+    async def best(ctx: SimpleNamespace) -> Any:
+        return await item.get_best_items(ctx, 'head', 'hp', as_embed=as_embed)
+
+    async def char(ctx: SimpleNamespace) -> Any:
+        return await crew.get_char_details_by_name(ctx, fake_pss_api.get_character_name(1), None, as_embed=as_embed)
+
+    async def daily_(ctx: SimpleNamespace) -> Any:
+        return await dropship.get_dropship_text(ctx.bot, ctx.guild)
+
+    async def daily_changed(ctx: SimpleNamespace) -> Any:
+        daily_info = dict(await daily.get_daily_info())
+        daily_info['News'] = f'{daily_info.get("News") or ""} ({next(daily_change_counter)})'
+        return await dropship.get_dropship_text(ctx.bot, ctx.guild, daily_info=daily_info)
+
+    async def fleet_(ctx: SimpleNamespace) -> Any:
+        fleet_infos = await fleet.get_fleet_infos_by_name(fake_pss_api.get_fleet_name(0))
+        output, file_paths = await fleet.get_full_fleet_info_as_text(ctx, fleet_infos[0], as_embed=as_embed)
+        for file_path in file_paths:
+            os.remove(file_path)
+        return output
+
+    async def fleet_sheets(ctx: SimpleNamespace) -> Any:
+        retrieved_at = utils.get_utc_now()
+        for fleet_id, fleet_users_data in fleets_users_data.items():
+            file_path = create_fleet_sheet_xl(fleet_users_data, retrieved_at, f'fleet_sheet_{fleet_id}.xlsx', max_tourney_battle_attempts=MAX_TOURNEY_BATTLE_ATTEMPTS)
+            os.remove(file_path)
+
+    async def fleets_sheet_csv(ctx: SimpleNamespace) -> Any:
+        users_data = {user_id: user_info for fleet_users_data in fleets_users_data.values() for user_id, user_info in fleet_users_data.items()}
+        file_path = fleet.create_fleets_sheet_csv(users_data, utils.get_utc_now(), 'fleets_sheet.csv')
+        os.remove(file_path)
+
+    async def get_layout(ctx: SimpleNamespace, user_name: str) -> Any:
+        user_infos = await user.get_users_infos_by_name(user_name)
+        user_id = user_infos[0][user.USER_KEY_NAME]
+        await ship.get_inspect_ship_for_user(user_id)
+        output, file_path = await user.get_user_ship_layout(ctx, user_id, as_embed=as_embed)
+        os.remove(file_path)
+        return output
+
+    async def ingredients(ctx: SimpleNamespace) -> Any:
+        return await item.get_ingredients_for_item(ctx, fake_pss_api.get_item_name(RECIPE_ITEM_INDEX), as_embed=as_embed)
+
+    async def item_(ctx: SimpleNamespace) -> Any:
+        return await item.get_item_details_by_name(ctx, fake_pss_api.get_item_name(0), as_embed=as_embed)
+
+    async def layout(ctx: SimpleNamespace) -> Any:
+        return await get_layout(ctx, fake_pss_api.get_user_name(0))
+
+    async def layout_replay(ctx: SimpleNamespace) -> Any:
+        return [await get_layout(ctx, fake_pss_api.get_user_name(index)) for index in range(LAYOUT_REPLAY_USER_COUNT)]
+
+    async def prestige_from(ctx: SimpleNamespace) -> Any:
+        return await crew.get_prestige_from_info(ctx, fake_pss_api.get_character_name(PRESTIGE_FROM_CHARACTER_INDEX), as_embed=as_embed)
+
+    async def prestige_to(ctx: SimpleNamespace) -> Any:
+        return await crew.get_prestige_to_info(ctx, fake_pss_api.get_character_name(PRESTIGE_TO_CHARACTER_INDEX), as_embed=as_embed)
+
+    async def raw_export(ctx: SimpleNamespace) -> Any:
+        retrieved_at = utils.get_utc_now()
+        for entity_name, retriever in raw_export_retrievers.items():
+            raw_data_dict = utils.convert.raw_xml_to_dict(await retriever.get_raw_data(), fix_attributes=True, preserve_lists=True)
+            flattened_data = flatten_raw_dict_for_excel(raw_data_dict)
+            if fix_columns:
+                fix_columns(flattened_data)
+            file_path = excel.create_xl_from_raw_data_dict(flattened_data, f'{entity_name}_designs', retrieved_at)
+            os.remove(file_path)
+
+    async def targets(ctx: SimpleNamespace) -> Any:
+        tourney_data, current_fleet_data = get_targets_data()
+        # Before the targets index, the users of the snapshot got passed in and filtered for every lookup.
+        user_infos = tourney_data if hasattr(top, 'TargetsIndex') else tourney_data.users_data.values()
+        result = []
+        for division, star_value, trophies, max_highest_trophies in TARGETS_QUERIES:
+            _, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies = top.get_targets_parameters(star_value, trophies, max_highest_trophies)
+            division_design_id = lookups.DIVISION_CHAR_TO_DESIGN_ID[division]
+            result.append(top.filter_targets(user_infos, division_design_id, tourney_data.users_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)[:100])
+        return result
+
+    async def upgrade(ctx: SimpleNamespace) -> Any:
+        items_data = await item.items_designs_retriever.get_data_dict3()
+        recipe_item_info = items_data[str(RECIPE_ITEM_INDEX + 1)]
+        ingredient_item_id = list(item.get_ingredients_dict(recipe_item_info['Ingredients']).keys())[0]
+        return await item.get_item_upgrades_from_name(ctx, items_data[ingredient_item_id][item.ITEM_DESIGN_DESCRIPTION_PROPERTY_NAME], as_embed=as_embed)
+
+    return {
+        'item': item_,
+        'ingredients': ingredients,
+        'upgrade': upgrade,
+        'char': char,
+        'prestige_from': prestige_from,
+        'prestige_to': prestige_to,
+        'best': best,
+        'fleet': fleet_,
+        'layout': layout,
+        'layout_replay_cold': layout_replay,
+        'layout_replay_warm': layout_replay,
+        'daily': daily_,
+        'daily_changed': daily_changed,
+        'autodaily': autodaily,
+        'fleet_sheets': fleet_sheets,
+        'fleets_sheet_csv': fleets_sheet_csv,
+        'raw_export': raw_export,
+        'targets': targets,
+    }
+
+
+def create_scenario_preparations() -> Dict[str, ScenarioPreparation]:
+    """
+    Returns the steps to be run before each run of a scenario, which aren't measured. The bot's modules may only be imported after the environment has been set up, see `set_up_environment`.
+    """
+    from src import pss_crew as crew
+    from src import pss_sprites as sprites
+
+    async def clear_sprites() -> None:
+        # Downloaded sprites and rendered layouts are stored in the same directory.
+        for file_name in os.listdir(sprites.SPRITES_CACHE_PATH):
+            sprite_id, extension = os.path.splitext(file_name)
+            if extension == '.png':
+                os.remove(os.path.join(sprites.SPRITES_CACHE_PATH, file_name))
+                sprites.invalidate_sprite(sprite_id)
+
+    async def create_targets_data() -> None:
+        get_targets_data()
+
+    async def wait_for_prestige_graph() -> None:
+        # The prestige graph gets built in the background after startup. Without it, every lookup gets requested from the API.
+        get_prestige_graph = getattr(crew, '__get_prestige_graph', None)
+        if get_prestige_graph:
+            while get_prestige_graph(await crew.characters_designs_retriever.get_data_dict3()) is None:
+                await asyncio.sleep(0.05)
+
+    # The requests made while building the prestige graph would slow down the requests for the daily.
+    return {
+        'layout_replay_cold': clear_sprites,
+        'prestige_from': wait_for_prestige_graph,
+        'prestige_to': wait_for_prestige_graph,
+        'daily': wait_for_prestige_graph,
+        'daily_changed': wait_for_prestige_graph,
+        'autodaily': wait_for_prestige_graph,
+        'targets': create_targets_data,
+    }
+
+
+async def initialize_bot_modules(work_path: str) -> None:
+    """
+    Runs the startup steps of the bot, which don't need a database or a connection to Discord. Sprites and layouts get written to the working directory.
+    """
+    from src import cache
+    from src import http_client
+    from src import pss_crew as crew
+    from src import pss_daily as daily
+    from src import pss_item as item
+    from src import pss_login as login
+    from src import pss_room as room
+    from src import pss_sprites as sprites
+    from src import pss_user as user
+    from src import settings
+
+    settings.SPRITE_CACHE_SUB_PATH = work_path
+    await http_client.init()
+    await cache.init()
+    await sprites.init()
+    login.DEVICES = login.DeviceCollection()
+    await crew.init()
+    await item.init()
+    await room.init()
+    await user.init()
+    # There's no database, so there are no sales to be listed.
+    await daily.update_db_sales_info_cache()
+
+
+def set_up_environment(base_url: str) -> None:
+    """
+    Points the bot at the fake API. Must be called before importing the bot's modules, since the settings get read on import.
+    """
+    os.environ['PSS_BASE_API_URL'] = base_url
+    os.environ['PSS_ACCESS_TOKEN'] = fake_pss_api.ACCESS_TOKEN
+    os.environ['USE_ACCESS_TOKEN'] = '1'
+    os.environ['FEATURE_CACHE_SNAPSHOTS_ENABLED'] = '0'
+    os.environ['FEATURE_TOURNEYDATA_ENABLED'] = '0'
+    os.environ.pop('PSS_PRODUCTION_SERVER', None)
+    if REPOSITORY_PATH not in sys.path:
+        sys.path.insert(0, REPOSITORY_PATH)
+
+
+
+
+
+# ---------- Functions ----------
+
+def compare_results(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Returns a line per scenario with the change of the median duration compared to the baseline.
+    """
+    result = []
+    for name, scenario_result in results['scenarios'].items():
+        baseline_result = baseline.get('scenarios', {}).get(name)
+        median = scenario_result.get('median')
+        baseline_median = (baseline_result or {}).get('median')
+        if median is None or not baseline_median:
+            result.append(f'{name}: no baseline')
+        else:
+            change = (median - baseline_median) / baseline_median * 100
+            line = f'{name}: {baseline_median * 1000:.1f} ms -> {median * 1000:.1f} ms ({change:+.1f}%)'
+            cpu = scenario_result.get('cpu_per_iteration')
+            baseline_cpu = baseline_result.get('cpu_per_iteration')
+            if cpu is not None and baseline_cpu:
+                cpu_change = (cpu - baseline_cpu) / baseline_cpu * 100
+                line += f', cpu {__format_duration(baseline_cpu)} -> {__format_duration(cpu)} ({cpu_change:+.1f}%)'
+            peak_memory = scenario_result.get('peak_memory')
+            baseline_peak_memory = baseline_result.get('peak_memory')
+            if peak_memory is not None and baseline_peak_memory:
+                peak_memory_change = (peak_memory - baseline_peak_memory) / baseline_peak_memory * 100
+                line += f', peak memory {__format_memory(baseline_peak_memory)} -> {__format_memory(peak_memory)} ({peak_memory_change:+.1f}%)'
+            result.append(line)
+    return result
+
+
+def create_fleets_users_data(fleet_count: int, member_count: int) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Returns the users of `fleet_count` fleets with `member_count` members each by fleet id, like they're stored in tournament data.
+    """
+    utc_now = datetime.now(timezone.utc).replace(microsecond=0)
+    result = {}
+    for fleet_index in range(fleet_count):
+        fleet_id = str(fleet_index + 1)
+        fleet_users_data = {}
+        for member_index in range(member_count):
+            index = fleet_index * member_count + member_index
+            user_id = str(index + 1)
+            last_login = (utc_now - timedelta(minutes=index % 600)).strftime(fake_pss_api.API_DATETIME_FORMAT)
+            fleet_users_data[user_id] = {
+                'Id': user_id,
+                'Name': fake_pss_api.get_user_name(index),
+                'AllianceId': fleet_id,
+                'AllianceName': fake_pss_api.get_fleet_name(fleet_index),
+                'AllianceMembership': 'FleetAdmiral' if member_index == 0 else 'Ensign',
+                'AllianceJoinDate': last_login,
+                'AllianceScore': str(index % 100),
+                'Trophy': str(max(0, 8000 - member_index * 50)),
+                'HighestTrophy': str(max(0, 8000 - member_index * 50)),
+                'LastLoginDate': last_login,
+                'CrewDonated': str(index % 50),
+                'CrewReceived': str(index % 30),
+                'PVPAttackWins': str(index % 20),
+                'PVPAttackLosses': str(index % 10),
+                'PVPAttackDraws': '0',
+                'PVPDefenceWins': str(index % 15),
+                'PVPDefenceLosses': str(index % 5),
+                'PVPDefenceDraws': '0',
+                'TournamentBonusScore': str(index % (MAX_TOURNEY_BATTLE_ATTEMPTS + 1)),
+                'Alliance': {'AllianceName': fake_pss_api.get_fleet_name(fleet_index), 'DivisionDesignId': str(fleet_index % 4 + 1)},
+            }
+        result[fleet_id] = fleet_users_data
+    return result
+
+
+def create_targets_tourney_data(fleet_count: int, user_count: int, seed: int) -> Any:
+    """
+    Returns a daily tournament data snapshot of `user_count` users spread evenly over `fleet_count` fleets in all four divisions. Must be called after the environment has been set up, see `set_up_environment`.
+    """
+    from src.gdrive import TourneyData
+    from src import utils
+
+    rng = random.Random(seed)
+    utc_now = datetime.now(timezone.utc).replace(tzinfo=None)
+    now_timestamp = int((utc_now - utils.constants.PSS_START_DATETIME).total_seconds())
+    fleets = [[fleet_id, fake_pss_api.get_fleet_name(fleet_id - 1), 5000 - fleet_id * 10, fleet_id % 4 + 1, 200000 - fleet_id * 500, 0, user_count // fleet_count, user_count // fleet_count] for fleet_id in range(1, fleet_count + 1)]
+    users = []
+    for user_id in range(1, user_count + 1):
+        trophies = rng.randint(500, 8000)
+        last_login_timestamp = now_timestamp - rng.randint(0, 86400)
+        users.append([
+            user_id, fake_pss_api.get_user_name(user_id - 1), user_id % fleet_count + 1, trophies, rng.randint(0, 100), rng.randrange(5),
+            last_login_timestamp - 86400, last_login_timestamp, last_login_timestamp,
+            0, 0, 0, 0, 0, 0, 0, 0, 0,
+            trophies + rng.randint(0, 2000), rng.randint(0, 6),
+        ])
+    return TourneyData({'meta': {'schema_version': 9, 'timestamp': utc_now.strftime('%Y-%m-%d %H:%M:%S')}, 'fleets': fleets, 'users': users})
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPOSITORY_PATH, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_summary(durations: List[float]) -> Dict[str, Optional[float]]:
+    if not durations:
+        return {'min': None, 'mean': None, 'median': None, 'p95': None, 'max': None}
+    sorted_durations = sorted(durations)
+    return {
+        'min': sorted_durations[0],
+        'mean': statistics.mean(sorted_durations),
+        'median': statistics.median(sorted_durations),
+        'p95': sorted_durations[min(len(sorted_durations) - 1, int(round(len(sorted_durations) * 0.95)) - 1)],
+        'max': sorted_durations[-1],
+    }
+
+
+def get_targets_data() -> Tuple[Any, Dict[str, Dict[str, Any]]]:
+    """
+    Returns the tournament data snapshot used by the targets scenario and the current fleets with their divisions. They get created on the first call, so all runs look up targets in the same snapshot, like the bot does during a tournament day.
+    """
+    global __targets_data
+    if __targets_data is None:
+        tourney_data = create_targets_tourney_data(TARGETS_FLEET_COUNT, TARGETS_USER_COUNT, fake_pss_api.DEFAULT_SEED)
+        __targets_data = (tourney_data, dict(tourney_data.fleets_data))
+    return __targets_data
+
+
+def measure_cold_starts(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Runs every cold start in a new process, since the bot's modules keep their caches for the lifetime of the process. The snapshots get written by a first process starting with an empty snapshot directory.
+    """
+    snapshots_path = tempfile.mkdtemp(prefix='yadc_bench_snapshots_')
+    try:
+        __run_cold_start_process(args, 'with-snapshots', snapshots_path)
+        result = {}
+        for mode in COLD_START_MODES:
+            runs = [__run_cold_start_process(args, mode, snapshots_path) for _ in range(max(args.cold_start_runs, 1))]
+            result[mode] = {
+                'runs': len(runs),
+                'startup': statistics.median(run['startup'] for run in runs),
+                'first_item': statistics.median(run['first_item'] for run in runs),
+                'time_to_first_item': statistics.median(run['startup'] + run['first_item'] for run in runs),
+                'requests_before_first_item': statistics.median(run['requests_before_first_item'] for run in runs),
+                'errors': sorted(set(run['error'] for run in runs if run['error'])),
+            }
+            print(__format_cold_start_result(mode, result[mode]))
+        return result
+    finally:
+        shutil.rmtree(snapshots_path, ignore_errors=True)
+
+
+async def run_scenario(name: str, scenario: Scenario, ctx: SimpleNamespace, api: fake_pss_api.FakePssApi, iterations: int, verbose: bool = False, prepare: ScenarioPreparation = None, measure_peak_memory: bool = False) -> Dict[str, Any]:
+    """
+    If `measure_peak_memory` is True, the scenario gets run once more after the measured runs while tracing allocations, since tracing slows it down.
+    """
+    if prepare:
+        await prepare()
+    cold_duration, cold_error = await __run_once(scenario, ctx, verbose)
+    errors = [cold_error] if cold_error else []
+
+    api.reset_counts()
+    durations = []
+    cpu_duration = 0.0
+    for _ in range(iterations):
+        if prepare:
+            await prepare()
+        cpu_start = time.process_time()
+        duration, error = await __run_once(scenario, ctx, verbose)
+        cpu_duration += time.process_time() - cpu_start
+        if error:
+            errors.append(error)
+        else:
+            durations.append(duration)
+    request_count = sum(api.request_counts.values())
+
+    peak_memory = None
+    if measure_peak_memory:
+        if prepare:
+            await prepare()
+        tracemalloc.start()
+        try:
+            _, error = await __run_once(scenario, ctx, verbose)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        if error:
+            errors.append(error)
+
+    result = {
+        'iterations': iterations,
+        'cold': cold_duration,
+        'requests_per_iteration': request_count / iterations if iterations else None,
+        'cpu_per_iteration': cpu_duration / iterations if iterations else None,
+        'peak_memory': peak_memory,
+        'error_count': len(errors),
+        'errors': sorted(set(errors)),
+    }
+    result.update(get_summary(durations))
+    return result
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    api = fake_pss_api.FakePssApi(entity_count=args.entities, latency=args.latency, jitter=args.jitter, description_length=args.description_length, seed=args.seed)
+    runner = await fake_pss_api.start(api, port=0)
+    work_path = tempfile.mkdtemp(prefix='yadc_bench_')
+    previous_cwd = os.getcwd()
+    os.chdir(REPOSITORY_PATH)
+    try:
+        set_up_environment(fake_pss_api.get_base_url(runner))
+        from src import http_client
+        from src import settings
+
+        started_at = datetime.now(timezone.utc)
+        await initialize_bot_modules(work_path)
+        scenarios = create_scenarios(args.embed)
+        preparations = create_scenario_preparations()
+        ctx = SimpleNamespace(bot=None, guild=None, author=SimpleNamespace(id=0))
+
+        scenarios_results = {}
+        for name, scenario in scenarios.items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            scenarios_results[name] = await run_scenario(name, scenario, ctx, api, args.iterations, verbose=args.verbose, prepare=preparations.get(name), measure_peak_memory=name in PEAK_MEMORY_SCENARIOS)
+            print(__format_scenario_result(name, scenarios_results[name]))
+
+        result = {
+            'version': RESULTS_VERSION,
+            'started_at': started_at.isoformat(),
+            'parameters': {
+                'iterations': args.iterations,
+                'latency': args.latency,
+                'jitter': args.jitter,
+                'entities': args.entities,
+                'description_length': args.description_length,
+                'seed': args.seed,
+                'embed': args.embed,
+            },
+            'environment': {
+                'bot_version': settings.VERSION,
+                'git_commit': get_git_commit(),
+                'platform': platform.platform(),
+                'python': platform.python_version(),
+            },
+            'unknown_endpoints': api.unknown_paths,
+            'scenarios': scenarios_results,
+        }
+        # Background tasks started by the bot, like building the prestige graph, would otherwise reopen the client session.
+        await __cancel_background_tasks()
+        await http_client.disconnect()
+        return result
+    finally:
+        os.chdir(previous_cwd)
+        await runner.cleanup()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+
+async def run_cold_start(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Starts the bot's modules in this process and runs /item right after. Snapshots get read from and written to `args.snapshots_path`, if `args.cold_start_child` is 'with-snapshots'.
+    """
+    api = fake_pss_api.FakePssApi(entity_count=args.entities, latency=args.latency, jitter=args.jitter, description_length=args.description_length, seed=args.seed)
+    runner = await fake_pss_api.start(api, port=0)
+    work_path = tempfile.mkdtemp(prefix='yadc_bench_')
+    previous_cwd = os.getcwd()
+    os.chdir(REPOSITORY_PATH)
+    try:
+        set_up_environment(fake_pss_api.get_base_url(runner))
+        if args.cold_start_child == 'with-snapshots':
+            os.environ['FEATURE_CACHE_SNAPSHOTS_ENABLED'] = '1'
+            os.environ['CACHE_SNAPSHOT_SUB_PATH'] = args.snapshots_path
+        from src import http_client
+
+        scenarios = create_scenarios(args.embed)
+        ctx = SimpleNamespace(bot=None, guild=None, author=SimpleNamespace(id=0))
+
+        start = time.perf_counter()
+        await initialize_bot_modules(work_path)
+        startup_duration = time.perf_counter() - start
+        first_item_duration, error = await __run_once(scenarios['item'], ctx, args.verbose)
+        request_count = sum(api.request_counts.values())
+
+        await __cancel_background_tasks()
+        await http_client.disconnect()
+        return {
+            'startup': startup_duration,
+            'first_item': first_item_duration,
+            'requests_before_first_item': request_count,
+            'error': error,
+        }
+    finally:
+        os.chdir(previous_cwd)
+        await runner.cleanup()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+
+
+
+
+# ---------- Helper functions ----------
+
+async def __cancel_background_tasks() -> None:
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def __format_cold_start_result(mode: str, cold_start_result: Dict[str, Any]) -> str:
+    result = (
+        f'cold start {mode}: startup {__format_duration(cold_start_result["startup"])}, first /item {__format_duration(cold_start_result["first_item"])}, '
+        f'{cold_start_result["requests_before_first_item"]:.0f} requests before the first /item'
+    )
+    if cold_start_result['errors']:
+        result += f', errors: {", ".join(cold_start_result["errors"])}'
+    return result
+
+
+def __format_duration(duration: Optional[float]) -> str:
+    if duration is None:
+        return '-'
+    return f'{duration * 1000:.1f} ms'
+
+
+def __format_memory(memory: Optional[int]) -> str:
+    if memory is None:
+        return '-'
+    return f'{memory / 1024 / 1024:.1f} MiB'
+
+
+def __format_scenario_result(name: str, scenario_result: Dict[str, Any]) -> str:
+    result = f'{name}: cold {__format_duration(scenario_result["cold"])}, median {__format_duration(scenario_result["median"])}, p95 {__format_duration(scenario_result["p95"])}'
+    if scenario_result['cpu_per_iteration'] is not None:
+        result += f', cpu {__format_duration(scenario_result["cpu_per_iteration"])} per run'
+    if scenario_result['requests_per_iteration'] is not None:
+        result += f', {scenario_result["requests_per_iteration"]:.1f} requests per run'
+    if scenario_result['peak_memory'] is not None:
+        result += f', peak memory {__format_memory(scenario_result["peak_memory"])}'
+    if scenario_result['error_count']:
+        result += f', {scenario_result["error_count"]} errors'
+    return result
+
+
+def __run_cold_start_process(args: argparse.Namespace, mode: str, snapshots_path: str) -> Dict[str, Any]:
+    command = [
+        sys.executable, '-m', __spec__.name,
+        '--cold-start-child', mode,
+        '--snapshots-path', snapshots_path,
+        '--latency', str(args.latency),
+        '--jitter', str(args.jitter),
+        '--entities', str(args.entities),
+        '--description-length', str(args.description_length),
+        '--seed', str(args.seed),
+    ]
+    if args.embed:
+        command.append('--embed')
+    if args.verbose:
+        command.append('--verbose')
+    completed = subprocess.run(command, cwd=REPOSITORY_PATH, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+async def __run_once(scenario: Scenario, ctx: SimpleNamespace, verbose: bool) -> Tuple[float, Optional[str]]:
+    start = time.perf_counter()
+    try:
+        await scenario(ctx)
+    except Exception as err:
+        if verbose:
+            traceback.print_exc()
+        return time.perf_counter() - start, f'{err.__class__.__name__}: {err}'
+    return time.perf_counter() - start, None
+
+
+
+
+
+# ---------- Initialization ----------
+
+__targets_data: Tuple[Any, Dict[str, Dict[str, Any]]] = None
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures the bot\'s commands against the fake PSS API.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Number of warm runs per scenario.')
+    parser.add_argument('--latency', type=float, default=fake_pss_api.DEFAULT_LATENCY, help='Seconds the fake API waits before answering a request.')
+    parser.add_argument('--jitter', type=float, default=fake_pss_api.DEFAULT_JITTER, help='Maximum random deviation from the latency in seconds.')
+    parser.add_argument('--entities', type=int, default=fake_pss_api.DEFAULT_ENTITY_COUNT, help='Number of items and crew served by the fake API.')
+    parser.add_argument('--description-length', type=int, default=fake_pss_api.DEFAULT_DESCRIPTION_LENGTH, help='Length of generated descriptions in characters.')
+    parser.add_argument('--seed', type=int, default=fake_pss_api.DEFAULT_SEED)
+    parser.add_argument('--embed', action='store_true', help='Create embeds instead of text output.')
+    parser.add_argument('--scenarios', nargs='*', help='Only run these scenarios.')
+    parser.add_argument('--output', help='Write the results to this file.')
+    parser.add_argument('--baseline', help='Compare the results to the results in this file.')
+    parser.add_argument('--verbose', action='store_true', help='Print the tracebacks of failed runs.')
+    parser.add_argument('--cold-start', action='store_true', help='Also measure the startup and the first /item in new processes, with and without cache snapshots.')
+    parser.add_argument('--cold-start-runs', type=int, default=DEFAULT_COLD_START_RUNS, help='Number of new processes per cold start mode.')
+    parser.add_argument('--cold-start-child', choices=COLD_START_MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--snapshots-path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        print(json.dumps(asyncio.run(run_cold_start(args))))
+        return
+
+    results = asyncio.run(run_benchmarks(args))
+    if args.cold_start:
+        results['cold_start'] = measure_cold_starts(args)
+    if results['unknown_endpoints']:
+        print(f'Requests to endpoints unknown to the fake API: {results["unknown_endpoints"]}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fp:
+            baseline = json.load(fp)
+        for line in compare_results(results, baseline):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
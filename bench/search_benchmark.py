@@ -0,0 +1,236 @@
+"""
+Measures looking up entities by name with the search index of every entity retriever and with the linear scan used before, and writes the results as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.search_benchmark --entities 2000 --queries 300 --output search.json
+
+Every retriever searching by a name gets the same generated names, stored under the property it searches. The queries are full names, prefixes, substrings, names with changed case and punctuation and names that don't exist. Both approaches must return the same ids in the same order.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import fake_pss_api
+
+
+# ---------- Constants ----------
+
+DEFAULT_ENTITY_COUNT: int = 2000
+DEFAULT_QUERY_COUNT: int = 300
+DEFAULT_SEED: int = 1
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_VERSION: int = 1
+
+# Names, which get treated specially by the item retriever, share a prefix with others or become empty or short when fixed.
+EDGE_CASE_NAMES: List[Optional[str]] = [
+    'Dark Matter Rifle Mk II',
+    'DMR Mark 2',
+    'Anon Mask',
+    'Anonymous Mask',
+    'Golden Bunny Armour',
+    'Gold Rabbit Armor',
+    'Ancient Relic (A)',
+    'Ancient Relic fragment',
+    'X',
+    'Xi',
+    'A-10',
+    'a 10',
+    'Über Shield',
+    '!!!',
+    '',
+    None,
+]
+EDGE_CASE_QUERIES: List[str] = [' ', '!!!', 'a', 'x', 'mk2', 'dmr mk ii', 'armour', '(a)', 'relic', 'über', 'zzzz', '10']
+
+RETRIEVER_MODULE_NAMES: List[str] = [
+    'pss_achievement',
+    'pss_ai',
+    'pss_craft',
+    'pss_crew',
+    'pss_gm',
+    'pss_item',
+    'pss_mission',
+    'pss_promo',
+    'pss_research',
+    'pss_room',
+    'pss_ship',
+    'pss_situation',
+    'pss_top',
+    'pss_training',
+]
+
+
+
+
+
+# ---------- Functions ----------
+
+def create_entities_data(key_name: str, property_name: str, names: List[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+    return {str(index + 1): {key_name or 'Id': str(index + 1), property_name: name} for index, name in enumerate(names)}
+
+
+def create_names(count: int) -> List[Optional[str]]:
+    """
+    Returns `count` names of generated items and crew, followed by the edge cases.
+    """
+    result = [fake_pss_api.get_item_name(index) if index % 2 else fake_pss_api.get_character_name(index) for index in range(count)]
+    result.extend(EDGE_CASE_NAMES)
+    return result
+
+
+def create_queries(names: List[Optional[str]], count: int, rng: random.Random) -> List[str]:
+    """
+    Returns variations of `count` random names and the edge case queries.
+    """
+    names = [name for name in names if name]
+    result = []
+    for name in rng.sample(names, min(count, len(names))):
+        variation = rng.randrange(7)
+        if variation == 0:
+            result.append(name)
+        elif variation == 1:
+            result.append(name.upper())
+        elif variation == 2:
+            result.append(name[:rng.randint(1, min(len(name), 5))])
+        elif variation == 3:
+            start = rng.randrange(len(name))
+            result.append(name[start:start + rng.randint(2, 6)])
+        elif variation == 4:
+            result.append(name.replace(' ', ''))
+        elif variation == 5:
+            result.append(f'{name}-')
+        else:
+            result.append(f'{name}zz')
+    result.extend(EDGE_CASE_QUERIES)
+    return result
+
+
+def get_retrievers() -> Dict[str, Any]:
+    """
+    Returns the entity retrievers of the bot's modules, which search entities by a name, by '<module>.<retriever>'.
+    """
+    if REPOSITORY_PATH not in sys.path:
+        sys.path.insert(0, REPOSITORY_PATH)
+    from src import pss_entity as entity
+
+    result = {}
+    for module_name in RETRIEVER_MODULE_NAMES:
+        module = importlib.import_module(f'src.{module_name}')
+        for attribute_name, value in vars(module).items():
+            if isinstance(value, entity.EntityRetriever) and value.description_property_name:
+                result[f'{module_name}.{attribute_name}'] = value
+    return result
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    retrievers = get_retrievers()
+    from src import pss_core as core
+    from src import settings
+
+    started_at = datetime.now(timezone.utc)
+    rng = random.Random(args.seed)
+    names = create_names(args.entities)
+    queries = create_queries(names, args.queries, rng)
+
+    retrievers_results = {}
+    for retriever_name, retriever in retrievers.items():
+        if args.retrievers and retriever_name not in args.retrievers:
+            continue
+        entities_data = create_entities_data(retriever.key_name, retriever.description_property_name, names)
+        fix_data_delegate = retriever._EntityRetriever__fix_data_delegate
+
+        start = time.perf_counter()
+        search_index = core.create_search_index(entities_data, retriever.description_property_name, fix_data_delegate=fix_data_delegate)
+        build_duration = time.perf_counter() - start
+
+        index_durations, index_results = __measure_lookups(queries, search_index.get_ids)
+        scan_durations, scan_results = __measure_lookups(queries, lambda query: core.get_ids_from_property_value(entities_data, retriever.description_property_name, query, fix_data_delegate=fix_data_delegate))
+        retrievers_results[retriever_name] = {
+            'build': build_duration,
+            'index_median': statistics.median(index_durations),
+            'index_p95': __get_percentile(index_durations, 0.95),
+            'scan_median': statistics.median(scan_durations),
+            'scan_p95': __get_percentile(scan_durations, 0.95),
+            'mismatch_count': sum(index_result != scan_result for index_result, scan_result in zip(index_results, scan_results)),
+        }
+        print(__format_retriever_result(retriever_name, retrievers_results[retriever_name]))
+
+    return {
+        'version': RESULTS_VERSION,
+        'started_at': started_at.isoformat(),
+        'parameters': {
+            'entities': len(names),
+            'queries': len(queries),
+            'seed': args.seed,
+        },
+        'environment': {
+            'bot_version': settings.VERSION,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        },
+        'retrievers': retrievers_results,
+    }
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __format_retriever_result(retriever_name: str, retriever_result: Dict[str, Any]) -> str:
+    return (
+        f'{retriever_name}: build {retriever_result["build"] * 1000:.1f} ms, '
+        f'index median {retriever_result["index_median"] * 1000000:.0f} µs, p95 {retriever_result["index_p95"] * 1000000:.0f} µs, '
+        f'scan median {retriever_result["scan_median"] * 1000000:.0f} µs, p95 {retriever_result["scan_p95"] * 1000000:.0f} µs, '
+        f'{retriever_result["mismatch_count"]} mismatches'
+    )
+
+
+def __get_percentile(values: List[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * percentile), len(values) - 1)]
+
+
+def __measure_lookups(queries: List[str], lookup: Callable[[str], List[str]]) -> tuple:
+    durations = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(lookup(query))
+        durations.append(time.perf_counter() - start)
+    return durations, results
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures looking up entities by name with the search index and with a linear scan.')
+    parser.add_argument('--entities', type=int, default=DEFAULT_ENTITY_COUNT, help='Number of generated names per retriever.')
+    parser.add_argument('--queries', type=int, default=DEFAULT_QUERY_COUNT, help='Number of queries generated from the names.')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--retrievers', nargs='*', help='Only run these retrievers, named like pss_item.items_designs_retriever.')
+    parser.add_argument('--output', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
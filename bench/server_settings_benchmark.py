@@ -0,0 +1,186 @@
+"""
+Measures writing guild settings changes of many guilds against the fake database and writes the results as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.server_settings_benchmark --guilds 10000 --rounds 5 --changes 2000 --latency 0.002 --output server_settings.json
+
+Each round changes random settings of random guilds, like the auto-daily loop and settings commands do. With write-behind the changes get queued and flushed at the end of the round, with write-through (SERVER_SETTINGS_FLUSH_INTERVAL=0) every change gets written right away. Every statement sent to the fake database takes --latency seconds.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import mock
+
+from . import fake_database
+
+
+# ---------- Constants ----------
+
+DEFAULT_CHANGE_COUNT: int = 2000
+DEFAULT_GUILD_COUNT: int = 10000
+DEFAULT_LATENCY: float = 0.002
+DEFAULT_ROUND_COUNT: int = 5
+DEFAULT_SEED: int = 1
+FIRST_GUILD_ID: int = 100000000000000000
+MODES: Tuple[str, ...] = ('write-behind', 'write-through')
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_VERSION: int = 1
+
+SETTING_VALUE_FACTORIES: Dict[str, Callable[[random.Random], Any]] = {
+    'dailycanpost': lambda rng: rng.random() < 0.5,
+    'dailychannelid': lambda rng: rng.randrange(10 ** 17, 10 ** 18),
+    'dailylatestmessageid': lambda rng: rng.randrange(10 ** 17, 10 ** 18),
+    'prefix': lambda rng: rng.choice(['/', '!', '?', '$', '%']),
+    'useembeds': lambda rng: rng.random() < 0.5,
+    'usepagination': lambda rng: rng.random() < 0.5,
+}
+
+
+
+
+
+# ---------- Functions ----------
+
+def create_changes(guild_count: int, change_count: int, rng: random.Random) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Returns `change_count` changes of one or two settings of random guilds. Most changes update the auto-daily message, like the auto-daily loop does.
+    """
+    result = []
+    for _ in range(change_count):
+        guild_id = FIRST_GUILD_ID + rng.randrange(guild_count)
+        if rng.random() < 0.8:
+            settings = {'dailylatestmessageid': SETTING_VALUE_FACTORIES['dailylatestmessageid'](rng), 'dailycanpost': True}
+        else:
+            setting_name = rng.choice(sorted(SETTING_VALUE_FACTORIES.keys()))
+            settings = {setting_name: SETTING_VALUE_FACTORIES[setting_name](rng)}
+        result.append((guild_id, settings))
+    return result
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if REPOSITORY_PATH not in sys.path:
+        sys.path.insert(0, REPOSITORY_PATH)
+    from src import server_settings
+    from src import settings
+
+    started_at = datetime.now(timezone.utc)
+    modes_results = {}
+    for mode in MODES:
+        if args.modes and mode not in args.modes:
+            continue
+        rng = random.Random(args.seed)
+        rounds = [create_changes(args.guilds, args.changes, rng) for _ in range(args.rounds)]
+        database = fake_database.FakeDatabase(latency=args.latency)
+        database.add_rows([FIRST_GUILD_ID + index for index in range(args.guilds)])
+        flush_interval = 5.0 if mode == 'write-behind' else 0.0
+
+        round_durations = []
+        update_durations = []
+        flush_durations = []
+        with database.patch(), mock.patch.object(settings, 'SERVER_SETTINGS_FLUSH_INTERVAL', flush_interval):
+            for changes in rounds:
+                round_start = time.perf_counter()
+                for guild_id, guild_settings in changes:
+                    start = time.perf_counter()
+                    await server_settings.update_server_settings(guild_id, guild_settings)
+                    update_durations.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                if not await server_settings.flush_server_settings():
+                    raise RuntimeError('Could not flush the guild settings.')
+                flush_durations.append(time.perf_counter() - start)
+                round_durations.append(time.perf_counter() - round_start)
+
+        expected_rows = __get_expected_rows(database, rounds)
+        modes_results[mode] = {
+            'duration': sum(round_durations),
+            'round_median': statistics.median(round_durations),
+            'update_median': statistics.median(update_durations),
+            'update_p95': __get_percentile(update_durations, 0.95),
+            'flush_median': statistics.median(flush_durations),
+            'statement_count': database.statement_count,
+            'statements_per_round': database.statement_count / len(rounds),
+            'updated_row_count': database.updated_row_count,
+            'is_consistent': database.rows == expected_rows,
+        }
+        print(__format_mode_result(mode, modes_results[mode]))
+
+    return {
+        'version': RESULTS_VERSION,
+        'started_at': started_at.isoformat(),
+        'parameters': {
+            'guilds': args.guilds,
+            'rounds': args.rounds,
+            'changes': args.changes,
+            'latency': args.latency,
+            'seed': args.seed,
+        },
+        'environment': {
+            'bot_version': settings.VERSION,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        },
+        'modes': modes_results,
+    }
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __format_mode_result(mode: str, mode_result: Dict[str, Any]) -> str:
+    return (
+        f'{mode}: {mode_result["duration"]:.2f} s, {mode_result["statements_per_round"]:.0f} statements per round, '
+        f'update median {mode_result["update_median"] * 1000000:.1f} µs, p95 {mode_result["update_p95"] * 1000000:.1f} µs, '
+        f'flush median {mode_result["flush_median"] * 1000:.1f} ms, consistent: {mode_result["is_consistent"]}'
+    )
+
+
+def __get_expected_rows(database: fake_database.FakeDatabase, rounds: List[List[Tuple[int, Dict[str, Any]]]]) -> Dict[int, Dict[str, Any]]:
+    result = {guild_id: {fake_database.GUILD_ID_COLUMN_NAME: guild_id} for guild_id in database.rows.keys()}
+    for changes in rounds:
+        for guild_id, guild_settings in changes:
+            result[guild_id].update(guild_settings)
+    return result
+
+
+def __get_percentile(values: List[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * percentile), len(values) - 1)]
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures writing guild settings changes against the fake database.')
+    parser.add_argument('--guilds', type=int, default=DEFAULT_GUILD_COUNT, help='Number of guilds with settings.')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUND_COUNT, help='Number of rounds, after each of which pending changes get flushed.')
+    parser.add_argument('--changes', type=int, default=DEFAULT_CHANGE_COUNT, help='Number of settings changes per round.')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='Seconds each statement takes.')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--modes', nargs='*', choices=MODES, help='Only run these modes.')
+    parser.add_argument('--output', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
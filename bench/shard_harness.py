@@ -0,0 +1,220 @@
+"""
+Runs the bot with N shards split across processes against the fake Discord gateway and the fake PSS API and reports the CPU and memory usage per process and per shard as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.shard_harness --shards 8 --processes 4 --guilds 4000 --duration 60 --output shard_results.json
+
+The bot processes get started the way the shard coordinator starts them. Each shard identifies with the fake gateway and receives a GUILD_CREATE event per guild it's responsible for. Without a DATABASE_URL the bot's initialization fails after connecting, so the measurements only cover the gateway connections and the guild cache. Point DATABASE_URL at a test database to include the PSS data caches.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from . import fake_discord
+from . import fake_pss_api
+from . import run_benchmarks
+
+
+# ---------- Constants ----------
+
+DEFAULT_DURATION: float = 60.0
+DEFAULT_GUILD_COUNT: int = 2000
+DEFAULT_PROCESS_COUNT: int = 2
+DEFAULT_SAMPLE_INTERVAL: float = 1.0
+DEFAULT_SHARD_COUNT: int = 4
+
+DISCORD_API_URL_ENV: str = 'FAKE_DISCORD_API_URL'
+DISCORD_BOT_TOKEN: str = 'fake-discord-bot-token'
+LOG_PATH_ENV: str = 'SHARD_HARNESS_LOG_PATH'
+RESULTS_VERSION: int = 1
+STOP_TIMEOUT: float = 10.0
+WORK_PATH_ENV: str = 'SHARD_HARNESS_WORK_PATH'
+
+
+
+
+
+# ---------- Functions ----------
+
+async def run_harness(args: argparse.Namespace) -> Dict[str, Any]:
+    pss_api = fake_pss_api.FakePssApi(entity_count=args.entities, latency=args.latency, seed=args.seed)
+    pss_runner = await fake_pss_api.start(pss_api, port=0)
+    discord_api = fake_discord.FakeDiscordApi(latency=0.0, guild_ids=fake_discord.create_guild_ids(args.guilds))
+    discord_runner = await fake_discord.start(discord_api, port=0)
+    work_path = tempfile.mkdtemp(prefix='yadc_shards_')
+    previous_cwd = os.getcwd()
+    os.chdir(run_benchmarks.REPOSITORY_PATH)
+    shard_processes = []
+    try:
+        run_benchmarks.set_up_environment(fake_pss_api.get_base_url(pss_runner))
+        os.environ[DISCORD_API_URL_ENV] = fake_discord.get_base_url(discord_runner)
+        os.environ['DISCORD_BOT_TOKEN'] = DISCORD_BOT_TOKEN
+        os.environ[WORK_PATH_ENV] = work_path
+        if args.logs:
+            os.makedirs(args.logs, exist_ok=True)
+            os.environ[LOG_PATH_ENV] = os.path.abspath(args.logs)
+        from src import settings
+        from src import shards
+
+        shard_processes = [shards.ShardProcess(index, shard_ids, args.shards) for index, shard_ids in enumerate(shards.get_shard_ranges(args.shards, args.processes))]
+        samples: Dict[int, List[Tuple[float, int]]] = {shard_process.index: [] for shard_process in shard_processes}
+        started_at = datetime.now(timezone.utc)
+        start = time.monotonic()
+        for shard_process in shard_processes:
+            shard_process.start()
+
+        all_identified_after = None
+        while time.monotonic() - start < args.duration:
+            await asyncio.sleep(args.interval)
+            for shard_process in shard_processes:
+                resource_usage = shard_process.get_resource_usage()
+                if resource_usage is not None:
+                    samples[shard_process.index].append(resource_usage)
+            if all_identified_after is None and len(discord_api.identified_shards) == args.shards:
+                all_identified_after = time.monotonic() - start
+
+        processes_results = [__get_process_result(shard_process, samples[shard_process.index], discord_api.identified_shards) for shard_process in shard_processes]
+    finally:
+        for shard_process in shard_processes:
+            shard_process.stop()
+        for shard_process in shard_processes:
+            await asyncio.get_running_loop().run_in_executor(None, shard_process.wait, STOP_TIMEOUT)
+        os.chdir(previous_cwd)
+        await discord_runner.cleanup()
+        await pss_runner.cleanup()
+        shutil.rmtree(work_path, ignore_errors=True)
+
+    return {
+        'version': RESULTS_VERSION,
+        'started_at': started_at.isoformat(),
+        'parameters': {
+            'shards': args.shards,
+            'processes': len(shard_processes),
+            'guilds': args.guilds,
+            'duration': args.duration,
+            'interval': args.interval,
+            'entities': args.entities,
+            'latency': args.latency,
+            'seed': args.seed,
+            'database': bool(os.environ.get('DATABASE_URL')),
+        },
+        'environment': {
+            'bot_version': settings.VERSION,
+            'git_commit': run_benchmarks.get_git_commit(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        },
+        'all_identified_after': all_identified_after,
+        'identified_shards': {str(shard_id): count for shard_id, count in sorted(discord_api.identified_shards.items())},
+        'processes': processes_results,
+    }
+
+
+def run_shard_process() -> None:
+    """
+    Runs the bot in a process started by the harness. Requests to the Discord API go to the fake API instead.
+    """
+    from discord import http as discord_http
+    base_url = os.environ[DISCORD_API_URL_ENV]
+    discord_http.Route.base = property(lambda route: base_url)
+
+    log_path = os.environ.get(LOG_PATH_ENV)
+    if log_path:
+        shard_ids = json.loads(os.environ['SHARD_IDS'])
+        log_file = open(os.path.join(log_path, f'shards_{shard_ids[0]}-{shard_ids[-1]}.log'), 'w', encoding='utf-8')
+        os.dup2(log_file.fileno(), sys.stdout.fileno())
+        os.dup2(log_file.fileno(), sys.stderr.fileno())
+
+    from src import settings
+    settings.SPRITE_CACHE_SUB_PATH = os.environ[WORK_PATH_ENV]
+    from src.bot import run_bot
+    run_bot()
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __format_process_result(process_result: Dict[str, Any]) -> str:
+    shard_ids = process_result['shard_ids']
+    result = f'process {process_result["index"]} (shards {shard_ids[0]}-{shard_ids[-1]}): {process_result["identified_shard_count"]}/{len(shard_ids)} identified'
+    if process_result['cpu_percent_mean'] is not None:
+        result += f', cpu mean {process_result["cpu_percent_mean"]:.1f}% ({process_result["cpu_percent_mean_per_shard"]:.1f}% per shard), max {process_result["cpu_percent_max"]:.1f}%'
+    if process_result['rss_last'] is not None:
+        result += f', rss {process_result["rss_last"] / 1024 / 1024:.1f} MiB ({process_result["rss_last_per_shard"] / 1024 / 1024:.1f} MiB per shard), max {process_result["rss_max"] / 1024 / 1024:.1f} MiB'
+    return result
+
+
+def __get_process_result(shard_process: Any, samples: List[Tuple[float, int]], identified_shards: Dict[int, int]) -> Dict[str, Any]:
+    cpu_percents = [cpu_percent for cpu_percent, _ in samples[1:]]
+    rss_values = [rss for _, rss in samples]
+    shard_count = len(shard_process.shard_ids)
+    result = {
+        'index': shard_process.index,
+        'shard_ids': shard_process.shard_ids,
+        'identified_shard_count': sum(1 for shard_id in shard_process.shard_ids if shard_id in identified_shards),
+        'reconnect_count': sum(max(identified_shards.get(shard_id, 0) - 1, 0) for shard_id in shard_process.shard_ids),
+        'sample_count': len(samples),
+        'cpu_percent_mean': statistics.mean(cpu_percents) if cpu_percents else None,
+        'cpu_percent_max': max(cpu_percents) if cpu_percents else None,
+        'rss_last': rss_values[-1] if rss_values else None,
+        'rss_max': max(rss_values) if rss_values else None,
+    }
+    result['cpu_percent_mean_per_shard'] = result['cpu_percent_mean'] / shard_count if result['cpu_percent_mean'] is not None else None
+    result['rss_last_per_shard'] = result['rss_last'] / shard_count if result['rss_last'] is not None else None
+    return result
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    if os.environ.get('SHARD_IDS') and os.environ.get(DISCORD_API_URL_ENV):
+        run_shard_process()
+        return
+
+    parser = argparse.ArgumentParser(description='Measures the resource usage of the bot\'s shard processes against a fake Discord gateway.')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARD_COUNT, help='Total number of shards.')
+    parser.add_argument('--processes', type=int, default=DEFAULT_PROCESS_COUNT, help='Number of processes the shards get split across.')
+    parser.add_argument('--guilds', type=int, default=DEFAULT_GUILD_COUNT, help='Number of guilds spread across the shards.')
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help='Seconds to run the processes for.')
+    parser.add_argument('--interval', type=float, default=DEFAULT_SAMPLE_INTERVAL, help='Seconds between resource usage samples.')
+    parser.add_argument('--entities', type=int, default=fake_pss_api.DEFAULT_ENTITY_COUNT, help='Number of items and crew served by the fake PSS API.')
+    parser.add_argument('--latency', type=float, default=fake_pss_api.DEFAULT_LATENCY, help='Seconds the fake PSS API waits before answering a request.')
+    parser.add_argument('--seed', type=int, default=fake_pss_api.DEFAULT_SEED)
+    parser.add_argument('--logs', help='Write the output of each process to a file in this directory instead of the console.')
+    parser.add_argument('--output', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    # The coordinator starts the bot processes with the arguments of this process, so they need to run this module, too.
+    sys.argv = ['-m', __spec__.name] + sys.argv[1:]
+    results = asyncio.run(run_harness(args))
+    if results['all_identified_after'] is None:
+        print(f'Not all shards identified within {args.duration:.0f} seconds.')
+    else:
+        print(f'All {args.shards} shards identified after {results["all_identified_after"]:.1f} seconds.')
+    for process_result in results['processes']:
+        print(__format_process_result(process_result))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
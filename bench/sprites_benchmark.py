@@ -0,0 +1,148 @@
+"""
+Measures shifting the hue of sprites of growing sizes with the vectorized conversions and with colorsys called per pixel, like before, and writes the results as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.sprites_benchmark --sizes 25 50 100 200 400 800 --iterations 5 --output sprites.json
+
+Ship interiors and rooms with a hue value get colorized this way when drawing layouts. The per pixel conversion gets slow for big sprites, so it's only run for sizes up to --max-colorsys-size.
+"""
+
+import argparse
+import colorsys
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+# ---------- Constants ----------
+
+DEFAULT_HUE: float = 0.3
+DEFAULT_ITERATIONS: int = 5
+DEFAULT_MAX_COLORSYS_SIZE: int = 400
+DEFAULT_SEED: int = 1
+DEFAULT_SIZES: List[int] = [25, 50, 100, 200, 400, 800]
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_VERSION: int = 1
+
+FUNC_HSV_TO_RGB = np.vectorize(colorsys.hsv_to_rgb)
+FUNC_RGB_TO_HSV = np.vectorize(colorsys.rgb_to_hsv)
+
+
+
+
+
+# ---------- Functions ----------
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    if REPOSITORY_PATH not in sys.path:
+        sys.path.insert(0, REPOSITORY_PATH)
+    from src import pss_sprites
+    from src import settings
+
+    started_at = datetime.now(timezone.utc)
+    rng = np.random.RandomState(args.seed)
+    sizes_results = {}
+    for size in args.sizes:
+        arr = rng.randint(0, 256, size=(size, size, 4)).astype('float')
+        size_result = {
+            'pixels': size * size,
+            'vectorized': __measure(lambda: pss_sprites.shift_hue(arr, args.hue), args.iterations),
+            'colorsys': None,
+            'speedup': None,
+            'max_difference': None,
+        }
+        if size <= args.max_colorsys_size:
+            size_result['colorsys'] = __measure(lambda: shift_hue_colorsys(arr, args.hue), args.iterations)
+            size_result['speedup'] = size_result['colorsys']['median'] / size_result['vectorized']['median']
+            size_result['max_difference'] = float(np.abs(pss_sprites.shift_hue(arr, args.hue) - shift_hue_colorsys(arr, args.hue)).max())
+        sizes_results[str(size)] = size_result
+        print(__format_size_result(size, size_result))
+
+    return {
+        'version': RESULTS_VERSION,
+        'started_at': started_at.isoformat(),
+        'parameters': {
+            'sizes': args.sizes,
+            'iterations': args.iterations,
+            'hue': args.hue,
+            'max_colorsys_size': args.max_colorsys_size,
+            'seed': args.seed,
+        },
+        'environment': {
+            'bot_version': settings.VERSION,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        },
+        'sizes': sizes_results,
+    }
+
+
+def shift_hue_colorsys(arr: np.ndarray, hue_out: float) -> np.ndarray:
+    """
+    Shifts the hue like `pss_sprites.shift_hue` did before its conversions got vectorized.
+    """
+    r, g, b, a = np.rollaxis(arr, axis=-1)
+    h, s, v = FUNC_RGB_TO_HSV(r, g, b)
+    h = (h + hue_out) % 1
+    r, g, b = FUNC_HSV_TO_RGB(h, s, v)
+    return np.dstack((r, g, b, a))
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __format_size_result(size: int, size_result: Dict[str, Any]) -> str:
+    result = f'{size}x{size}: vectorized median {size_result["vectorized"]["median"] * 1000:.2f} ms'
+    if size_result['colorsys']:
+        result += f', colorsys median {size_result["colorsys"]["median"] * 1000:.2f} ms, {size_result["speedup"]:.0f}x faster, max difference {size_result["max_difference"]:.2e}'
+    return result
+
+
+def __measure(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    durations = []
+    for _ in range(max(iterations, 1)):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return {
+        'min': min(durations),
+        'median': statistics.median(durations),
+        'max': max(durations),
+    }
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures shifting the hue of sprites of growing sizes.')
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES, help='Widths and heights of the square sprites in pixels.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Number of runs per size and implementation.')
+    parser.add_argument('--hue', type=float, default=DEFAULT_HUE, help='The hue shift, between -1 and 1.')
+    parser.add_argument('--max-colorsys-size', type=int, default=DEFAULT_MAX_COLORSYS_SIZE, help='Only run the per pixel conversion for sprites up to this size.')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help='Write the results to this file.')
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Measures the peak memory and the time needed to convert a large design list response with the tree based and the streaming xml parser and writes the results as JSON.
+
+Run it from the repository root with:
+
+    python -m bench.xml_benchmark --entities 20000 --iterations 5 --output xml.json
+
+The response gets generated by the fake PSS API and written to a temporary file. Each parser runs in its own process, so that the peak resident set size of one doesn't hide the other's. Both parsers must produce the same result, which gets compared by digest.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from . import fake_pss_api
+
+
+# ---------- Constants ----------
+
+DEFAULT_DESIGNS_PATH: str = 'ItemService/ListItemDesigns2'
+DEFAULT_ENTITY_COUNT: int = 20000
+DEFAULT_ITERATIONS: int = 5
+PARSER_NAMES: List[str] = ['elementtree', 'iterparse']
+REPOSITORY_PATH: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_VERSION: int = 1
+
+
+
+
+
+# ---------- Functions ----------
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    started_at = datetime.now(timezone.utc)
+    raw_xml = fake_pss_api.FakePssApi(entity_count=args.entities, latency=0.0, seed=args.seed).get_designs_xml(args.path)
+
+    parsers_results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        xml_file_path = os.path.join(temp_dir, 'designs.xml')
+        with open(xml_file_path, 'w', encoding='utf-8') as fp:
+            fp.write(raw_xml)
+
+        for parser_name in PARSER_NAMES:
+            if args.parsers and parser_name not in args.parsers:
+                continue
+            command = [sys.executable, '-m', __spec__.name, '--child', parser_name, '--xml-file', xml_file_path, '--iterations', str(args.iterations)]
+            completed = subprocess.run(command, cwd=REPOSITORY_PATH, capture_output=True, text=True, check=True)
+            parsers_results[parser_name] = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(__format_parser_result(parser_name, parsers_results[parser_name]))
+
+    digests = {parser_result['digest'] for parser_result in parsers_results.values()}
+    if len(digests) > 1:
+        print('The parsers produced different results!')
+
+    return {
+        'version': RESULTS_VERSION,
+        'started_at': started_at.isoformat(),
+        'parameters': {
+            'entities': args.entities,
+            'iterations': args.iterations,
+            'path': args.path,
+            'seed': args.seed,
+            'xml_length': len(raw_xml),
+        },
+        'environment': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        },
+        'results_match': len(digests) <= 1,
+        'parsers': parsers_results,
+    }
+
+
+def run_child(parser_name: str, xml_file_path: str, iterations: int) -> Dict[str, Any]:
+    """
+    Converts the xml in `xml_file_path` with the parser `parser_name`. Runs in a separate process started by `run_benchmark`.
+    """
+    if REPOSITORY_PATH not in sys.path:
+        sys.path.insert(0, REPOSITORY_PATH)
+    from src.utils import convert
+
+    parse: Callable[[str], Any] = {
+        'elementtree': convert.xmltree_to_dict3,
+        'iterparse': convert.iterparse_xmltree_to_dict3,
+    }[parser_name]
+
+    with open(xml_file_path, 'r', encoding='utf-8') as fp:
+        raw_xml = fp.read()
+
+    baseline_max_rss = __get_max_rss_kb()
+    start = time.perf_counter()
+    result = parse(raw_xml)
+    cold_duration = time.perf_counter() - start
+    peak_max_rss = __get_max_rss_kb()
+    digest = hashlib.sha256(json.dumps(result).encode('utf-8')).hexdigest()
+    entity_count = len(result)
+    del result
+
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        parse(raw_xml)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = parse(raw_xml)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'cold': cold_duration,
+        'median': statistics.median(durations),
+        'min': min(durations),
+        'max': max(durations),
+        'peak_rss_delta_kb': peak_max_rss - baseline_max_rss,
+        'tracemalloc_peak_kb': traced_peak // 1024,
+        'entity_count': entity_count,
+        'digest': digest,
+    }
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __format_parser_result(parser_name: str, parser_result: Dict[str, Any]) -> str:
+    return (
+        f'{parser_name}: cold {parser_result["cold"] * 1000:.1f} ms, median {parser_result["median"] * 1000:.1f} ms, '
+        f'peak RSS +{parser_result["peak_rss_delta_kb"] / 1024:.1f} MiB, traced peak {parser_result["tracemalloc_peak_kb"] / 1024:.1f} MiB, '
+        f'{parser_result["entity_count"]} entities'
+    )
+
+
+def __get_max_rss_kb() -> int:
+    """
+    ru_maxrss survives exec on Linux, so a child process would report the peak of the process that started it. VmHWM doesn't.
+    """
+    try:
+        with open('/proc/self/status', 'r') as fp:
+            for line in fp:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is given in kilobytes on Linux and in bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss // 1024 if sys.platform == 'darwin' else max_rss
+
+
+
+
+
+# ---------- Main ----------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measures converting a large design list response with the tree based and the streaming xml parser.')
+    parser.add_argument('--entities', type=int, default=DEFAULT_ENTITY_COUNT, help='Number of entities in the response.')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='Number of timed conversions after the first one.')
+    parser.add_argument('--path', default=DEFAULT_DESIGNS_PATH, help='The fake API endpoint serving the design list.')
+    parser.add_argument('--seed', type=int, default=fake_pss_api.DEFAULT_SEED)
+    parser.add_argument('--parsers', nargs='*', choices=PARSER_NAMES, help='Only run these parsers.')
+    parser.add_argument('--output', help='Write the results to this file.')
+    parser.add_argument('--child', choices=PARSER_NAMES, help=argparse.SUPPRESS)
+    parser.add_argument('--xml-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.xml_file, args.iterations)))
+        return
+
+    results = run_benchmark(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            json.dump(results, fp, indent=2)
+        print(f'Wrote results to: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,8 @@
 from src.bot import run_bot
+from src import shards
 
 if __name__ == '__main__':
-    run_bot()
\ No newline at end of file
+    if shards.is_coordinator():
+        shards.run_coordinator()
+    else:
+        run_bot()
\ No newline at end of file
@@ -1,9 +1,11 @@
+import asyncio
 import datetime
 import logging
 import json
 import os
 import sys
-from typing import List, Optional, Tuple, Type
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 from discord import Activity, ActivityType, ApplicationCommand, ApplicationContext, Embed, Guild, Intents, Message, SlashCommand, SlashCommandGroup, TextChannel
 from discord import ApplicationCommandInvokeError, CheckFailure
@@ -13,8 +15,11 @@ import discord.errors as errors
 import discord.ext.commands.errors as command_errors
 import discord.ext.tasks as tasks
 
+from . import cache
 from . import database as db
 from .gdrive import TourneyDataClient
+from . import http_client
+from . import metrics
 from . import pss_crew as crew
 from . import pss_daily as daily
 from . import pss_dropship as dropship
@@ -27,8 +32,10 @@ from . import pss_user as user
 from . import server_settings
 from .server_settings import GUILD_SETTINGS
 from . import settings
+from . import shards
+from . import startup
 from . import utils
-from . yadc_bot import YadcBot
+from . yadc_bot import ShardedYadcBot, YadcBot
 
 
 
@@ -46,17 +53,28 @@ INTENTS: Intents = Intents.default()
 if settings.INTENT_MESSAGE_CONTENT:
     INTENTS.message_content = True
 
-BOT = YadcBot(
-    command_prefix=get_prefix,
-    description='This is a Discord Bot for Pixel Starships',
-    activity=Activity(type=ActivityType.playing, name='Slash Commands only. Visit support.dolores2.xyz for help.'),
-    debug_guilds=settings.DEBUG_GUILDS or None,
-    intents=INTENTS,
-)
+BOT_KWARGS: Dict[str, Any] = {
+    'command_prefix': get_prefix,
+    'description': 'This is a Discord Bot for Pixel Starships',
+    'activity': Activity(type=ActivityType.playing, name='Slash Commands only. Visit support.dolores2.xyz for help.'),
+    'debug_guilds': settings.DEBUG_GUILDS or None,
+    'intents': INTENTS,
+}
+
+if settings.SHARD_COUNT or settings.SHARD_IDS:
+    BOT = ShardedYadcBot(
+        shard_count=settings.SHARD_COUNT or None,
+        shard_ids=settings.SHARD_IDS or None,
+        **BOT_KWARGS,
+    )
+else:
+    BOT = YadcBot(**BOT_KWARGS)
 
 
 __COMMANDS = []
 
+__STORED_DAILY_MODIFY_DATE: datetime.datetime = None
+
 INITIALIZED: bool = False
 
 PWD: str = os.getcwd()
@@ -88,6 +106,8 @@ async def on_ready() -> None:
     print(f'Current time: {utils.format.datetime(utils.get_utc_now())}')
     print(f'Current Working Directory: {PWD}')
     print(f'Bot logged in as {BOT.user.name} (id={BOT.user.id}) on {len(BOT.guilds)} servers')
+    if isinstance(BOT, ShardedYadcBot):
+        print(f'Running shards {", ".join(str(shard_id) for shard_id in sorted(BOT.shards.keys()))} of {BOT.shard_count}')
     print(f'Bot version is: {settings.VERSION}')
     schema_version = await db.get_schema_version()
     print(f'DB schema version is: {schema_version}')
@@ -220,6 +240,19 @@ async def on_application_command_error(ctx: ApplicationContext, err: Exception):
             __log_command_use_error(ctx, err, force_printing=True)
 
 
+@BOT.before_invoke
+async def before_invoke(ctx: Context) -> None:
+    setattr(ctx, 'invoked_at', time.perf_counter())
+
+
+@BOT.after_invoke
+async def after_invoke(ctx: Context) -> None:
+    invoked_at = getattr(ctx, 'invoked_at', None)
+    if invoked_at is not None and ctx.command:
+        command_type = 'slash' if isinstance(ctx, ApplicationContext) else 'prefix'
+        metrics.COMMAND_DURATION.observe(time.perf_counter() - invoked_at, command=ctx.command.qualified_name, command_type=command_type)
+
+
 @BOT.event
 async def on_guild_join(guild: Guild) -> None:
     print(f'Joined guild with id {guild.id} ({guild.name})')
@@ -252,8 +285,12 @@ async def post_dailies_loop() -> None:
     utc_now = utils.get_utc_now()
 
     daily_info = await daily.get_daily_info()
-    db_daily_info, db_daily_modify_date = await daily.db_get_daily_info()
-    has_daily_changed = daily.has_daily_changed(daily_info, utc_now, db_daily_info, db_daily_modify_date)
+    is_primary_process = shards.is_primary_process()
+    db_daily_info, db_daily_modify_date = await daily.db_get_daily_info(skip_cache=not is_primary_process)
+    if is_primary_process:
+        has_daily_changed = daily.has_daily_changed(daily_info, utc_now, db_daily_info, db_daily_modify_date)
+    else:
+        has_daily_changed = __get_has_stored_daily_changed(db_daily_modify_date)
 
     if has_daily_changed:
         print(f'[post_dailies_loop] daily info changed:\n{json.dumps(daily_info, indent=2)}')
@@ -264,6 +301,7 @@ async def post_dailies_loop() -> None:
         if autodaily_settings:
             print(f'[post_dailies_loop] retrieved new {len(autodaily_settings)} channels without a post, yet.')
 
+    autodaily_settings = [guild_autodaily_settings for guild_autodaily_settings in autodaily_settings if shards.is_local_guild(guild_autodaily_settings.guild_id)]
     created_output = False
     posted_count = 0
     if autodaily_settings:
@@ -274,29 +312,72 @@ async def post_dailies_loop() -> None:
             posted_count = await post_dailies(current_daily_message, current_daily_embed, autodaily_settings, utc_now)
         print(f'[post_dailies_loop] posted to {posted_count} of {len(autodaily_settings)} guilds')
 
-    if has_daily_changed and (created_output or not autodaily_settings):
+    if is_primary_process and has_daily_changed and (created_output or not autodaily_settings):
         await daily.db_set_daily_info(daily_info, utc_now)
 
 
+def __get_has_stored_daily_changed(db_daily_modify_date: datetime.datetime) -> bool:
+    """
+    When running multiple processes, only the primary process detects changes to the daily and stores them. The other processes post the daily to their guilds, once they find a newly stored daily.
+    """
+    global __STORED_DAILY_MODIFY_DATE
+    if __STORED_DAILY_MODIFY_DATE is None:
+        __STORED_DAILY_MODIFY_DATE = db_daily_modify_date
+        return False
+    if db_daily_modify_date is None or db_daily_modify_date <= __STORED_DAILY_MODIFY_DATE:
+        return False
+    __STORED_DAILY_MODIFY_DATE = db_daily_modify_date
+    return True
+
+
 @post_dailies_loop.before_loop
 async def before_post_dailies_loop() -> None:
     await BOT.wait_until_ready()
 
 
 async def post_dailies(current_daily_message: str, current_daily_embed: Embed, autodaily_settings: List[server_settings.AutoDailySettings], utc_now: datetime.datetime) -> int:
-    posted_count = 0
+    """
+    Posts to up to settings.AUTODAILY_POST_CONCURRENCY channels at the same time. Guilds sharing a channel are processed in order. The results get stored in a single batch after all posts have been processed.
+    """
+    autodaily_settings_by_channel_id: Dict[int, List[server_settings.AutoDailySettings]] = {}
     for guild_autodaily_settings in autodaily_settings:
         if guild_autodaily_settings.guild_id is not None and guild_autodaily_settings.channel_id is not None:
-            posted, can_post, latest_message = await post_autodaily(guild_autodaily_settings.channel, guild_autodaily_settings.latest_message_id, guild_autodaily_settings.change_mode, current_daily_message, current_daily_embed, utc_now)
-            if posted:
-                posted_count += 1
-            else:
-                guild_name = guild_autodaily_settings.guild.name if guild_autodaily_settings.guild else None
-                guild_id = guild_autodaily_settings.guild_id
-                channel_name = f'#{guild_autodaily_settings.channel.name}' if guild_autodaily_settings.channel else '<not accessible>'
-                channel_id = guild_autodaily_settings.channel_id
-                print(f'[post_dailies] Failed to post to guild \'{guild_name}\' ({guild_id}), channel \'{channel_name}\' ({channel_id})')
-            await guild_autodaily_settings.update(can_post=can_post, latest_message=latest_message, store_now_as_created_at=(not can_post and not latest_message))
+            autodaily_settings_by_channel_id.setdefault(guild_autodaily_settings.channel_id, []).append(guild_autodaily_settings)
+    if not autodaily_settings_by_channel_id:
+        return 0
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for channel_autodaily_settings in autodaily_settings_by_channel_id.values():
+        queue.put_nowait(channel_autodaily_settings)
+
+    updates: List[Tuple[server_settings.AutoDailySettings, Dict]] = []
+    posted_count = 0
+
+    async def worker() -> None:
+        nonlocal posted_count
+        while not queue.empty():
+            channel_autodaily_settings = queue.get_nowait()
+            for guild_autodaily_settings in channel_autodaily_settings:
+                try:
+                    posted, can_post, latest_message = await post_autodaily(guild_autodaily_settings.channel, guild_autodaily_settings.latest_message_id, guild_autodaily_settings.change_mode, current_daily_message, current_daily_embed, utc_now)
+                except Exception as err:
+                    print(f'[post_dailies] {err.__class__.__name__}: {err}')
+                    continue
+                if posted:
+                    posted_count += 1
+                else:
+                    guild_name = guild_autodaily_settings.guild.name if guild_autodaily_settings.guild else None
+                    guild_id = guild_autodaily_settings.guild_id
+                    channel_name = f'#{guild_autodaily_settings.channel.name}' if guild_autodaily_settings.channel else '<not accessible>'
+                    channel_id = guild_autodaily_settings.channel_id
+                    print(f'[post_dailies] Failed to post to guild \'{guild_name}\' ({guild_id}), channel \'{channel_name}\' ({channel_id})')
+                updates.append((guild_autodaily_settings, guild_autodaily_settings.get_update_settings(can_post=can_post, latest_message=latest_message, store_now_as_created_at=(not can_post and not latest_message))))
+
+    worker_count = max(1, min(settings.AUTODAILY_POST_CONCURRENCY, len(autodaily_settings_by_channel_id)))
+    await asyncio.gather(*[worker() for _ in range(worker_count)])
+
+    if not await server_settings.update_autodaily_settings(updates):
+        print(f'[post_dailies] Could not store the autodaily settings of all {len(updates)} guilds.')
     return posted_count
 
 
@@ -438,17 +519,26 @@ def __log_slash_command_use_error(ctx: ApplicationContext, err: Exception, force
 
 async def __initialize() -> None:
     print('Initializing.')
-    await db.init()
-    await server_settings.init(BOT)
-    await server_settings.clean_up_invalid_server_settings(BOT)
-    await sprites.init()
-    await login.init()
-    await daily.init()
-
-    await crew.init()
-    await item.init()
-    await room.init()
-    await user.init()
+    startup_steps = [
+        startup.StartupStep('http_client', http_client.init),
+        startup.StartupStep('metrics', metrics.init),
+        startup.StartupStep('cache', cache.init, depends_on=['http_client']),
+        startup.StartupStep('db', db.init),
+        startup.StartupStep('server_settings', lambda: server_settings.init(BOT), depends_on=['db']),
+        startup.StartupStep('clean_up_server_settings', lambda: server_settings.clean_up_invalid_server_settings(BOT), depends_on=['server_settings']),
+        startup.StartupStep('sprites', sprites.init),
+        startup.StartupStep('login', login.init, depends_on=['db']),
+        startup.StartupStep('daily', daily.init, depends_on=['db']),
+        startup.StartupStep('crew', crew.init, depends_on=['cache']),
+        startup.StartupStep('item', item.init, depends_on=['cache']),
+        startup.StartupStep('room', room.init, depends_on=['cache']),
+        startup.StartupStep('user', user.init, depends_on=['http_client']),
+    ]
+    if BOT.tournament_data_client:
+        startup_steps.append(startup.StartupStep('tournament_data', BOT.tournament_data_client.init))
+    await startup.run(startup_steps)
+    for line in startup.get_report(startup_steps):
+        print(f'[initialize] {line}')
 
     global __COMMANDS
     __COMMANDS = sorted([key for key, value in BOT.all_commands.items() if hasattr(value, 'hidden') and value.hidden == False])
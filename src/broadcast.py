@@ -0,0 +1,320 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from discord import errors as discord_errors
+
+from . import settings
+from . import utils
+
+
+# ---------- Constants ----------
+
+CHANNEL_BURST: int = 5
+CHANNEL_REQUESTS_PER_SECOND: float = 1.0
+
+JOBS_PATH: str = None
+
+RETRY_BACKOFF_BASE: float = 1.0
+RETRY_BACKOFF_MAX: float = 60.0
+RETRY_JITTER: float = 1.0
+
+SAVE_INTERVAL: float = 2.0
+
+SendFunction = Callable[[int, Dict[str, Any]], Awaitable[None]]
+ProgressCallback = Callable[['BroadcastJob'], Awaitable[None]]
+
+__GLOBAL_BUCKET: 'TokenBucket' = None
+
+
+
+
+
+# ---------- Classes ----------
+
+class TokenBucket():
+    """
+    Hands out up to `burst` tokens at once and refills `rate` tokens per second. Can be paused, e.g. when Discord asks to retry after a while.
+    """
+    def __init__(self, rate: float, burst: float) -> None:
+        self.__rate: float = rate
+        self.__burst: float = burst
+        self.__tokens: float = burst
+        self.__updated_at: float = time.monotonic()
+        self.__paused_until: float = 0.0
+
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.__paused_until:
+                await asyncio.sleep(self.__paused_until - now)
+                continue
+            self.__tokens = min(self.__burst, self.__tokens + (now - self.__updated_at) * self.__rate)
+            self.__updated_at = now
+            if self.__tokens >= 1.0:
+                self.__tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self.__tokens) / self.__rate)
+
+
+    def pause(self, seconds: float) -> None:
+        self.__paused_until = max(self.__paused_until, time.monotonic() + seconds)
+
+
+class BroadcastJob():
+    """
+    Tracks which channels a message has been sent to. Gets saved while being run, so an interrupted broadcast can be resumed.
+    """
+    def __init__(self, name: str, payload: Dict[str, Any], channel_ids: List[int], job_id: str = None, sent_channel_ids: List[int] = None, failed_channel_ids: List[int] = None, created_at: str = None) -> None:
+        self.__id: str = job_id or uuid.uuid4().hex
+        self.__name: str = name
+        self.__payload: Dict[str, Any] = payload
+        self.__channel_ids: List[int] = list(dict.fromkeys(channel_ids))
+        self.__sent_channel_ids: List[int] = list(sent_channel_ids or [])
+        self.__failed_channel_ids: List[int] = list(failed_channel_ids or [])
+        self.__created_at: str = created_at or utils.get_utc_now().isoformat()
+
+
+    @property
+    def created_at(self) -> str:
+        return self.__created_at
+
+    @property
+    def failed_count(self) -> int:
+        return len(self.__failed_channel_ids)
+
+    @property
+    def id(self) -> str:
+        return self.__id
+
+    @property
+    def is_finished(self) -> bool:
+        return not self.pending_channel_ids
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        return dict(self.__payload)
+
+    @property
+    def pending_channel_ids(self) -> List[int]:
+        done_channel_ids = set(self.__sent_channel_ids) | set(self.__failed_channel_ids)
+        return [channel_id for channel_id in self.__channel_ids if channel_id not in done_channel_ids]
+
+    @property
+    def sent_count(self) -> int:
+        return len(self.__sent_channel_ids)
+
+    @property
+    def total_count(self) -> int:
+        return len(self.__channel_ids)
+
+
+    def get_progress_text(self) -> str:
+        return f'Sent {self.sent_count} of {self.total_count} messages, {self.failed_count} failed.'
+
+
+    def set_failed(self, channel_id: int) -> None:
+        self.__failed_channel_ids.append(channel_id)
+
+
+    def set_sent(self, channel_id: int) -> None:
+        self.__sent_channel_ids.append(channel_id)
+
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.__id,
+            'name': self.__name,
+            'payload': self.__payload,
+            'channel_ids': self.__channel_ids,
+            'sent_channel_ids': self.__sent_channel_ids,
+            'failed_channel_ids': self.__failed_channel_ids,
+            'created_at': self.__created_at,
+        }
+
+
+    @staticmethod
+    def from_dict(job_dict: Dict[str, Any]) -> 'BroadcastJob':
+        return BroadcastJob(
+            job_dict['name'],
+            job_dict['payload'],
+            job_dict['channel_ids'],
+            job_id=job_dict['id'],
+            sent_channel_ids=job_dict.get('sent_channel_ids'),
+            failed_channel_ids=job_dict.get('failed_channel_ids'),
+            created_at=job_dict.get('created_at'),
+        )
+
+
+
+
+
+# ---------- Functions ----------
+
+async def acquire_global_token() -> None:
+    """
+    Waits for a token of the global rate limit shared by all broadcasts. Send functions making additional requests to Discord, e.g. to fetch a channel, need to acquire a token per request.
+    """
+    await __get_global_bucket().acquire()
+
+
+async def get_unfinished_job(name: str) -> Optional[BroadcastJob]:
+    """
+    Returns the most recently created, unfinished job with the specified name, if there's one.
+    """
+    jobs = await asyncio.get_running_loop().run_in_executor(None, _read_jobs, __get_jobs_path())
+    jobs = [job for job in jobs if job.name == name and not job.is_finished]
+    if jobs:
+        return max(jobs, key=lambda job: job.created_at)
+    return None
+
+
+async def run(job: BroadcastJob, send_function: SendFunction, on_progress: ProgressCallback = None, concurrency: int = None) -> BroadcastJob:
+    """
+    Sends the payload of the job to all of its pending channels by calling the send function with a channel id and the payload.
+
+    Sends to up to `concurrency` channels at the same time, while staying within a global and a per channel rate limit. Rate limited sends get retried after the time requested by Discord plus some jitter. Channels, which can't be sent to, get marked as failed. The job gets saved regularly, so it can be resumed, if the broadcast gets interrupted.
+    """
+    concurrency = concurrency or settings.BROADCAST_CONCURRENCY
+    jobs_path = __get_jobs_path()
+    global_bucket = __get_global_bucket()
+    channel_buckets: Dict[int, TokenBucket] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for channel_id in job.pending_channel_ids:
+        queue.put_nowait(channel_id)
+
+    last_saved_at = time.monotonic()
+
+    async def save_progress(force: bool = False) -> None:
+        nonlocal last_saved_at
+        if force or time.monotonic() - last_saved_at >= SAVE_INTERVAL:
+            last_saved_at = time.monotonic()
+            await __save_job(job, jobs_path)
+            if on_progress:
+                try:
+                    await on_progress(job)
+                except Exception as err:
+                    print(f'[broadcast.run] Could not report progress of job \'{job.id}\': {err.__class__.__name__}: {err}')
+
+    async def worker() -> None:
+        while not queue.empty():
+            channel_id = queue.get_nowait()
+            channel_bucket = channel_buckets.setdefault(channel_id, TokenBucket(CHANNEL_REQUESTS_PER_SECOND, CHANNEL_BURST))
+            if await __send_with_retries(channel_id, job.payload, send_function, global_bucket, channel_bucket):
+                job.set_sent(channel_id)
+            else:
+                job.set_failed(channel_id)
+            await save_progress()
+
+    await __save_job(job, jobs_path)
+    workers = [asyncio.get_running_loop().create_task(worker()) for _ in range(max(1, min(concurrency, queue.qsize())))]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await save_progress(force=True)
+    return job
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _read_jobs(jobs_path: str) -> List[BroadcastJob]:
+    result = []
+    if not os.path.isdir(jobs_path):
+        return result
+    for file_name in os.listdir(jobs_path):
+        if not file_name.endswith('.json'):
+            continue
+        file_path = os.path.join(jobs_path, file_name)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as fp:
+                result.append(BroadcastJob.from_dict(json.load(fp)))
+        except Exception as err:
+            print(f'[broadcast._read_jobs] Could not read broadcast job from: {file_path}\n{err.__class__.__name__}: {err}')
+    return result
+
+
+def _write_job(jobs_path: str, job_dict: Dict[str, Any]) -> None:
+    if not os.path.isdir(jobs_path):
+        os.makedirs(jobs_path)
+    file_path = os.path.join(jobs_path, f'{job_dict["id"]}.json')
+    temp_file_path = f'{file_path}.tmp'
+    with open(temp_file_path, 'w', encoding='utf-8') as fp:
+        json.dump(job_dict, fp)
+    os.replace(temp_file_path, file_path)
+
+
+def __get_global_bucket() -> TokenBucket:
+    global __GLOBAL_BUCKET
+    if __GLOBAL_BUCKET is None:
+        __GLOBAL_BUCKET = TokenBucket(settings.BROADCAST_REQUESTS_PER_SECOND, settings.BROADCAST_REQUESTS_PER_SECOND)
+    return __GLOBAL_BUCKET
+
+
+def __get_jobs_path() -> str:
+    return JOBS_PATH or os.path.join(os.getcwd(), settings.BROADCAST_JOBS_SUB_PATH)
+
+
+def __get_retry_after(err: discord_errors.HTTPException) -> Optional[float]:
+    headers = getattr(err.response, 'headers', None) or {}
+    retry_after = headers.get('Retry-After')
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+
+async def __save_job(job: BroadcastJob, jobs_path: str) -> None:
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _write_job, jobs_path, job.to_dict())
+    except Exception as err:
+        print(f'[broadcast.__save_job] Could not save broadcast job \'{job.id}\' to: {jobs_path}\n{err.__class__.__name__}: {err}')
+
+
+async def __send_with_retries(channel_id: int, payload: Dict[str, Any], send_function: SendFunction, global_bucket: TokenBucket, channel_bucket: TokenBucket) -> bool:
+    """
+    Returns True, if the payload has been sent.
+    """
+    for attempt in range(1, settings.BROADCAST_MAX_ATTEMPTS + 1):
+        await global_bucket.acquire()
+        await channel_bucket.acquire()
+        try:
+            await send_function(channel_id, payload)
+            return True
+        except (discord_errors.Forbidden, discord_errors.NotFound):
+            return False
+        except discord_errors.HTTPException as err:
+            if err.status == 429:
+                retry_after = __get_retry_after(err) or RETRY_BACKOFF_BASE
+                headers = getattr(err.response, 'headers', None) or {}
+                if headers.get('X-RateLimit-Global'):
+                    global_bucket.pause(retry_after)
+                else:
+                    channel_bucket.pause(retry_after)
+                delay = retry_after + random.uniform(0, RETRY_JITTER)
+            elif err.status >= 500:
+                delay = min(RETRY_BACKOFF_BASE * 2 ** (attempt - 1), RETRY_BACKOFF_MAX) + random.uniform(0, RETRY_JITTER)
+            else:
+                print(f'[broadcast.__send_with_retries] Could not send to channel {channel_id}: {err.__class__.__name__}: {err}')
+                return False
+        except Exception as err:
+            print(f'[broadcast.__send_with_retries] Could not send to channel {channel_id}: {err.__class__.__name__}: {err}')
+            return False
+        if attempt < settings.BROADCAST_MAX_ATTEMPTS:
+            await asyncio.sleep(delay)
+    print(f'[broadcast.__send_with_retries] Giving up on channel {channel_id} after {settings.BROADCAST_MAX_ATTEMPTS} attempts.')
+    return False
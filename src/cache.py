@@ -1,14 +1,34 @@
+import asyncio
 import datetime
-import random
-from threading import Lock
+import hashlib
+import json
+import os
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, TextIO, Tuple
 
-from . import pss_core as core
+from . import metrics
+from . import settings
 from . import utils
 from .typehints import EntitiesData
 
 
+# ---------- Constants ----------
+
+CACHES: List['PssCache'] = []
+
+REFRESH_BACKOFF_BASE: datetime.timedelta = datetime.timedelta(seconds=5)
+REFRESH_BACKOFF_MAX: datetime.timedelta = datetime.timedelta(minutes=5)
+
+SNAPSHOT_LOCK_RETRY_INTERVAL: float = 0.05
+SNAPSHOT_LOCK_TIMEOUT: float = 5.0
+SNAPSHOTS_PATH: str = None
+
+__DATA_VERSION: int = 0
+
+
+
+
+
 # ---------- Classes ----------
 
 class PssCache:
@@ -20,59 +40,168 @@ class PssCache:
         self.__UPDATE_INTERVAL_ORIG: int = update_interval
 
         self.__data: str = None
+        self.__data_dict3: EntitiesData = None
+        self.__raw_data_dict: Tuple[str, Dict] = None
         self.__modify_date: datetime.datetime = None
-        self.__WRITE_LOCK: Lock = Lock()
-        self.__READ_LOCK: Lock = Lock()
-        self.__write_requested: bool = False
-        self.__reader_count: int = 0
+        self.__snapshot_modify_date: datetime.datetime = None
+
+        self.__update_task: asyncio.Task = None
+        self.__failure_count: int = 0
+        self.__retry_after: datetime.datetime = None
+
+        self.__hits: int = 0
+        self.__stale_hits: int = 0
+        self.__misses: int = 0
+        self.__refresh_count: int = 0
+        self.__refresh_failure_count: int = 0
+        self.__parse_count: int = 0
+        self.__parse_time: float = 0.0
+        self.__last_parse_time: float = None
+
+        self.__snapshot_file_name: str = f'{name or hashlib.md5(update_path.encode("utf-8")).hexdigest()}.json'
+        CACHES.append(self)
+
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def last_parse_time(self) -> Optional[float]:
+        """
+        Duration of the most recent parse in seconds.
+        """
+        return self.__last_parse_time
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
 
+    @property
+    def modify_date(self) -> Optional[datetime.datetime]:
+        return self.__modify_date
 
     @property
     def name(self) -> Optional[str]:
         return self.__name
 
+    @property
+    def parse_count(self) -> int:
+        return self.__parse_count
 
-    async def update_data(self, old_data: str = None) -> bool:
-        data = await core.get_data_from_path(self.__update_path)
-        data_changed = data != old_data
-        if data_changed:
-            self.__request_write()
-            can_write = False
-            while not can_write:
-                can_write = self.__get_reader_count() == 0
-                if not can_write:
-                    time.sleep(random.random())
-            self.__write_data(data)
-            self.__finish_write()
-            return True
-        return False
+    @property
+    def parse_time(self) -> float:
+        """
+        Total time spent parsing in seconds.
+        """
+        return self.__parse_time
 
+    @property
+    def refresh_count(self) -> int:
+        return self.__refresh_count
 
-    async def get_raw_data(self) -> str:
-        if self.__get_is_data_outdated():
-            await self.update_data()
+    @property
+    def refresh_failure_count(self) -> int:
+        return self.__refresh_failure_count
+
+    @property
+    def stale_hits(self) -> int:
+        """
+        Number of reads served with outdated data while a refresh was pending.
+        """
+        return self.__stale_hits
+
+
+    async def load_snapshot(self) -> bool:
+        """
+        Loads the payload of the last successful refresh from disk, if there's a snapshot for this cache. The data keeps its original fetch date, so it'll be revalidated as soon as it's outdated.
+
+        Returns True, if a snapshot has been loaded.
+        """
+        if not SNAPSHOTS_PATH or self.__data is not None:
+            return False
+
+        file_path = self.__get_snapshot_file_path()
+        try:
+            snapshot_modify_date = _get_snapshot_modify_date(file_path)
+            snapshot = await asyncio.get_running_loop().run_in_executor(None, _read_snapshot, file_path)
+        except FileNotFoundError:
+            return False
+        except Exception as err:
+            print(f'[PssCache.load_snapshot] Could not read snapshot for cache \'{self.__name}\' from: {file_path}\n{err.__class__.__name__}: {err}')
+            return False
+
+        if snapshot.get('path') != self.__update_path or not snapshot.get('data'):
+            return False
+
+        data = snapshot['data']
+        data_dict3 = self.__get_snapshot_data_dict3(snapshot)
+        if self.__data is None:
+            self.__data = data
+            self.__data_dict3 = data_dict3
+            self.__modify_date = datetime.datetime.fromisoformat(snapshot['fetched_at'])
+            self.__snapshot_modify_date = snapshot_modify_date
+            _increase_data_version()
+        return True
+
+
+    def request_update(self) -> None:
+        """
+        Starts a refresh in the background, unless one is in flight already or refreshing is backing off after a failure.
+        """
+        if not self.__get_is_backing_off():
+            self.__get_update_task()
+
+
+    async def update_data(self) -> bool:
+        """
+        Refreshes the cached data. If a refresh is already in flight, waits for that one instead of starting another.
+
+        Returns True, if the payload changed.
+        """
+        task = self.__get_update_task()
+        return await asyncio.shield(task)
 
-        can_read = False
-        while not can_read:
-            can_read = not self.__get_write_requested()
-            if not can_read:
-                time.sleep(random.random())
 
-        self.__add_reader()
-        result = self.__read_data()
-        self.__remove_reader()
+    async def get_raw_data(self) -> str:
+        result, _ = await self.__get_data()
         return result
 
 
     async def get_raw_data_dict(self) -> Dict:
+        """
+        The result is shared between all callers and must not be modified.
+        """
         raw_data = await self.get_raw_data()
-        result = utils.convert.raw_xml_to_dict(raw_data)
-        return result
+        result = self.__raw_data_dict
+        if result is None or result[0] is not raw_data:
+            result = (raw_data, utils.convert.raw_xml_to_dict(raw_data))
+            self.__raw_data_dict = result
+        return result[1]
 
 
     async def get_data_dict3(self) -> EntitiesData:
-        data = await self.get_raw_data()
-        return utils.convert.xmltree_to_dict3(data)
+        """
+        The result is shared between all callers and must not be modified.
+        """
+        _, result = await self.__get_data()
+        return result
+
+
+    async def __get_data(self) -> Tuple[str, EntitiesData]:
+        if self.__data is None or self.__UPDATE_INTERVAL_ORIG == 0:
+            self.__misses += 1
+            await self.update_data()
+        elif self.__get_is_data_outdated():
+            self.__stale_hits += 1
+            self.request_update()
+        else:
+            self.__hits += 1
+        return self.__data, self.__data_dict3
+
+
+    def __get_is_backing_off(self) -> bool:
+        return self.__retry_after is not None and utils.get_utc_now() < self.__retry_after
 
 
     def __get_is_data_outdated(self) -> bool:
@@ -80,60 +209,304 @@ class PssCache:
             return True
 
         utc_now = utils.get_utc_now()
-        self.__WRITE_LOCK.acquire()
         modify_date = self.__modify_date
-        self.__WRITE_LOCK.release()
         result = modify_date is None or utc_now - modify_date > self.__UPDATE_INTERVAL
         return result
 
 
-    def __get_reader_count(self) -> int:
-        self.__READ_LOCK.acquire()
-        result = self.__reader_count
-        self.__READ_LOCK.release()
+    def __get_snapshot_data_dict3(self, snapshot: Dict) -> EntitiesData:
+        """
+        Snapshots contain the parsed data, so that processes sharing them don't have to parse the data themselves. Older snapshots only contain the raw data.
+        """
+        result = snapshot.get('entities')
+        if result is None:
+            result = self.__parse_data(snapshot['data'])
         return result
 
 
-    def __get_write_requested(self) -> bool:
-        self.__WRITE_LOCK.acquire()
-        result = self.__write_requested
-        self.__WRITE_LOCK.release()
-        return result
+    def __get_snapshot_file_path(self) -> str:
+        return os.path.join(SNAPSHOTS_PATH, self.__snapshot_file_name)
+
 
+    def __get_update_task(self) -> asyncio.Task:
+        if self.__update_task is None or self.__update_task.done():
+            self.__update_task = asyncio.get_running_loop().create_task(self.__update_data())
+            self.__update_task.add_done_callback(self.__on_update_done)
+        return self.__update_task
 
-    def __request_write(self) -> None:
-        self.__WRITE_LOCK.acquire()
-        self.__write_requested = True
-        self.__WRITE_LOCK.release()
 
+    def __on_update_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            err = task.exception()
+            print(f'[PssCache.update_data] Could not update cache \'{self.__name}\' (attempt {self.__failure_count}, retrying after {self.__retry_after}): {err.__class__.__name__}: {err}')
 
-    def __finish_write(self) -> None:
-        self.__WRITE_LOCK.acquire()
-        self.__write_requested = False
-        self.__WRITE_LOCK.release()
+
+    def __parse_data(self, data: str) -> EntitiesData:
+        start = time.perf_counter()
+        result = utils.convert.iterparse_xmltree_to_dict3(data)
+        self.__last_parse_time = time.perf_counter() - start
+        self.__parse_time += self.__last_parse_time
+        self.__parse_count += 1
+        return result
 
 
-    def __write_data(self, data: str) -> None:
-        self.__WRITE_LOCK.acquire()
-        self.__data = data
+    async def __fetch_data(self) -> bool:
+        # pss_core imports pss_entity, which imports this module.
+        from . import pss_core as core
+
+        self.__refresh_count += 1
+        fetch_started_at = utils.get_utc_now()
+        try:
+            with metrics.CACHE_REFRESH_DURATION.time(cache=self.__name, status='error') as labels:
+                url = await core.get_url_from_path(self.__update_path)
+                data = await core.get_data_from_url(url)
+                data_changed = data != self.__data
+                if data_changed:
+                    data_dict3 = self.__parse_data(data)
+                labels['status'] = 'changed' if data_changed else 'unchanged'
+        except Exception:
+            self.__refresh_failure_count += 1
+            self.__failure_count += 1
+            backoff = min(REFRESH_BACKOFF_BASE * 2 ** min(self.__failure_count - 1, 10), REFRESH_BACKOFF_MAX)
+            self.__retry_after = utils.get_utc_now() + backoff
+            raise
+
+        self.__failure_count = 0
+        self.__retry_after = None
+        if data_changed:
+            self.__data = data
+            self.__data_dict3 = data_dict3
+            _increase_data_version()
         self.__modify_date = utils.get_utc_now()
-        self.__WRITE_LOCK.release()
+        await self.__write_snapshot(data, self.__data_dict3, url, self.__modify_date, data_changed, fetch_started_at)
+        return data_changed
+
+
+    async def __update_data(self) -> bool:
+        """
+        While snapshots are enabled, processes sharing the snapshot directory share their refreshed data. If another process refreshed the data recently, its snapshot gets used instead of fetching the data again.
+        """
+        if SNAPSHOTS_PATH:
+            result = await self.__update_data_from_snapshot(self.__get_snapshot_file_path())
+            if result is not None:
+                return result
+        return await self.__fetch_data()
+
+
+    async def __update_data_from_snapshot(self, file_path: str) -> Optional[bool]:
+        """
+        The modification date of a snapshot is the date its data has last been fetched.
+
+        Returns None, if the snapshot hasn't been written by another process since this one wrote or read it or if it's outdated. Else returns True, if the payload changed.
+        """
+        try:
+            snapshot_modify_date = _get_snapshot_modify_date(file_path)
+        except OSError:
+            return None
+        if snapshot_modify_date == self.__snapshot_modify_date:
+            return None
+        if utils.get_utc_now() - snapshot_modify_date > self.__UPDATE_INTERVAL:
+            return None
+
+        try:
+            snapshot = await asyncio.get_running_loop().run_in_executor(None, _read_snapshot, file_path)
+        except Exception as err:
+            print(f'[PssCache.__update_data_from_snapshot] Could not read snapshot for cache \'{self.__name}\' from: {file_path}\n{err.__class__.__name__}: {err}')
+            return None
+        if snapshot.get('path') != self.__update_path or not snapshot.get('data'):
+            return None
+
+        data = snapshot['data']
+        data_changed = data != self.__data
+        if data_changed:
+            self.__data_dict3 = self.__get_snapshot_data_dict3(snapshot)
+            self.__data = data
+            _increase_data_version()
+        self.__failure_count = 0
+        self.__retry_after = None
+        self.__modify_date = snapshot_modify_date
+        self.__snapshot_modify_date = snapshot_modify_date
+        return data_changed
+
+
+    async def __write_snapshot(self, data: str, data_dict3: EntitiesData, url: str, fetched_at: datetime.datetime, data_changed: bool, fetch_started_at: datetime.datetime) -> None:
+        """
+        The snapshot only gets locked while comparing and writing it, never while fetching. If another process has written it since this one started fetching, its data is at least as recent, so it's left alone. If the data didn't change and the snapshot hasn't been written by another process in the meantime, only the modification date of the snapshot gets updated.
+        """
+        if not SNAPSHOTS_PATH:
+            return
+
+        snapshot = {
+            'name': self.__name,
+            'path': self.__update_path,
+            'url': url,
+            'fetched_at': fetched_at.isoformat(),
+            'data': data,
+            'entities': data_dict3,
+        }
+        file_path = self.__get_snapshot_file_path()
+        lock_fp = await _acquire_snapshot_lock(file_path)
+        if lock_fp is None:
+            print(f'[PssCache.__write_snapshot] Could not lock snapshot for cache \'{self.__name}\' within {SNAPSHOT_LOCK_TIMEOUT} seconds, not writing it to: {file_path}')
+            return
+
+        try:
+            snapshot_modify_date = await asyncio.get_running_loop().run_in_executor(None, _write_snapshot, file_path, snapshot, self.__snapshot_modify_date, not data_changed, fetch_started_at)
+        except Exception as err:
+            print(f'[PssCache.__write_snapshot] Could not write snapshot for cache \'{self.__name}\' to: {file_path}\n{err.__class__.__name__}: {err}')
+        else:
+            if snapshot_modify_date is not None:
+                self.__snapshot_modify_date = snapshot_modify_date
+        finally:
+            utils.io.release_file_lock(lock_fp)
+
+
+
+
+
+# ---------- Functions ----------
+
+def get_data_version() -> int:
+    """
+    Returns a number, which increases whenever any cache received new data. Results derived from cached data can be reused for as long as it doesn't change.
+    """
+    return __DATA_VERSION
+
+
+async def read_shared_snapshot(file_name: str) -> Optional[Dict]:
+    """
+    Reads a snapshot of derived data from the snapshot directory, so that processes sharing that directory don't have to derive the data themselves.
+
+    Returns None, if snapshots are disabled or if there's no readable snapshot with that name.
+    """
+    if not SNAPSHOTS_PATH:
+        return None
+
+    file_path = os.path.join(SNAPSHOTS_PATH, file_name)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, _read_snapshot, file_path)
+    except FileNotFoundError:
+        return None
+    except Exception as err:
+        print(f'[read_shared_snapshot] Could not read snapshot from: {file_path}\n{err.__class__.__name__}: {err}')
+        return None
+
+
+async def write_shared_snapshot(file_name: str, snapshot: Dict) -> bool:
+    """
+    Returns True, if the snapshot has been written.
+    """
+    if not SNAPSHOTS_PATH:
+        return False
+
+    file_path = os.path.join(SNAPSHOTS_PATH, file_name)
+    lock_fp = await _acquire_snapshot_lock(file_path)
+    if lock_fp is None:
+        print(f'[write_shared_snapshot] Could not lock snapshot within {SNAPSHOT_LOCK_TIMEOUT} seconds, not writing it to: {file_path}')
+        return False
+
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _write_snapshot, file_path, snapshot)
+    except Exception as err:
+        print(f'[write_shared_snapshot] Could not write snapshot to: {file_path}\n{err.__class__.__name__}: {err}')
+        return False
+    finally:
+        utils.io.release_file_lock(lock_fp)
+    return True
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _collect_metrics() -> None:
+    for pss_cache in CACHES:
+        __CACHE_HITS.set(pss_cache.hits, cache=pss_cache.name)
+        __CACHE_STALE_HITS.set(pss_cache.stale_hits, cache=pss_cache.name)
+        __CACHE_MISSES.set(pss_cache.misses, cache=pss_cache.name)
+        __CACHE_PARSE_TIME.set(pss_cache.parse_time, cache=pss_cache.name)
+        __CACHE_REFRESH_FAILURES.set(pss_cache.refresh_failure_count, cache=pss_cache.name)
+
+
+def _increase_data_version() -> None:
+    global __DATA_VERSION
+    __DATA_VERSION += 1
+
+
+async def _acquire_snapshot_lock(file_path: str) -> Optional[TextIO]:
+    """
+    Retries acquiring the lock on the snapshot without blocking the event loop for up to SNAPSHOT_LOCK_TIMEOUT seconds.
+
+    Returns None, if the lock couldn't be acquired in time.
+    """
+    deadline = time.monotonic() + SNAPSHOT_LOCK_TIMEOUT
+    while True:
+        result = utils.io.try_acquire_file_lock(file_path)
+        if result is not None or time.monotonic() >= deadline:
+            return result
+        await asyncio.sleep(SNAPSHOT_LOCK_RETRY_INTERVAL)
+
+
+def _get_snapshot_modify_date(file_path: str) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(os.path.getmtime(file_path), tz=datetime.timezone.utc)
+
+
+def _read_snapshot(file_path: str) -> Dict:
+    with open(file_path, 'r', encoding='utf-8') as fp:
+        result = json.load(fp)
+    return result
+
+
+def _write_snapshot(file_path: str, snapshot: Dict, known_modify_date: datetime.datetime = None, touch_only: bool = False, skip_if_modified_after: datetime.datetime = None) -> Optional[datetime.datetime]:
+    """
+    Leaves the snapshot alone, if it has been modified after `skip_if_modified_after` at another than the known modification date. If `touch_only` is True, only updates the modification date, if the snapshot has been last modified at the known modification date.
+
+    Returns the modification date of the snapshot or None, if it has been left alone.
+    """
+    modify_date = _get_snapshot_modify_date(file_path) if os.path.isfile(file_path) else None
+    if modify_date is not None and modify_date != known_modify_date and skip_if_modified_after is not None and modify_date > skip_if_modified_after:
+        return None
+
+    if touch_only and modify_date is not None and modify_date == known_modify_date:
+        os.utime(file_path)
+    else:
+        temp_file_path = f'{file_path}.tmp'
+        with open(temp_file_path, 'w', encoding='utf-8') as fp:
+            json.dump(snapshot, fp)
+        os.replace(temp_file_path, file_path)
+    return _get_snapshot_modify_date(file_path)
+
+
+
+
+
+# ---------- Initialization ----------
+
+__CACHE_HITS: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('pss_cache_hits_total', 'Reads served with up-to-date data.', ['cache']))
+__CACHE_MISSES: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('pss_cache_misses_total', 'Reads, which had to wait for a refresh.', ['cache']))
+__CACHE_PARSE_TIME: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('pss_cache_parse_seconds_total', 'Time spent parsing refreshed data.', ['cache']))
+__CACHE_REFRESH_FAILURES: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('pss_cache_refresh_failures_total', 'Failed refreshes.', ['cache']))
+__CACHE_STALE_HITS: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('pss_cache_stale_hits_total', 'Reads served with outdated data while a refresh was pending.', ['cache']))
 
+metrics.REGISTRY.add_collector(_collect_metrics)
 
-    def __add_reader(self) -> None:
-        self.__READ_LOCK.acquire()
-        self.__reader_count = self.__reader_count + 1
-        self.__READ_LOCK.release()
 
 
-    def __remove_reader(self) -> None:
-        self.__READ_LOCK.acquire()
-        self.__reader_count = self.__reader_count - 1
-        self.__READ_LOCK.release()
+async def init() -> None:
+    """
+    Loads the snapshots of all caches and revalidates the loaded ones in the background.
+    """
+    if not settings.FEATURE_CACHE_SNAPSHOTS_ENABLED:
+        return
 
+    snapshots_path = os.path.join(os.getcwd(), settings.CACHE_SNAPSHOT_SUB_PATH)
+    if not os.path.isdir(snapshots_path):
+        os.makedirs(snapshots_path)
+    global SNAPSHOTS_PATH
+    SNAPSHOTS_PATH = snapshots_path
 
-    def __read_data(self) -> str:
-        self.__WRITE_LOCK.acquire()
-        result = self.__data
-        self.__WRITE_LOCK.release()
-        return result
\ No newline at end of file
+    loaded_caches = [pss_cache for pss_cache in CACHES if await pss_cache.load_snapshot()]
+    print(f'Loaded {len(loaded_caches)} of {len(CACHES)} cache snapshots.')
+    for pss_cache in loaded_caches:
+        pss_cache.request_update()
@@ -314,7 +314,7 @@ class CurrentDataCog(_CurrentCogBase, name='Current PSS Data'):
                 if is_tourney_running:
                     max_tourney_battle_attempts = await _tourney.get_max_tourney_battle_attempts()
                     if _settings.FEATURE_TOURNEYDATA_ENABLED:
-                        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+                        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
                 output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, max_tourney_battle_attempts=max_tourney_battle_attempts, yesterday_tourney_data=yesterday_tourney_data, as_embed=as_embed)
                 await _utils.discord.reply_with_output_and_files(ctx, output, file_paths, output_is_embeds=as_embed)
                 for file_path in file_paths:
@@ -523,9 +523,9 @@ class CurrentDataCog(_CurrentCogBase, name='Current PSS Data'):
 
             if user_info:
                 if _tourney.is_tourney_running() and _settings.FEATURE_TOURNEYDATA_ENABLED:
-                    yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+                    yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
                     if yesterday_tourney_data:
-                        yesterday_user_info = yesterday_tourney_data.users.get(user_info[_user.USER_KEY_NAME], {})
+                        yesterday_user_info = yesterday_tourney_data.users_data.get(user_info[_user.USER_KEY_NAME], {})
                         user_info['YesterdayAllianceScore'] = yesterday_user_info.get('AllianceScore', '0')
                 max_tourney_battle_attempts = await _tourney.get_max_tourney_battle_attempts()
                 output = await _user.get_user_details_by_info(ctx, user_info, max_tourney_battle_attempts=max_tourney_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
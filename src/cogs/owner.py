@@ -1,3 +1,4 @@
+from io import BytesIO as _BytesIO
 import os as _os
 import json as _json
 import re as _re
@@ -5,7 +6,6 @@ from typing import List as _List
 
 from discord import Embed as _Embed
 from discord import File as _File
-import discord.errors as _errors
 from discord.ext.commands import Context as _Context
 from discord.ext.commands import command as _command
 from discord.ext.commands import Command as _Command
@@ -13,7 +13,9 @@ from discord.ext.commands import group as _command_group
 from discord.ext.commands import is_owner as _is_owner
 
 from .base import CogBase as _CogBase
+from .. import broadcast as _broadcast
 from .. import database as _db
+from .. import metrics as _metrics
 from .. import pagination as _pagination
 from .. import pss_crew as _crew
 from .. import pss_daily as _daily
@@ -36,6 +38,7 @@ class OwnerCog(_CogBase, name='Owner commands'):
     """
     This module offers commands for the owner of the bot.
     """
+    BOT_NEWS_JOB_NAME = 'bot_news'
     QUERY_UPDATE_SEQUENCES = '\n'.join([
         'DO',
         '$do$',
@@ -110,30 +113,41 @@ class OwnerCog(_CogBase, name='Owner commands'):
         await ctx.send_help('db')
 
 
-    @db.command(name='export', brief='Export the database to JSON')
+    @db.command(name='export', brief='Export the database to JSON lines')
     @_is_owner()
     async def db_export(self, ctx: _Context):
         utc_now = _utils.get_utc_now()
-        export = await _db.export_to_json()
-
-        file_name = f'pss-statistics-db-export_{utc_now.strftime("%Y%m%d-%H%M%S")}.json'
-        with open(file_name, 'w') as fp:
-            fp.write(export)
+        file_name = f'pss-statistics-db-export_{utc_now.strftime("%Y%m%d-%H%M%S")}.jsonl'
+        await _db.export_to_json_lines(file_name)
         await ctx.reply('Database export:', file=_File(file_name))
+        _os.remove(file_name)
 
 
-    @db.command(name='import', brief='Import the database from JSON')
+    @db.command(name='import', brief='Import the database from JSON (lines)')
     @_is_owner()
     async def db_import(self, ctx: _Context):
+        """
+        Imports a file created by the `db export` command. Files with the extension `.jsonl` get streamed into the database, other files will be read as a single JSON document.
+        """
         if not ctx.message.attachments:
             raise _Error('You need to upload a JSON file to be imported with the command!')
 
         attachment = ctx.message.attachments[0]
-        file_contents = (await attachment.read()).decode('utf-8')
-        if not file_contents:
-            raise _Error('The file provided must not be empty.')
+        if attachment.filename.endswith('.jsonl'):
+            file_name = f'db-import_{ctx.message.id}.jsonl'
+            await attachment.save(file_name)
+            try:
+                if not _os.path.getsize(file_name):
+                    raise _Error('The file provided must not be empty.')
+                await _db.import_from_json_lines(file_name)
+            finally:
+                _os.remove(file_name)
+        else:
+            file_contents = (await attachment.read()).decode('utf-8')
+            if not file_contents:
+                raise _Error('The file provided must not be empty.')
+            await _db.import_from_json(file_contents)
 
-        await _db.import_from_json(file_contents)
         updated_sequences = await _db.try_execute(OwnerCog.QUERY_UPDATE_SEQUENCES)
         await _db.init_caches()
         await _server_settings.GUILD_SETTINGS.init(self.bot)
@@ -411,6 +425,17 @@ class OwnerCog(_CogBase, name='Owner commands'):
         await _utils.discord.reply_with_output(ctx, output)
 
 
+    @_command(name='metrics', brief='Get the current metrics', hidden=True)
+    @_is_owner()
+    async def metrics(self, ctx: _Context):
+        """
+        Returns the current metrics in the Prometheus text format.
+        """
+        self._log_command_use(ctx)
+        metrics_text = _metrics.REGISTRY.render()
+        await ctx.reply('Current metrics:', file=_File(_BytesIO(metrics_text.encode('utf-8')), filename='metrics.txt'), mention_author=False)
+
+
     @_command(name='sales-add', brief='Add a past sale.', hidden=True)
     @_is_owner()
     async def sales_add(self, ctx: _Context, sold_on: str, price: int, currency: str, max_amount: int, *, entity_name: str):
@@ -675,13 +700,15 @@ class OwnerCog(_CogBase, name='Owner commands'):
     @_is_owner()
     async def send_bot_news(self, ctx: _Context, *, news: str = None):
         """
-        Sends an embed to all guilds which have a bot news channel configured.
+        Sends an embed to all guilds which have a bot news channel configured. The news get sent to multiple channels at once, while staying within Discord's rate limits. If sending gets interrupted, it can be resumed.
 
         Usage:
         /sendnews [--test] [--<property_key>=<property_value> ...]
+        /sendnews --resume
 
         Available property keys:
         --test:    Optional. Use to only send the news to the current channel.
+        --resume:  Optional. Use to continue sending the most recent news, which haven't been sent to all channels.
         --title:   Mandatory. The title of the news.
         --content: Optional. The contents of the news.
 
@@ -693,19 +720,39 @@ class OwnerCog(_CogBase, name='Owner commands'):
         if not news:
             return
 
-        _, for_testing, title, content = self._extract_dash_parameters(news, None, '--test', '--title=', '--content=')
-        if not title:
+        _, for_testing, resume, title, content = self._extract_dash_parameters(news, None, '--test', '--resume', '--title=', '--content=')
+        job = None
+        if resume:
+            job = await _broadcast.get_unfinished_job(self.BOT_NEWS_JOB_NAME)
+            if job is None:
+                raise _Error('There are no bot news to resume sending.')
+            title = job.payload['title']
+            content = job.payload['content']
+        elif not title:
             raise ValueError('You need to specify a title!')
+        elif not for_testing:
+            bot_news_channel_ids = [guild_settings.bot_news_channel_id for guild_settings in _server_settings.GUILD_SETTINGS.values() if guild_settings.bot_news_channel_id is not None]
+            job = _broadcast.BroadcastJob(self.BOT_NEWS_JOB_NAME, {'title': title, 'content': content}, bot_news_channel_ids)
+
         avatar_url = self.bot.user.avatar.url
-        if not for_testing:
-            for bot_news_channel in _server_settings.GUILD_SETTINGS.bot_news_channels:
+        if job is not None:
+            progress_message = await ctx.send(job.get_progress_text())
+
+            async def send_news(channel_id: int, payload: dict) -> None:
+                bot_news_channel = self.bot.get_channel(channel_id)
+                if bot_news_channel is None:
+                    # Channels of guilds on shards run by other processes aren't cached. Fetching them counts against the rate limit, too.
+                    await _broadcast.acquire_global_token()
+                    bot_news_channel = await self.bot.fetch_channel(channel_id)
                 embed_colour = _utils.discord.get_bot_member_colour(self.bot, bot_news_channel.guild)
-                embed: _Embed = _utils.discord.create_embed(title, description=content, colour=embed_colour)
+                embed: _Embed = _utils.discord.create_embed(payload['title'], description=payload['content'], colour=embed_colour)
                 embed.set_thumbnail(url=avatar_url)
-                try:
-                    await bot_news_channel.send(embed=embed)
-                except _errors.Forbidden:
-                    pass
+                await bot_news_channel.send(embed=embed)
+
+            async def report_progress(job: _broadcast.BroadcastJob) -> None:
+                await progress_message.edit(content=job.get_progress_text())
+
+            await _broadcast.run(job, send_news, on_progress=report_progress)
         embed_colour = _utils.discord.get_bot_member_colour(self.bot, ctx.guild)
         embed = _utils.discord.create_embed(title, description=content, colour=embed_colour)
         embed.set_thumbnail(url=avatar_url)
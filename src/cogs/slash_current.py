@@ -224,7 +224,7 @@ class CurrentDataSlashCog(_CurrentCogBase, name='Current PSS Data Slash'):
         if is_tourney_running:
             max_tourney_battle_attempts = await _tourney.get_max_tourney_battle_attempts()
             if _settings.FEATURE_TOURNEYDATA_ENABLED:
-                yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+                yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
         output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, max_tourney_battle_attempts=max_tourney_battle_attempts, yesterday_tourney_data=yesterday_tourney_data, as_embed=(await _server_settings.get_use_embeds(ctx)))
 
         await _utils.discord.edit_original_response(ctx, response, output=output, file_paths=file_paths)
@@ -339,9 +339,9 @@ class CurrentDataSlashCog(_CurrentCogBase, name='Current PSS Data Slash'):
 
         await _utils.discord.edit_original_response(ctx, response, content='Player found. Compiling player info...', embeds=[], view=None)
         if _tourney.is_tourney_running() and _settings.FEATURE_TOURNEYDATA_ENABLED:
-            yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+            yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
             if yesterday_tourney_data:
-                yesterday_user_info = yesterday_tourney_data.users.get(user_info[_user.USER_KEY_NAME], {})
+                yesterday_user_info = yesterday_tourney_data.users_data.get(user_info[_user.USER_KEY_NAME], {})
                 user_info['YesterdayAllianceScore'] = yesterday_user_info.get('AllianceScore', '0')
         max_tourney_battle_attempts = await _tourney.get_max_tourney_battle_attempts()
         output = await _user.get_user_details_by_info(ctx, user_info, max_tourney_battle_attempts=max_tourney_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
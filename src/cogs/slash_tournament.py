@@ -59,7 +59,7 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         tourney_data = await self._get_tourney_data(ctx, month, year)
         fleet_info, response = await _fleet.find_tournament_fleet(ctx, name, tourney_data)
 
-        output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, past_fleets_data=tourney_data.fleets, past_users_data=tourney_data.users, past_retrieved_at=tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, past_fleets_data=tourney_data.fleets_data, past_users_data=tourney_data.users_data, past_retrieved_at=tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.edit_original_response(ctx, response, output=output, file_paths=file_paths)
 
         for file_path in file_paths:
@@ -82,7 +82,7 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         tourney_data = await self._get_tourney_data(ctx, month, year)
         user_info, response = await _user.find_tournament_user(ctx, name, tourney_data)
 
-        output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=tourney_data.retrieved_at, past_fleet_infos=tourney_data.fleets, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=tourney_data.retrieved_at, past_fleet_infos=tourney_data.fleets_data, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.edit_original_response(ctx, response, output=output)
 
 
@@ -108,7 +108,7 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         self._log_command_use(ctx)
 
         tourney_data = await self._get_tourney_data(ctx, month, year)
-        output = await _top.get_division_stars(ctx, division=division, fleet_data=tourney_data.fleets, retrieved_date=tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output = await _top.get_division_stars(ctx, division=division, fleet_data=tourney_data.fleets_data, retrieved_date=tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.edit_original_response(ctx, ctx.interaction, output)
 
 
@@ -127,7 +127,7 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
 
         tourney_data = await self._get_tourney_data(ctx, month, year)
         fleet_info, response = await _fleet.find_tournament_fleet(ctx, name, tourney_data)
-        output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, tourney_data.fleets, tourney_data.users, tourney_data.retrieved_at, tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, tourney_data.fleets_data, tourney_data.users_data, tourney_data.retrieved_at, tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.edit_original_response(ctx, response, output)
 
 
@@ -176,12 +176,12 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         trophies_value = _utils.format.range_string(min_trophies, max_trophies)
         criteria_lines, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies = _top.get_targets_parameters(star_value, trophies_value, max_highest_trophies)
 
-        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
-        last_month_user_data = self.bot.tournament_data_client.get_latest_monthly_data().users
-        current_fleet_data = await _top.get_alliances_with_division()
+        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
+        last_month_user_data = (await self.bot.tournament_data_client.get_latest_monthly_data()).users_data
+        current_fleet_data = await _top.get_tourney_alliances_with_division()
 
         if yesterday_tourney_data:
-            yesterday_user_infos = _top.filter_targets(yesterday_tourney_data.users.values(), division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
+            yesterday_user_infos = _top.filter_targets(yesterday_tourney_data, division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
             if not yesterday_user_infos:
                 error_lines = [f'No ships in division {division.upper()} match the criteria.'] + criteria_lines
                 raise _Error('\n'.join(error_lines))
@@ -263,12 +263,12 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         else:
             count = max_count
 
-        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
-        last_month_user_data = self.bot.tournament_data_client.get_latest_monthly_data().users
-        current_fleet_data = await _top.get_alliances_with_division()
+        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
+        last_month_user_data = (await self.bot.tournament_data_client.get_latest_monthly_data()).users_data
+        current_fleet_data = await _top.get_tourney_alliances_with_division()
 
         if yesterday_tourney_data:
-            yesterday_user_infos = _top.filter_targets(yesterday_tourney_data.users.values(), division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
+            yesterday_user_infos = _top.filter_targets(yesterday_tourney_data, division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
             if not yesterday_user_infos:
                 error_text = [f'No ships in division {division.upper()} match the criteria.'] + criteria_lines
                 raise _Error('\n'.join(error_text))
@@ -349,16 +349,16 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         await _utils.discord.edit_original_response(ctx, response, content='Fleet found. Compiling fleet info...', embeds=[], view=None)
 
         fleet_id = fleet_info[_fleet.FLEET_KEY_NAME]
-        day_before_tourney_data = self.bot.tournament_data_client.get_second_latest_daily_data()
-        yesterday_users_data = {user_id: user_info for user_id, user_info in yesterday_tourney_data.users.items() if user_info[_fleet.FLEET_KEY_NAME] == fleet_id}
-        day_before_users_data = {user_id: user_info for user_id, user_info in day_before_tourney_data.users.items() if user_info[_fleet.FLEET_KEY_NAME] == fleet_id}
+        day_before_tourney_data = await self.bot.tournament_data_client.get_second_latest_daily_data()
+        yesterday_users_data = {user_id: dict(user_info) for user_id, user_info in yesterday_tourney_data.get_fleet_users_data(fleet_id).items()}
+        day_before_users_data = day_before_tourney_data.get_fleet_users_data(fleet_id)
 
         for yesterday_user_info in yesterday_users_data.values():
             day_before_user_info = day_before_users_data.get(yesterday_user_info[_user.USER_KEY_NAME], {})
             day_before_star_count = day_before_user_info.get('AllianceScore', 0)
             yesterday_user_info['StarValue'], _ = _user.get_star_value_from_user_info(yesterday_user_info, star_count=day_before_star_count)
         max_tourney_battle_attempts = (await _tourney.get_max_tourney_battle_attempts())
-        output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, max_tourney_battle_attempts=max_tourney_battle_attempts, past_fleets_data=yesterday_tourney_data.fleets, past_users_data=yesterday_users_data, past_retrieved_at=yesterday_tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, max_tourney_battle_attempts=max_tourney_battle_attempts, past_fleets_data=yesterday_tourney_data.fleets_data, past_users_data=yesterday_users_data, past_retrieved_at=yesterday_tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
 
         await _utils.discord.edit_original_response(ctx, response, output=output, file_paths=file_paths)
         for file_path in file_paths:
@@ -380,13 +380,13 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         yesterday_tourney_data = await self._get_yesterday_tourney_data(ctx)
         user_info, response = await _user.find_tournament_user(ctx, name, yesterday_tourney_data)
 
-        day_before_yesterday_tourney_data = self.bot.tournament_data_client.get_second_latest_daily_data()
-        day_before_user_info = day_before_yesterday_tourney_data.users.get(user_info[_user.USER_KEY_NAME])
+        day_before_yesterday_tourney_data = await self.bot.tournament_data_client.get_second_latest_daily_data()
+        day_before_user_info = day_before_yesterday_tourney_data.users_data.get(user_info[_user.USER_KEY_NAME])
         if day_before_user_info:
             user_info['YesterdayAllianceScore'] = day_before_user_info['AllianceScore']
 
         await _utils.discord.edit_original_response(ctx, response, content='Player found. Compiling player info...', embeds=[], view=None)
-        output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=yesterday_tourney_data.retrieved_at, past_fleet_infos=yesterday_tourney_data.fleets, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=yesterday_tourney_data.retrieved_at, past_fleet_infos=yesterday_tourney_data.fleets_data, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.edit_original_response(ctx, response, output=output)
 
 
@@ -403,7 +403,7 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         self._assure_yesterday_command_valid()
 
         yesterday_tourney_data = await self._get_yesterday_tourney_data(ctx)
-        output = await _top.get_division_stars(ctx, division=division, fleet_data=yesterday_tourney_data.fleets, retrieved_date=yesterday_tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output = await _top.get_division_stars(ctx, division=division, fleet_data=yesterday_tourney_data.fleets_data, retrieved_date=yesterday_tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.respond_with_output(ctx, output)
 
 
@@ -423,7 +423,7 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
         fleet_info, response = await _fleet.find_tournament_fleet(ctx, name, yesterday_tourney_data)
 
         await _utils.discord.edit_original_response(ctx, response, content='Fleet found. Compiling fleet info...', embeds=[], view=None)
-        output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, yesterday_tourney_data.fleets, yesterday_tourney_data.users, yesterday_tourney_data.retrieved_at, yesterday_tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
+        output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, yesterday_tourney_data.fleets_data, yesterday_tourney_data.users_data, yesterday_tourney_data.retrieved_at, yesterday_tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.edit_original_response(ctx, response, output=output)
 
 
@@ -437,14 +437,14 @@ class TournamentSlashCog(_CogBase, name='Tournament Slash'):
             await _utils.discord.respond_with_output(ctx, output)
 
         day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, _utils.get_utc_now())
-        return self.bot.tournament_data_client.get_data(year, month, day=day)
+        return await self.bot.tournament_data_client.get_data(year, month, day=day)
 
 
     async def _get_yesterday_tourney_data(self, ctx: _ApplicationContext) -> _TourneyData:
         if not ctx.interaction.response.is_done():
             await ctx.interaction.response.defer()
 
-        return self.bot.tournament_data_client.get_latest_daily_data()
+        return await self.bot.tournament_data_client.get_latest_daily_data()
 
 
 
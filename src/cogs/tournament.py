@@ -74,9 +74,9 @@ class TournamentCog(_CogBase, name='Tournament'):
             return
         else:
             day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, utc_now)
-            tourney_data = self.bot.tournament_data_client.get_data(year, month, day=day)
+            tourney_data = await self.bot.tournament_data_client.get_data(year, month, day=day)
             if tourney_data:
-                output = await _top.get_division_stars(ctx, division=division, fleet_data=tourney_data.fleets, retrieved_date=tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
+                output = await _top.get_division_stars(ctx, division=division, fleet_data=tourney_data.fleets_data, retrieved_date=tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.reply_with_output(ctx, output)
 
 
@@ -103,12 +103,12 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _MissingParameterError('The parameter `fleet_name` is mandatory.')
 
         day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, utc_now)
-        tourney_data = self.bot.tournament_data_client.get_data(year, month, day=day)
+        tourney_data = await self.bot.tournament_data_client.get_data(year, month, day=day)
 
         if tourney_data is None:
             fleet_infos = []
         else:
-            fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, tourney_data.fleets)
+            fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, tourney_data.fleets_data)
 
         if fleet_infos:
             if len(fleet_infos) == 1:
@@ -119,7 +119,7 @@ class TournamentCog(_CogBase, name='Tournament'):
                 _, fleet_info = await paginator.wait_for_option_selection()
 
             if fleet_info:
-                output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, tourney_data.fleets, tourney_data.users, tourney_data.retrieved_at, tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
+                output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, tourney_data.fleets_data, tourney_data.users_data, tourney_data.retrieved_at, tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
         else:
             leading_space_note = ''
             if fleet_name.startswith(' '):
@@ -141,7 +141,7 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _MissingParameterError('If the parameter `year` is specified, the parameter `month` must be specified, too.')
 
         day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, utc_now)
-        tourney_data = self.bot.tournament_data_client.get_data(year, month, day=day)
+        tourney_data = await self.bot.tournament_data_client.get_data(year, month, day=day)
 
         output = await _top.get_top_captains(ctx, 100, as_embed=(await _server_settings.get_use_embeds(ctx)), tourney_data=tourney_data)
         await _utils.discord.reply_with_output(ctx, output)
@@ -170,12 +170,12 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _MissingParameterError('The parameter `fleet_name` is mandatory.')
 
         day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, utc_now)
-        tourney_data = self.bot.tournament_data_client.get_data(year, month, day=day)
+        tourney_data = await self.bot.tournament_data_client.get_data(year, month, day=day)
 
         if tourney_data is None:
             fleet_infos = []
         else:
-            fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, tourney_data.fleets)
+            fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, tourney_data.fleets_data)
 
         if fleet_infos:
             if len(fleet_infos) == 1:
@@ -187,7 +187,7 @@ class TournamentCog(_CogBase, name='Tournament'):
 
             if fleet_info:
                 as_embed = await _server_settings.get_use_embeds(ctx)
-                output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, past_fleets_data=tourney_data.fleets, past_users_data=tourney_data.users, past_retrieved_at=tourney_data.retrieved_at, as_embed=as_embed)
+                output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, past_fleets_data=tourney_data.fleets_data, past_users_data=tourney_data.users_data, past_retrieved_at=tourney_data.retrieved_at, as_embed=as_embed)
                 await _utils.discord.reply_with_output_and_files(ctx, output, file_paths, output_is_embeds=as_embed)
                 for file_path in file_paths:
                     _os.remove(file_path)
@@ -221,11 +221,11 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _MissingParameterError('If the parameter `year` is specified, the parameter `month` must be specified, too.')
 
         day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, utc_now)
-        tourney_data = self.bot.tournament_data_client.get_data(year, month, day=day)
+        tourney_data = await self.bot.tournament_data_client.get_data(year, month, day=day)
 
-        if tourney_data and tourney_data.fleets and tourney_data.users:
+        if tourney_data and tourney_data.fleets_data and tourney_data.users_data:
             file_name = f'tournament_results_{year}-{_utils.datetime.get_month_short_name(tourney_data.retrieved_at).lower()}.csv'
-            file_paths = [_fleet.create_fleets_sheet_csv(tourney_data.users, tourney_data.retrieved_at, file_name)]
+            file_paths = [_fleet.create_fleets_sheet_csv(tourney_data.users_data, tourney_data.retrieved_at, file_name)]
             await _utils.discord.reply_with_output_and_files(ctx, [], file_paths)
             for file_path in file_paths:
                 _os.remove(file_path)
@@ -260,7 +260,7 @@ class TournamentCog(_CogBase, name='Tournament'):
 
         day, month, year = self.bot.tournament_data_client.retrieve_past_day_month_year(month, year, utc_now)
         try:
-            tourney_data = self.bot.tournament_data_client.get_data(year, month, day=day)
+            tourney_data = await self.bot.tournament_data_client.get_data(year, month, day=day)
         except ValueError as err:
             error = str(err)
             tourney_data = None
@@ -268,7 +268,7 @@ class TournamentCog(_CogBase, name='Tournament'):
         if tourney_data is None:
             user_infos = []
         else:
-            user_infos = await _user.get_user_infos_from_tournament_data_by_name(player_name, tourney_data.users)
+            user_infos = await _user.get_user_infos_from_tournament_data_by_name(player_name, tourney_data.users_data)
 
         if user_infos:
             if len(user_infos) == 1:
@@ -279,7 +279,7 @@ class TournamentCog(_CogBase, name='Tournament'):
                 _, user_info = await paginator.wait_for_option_selection()
 
             if user_info:
-                output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=tourney_data.retrieved_at, past_fleet_infos=tourney_data.fleets, as_embed=(await _server_settings.get_use_embeds(ctx)))
+                output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=tourney_data.retrieved_at, past_fleet_infos=tourney_data.fleets_data, as_embed=(await _server_settings.get_use_embeds(ctx)))
         elif error:
             raise _Error(str(error))
         else:
@@ -324,12 +324,12 @@ class TournamentCog(_CogBase, name='Tournament'):
 
             criteria_lines, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies = _top.get_targets_parameters(star_value, trophies, max_highest_trophies)
 
-            yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
-            last_month_user_data = self.bot.tournament_data_client.get_latest_monthly_data().users
-            current_fleet_data = await _top.get_alliances_with_division()
+            yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
+            last_month_user_data = (await self.bot.tournament_data_client.get_latest_monthly_data()).users_data
+            current_fleet_data = await _top.get_tourney_alliances_with_division()
 
             if yesterday_tourney_data:
-                yesterday_user_infos = _top.filter_targets(yesterday_tourney_data.users.values(), division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
+                yesterday_user_infos = _top.filter_targets(yesterday_tourney_data, division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
                 if not yesterday_user_infos:
                     error_lines = [f'No ships in division {division.upper()} match the criteria.'] + criteria_lines
                     raise _Error('\n'.join(error_lines))
@@ -429,12 +429,12 @@ class TournamentCog(_CogBase, name='Tournament'):
 
         criteria_lines, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies = _top.get_targets_parameters(star_value, trophies, max_highest_trophies)
 
-        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
-        last_month_user_data = self.bot.tournament_data_client.get_latest_monthly_data().users
-        current_fleet_data = await _top.get_alliances_with_division()
+        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
+        last_month_user_data = (await self.bot.tournament_data_client.get_latest_monthly_data()).users_data
+        current_fleet_data = await _top.get_tourney_alliances_with_division()
 
         if yesterday_tourney_data:
-            yesterday_user_infos = _top.filter_targets(yesterday_tourney_data.users.values(), division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
+            yesterday_user_infos = _top.filter_targets(yesterday_tourney_data, division_design_id, last_month_user_data, current_fleet_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
             if not yesterday_user_infos:
                 error_text = [f'No ships in division {division.upper()} match the criteria.'] + criteria_lines
                 raise _Error('\n'.join(error_text))
@@ -526,11 +526,11 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _Error('It\'s day 1 of the current tournament, there is no data from yesterday.')
         output = []
 
-        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
         if yesterday_tourney_data is None:
             yesterday_fleet_infos = []
         else:
-            yesterday_fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, yesterday_tourney_data.fleets)
+            yesterday_fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, yesterday_tourney_data.fleets_data)
 
         if yesterday_fleet_infos:
             if len(yesterday_fleet_infos) == 1:
@@ -542,15 +542,15 @@ class TournamentCog(_CogBase, name='Tournament'):
 
             if fleet_info:
                 fleet_id = fleet_info[_fleet.FLEET_KEY_NAME]
-                day_before_tourney_data = self.bot.tournament_data_client.get_second_latest_daily_data()
-                yesterday_users_data = {user_id: user_info for user_id, user_info in yesterday_tourney_data.users.items() if user_info[_fleet.FLEET_KEY_NAME] == fleet_id}
-                day_before_users_data = {user_id: user_info for user_id, user_info in day_before_tourney_data.users.items() if user_info[_fleet.FLEET_KEY_NAME] == fleet_id}
+                day_before_tourney_data = await self.bot.tournament_data_client.get_second_latest_daily_data()
+                yesterday_users_data = {user_id: dict(user_info) for user_id, user_info in yesterday_tourney_data.get_fleet_users_data(fleet_id).items()}
+                day_before_users_data = day_before_tourney_data.get_fleet_users_data(fleet_id)
                 for yesterday_user_info in yesterday_users_data.values():
                     day_before_user_info = day_before_users_data.get(yesterday_user_info[_user.USER_KEY_NAME], {})
                     day_before_star_count = day_before_user_info.get('AllianceScore', 0)
                     yesterday_user_info['StarValue'], _ = _user.get_star_value_from_user_info(yesterday_user_info, star_count=day_before_star_count)
                 as_embed = await _server_settings.get_use_embeds(ctx)
-                output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, max_tourney_battle_attempts=6, past_fleets_data=yesterday_tourney_data.fleets, past_users_data=yesterday_users_data, past_retrieved_at=yesterday_tourney_data.retrieved_at, as_embed=as_embed)
+                output, file_paths = await _fleet.get_full_fleet_info_as_text(ctx, fleet_info, max_tourney_battle_attempts=6, past_fleets_data=yesterday_tourney_data.fleets_data, past_users_data=yesterday_users_data, past_retrieved_at=yesterday_tourney_data.retrieved_at, as_embed=as_embed)
                 await _utils.discord.reply_with_output_and_files(ctx, output, file_paths, output_is_embeds=as_embed)
                 for file_path in file_paths:
                     _os.remove(file_path)
@@ -579,11 +579,11 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _Error('It\'s day 1 of the current tournament, there is no data from yesterday.')
         output = []
 
-        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
         if yesterday_tourney_data is None:
             user_infos = []
         else:
-            user_infos = await _user.get_user_infos_from_tournament_data_by_name(player_name, yesterday_tourney_data.users)
+            user_infos = await _user.get_user_infos_from_tournament_data_by_name(player_name, yesterday_tourney_data.users_data)
 
         if user_infos:
             if len(user_infos) == 1:
@@ -594,11 +594,11 @@ class TournamentCog(_CogBase, name='Tournament'):
                 _, user_info = await paginator.wait_for_option_selection()
 
             if user_info:
-                day_before_yesterday_tourney_data = self.bot.tournament_data_client.get_second_latest_daily_data()
-                day_before_user_info = day_before_yesterday_tourney_data.users.get(user_info[_user.USER_KEY_NAME])
+                day_before_yesterday_tourney_data = await self.bot.tournament_data_client.get_second_latest_daily_data()
+                day_before_user_info = day_before_yesterday_tourney_data.users_data.get(user_info[_user.USER_KEY_NAME])
                 if day_before_user_info:
                     user_info['YesterdayAllianceScore'] = day_before_user_info['AllianceScore']
-                output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=yesterday_tourney_data.retrieved_at, past_fleet_infos=yesterday_tourney_data.fleets, as_embed=(await _server_settings.get_use_embeds(ctx)))
+                output = await _user.get_user_details_by_info(ctx, user_info, retrieved_at=yesterday_tourney_data.retrieved_at, past_fleet_infos=yesterday_tourney_data.fleets_data, as_embed=(await _server_settings.get_use_embeds(ctx)))
         else:
             leading_space_note = ''
             if player_name.startswith(' '):
@@ -627,9 +627,9 @@ class TournamentCog(_CogBase, name='Tournament'):
             await ctx.invoke(subcommand, fleet_name=division)
             return
         else:
-            yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+            yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
             if yesterday_tourney_data:
-                output = await _top.get_division_stars(ctx, division=division, fleet_data=yesterday_tourney_data.fleets, retrieved_date=yesterday_tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
+                output = await _top.get_division_stars(ctx, division=division, fleet_data=yesterday_tourney_data.fleets_data, retrieved_date=yesterday_tourney_data.retrieved_at, as_embed=(await _server_settings.get_use_embeds(ctx)))
         await _utils.discord.reply_with_output(ctx, output)
 
 
@@ -651,11 +651,11 @@ class TournamentCog(_CogBase, name='Tournament'):
             raise _Error('It\'s day 1 of the current tournament, there is no data from yesterday.')
         output = []
 
-        yesterday_tourney_data = self.bot.tournament_data_client.get_latest_daily_data()
+        yesterday_tourney_data = await self.bot.tournament_data_client.get_latest_daily_data()
         if yesterday_tourney_data is None:
             fleet_infos = []
         else:
-            fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, yesterday_tourney_data.fleets)
+            fleet_infos = await _fleet.get_fleet_infos_from_tourney_data_by_name(fleet_name, yesterday_tourney_data.fleets_data)
 
         if fleet_infos:
             if len(fleet_infos) == 1:
@@ -666,7 +666,7 @@ class TournamentCog(_CogBase, name='Tournament'):
                 _, fleet_info = await paginator.wait_for_option_selection()
 
             if fleet_info:
-                output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, yesterday_tourney_data.fleets, yesterday_tourney_data.users, yesterday_tourney_data.retrieved_at, yesterday_tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
+                output = await _fleet.get_fleet_users_stars_from_tournament_data(ctx, fleet_info, yesterday_tourney_data.fleets_data, yesterday_tourney_data.users_data, yesterday_tourney_data.retrieved_at, yesterday_tourney_data.max_tournament_battle_attempts, as_embed=(await _server_settings.get_use_embeds(ctx)))
         else:
             leading_space_note = ''
             if fleet_name.startswith(' '):
@@ -5,6 +5,7 @@ from typing import Any, Callable, Dict, List, Tuple, Union
 
 import asyncpg
 
+from . import metrics
 from . import pss_daily as daily
 from . import settings
 from .typehints import SalesCache
@@ -21,9 +22,13 @@ ColumnDefinition = Tuple[str, str, bool, bool]
 
 # ---------- Constants ----------
 
+BULK_TRANSFER_CHUNK_SIZE: int = 10000
+
 CONNECTION_POOL: asyncpg.pool.Pool = None
 __CONNECTION_POOL_LOCK: _Lock = _Lock()
 
+EXPORT_TABLE_NAMES: List[str] = ['devices', 'sales', 'serversettings']
+
 
 
 
@@ -54,12 +59,68 @@ async def export_to_json() -> str:
     return _json.dumps(result, indent=4, cls=utils.json.YadcEncoder)
 
 
+async def export_to_json_lines(file_path: str, table_names: List[str] = None) -> int:
+    """
+    Streams the contents of the specified tables (or the default export tables) into a JSON lines file. Each table starts with a line containing an object with the table and column names, followed by one line per row.
+
+    Returns the number of rows exported.
+    """
+    table_names = table_names or EXPORT_TABLE_NAMES
+    result = 0
+    with open(file_path, 'w', encoding='utf-8') as fp:
+        async with CONNECTION_POOL.acquire() as connection:
+            async with connection.transaction(readonly=True, isolation='repeatable_read'):
+                for table_name in table_names:
+                    column_names = await get_column_names(table_name)
+                    fp.write(_json.dumps({'table': table_name, 'column_names': column_names}) + '\n')
+                    lines = []
+                    async for record in connection.cursor(f'SELECT {", ".join(column_names)} FROM {table_name}', prefetch=BULK_TRANSFER_CHUNK_SIZE):
+                        lines.append(_json.dumps(list(record.values()), cls=utils.json.YadcEncoder))
+                        if len(lines) >= BULK_TRANSFER_CHUNK_SIZE:
+                            result += __write_lines(fp, lines)
+                    result += __write_lines(fp, lines)
+                    print(f'[export_to_json_lines] Exported table: {table_name}')
+    return result
+
+
 async def import_from_json(json: str) -> None:
     tables = _json.loads(json, cls=utils.json.YadcDecoder)
     for table_name, table_contents in tables.items():
         await _import_table(table_name, table_contents['column_names'], table_contents['values'])
 
 
+async def import_from_json_lines(file_path: str) -> int:
+    """
+    Imports a file created by `export_to_json_lines`. Every table contained in the file will be cleared and the rows will be copied in chunks. Either all tables get imported or none.
+
+    Returns the number of rows imported.
+    """
+    result = 0
+    with open(file_path, 'r', encoding='utf-8') as fp:
+        async with CONNECTION_POOL.acquire() as connection:
+            async with connection.transaction():
+                table_name: str = None
+                column_names: List[str] = None
+                records = []
+                for line in fp:
+                    if not line.strip():
+                        continue
+                    entry = _json.loads(line, cls=utils.json.YadcDecoder)
+                    if isinstance(entry, dict):
+                        result += await __copy_records(connection, table_name, column_names, records)
+                        table_name = entry['table']
+                        column_names = entry['column_names']
+                        print(f'[import_from_json_lines] Clearing table: {table_name}')
+                        await connection.execute(f'DELETE FROM {table_name}')
+                        print(f'[import_from_json_lines] Importing data to table: {table_name}')
+                    else:
+                        records.append(tuple(entry))
+                        if len(records) >= BULK_TRANSFER_CHUNK_SIZE:
+                            result += await __copy_records(connection, table_name, column_names, records)
+                result += await __copy_records(connection, table_name, column_names, records)
+    return result
+
+
 async def _export_table(table_name: str) -> dict:
     column_names = await get_column_names(table_name)
     rows = await fetchall(f'SELECT * FROM {table_name}')
@@ -74,16 +135,38 @@ async def _import_table(table_name: str, column_names: List[str], rows: List[Lis
     """
     This function will clear the specified table and insert the values provided.
     """
-    column_names_string = ','.join(column_names)
-    values_string = ', '.join([f'${i}' for i in range(1, len(column_names) + 1)])
-    query = f'INSERT INTO {table_name} ({column_names_string}) VALUES ({values_string})'
+    async with CONNECTION_POOL.acquire() as connection:
+        async with connection.transaction():
+            print(f'[_import_table] Clearing table: {table_name}')
+            await connection.execute(f'DELETE FROM {table_name}')
 
-    print(f'[_import_table] Clearing table: {table_name}')
-    await execute(f'DELETE FROM {table_name}')
+            print(f'[_import_table] Importing data to table: {table_name}')
+            for i in range(0, len(rows), BULK_TRANSFER_CHUNK_SIZE):
+                records = [tuple(values) for values in rows[i:i + BULK_TRANSFER_CHUNK_SIZE]]
+                await __copy_records(connection, table_name, column_names, records)
 
-    print(f'[_import_table] Importing data to table: {table_name}')
-    for values in rows:
-        await execute(query, values)
+
+async def __copy_records(connection: asyncpg.Connection, table_name: str, column_names: List[str], records: List[Tuple]) -> int:
+    """
+    Copies the records to the table and clears the list of records.
+    """
+    result = len(records)
+    if records:
+        with metrics.DB_QUERY_DURATION.time(function='copy_records'):
+            await connection.copy_records_to_table(table_name, records=records, columns=column_names)
+        records.clear()
+    return result
+
+
+def __write_lines(fp, lines: List[str]) -> int:
+    """
+    Writes the lines to the file and clears the list of lines.
+    """
+    result = len(lines)
+    if lines:
+        fp.write('\n'.join(lines) + '\n')
+        lines.clear()
+    return result
 
 
 
@@ -547,12 +630,22 @@ async def disconnect() -> None:
 async def execute(query: str, args: list = None) -> bool:
     __log_db_function_enter('execute', query=f'\'{query}\'', args=args)
 
-    async with CONNECTION_POOL.acquire() as connection:
-        async with connection.transaction():
-            if args:
-                await connection.execute(query, *args)
-            else:
-                await connection.execute(query)
+    with metrics.DB_QUERY_DURATION.time(function='execute'):
+        async with CONNECTION_POOL.acquire() as connection:
+            async with connection.transaction():
+                if args:
+                    await connection.execute(query, *args)
+                else:
+                    await connection.execute(query)
+
+
+async def executemany(query: str, args_list: List[list]) -> None:
+    __log_db_function_enter('executemany', query=f'\'{query}\'', args_count=len(args_list))
+
+    with metrics.DB_QUERY_DURATION.time(function='executemany'):
+        async with CONNECTION_POOL.acquire() as connection:
+            async with connection.transaction():
+                await connection.executemany(query, args_list)
 
 
 async def fetchall(query: str, args: list = None) -> List[asyncpg.Record]:
@@ -563,12 +656,13 @@ async def fetchall(query: str, args: list = None) -> List[asyncpg.Record]:
     result: List[asyncpg.Record] = None
     if await connect():
         try:
-            async with CONNECTION_POOL.acquire() as connection:
-                async with connection.transaction():
-                    if args:
-                        result = await connection.fetch(query, *args)
-                    else:
-                        result = await connection.fetch(query)
+            with metrics.DB_QUERY_DURATION.time(function='fetchall'):
+                async with CONNECTION_POOL.acquire() as connection:
+                    async with connection.transaction():
+                        if args:
+                            result = await connection.fetch(query, *args)
+                        else:
+                            result = await connection.fetch(query)
         except (asyncpg.exceptions.PostgresError, asyncpg.PostgresError) as pg_error:
             raise pg_error
         except Exception as error:
@@ -671,6 +765,29 @@ async def try_execute(query: str, args: list = None, raise_db_error: bool = Fals
     return success
 
 
+async def try_executemany(query: str, args_list: List[list]) -> bool:
+    """
+    Executes the query once for every set of arguments in a single transaction.
+    """
+    __log_db_function_enter('try_executemany', query=f'\'{query}\'', args_count=len(args_list))
+
+    if not args_list:
+        return True
+    if query and query[-1] != ';':
+        query += ';'
+    success = False
+    if await connect():
+        try:
+            await executemany(query, args_list)
+            success = True
+        except Exception as error:
+            print_db_query_error('try_executemany', query, None, error)
+            success = False
+    else:
+        print('[try_executemany] could not connect to db')
+    return success
+
+
 async def get_setting(setting_name: str) -> Tuple[object, datetime]:
     __log_db_function_enter('get_setting', setting_name=f'\'{setting_name}\'')
 
@@ -1,11 +1,10 @@
 from datetime import datetime, timezone
 from enum import IntEnum
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
 
 import openpyxl
-from openpyxl.worksheet.table import TableStyleInfo
-import openpyxl.utils.dataframe
-import pandas
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.worksheet.table import Table, TableStyleInfo
 
 from . import pss_tournament as tourney
 from . import utils
@@ -38,7 +37,10 @@ class FILE_ENDING(IntEnum):
 # ---------- Functions ----------
 
 
-def create_csv_from_data(data: List[Iterable[Any]], file_prefix: str, data_retrieved_at: datetime, file_name: Optional[str] = None, delimiter: Optional[str] = '\t') -> str:
+def create_csv_from_data(data: Iterable[Iterable[Any]], file_prefix: str, data_retrieved_at: datetime, file_name: Optional[str] = None, delimiter: Optional[str] = '\t') -> str:
+    """
+    Writes the lines to the file one by one, so `data` may be a generator.
+    """
     if data_retrieved_at is None:
         data_retrieved_at = utils.get_utc_now()
     if file_name:
@@ -49,74 +51,93 @@ def create_csv_from_data(data: List[Iterable[Any]], file_prefix: str, data_retri
     if not delimiter:
         delimiter = '\t'
 
-    lines = [
-        delimiter.join([
-            str(field)
-            for field
-            in line
-        ])
-        for line
-        in data
-    ]
-
     with open(save_to, mode='w') as fp:
-        fp.write('\n'.join(lines))
+        for i, line in enumerate(data):
+            if i:
+                fp.write('\n')
+            fp.write(delimiter.join(str(field) for field in line))
     return save_to
 
 
-def create_xl_from_data(data: List[Iterable[Any]], file_prefix: str, data_retrieved_at: datetime, column_formats: List[str], file_name: Optional[str] = None) -> str:
+def create_xl_from_data(data: Iterable[Iterable[Any]], file_prefix: str, data_retrieved_at: datetime, column_formats: List[str], file_name: Optional[str] = None) -> str:
+    """
+    The first line is the header. The number formats get applied to all other lines, so `data` may be a generator.
+    """
     if data_retrieved_at is None:
         data_retrieved_at = utils.get_utc_now()
     save_to = file_name or get_file_name(file_prefix, data_retrieved_at, FILE_ENDING.XL)
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
-
-    for item in data:
-        ws.append(item)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
 
-    col_count = len(data[0]) + 1
-    row_count = len(data) + 1
-    for i, col_no in enumerate(range(1, col_count)):
-        column_format = column_formats[i]
-        if column_format:
-            for row_no in range(2, row_count):
-                ws.cell(row_no, col_no).number_format = column_format
+    lines = iter(data)
+    header = next(lines, None)
+    if header is not None:
+        ws.append(header)
+    for line in lines:
+        ws.append([__create_cell(ws, value, column_format) for value, column_format in zip(line, column_formats)])
 
     wb.save(save_to)
     return save_to
 
 
-def create_xl_from_raw_data_dict(flattened_data: List[Iterable[Any]], file_prefix: str, data_retrieved_at: Optional[datetime] = None, file_name: Optional[str] = None) -> str:
+def create_xl_from_raw_data_dict(flattened_data: List[Dict[str, Any]], file_prefix: str, data_retrieved_at: Optional[datetime] = None, file_name: Optional[str] = None) -> str:
+    """
+    Writes the entities as a table with a column per distinct key, in order of their first occurrence.
+    """
     if data_retrieved_at is None:
         data_retrieved_at = utils.get_utc_now()
     if flattened_data:
         save_to = file_name or get_file_name(file_prefix, data_retrieved_at, FILE_ENDING.XL, consider_tourney=False)
+        column_names = list(dict.fromkeys(column_name for entity in flattened_data for column_name in entity.keys()))
+        lines = ([entity.get(column_name) for column_name in column_names] for entity in flattened_data)
+        __write_xl_table(save_to, column_names, lines)
+    else:
+        save_to = None
+    return save_to
 
-        wb = openpyxl.Workbook(write_only=True)
-        ws: openpyxl.worksheet.worksheet.Worksheet = wb.create_sheet()
-        df = pandas.DataFrame(flattened_data)
-        for (columnName, columnData) in df.items():
-            if 'datetime64' in columnData.dtype.name:
-                df[columnName] = df[columnName].dt.tz_convert(None)
-
-        for row in openpyxl.utils.dataframe.dataframe_to_rows(df, index=False, header=True):
-            if row:
-                ws.append(row)
-
-        table = openpyxl.worksheet.table.Table(displayName='tbl', ref=__get_ref_for_df(df))
-        table.tableStyleInfo = __BASE_TABLE_STYLE
-        table._initialise_columns()
-        for cell, col in zip(df.columns, table.tableColumns):
-            col.name = str(cell)
-        ws.add_table(table)
 
-        wb.save(save_to)
+def create_xl_table_from_lines(lines: Iterable[List[Any]], file_prefix: str, data_retrieved_at: Optional[datetime] = None, file_name: Optional[str] = None) -> str:
+    """
+    Writes the lines as a table. The first line holds the column names. The lines get written one by one, so `lines` may be a generator.
+    """
+    if data_retrieved_at is None:
+        data_retrieved_at = utils.get_utc_now()
+    lines = iter(lines)
+    column_names = next(lines, None)
+    if column_names:
+        save_to = file_name or get_file_name(file_prefix, data_retrieved_at, FILE_ENDING.XL, consider_tourney=False)
+        __write_xl_table(save_to, column_names, lines)
     else:
         save_to = None
     return save_to
 
 
+def fix_columns(entities: List[Dict[str, Any]]) -> None:
+    """
+    Converts the text values of the entities in place. The type gets inferred once per column: a column is converted to datetime, int, float or bool, if all of its non-empty values can be converted to that type. Otherwise its values stay text.
+    """
+    values_by_column_name: Dict[str, List[Any]] = {}
+    for entity in entities:
+        for column_name, value in entity.items():
+            values_by_column_name.setdefault(column_name, []).append(value)
+
+    converters_by_column_name: Dict[str, Callable[[str], Any]] = {}
+    for column_name, values in values_by_column_name.items():
+        text_values = [value for value in values if value and isinstance(value, str)]
+        if text_values:
+            converter = __get_column_converter(text_values)
+            if converter:
+                converters_by_column_name[column_name] = converter
+
+    if converters_by_column_name:
+        for entity in entities:
+            for column_name, converter in converters_by_column_name.items():
+                value = entity.get(column_name)
+                if value and isinstance(value, str):
+                    entity[column_name] = converter(value)
+
+
 def fix_field(field: str) -> Union[datetime, int, float, str]:
     if field:
         try:
@@ -161,6 +182,78 @@ def get_file_name(file_prefix: str, data_retrieved_at: datetime, file_ending: FI
 
 # ---------- Helper functions ----------
 
+def __convert_to_bool(field: str) -> bool:
+    field_lower = field.lower().strip()
+    if field_lower == 'true':
+        return True
+    elif field_lower == 'false':
+        return False
+    raise ValueError(f'Not a boolean value: {field}')
+
+
+def __convert_to_datetime(field: str) -> datetime:
+    result = utils.parse.pss_datetime(field)
+    if result < __EARLIEST_EXCEL_DATETIME:
+        result = __EARLIEST_EXCEL_DATETIME
+    return result
+
+
+def __convert_to_float(field: str) -> float:
+    if len(field) >= 2 and field.startswith('0'):
+        raise ValueError(f'Numbers with leading zeros are kept as text: {field}')
+    return float(field)
+
+
+def __convert_to_int(field: str) -> int:
+    if len(field) >= 2 and field.startswith('0'):
+        raise ValueError(f'Numbers with leading zeros are kept as text: {field}')
+    return int(field)
+
+
+def __create_cell(ws: Any, value: Any, number_format: Optional[str]) -> WriteOnlyCell:
+    result = WriteOnlyCell(ws, value=__get_xl_value(value))
+    if number_format:
+        result.number_format = number_format
+    return result
+
+
+def __get_column_converter(text_values: List[str]) -> Optional[Callable[[str], Any]]:
+    for converter in __COLUMN_CONVERTERS:
+        try:
+            for value in text_values:
+                converter(value)
+        except (TypeError, ValueError):
+            continue
+        return converter
+    return None
+
+
+def __get_xl_value(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def __write_xl_table(save_to: str, column_names: List[Any], lines: Iterable[List[Any]]) -> None:
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(column_names)
+    row_count = 0
+    for line in lines:
+        ws.append([__get_xl_value(value) for value in line])
+        row_count += 1
+
+    if row_count:
+        table = Table(displayName='tbl', ref=__convert_to_ref(len(column_names) - 1, row_count))
+        table.tableStyleInfo = __BASE_TABLE_STYLE
+        table._initialise_columns()
+        for column_name, column in zip(column_names, table.tableColumns):
+            column.name = str(column_name)
+        ws.add_table(table)
+
+    wb.save(save_to)
+
+
 def __convert_to_ref(column_count: int, row_count: int, column_start: int = 0, row_start: int = 0, zero_based: bool = True) -> str:
     if zero_based:
         column_start += 1
@@ -171,18 +264,18 @@ def __convert_to_ref(column_count: int, row_count: int, column_start: int = 0, r
     return result
 
 
-def __get_ref_for_df(df: pandas.DataFrame, column_start: int = 0, row_start: int = 0, zero_based: bool = True) -> str:
-    col_count = len(df.columns) - 1
-    row_count = len(df.index)
-    ref = __convert_to_ref(col_count, row_count, column_start=column_start, row_start=row_start, zero_based=zero_based)
-    return ref
-
-
 
 
 
 # ---------- Initialization ----------
 
+__COLUMN_CONVERTERS: List[Callable[[str], Any]] = [
+    __convert_to_datetime,
+    __convert_to_int,
+    __convert_to_float,
+    __convert_to_bool,
+]
+
 __FILE_ENDING_LOOKUP = {
     FILE_ENDING.CSV: 'csv',
     FILE_ENDING.JSON: 'json',
@@ -1,11 +1,12 @@
+import asyncio
 import calendar
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import json
 import os
-import random
-from threading import Lock
-import time
-from typing import Dict, List, Optional, Tuple, Union
+from sys import intern
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple, Union
 import urllib.parse
 import yaml
 
@@ -54,6 +55,14 @@ class TourneyData(object):
             self.__fleets = TourneyData.__create_fleet_data_from_data_v3(data['fleets'], data['users'], data['data'])
             self.__users = TourneyData.__create_user_data_from_data_v3(data['users'], data['data'], self.__fleets)
         self.__data_date: datetime = utils.parse.formatted_datetime(data['meta']['timestamp'], include_tz=False, include_tz_brackets=False)
+        TourneyData.__intern_values(self.__fleets)
+        TourneyData.__intern_values(self.__users)
+
+        self.__users_ids_by_fleet_id: Dict[str, List[str]] = {}
+        for user_id, user_info in self.__users.items():
+            self.__users_ids_by_fleet_id.setdefault(user_info['AllianceId'], []).append(user_id)
+        self.__fleets_view: Mapping[str, EntityInfo] = MappingProxyType(self.__fleets)
+        self.__users_view: Mapping[str, EntityInfo] = MappingProxyType(self.__users)
 
         self.__top_100_users: EntitiesData = {}
         top_users_infos = sorted(list(self.__users.values()), key=lambda user_info: -int(user_info.get('Trophy', 0)))[:100]
@@ -91,6 +100,13 @@ class TourneyData(object):
         """
         return dict({key: dict(value) for key, value in self.__fleets.items()})
 
+    @property
+    def fleets_data(self) -> Mapping[str, EntityInfo]:
+        """
+        Read-only view on the fleet data. The fleet infos are shared and must not be modified.
+        """
+        return self.__fleets_view
+
     @property
     def max_tournament_battle_attempts(self) -> Optional[int]:
         """
@@ -140,6 +156,13 @@ class TourneyData(object):
         """
         return dict({key: dict(value) for key, value in self.__users.items()})
 
+    @property
+    def users_data(self) -> Mapping[str, EntityInfo]:
+        """
+        Read-only view on the user data. The user infos are shared and must not be modified.
+        """
+        return self.__users_view
+
     @property
     def year(self) -> int:
         """
@@ -168,6 +191,13 @@ class TourneyData(object):
         return result
 
 
+    def get_fleet_users_data(self, fleet_id: str) -> EntitiesData:
+        """
+        Look up the members of a fleet by fleet id. The user infos are shared and must not be modified.
+        """
+        return {user_id: self.__users[user_id] for user_id in self.__users_ids_by_fleet_id.get(fleet_id, [])}
+
+
     def get_user_data_by_id(self, user_id: str) -> EntityInfo:
         """
         Look up user by id
@@ -298,12 +328,8 @@ class TourneyData(object):
                 'AllianceJoinDate': entry[5],
                 'LastLoginDate': entry[6],
                 'Name': users_dict[entry[0]],
-                'Alliance': {}
+                'Alliance': TourneyData.__get_user_fleet_info(fleet_id, fleet_data),
             }
-            if fleet_id and fleet_id != '0':
-                fleet_info = fleet_data.get(fleet_id, {})
-                for key, value in fleet_info.items():
-                    result[entry[0]]['Alliance'][key] = value
 
         return result
 
@@ -329,12 +355,8 @@ class TourneyData(object):
                 'PVPDefenceWins': str(user[14]),
                 'PVPDefenceLosses': str(user[15]),
                 'PVPDefenceDraws': str(user[16]),
-                'Alliance': {}
+                'Alliance': TourneyData.__get_user_fleet_info(fleet_id, fleet_data),
             }
-            if fleet_id and fleet_id != '0':
-                fleet_info = fleet_data.get(fleet_id, {})
-                for key, value in fleet_info.items():
-                    result[user_id]['Alliance'][key] = value
 
         return result
 
@@ -363,12 +385,8 @@ class TourneyData(object):
                 'PVPDefenceWins': str(user[14]),
                 'PVPDefenceLosses': str(user[15]),
                 'PVPDefenceDraws': str(user[16]),
-                'Alliance': {}
+                'Alliance': TourneyData.__get_user_fleet_info(fleet_id, fleet_data),
             }
-            if fleet_id and fleet_id != '0':
-                fleet_info = fleet_data.get(fleet_id, {})
-                for key, value in fleet_info.items():
-                    result[user_id]['Alliance'][key] = value
 
         return result
 
@@ -398,12 +416,8 @@ class TourneyData(object):
                 'PVPDefenceLosses': str(user[15]),
                 'PVPDefenceDraws': str(user[16]),
                 'ChampionshipScore': str(user[17]),
-                'Alliance': {}
+                'Alliance': TourneyData.__get_user_fleet_info(fleet_id, fleet_data),
             }
-            if fleet_id and fleet_id != '0':
-                fleet_info = fleet_data.get(fleet_id, {})
-                for key, value in fleet_info.items():
-                    result[user_id]['Alliance'][key] = value
 
         return result
 
@@ -434,12 +448,8 @@ class TourneyData(object):
                 'PVPDefenceDraws': str(user[16]),
                 'ChampionshipScore': str(user[17]),
                 'HighestTrophy': str(user[18]),
-                'Alliance': {}
+                'Alliance': TourneyData.__get_user_fleet_info(fleet_id, fleet_data),
             }
-            if fleet_id and fleet_id != '0':
-                fleet_info = fleet_data.get(fleet_id, {})
-                for key, value in fleet_info.items():
-                    result[user_id]['Alliance'][key] = value
 
         return result
 
@@ -471,16 +481,33 @@ class TourneyData(object):
                 'ChampionshipScore': str(user[17]),
                 'HighestTrophy': str(user[18]),
                 'TournamentBonusScore': str(user[19]),
-                'Alliance': {}
+                'Alliance': TourneyData.__get_user_fleet_info(fleet_id, fleet_data),
             }
-            if fleet_id and fleet_id != '0':
-                fleet_info = fleet_data.get(fleet_id, {})
-                for key, value in fleet_info.items():
-                    result[user_id]['Alliance'][key] = value
 
         return result
 
 
+    @staticmethod
+    def __get_user_fleet_info(fleet_id: str, fleet_data: EntitiesData) -> EntityInfo:
+        """
+        Users share the fleet info of their fleet instead of holding a copy of it.
+        """
+        if fleet_id and fleet_id != '0':
+            return fleet_data.get(fleet_id, {})
+        return {}
+
+
+    @staticmethod
+    def __intern_values(entities_data: EntitiesData) -> None:
+        """
+        Many values (like ids, division design ids and numbers) repeat across entities, so intern them in-place to store every distinct string just once.
+        """
+        for entity_info in entities_data.values():
+            for key, value in entity_info.items():
+                if isinstance(value, str):
+                    entity_info[key] = intern(value)
+
+
     @staticmethod
     def __convert_timestamp_v4(timestamp: int) -> str:
         minutes, seconds = divmod(timestamp, 60)
@@ -496,8 +523,9 @@ class TourneyData(object):
 
 
 class TourneyDataClient():
-    def __init__(self, project_id: str, private_key_id: str, private_key: str, client_email: str, client_id: str, scopes: List[str], folder_id: str, service_account_file_path: str, settings_file_path: str, earliest_date: datetime) -> None:
+    def __init__(self, project_id: str, private_key_id: str, private_key: str, client_email: str, client_id: str, scopes: List[str], folder_id: str, service_account_file_path: str, settings_file_path: str, earliest_date: datetime, cache_path: str = None) -> None:
         print('Create TourneyDataClient')
+        self._cache_path: str = cache_path
         self._client_email: str = client_email
         self._client_id: str = client_id
         self._folder_id: str = folder_id
@@ -509,10 +537,10 @@ class TourneyDataClient():
         self._settings_file_path: str = settings_file_path
         self.__earliest_date: datetime = earliest_date
 
-        self.__READ_LOCK: Lock = Lock()
-        self.__WRITE_LOCK: Lock = Lock()
-        self.__write_requested: bool = False
-        self.__reader_count: int = 0
+        # pydrive shares a single http object between all requests, so all Drive I/O happens on one dedicated thread.
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='TourneyDataClient')
+        self.__drive_lock: asyncio.Lock = asyncio.Lock()
+        self.__pending_retrievals: Dict[Tuple[int, int, Optional[int]], asyncio.Task] = {}
 
         self.__cache: Dict[int, Dict[int, Dict[int, TourneyData]]] = {}
 
@@ -537,13 +565,17 @@ class TourneyDataClient():
         return max(self.__cache.keys())
 
 
-    def get_data(self, year: int, month: int, day: Optional[int] = None, initializing: bool = False) -> TourneyData:
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False)
+
+
+    async def get_data(self, year: int, month: int, day: Optional[int] = None, initializing: bool = False) -> TourneyData:
         if year < self.from_year:
             raise ValueError(f'There\'s no data from {year}. Earliest data available is from {calendar.month_name[self.from_month]} {self.from_year}.')
         if year == self.from_year:
             if month < self.from_month:
                 raise ValueError(f'There\'s no data from {calendar.month_name[month]} {year}. Earliest data available is from {calendar.month_name[self.from_month]} {self.from_year}.')
-        if not initializing:
+        if not initializing and self.__cache:
             if year > self.to_year or (year == self.to_year and month > self.to_month):
                 utc_now = utils.get_utc_now()
                 if utc_now.year == year and utc_now.month == month:
@@ -555,19 +587,18 @@ class TourneyDataClient():
         result = self.__read_data(year, month, day)
 
         if result is None:
-            result = self.__retrieve_data(year, month, day, initializing=initializing)
-            self.__cache_data(result)
+            result = await self.__get_retrieval_task(year, month, day, initializing=initializing)
 
         return result
 
 
-    def get_latest_daily_data(self, initializing: bool = False) -> TourneyData:
+    async def get_latest_daily_data(self, initializing: bool = False) -> TourneyData:
         yesterday = utils.get_utc_now() - utils.datetime.ONE_DAY
-        result = self.get_data(yesterday.year, yesterday.month, yesterday.day, initializing=initializing)
+        result = await self.get_data(yesterday.year, yesterday.month, yesterday.day, initializing=initializing)
         return result
 
 
-    def get_latest_monthly_data(self, initializing: bool = False) -> TourneyData:
+    async def get_latest_monthly_data(self, initializing: bool = False) -> TourneyData:
         utc_now = utils.get_utc_now()
         year, month = TourneyDataClient.__get_last_tourney_year_and_month(utc_now)
         if settings.MOST_RECENT_TOURNAMENT_DATA:
@@ -577,7 +608,7 @@ class TourneyDataClient():
                 year += 1
         result = None
         while year > self.from_year or month >= self.from_month:
-            result = self.get_data(year, month, initializing=initializing)
+            result = await self.get_data(year, month, initializing=initializing)
             if result:
                 break
             month -= 1
@@ -587,15 +618,20 @@ class TourneyDataClient():
         return result
 
 
-    def get_second_latest_daily_data(self, initializing: bool = False) -> TourneyData:
+    async def get_second_latest_daily_data(self, initializing: bool = False) -> TourneyData:
         yesterday = utils.get_utc_now() - utils.datetime.ONE_DAY - utils.datetime.ONE_DAY
-        result = self.get_data(yesterday.year, yesterday.month, yesterday.day, initializing=initializing)
+        result = await self.get_data(yesterday.year, yesterday.month, yesterday.day, initializing=initializing)
         return result
 
 
-    def __add_reader(self) -> None:
-        with self.__READ_LOCK:
-            self.__reader_count = self.__reader_count + 1
+    async def init(self) -> None:
+        """
+        Retrieves the most recent tournament data.
+        """
+        await self.get_latest_monthly_data(initializing=True)
+        await self.get_latest_daily_data(initializing=True)
+        await self.get_second_latest_daily_data(initializing=True)
+        self.__initialized = True
 
 
     def __assert_initialized(self) -> None:
@@ -605,20 +641,22 @@ class TourneyDataClient():
 
     def __cache_data(self, tourney_data: TourneyData) -> bool:
         if tourney_data:
-            self.__request_write()
-            can_write = False
-            while not can_write:
-                can_write = self.__get_reader_count() == 0
-                if not can_write:
-                    time.sleep(random.random())
-                with self.__WRITE_LOCK:
-                    self.__cache.setdefault(tourney_data.year, {}).setdefault(tourney_data.month, {})[tourney_data.day] = tourney_data
-                    self.__write_requested = False
-                return True
-            return False
+            self.__cache.setdefault(tourney_data.year, {}).setdefault(tourney_data.month, {})[tourney_data.day] = tourney_data
+            return True
         return False
 
 
+    def __download_data(self, year: int, month: int, day: Optional[int] = None) -> TourneyData:
+        g_file = self.__get_latest_file(year, month, day)
+        result = None
+        if g_file:
+            raw_data = self.__get_file_content(g_file)
+            data = json.loads(raw_data)
+            if data:
+                result = TourneyData(data)
+        return result
+
+
     def __ensure_initialized(self) -> None:
         try:
             self.__drive.ListFile({'q': f'\'{self._folder_id}\' in parents and title contains \'highaöegjoyödfmj giod\''}).GetList()
@@ -626,6 +664,31 @@ class TourneyDataClient():
             self.__initialize()
 
 
+    def __get_file_content(self, g_file: pydrive.files.GoogleDriveFile) -> str:
+        """
+        Downloaded files get stored in the cache directory, if there's one, so that processes sharing that directory download every file only once. Reading a cached file updates its modification date, so that the least recently used files get pruned first.
+        """
+        if not self._cache_path:
+            return g_file.GetContentString()
+
+        if not os.path.isdir(self._cache_path):
+            os.makedirs(self._cache_path, exist_ok=True)
+        file_path = os.path.join(self._cache_path, os.path.basename(g_file['title']))
+        with utils.io.lock_file(file_path):
+            if os.path.isfile(file_path):
+                os.utime(file_path)
+                with open(file_path, 'r', encoding='utf-8') as fp:
+                    return fp.read()
+
+            result = g_file.GetContentString()
+            temp_file_path = f'{file_path}.{os.getpid()}.tmp'
+            with open(temp_file_path, 'w', encoding='utf-8') as fp:
+                fp.write(result)
+            os.replace(temp_file_path, file_path)
+        self.__prune_cache(file_path)
+        return result
+
+
     def __get_first_file(self, file_name: str) -> pydrive.files.GoogleDriveFile:
         file_list = self.__drive.ListFile({'q': f"'{self._folder_id}' in parents and title = '{file_name}'"}).GetList()
         for file_def in file_list:
@@ -633,9 +696,7 @@ class TourneyDataClient():
         return None
 
 
-    def __get_latest_file(self, year: int, month: int, day: Optional[int] = None, initializing: bool = False) -> pydrive.files.GoogleDriveFile:
-        if not initializing:
-            self.__ensure_initialized()
+    def __get_latest_file(self, year: int, month: int, day: Optional[int] = None) -> pydrive.files.GoogleDriveFile:
         file_name_part: str = f'{year:04d}{month:02d}'
         if day is not None:
             file_name_part += f'{day:02d}'
@@ -646,16 +707,17 @@ class TourneyDataClient():
         return None
 
 
-    def __get_reader_count(self) -> int:
-        with self.__READ_LOCK:
-            result = self.__reader_count
-        return result
-
-
-    def __get_write_requested(self) -> bool:
-        with self.__WRITE_LOCK:
-            result = self.__write_requested
-        return result
+    def __get_retrieval_task(self, year: int, month: int, day: Optional[int] = None, initializing: bool = False) -> asyncio.Future:
+        """
+        Concurrent requests for the same file share a single download.
+        """
+        key = (year, month, day)
+        task = self.__pending_retrievals.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self.__retrieve_data(year, month, day, initializing=initializing))
+            task.add_done_callback(lambda _: self.__pending_retrievals.pop(key, None))
+            self.__pending_retrievals[key] = task
+        return asyncio.shield(task)
 
 
     def __initialize(self) -> None:
@@ -665,20 +727,41 @@ class TourneyDataClient():
         credentials = pydrive.auth.ServiceAccountCredentials.from_json_keyfile_name(self._service_account_file_path, self._scopes)
         self.__gauth.credentials = credentials
         self.__drive: pydrive.drive.GoogleDrive = pydrive.drive.GoogleDrive(self.__gauth)
-        self.get_latest_monthly_data(initializing=True)
-        self.get_latest_daily_data(initializing=True)
-        self.get_second_latest_daily_data(initializing=True)
-        self.__initialized = True
 
 
-    def __read_data(self, year: int, month: int, day: Optional[int] = None) -> TourneyData:
-        can_read = False
-        while not can_read:
-            can_read = not self.__get_write_requested()
-            if not can_read:
-                time.sleep(random.random())
+    def __prune_cache(self, keep_file_path: str) -> None:
+        """
+        Removes the least recently used files from the cache directory, until it's not larger than settings.TOURNAMENT_DATA_CACHE_MAX_BYTES. Files being read or written by another process at the moment are skipped.
+
+        Lock files are kept. A process waiting for the lock of a removed lock file would lock an orphaned file, while a process creating the lock file anew would lock another one, so both would enter the critical section.
+        """
+        file_infos = []
+        total_size = 0
+        for entry in os.scandir(self._cache_path):
+            if not entry.is_file() or entry.name.endswith(('.lock', '.tmp')):
+                continue
+            stat = entry.stat()
+            file_infos.append((stat.st_mtime, stat.st_size, entry.path))
+            total_size += stat.st_size
+
+        for _, size, file_path in sorted(file_infos):
+            if total_size <= settings.TOURNAMENT_DATA_CACHE_MAX_BYTES:
+                break
+            if file_path == keep_file_path:
+                continue
+            lock_fp = utils.io.try_acquire_file_lock(file_path)
+            if lock_fp is None:
+                continue
+            try:
+                os.remove(file_path)
+                total_size -= size
+            except OSError as err:
+                print(f'[TourneyDataClient.__prune_cache] Could not remove cached file: {file_path}\n{err.__class__.__name__}: {err}')
+            finally:
+                utils.io.release_file_lock(lock_fp)
+
 
-        self.__add_reader()
+    def __read_data(self, year: int, month: int, day: Optional[int] = None) -> TourneyData:
         result = self.__cache.get(year, {}).get(month, {})
         if result:
             if day is None:
@@ -687,30 +770,16 @@ class TourneyDataClient():
                 result = result.get(day, None)
         else:
             result = None
-        self.__remove_reader()
         return result
 
 
-    def __remove_reader(self) -> None:
-        with self.__READ_LOCK:
-            self.__reader_count = self.__reader_count - 1
-
-
-    def __request_write(self) -> None:
-        with self.__WRITE_LOCK:
-            self.__write_requested = True
-
-
-    def __retrieve_data(self, year: int, month: int, day: Optional[int] = False, initializing: bool = False) -> TourneyData:
+    async def __retrieve_data(self, year: int, month: int, day: Optional[int] = None, initializing: bool = False) -> TourneyData:
+        loop = asyncio.get_running_loop()
         if not initializing:
-            self.__ensure_initialized()
-        g_file = self.__get_latest_file(year, month, day, initializing=initializing)
-        result = None
-        if g_file:
-            raw_data = g_file.GetContentString()
-            data = json.loads(raw_data)
-            if data:
-                result = TourneyData(data)
+            async with self.__drive_lock:
+                await loop.run_in_executor(self.__executor, self.__ensure_initialized)
+        result = await loop.run_in_executor(self.__executor, self.__download_data, year, month, day)
+        self.__cache_data(result)
         return result
 
 
@@ -0,0 +1,158 @@
+from asyncio import Lock
+import json
+import re
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from . import metrics
+from . import settings
+
+
+# ---------- Constants ----------
+
+SESSION: aiohttp.ClientSession = None
+__SESSION_LOCK: Lock = Lock()
+
+__RX_PSS_API_ENDPOINT: re.Pattern = re.compile(r'^/?(\w+Service/\w+)')
+
+
+
+
+
+# ---------- Requests ----------
+
+async def get_bytes(url: str, params: Dict[str, Any] = None) -> bytes:
+    __log_request(url, params)
+    session = await get_session()
+    with metrics.HTTP_REQUEST_DURATION.time(method='GET', endpoint=__get_endpoint(url), status='error') as labels:
+        async with session.get(url, params=params) as response:
+            result = await response.read()
+            labels['status'] = response.status
+    __log_response(result)
+    return result
+
+
+async def get_status(url: str) -> int:
+    __log_request(url)
+    session = await get_session()
+    with metrics.HTTP_REQUEST_DURATION.time(method='GET', endpoint=__get_endpoint(url), status='error') as labels:
+        async with session.get(url) as response:
+            result = response.status
+            labels['status'] = response.status
+    return result
+
+
+async def get_text(url: str, params: Dict[str, Any] = None) -> str:
+    __log_request(url, params)
+    session = await get_session()
+    with metrics.HTTP_REQUEST_DURATION.time(method='GET', endpoint=__get_endpoint(url), status='error') as labels:
+        async with session.get(url, params=params) as response:
+            result = await response.text(encoding='utf-8')
+            labels['status'] = response.status
+    __log_response(result)
+    return result
+
+
+async def post_text(url: str, params: Dict[str, Any] = None) -> str:
+    __log_request(url, params)
+    session = await get_session()
+    with metrics.HTTP_REQUEST_DURATION.time(method='POST', endpoint=__get_endpoint(url), status='error') as labels:
+        async with session.post(url, params=params) as response:
+            result = await response.text(encoding='utf-8')
+            labels['status'] = response.status
+    __log_response(result)
+    return result
+
+
+
+
+
+# ---------- Session ----------
+
+async def connect() -> aiohttp.ClientSession:
+    """
+    Creates the process-wide client session, if there's none or if it has been closed.
+    """
+    global SESSION
+    async with __SESSION_LOCK:
+        if not is_connected(SESSION):
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_CONNECTION_LIMIT,
+                limit_per_host=settings.HTTP_CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+                use_dns_cache=True,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=settings.HTTP_TIMEOUT_TOTAL,
+                connect=settings.HTTP_TIMEOUT_CONNECT,
+                sock_read=settings.HTTP_TIMEOUT_SOCK_READ,
+            )
+            SESSION = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return SESSION
+
+
+async def disconnect() -> None:
+    """
+    Closes the process-wide client session and all pooled connections.
+    """
+    global SESSION
+    async with __SESSION_LOCK:
+        if is_connected(SESSION):
+            await SESSION.close()
+        SESSION = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    if is_connected(SESSION):
+        return SESSION
+    return await connect()
+
+
+def is_connected(session: Optional[aiohttp.ClientSession]) -> bool:
+    if session:
+        return not session.closed
+    return False
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __get_endpoint(url: str) -> str:
+    """
+    Returns the service endpoint for requests to the PSS API and the host for any other request, so that the metrics don't get a label per sprite or file.
+    """
+    split_url = urlsplit(url)
+    match = __RX_PSS_API_ENDPOINT.match(split_url.path)
+    if match:
+        return match.group(1)
+    return split_url.netloc
+
+
+
+def __log_request(url: str, params: Dict[str, Any] = None) -> None:
+    if settings.PRINT_DEBUG_WEB_REQUESTS:
+        print(f'[WebRequest] Attempting to get data from url: {url}')
+        if params:
+            print(f'[WebRequest]   with parameters: {json.dumps(params, separators=(",", ":"))}')
+
+
+def __log_response(data: Any) -> None:
+    if settings.PRINT_DEBUG_WEB_REQUESTS:
+        log_data = data or ''
+        if log_data and len(log_data) > 100:
+            log_data = log_data[:100]
+        print(f'[WebRequest] Returned data: {log_data}')
+
+
+
+
+
+# ---------- Initialization ----------
+
+async def init() -> None:
+    await connect()
@@ -0,0 +1,306 @@
+import abc
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+from aiohttp import web
+
+from . import settings
+
+
+# ---------- Constants ----------
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+
+__RUNNER: web.AppRunner = None
+
+
+
+
+
+# ---------- Classes ----------
+
+class Metric(abc.ABC):
+    """
+    Base class of all metrics. The values of a metric are tracked per combination of label values.
+    """
+    TYPE_NAME: str = 'untyped'
+
+    def __init__(self, name: str, documentation: str, label_names: List[str] = None) -> None:
+        self.__name: str = name
+        self.__documentation: str = documentation
+        self.__label_names: Tuple[str, ...] = tuple(label_names or [])
+
+
+    @property
+    def documentation(self) -> str:
+        return self.__documentation
+
+    @property
+    def label_names(self) -> Tuple[str, ...]:
+        return self.__label_names
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+
+    def collect(self) -> List[str]:
+        """
+        Returns the metric in the Prometheus text format.
+        """
+        result = [
+            f'# HELP {self.name} {_escape_documentation(self.documentation)}',
+            f'# TYPE {self.name} {self.TYPE_NAME}',
+        ]
+        result.extend(self._collect_samples())
+        return result
+
+
+    @abc.abstractmethod
+    def _collect_samples(self) -> List[str]:
+        """
+        Returns the sample lines of the metric.
+        """
+
+
+    def _get_label_values(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.__label_names) or any(label_name not in labels for label_name in self.__label_names):
+            raise ValueError(f'The metric \'{self.__name}\' expects the labels: {", ".join(self.__label_names)}')
+        return tuple(str(labels[label_name]) for label_name in self.__label_names)
+
+
+    def _get_sample_line(self, sample_name: str, label_values: Tuple[str, ...], value: float, additional_labels: Dict[str, str] = None) -> str:
+        labels = list(zip(self.__label_names, label_values))
+        if additional_labels:
+            labels.extend(additional_labels.items())
+        if labels:
+            labels_string = ','.join(f'{label_name}="{_escape_label_value(label_value)}"' for label_name, label_value in labels)
+            return f'{sample_name}{{{labels_string}}} {_format_value(value)}'
+        return f'{sample_name} {_format_value(value)}'
+
+
+class Counter(Metric):
+    TYPE_NAME: str = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: List[str] = None) -> None:
+        super().__init__(name, documentation, label_names=label_names)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError('Counters can only be increased.')
+        label_values = self._get_label_values(labels)
+        self.__values[label_values] = self.__values.get(label_values, 0.0) + amount
+
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Sets the total. Meant for mirroring counts, which are tracked elsewhere.
+        """
+        self.__values[self._get_label_values(labels)] = value
+
+
+    def _collect_samples(self) -> List[str]:
+        return [self._get_sample_line(self.name, label_values, value) for label_values, value in self.__values.items()]
+
+
+class Gauge(Metric):
+    TYPE_NAME: str = 'gauge'
+
+    def __init__(self, name: str, documentation: str, label_names: List[str] = None) -> None:
+        super().__init__(name, documentation, label_names=label_names)
+        self.__values: Dict[Tuple[str, ...], float] = {}
+
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        label_values = self._get_label_values(labels)
+        self.__values[label_values] = self.__values.get(label_values, 0.0) + amount
+
+
+    def set(self, value: float, **labels) -> None:
+        self.__values[self._get_label_values(labels)] = value
+
+
+    def _collect_samples(self) -> List[str]:
+        return [self._get_sample_line(self.name, label_values, value) for label_values, value in self.__values.items()]
+
+
+class Histogram(Metric):
+    TYPE_NAME: str = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: List[str] = None, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, label_names=label_names)
+        self.__buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self.__bucket_counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.__counts: Dict[Tuple[str, ...], int] = {}
+        self.__sums: Dict[Tuple[str, ...], float] = {}
+
+
+    def observe(self, value: float, **labels) -> None:
+        label_values = self._get_label_values(labels)
+        bucket_counts = self.__bucket_counts.get(label_values)
+        if bucket_counts is None:
+            bucket_counts = [0] * len(self.__buckets)
+            self.__bucket_counts[label_values] = bucket_counts
+        bucket_index = bisect_left(self.__buckets, value)
+        if bucket_index < len(bucket_counts):
+            bucket_counts[bucket_index] += 1
+        self.__counts[label_values] = self.__counts.get(label_values, 0) + 1
+        self.__sums[label_values] = self.__sums.get(label_values, 0.0) + value
+
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[Dict[str, object]]:
+        """
+        Observes the time spent in the with-block. Labels may be changed or added through the yielded dictionary, e.g. to record the outcome.
+        """
+        labels = dict(labels)
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+    def _collect_samples(self) -> List[str]:
+        result = []
+        for label_values, bucket_counts in self.__bucket_counts.items():
+            cumulative_count = 0
+            for upper_bound, bucket_count in zip(self.__buckets, bucket_counts):
+                cumulative_count += bucket_count
+                result.append(self._get_sample_line(f'{self.name}_bucket', label_values, cumulative_count, additional_labels={'le': _format_value(upper_bound)}))
+            result.append(self._get_sample_line(f'{self.name}_bucket', label_values, self.__counts[label_values], additional_labels={'le': '+Inf'}))
+            result.append(self._get_sample_line(f'{self.name}_sum', label_values, self.__sums[label_values]))
+            result.append(self._get_sample_line(f'{self.name}_count', label_values, self.__counts[label_values]))
+        return result
+
+
+class Registry():
+    """
+    Holds all metrics of the process. Collectors get called before rendering to update metrics mirroring state, which is tracked elsewhere.
+    """
+    def __init__(self) -> None:
+        self.__collectors: List[Callable[[], None]] = []
+        self.__metrics: Dict[str, Metric] = {}
+
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self.__collectors.append(collector)
+
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.__metrics:
+            raise ValueError(f'There\'s already a metric named \'{metric.name}\'.')
+        self.__metrics[metric.name] = metric
+        return metric
+
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text format.
+        """
+        for collector in self.__collectors:
+            try:
+                collector()
+            except Exception as err:
+                print(f'[Registry.render] Could not collect metrics: {err.__class__.__name__}: {err}')
+
+        lines = []
+        for metric in sorted(self.__metrics.values(), key=lambda metric: metric.name):
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+
+
+
+# ---------- Functions ----------
+
+def timed(histogram: Histogram, **labels) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Decorator observing the time spent in a coroutine function.
+    """
+    def decorator(function: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @wraps(function)
+        async def wrapper(*args, **kwargs) -> Any:
+            with histogram.time(**labels):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _escape_documentation(documentation: str) -> str:
+    return documentation.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label_value(label_value: str) -> str:
+    return label_value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+async def __handle_metrics_request(request: web.Request) -> web.Response:
+    return web.Response(body=REGISTRY.render().encode('utf-8'), headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+
+
+
+
+
+# ---------- Initialization ----------
+
+REGISTRY: Registry = Registry()
+
+
+CACHE_REFRESH_DURATION: Histogram = REGISTRY.register(Histogram('pss_cache_refresh_duration_seconds', 'Time spent refreshing a PSS data cache, including download and parsing.', ['cache', 'status']))
+COMMAND_DURATION: Histogram = REGISTRY.register(Histogram('command_duration_seconds', 'Time spent running a command, after its checks passed.', ['command', 'command_type']))
+DB_QUERY_DURATION: Histogram = REGISTRY.register(Histogram('db_query_duration_seconds', 'Time spent running database queries, including acquiring a connection.', ['function']))
+DISCORD_SEND_DURATION: Histogram = REGISTRY.register(Histogram('discord_send_duration_seconds', 'Time spent sending output to Discord.', ['function']))
+FLEET_SHEET_DURATION: Histogram = REGISTRY.register(Histogram('fleet_sheet_duration_seconds', 'Time spent creating fleet sheets, split into preparing the data and writing the file.', ['sheet_type', 'stage']))
+HTTP_REQUEST_DURATION: Histogram = REGISTRY.register(Histogram('http_request_duration_seconds', 'Duration of outgoing HTTP requests. Requests to the PSS API are labeled with the called service endpoint.', ['method', 'endpoint', 'status']))
+
+
+async def init() -> None:
+    """
+    Starts serving the metrics on the configured local port, if there's one.
+    """
+    global __RUNNER
+    if not settings.METRICS_PORT or __RUNNER is not None:
+        return
+
+    app = web.Application()
+    app.router.add_get('/metrics', __handle_metrics_request)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.METRICS_HOST, settings.METRICS_PORT)
+    await site.start()
+    __RUNNER = runner
+    print(f'Serving metrics on http://{settings.METRICS_HOST}:{settings.METRICS_PORT}/metrics')
+
+
+async def close() -> None:
+    global __RUNNER
+    if __RUNNER is not None:
+        await __RUNNER.cleanup()
+        __RUNNER = None
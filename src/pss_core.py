@@ -1,10 +1,9 @@
 from datetime import datetime
 import json
 import re
-from typing import Any, Callable, Dict, List, Optional
-
-import aiohttp
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
+from . import http_client
 from . import pss_entity as entity
 from .pss_exception import MaintenanceError
 from . import settings
@@ -19,12 +18,61 @@ LIVEOPS_BASE_PATH: str = 'LiveOpsService/GetTodayLiveOps?deviceType=DeviceTypeAn
 __RX_PROPERTY_FIX_REPLACE: re.Pattern = re.compile(r'[^a-z0-9]', re.IGNORECASE)
 __RX_ALLOWED_CANDIDATE_FIX_REPLACE: re.Pattern = re.compile(r'(\(.*?\)|[^a-z0-9 ])', re.IGNORECASE)
 
+SEARCH_INDEX_NGRAM_LENGTH: int = 3
+
+
+
+
+
+# ---------- Classes ----------
+
+class EntitiesSearchIndex():
+    """
+    Precomputed lookup structures for searching entities by a property value. Returns the same results as `get_ids_from_property_value` for the data it has been built from.
+    """
+    def __init__(self, data: EntitiesData, property_name: str, fix_data_delegate: Callable[[str], str]) -> None:
+        self.__data: EntitiesData = data
+        self.__fix_data_delegate: Callable[[str], str] = fix_data_delegate
+        self.__fixed_entries: List[Tuple[str, str]] = [(entry_id, fix_data_delegate(entry_data[property_name])) for entry_id, entry_data in data.items() if entry_data[property_name]]
+        self.__exact_matches: Dict[str, List[str]] = {}
+        self.__ngrams: Dict[str, Set[int]] = {}
+        for i, (entry_id, entry_property) in enumerate(self.__fixed_entries):
+            self.__exact_matches.setdefault(entry_property, []).append(entry_id)
+            for ngram in _get_ngrams(entry_property):
+                self.__ngrams.setdefault(ngram, set()).add(i)
+
+
+    @property
+    def data(self) -> EntitiesData:
+        return self.__data
+
+
+    def get_ids(self, property_value: str, match_exact: bool = False) -> List[str]:
+        if not property_value:
+            return []
+
+        fixed_value = self.__fix_data_delegate(property_value)
+        if match_exact:
+            return list(self.__exact_matches.get(fixed_value, []))
+
+        ngrams = _get_ngrams(fixed_value)
+        if ngrams:
+            postings = sorted((self.__ngrams.get(ngram, set()) for ngram in ngrams), key=len)
+            candidate_positions = set(postings[0]).intersection(*postings[1:])
+            candidates = (self.__fixed_entries[i] for i in sorted(candidate_positions))
+        else:
+            candidates = self.__fixed_entries
+        return _get_ids_ranked_by_similarity(candidates, fixed_value)
+
 
 
 
 
 # ---------- Functions ----------
 
+def create_search_index(data: EntitiesData, property_name: str, fix_data_delegate: Callable[[str], str] = None) -> EntitiesSearchIndex:
+    return EntitiesSearchIndex(data, property_name, fix_data_delegate or __fix_property_value)
+
 def filter_entities_data(data: EntitiesData, by: Dict[str, str], ignore_case: bool = False) -> Optional[EntitiesData]:
     """Parameter 'data':
        - A dict with entity ids as keys and entity info as values.
@@ -46,16 +94,21 @@ def fix_allowed_value_candidate(candidate: str) -> str:
 
 async def get_base_url() -> str:
     production_server = await __get_production_server()
-    result = f'https://{production_server}/'
+    if '://' in production_server:
+        result = f'{production_server.rstrip("/")}/'
+    else:
+        result = f'https://{production_server}/'
     return result
 
 
 async def get_data_from_path(path: str) -> str:
-    if path:
-        path = path.strip('/')
-    base_url = await get_base_url()
-    url = f'{base_url}{path}'
-    return await __get_data_from_url(url)
+    url = await get_url_from_path(path)
+    return await get_data_from_url(url)
+
+
+async def get_data_from_url(url: str) -> str:
+    data = await http_client.get_text(url)
+    return data
 
 
 async def get_latest_settings(language_key: str = 'en', base_url: str = None) -> EntityInfo:
@@ -63,7 +116,7 @@ async def get_latest_settings(language_key: str = 'en', base_url: str = None) ->
         language_key = 'en'
     base_url = base_url or await get_base_url()
     url = f'{base_url}{settings.LATEST_SETTINGS_BASE_PATH}{language_key}'
-    raw_text = await __get_data_from_url(url)
+    raw_text = await get_data_from_url(url)
     result = utils.convert.xmltree_to_dict3(raw_text)
     maintenance_message = result.get('MaintenanceMessage')
     if maintenance_message:
@@ -93,26 +146,19 @@ def get_ids_from_property_value(data: EntitiesData, property_name: str, property
     if match_exact:
         results = [key for key, value in fixed_data.items() if value == fixed_value]
     else:
-        similarity_map = {}
-        for entry_id, entry_property in fixed_data.items():
-            if entry_property.startswith(fixed_value) or fixed_value in entry_property:
-                similarity_value = utils.get_similarity(entry_property, fixed_value)
-                if similarity_value in similarity_map.keys():
-                    similarity_map[similarity_value].append((entry_id, entry_property))
-                else:
-                    similarity_map[similarity_value] = [(entry_id, entry_property)]
-        for similarity_value, entries in similarity_map.items():
-            similarity_map[similarity_value] = sorted(entries, key=lambda entry: entry[1])
-        similarity_values = sorted(list(similarity_map.keys()), reverse=True)
-        results = []
-        for similarity_value in similarity_values:
-            if not match_exact or (match_exact is True and similarity_value.is_integer()):
-                entry_ids = [entry_id for (entry_id, _) in similarity_map[similarity_value]]
-                results.extend(entry_ids)
+        results = _get_ids_ranked_by_similarity(fixed_data.items(), fixed_value)
 
     return results
 
 
+async def get_url_from_path(path: str) -> str:
+    if path:
+        path = path.strip('/')
+    base_url = await get_base_url()
+    result = f'{base_url}{path}'
+    return result
+
+
 def read_about_file(language_key: str = 'en') -> Dict[str, Any]:
     result = {}
     for pss_about_file in settings.PSS_ABOUT_FILES:
@@ -175,6 +221,33 @@ def transform_sanitize_text(*args, **kwargs) -> Optional[str]:
         return None
 
 
+def _get_ids_ranked_by_similarity(fixed_entries: Iterable[Tuple[str, str]], fixed_value: str) -> List[str]:
+    """
+    Parameter 'fixed_entries':
+    - (entity id, fixed property value) pairs in data order.
+    """
+    similarity_map = {}
+    for entry_id, entry_property in fixed_entries:
+        if fixed_value in entry_property:
+            similarity_value = utils.get_similarity(entry_property, fixed_value)
+            similarity_map.setdefault(similarity_value, []).append((entry_id, entry_property))
+    for similarity_value, entries in similarity_map.items():
+        similarity_map[similarity_value] = sorted(entries, key=lambda entry: entry[1])
+    similarity_values = sorted(list(similarity_map.keys()), reverse=True)
+    results = []
+    for similarity_value in similarity_values:
+        entry_ids = [entry_id for (entry_id, _) in similarity_map[similarity_value]]
+        results.extend(entry_ids)
+    return results
+
+
+def _get_ngrams(value: str) -> Set[str]:
+    if not value or len(value) < SEARCH_INDEX_NGRAM_LENGTH:
+        return set()
+    result = {value[i:i + SEARCH_INDEX_NGRAM_LENGTH] for i in range(len(value) - SEARCH_INDEX_NGRAM_LENGTH + 1)}
+    return result
+
+
 def __filter_data_dict(data: EntitiesData, by_key: Any, by_value: Any, ignore_case: bool) -> Optional[EntitiesData]:
     """Parameter 'data':
        - A dict with entity ids as keys and entity info as values. """
@@ -203,20 +276,6 @@ def __fix_property_value(property_value: str) -> str:
     return result
 
 
-async def __get_data_from_url(url: str) -> str:
-    if settings.PRINT_DEBUG_WEB_REQUESTS:
-        print(f'[WebRequest] Attempting to get data from url: {url}')
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            data = await response.text(encoding='utf-8')
-            if settings.PRINT_DEBUG_WEB_REQUESTS:
-                log_data = data or ''
-                if log_data and len(log_data) > 100:
-                    log_data = log_data[:100]
-                print(f'[WebRequest] Returned data: {log_data}')
-    return data
-
-
 async def __get_production_server(language_key: str = 'en') -> str:
     if settings.PRODUCTION_SERVER:
         return settings.PRODUCTION_SERVER
@@ -1,10 +1,15 @@
+import asyncio
 from collections import Counter
-from typing import Dict, List, Optional, Tuple, Union
+import hashlib
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from discord import Colour, Embed
 from discord.ext.commands import Context
 
 from . import pss_assert
+from . import cache
 from .cache import PssCache
 from . import emojis
 from . import pss_core as core
@@ -13,6 +18,7 @@ from .pss_exception import Error, NotFound
 from . import pss_lookups as lookups
 from . import pss_sprites as sprites
 from . import settings
+from . import shards
 from .typehints import EntitiesData, EntityInfo
 from . import utils
 
@@ -28,6 +34,11 @@ COLLECTION_DESIGN_DESCRIPTION_PROPERTY_NAME: str = 'CollectionName'
 COLLECTION_DESIGN_KEY_NAME: str = 'CollectionDesignId'
 
 __PRESTIGE_FROM_BASE_PATH: str = 'CharacterService/PrestigeCharacterFrom?languagekey=en&characterDesignId='
+__PRESTIGE_GRAPH_CONCURRENCY: int = 10
+__PRESTIGE_GRAPH_RETRY_INTERVAL: float = 600.0
+__PRESTIGE_GRAPH_SNAPSHOT_FILE_NAME: str = 'prestige_graph.json'
+__PRESTIGE_GRAPH_SNAPSHOT_POLL_INTERVAL: float = 5.0
+__PRESTIGE_GRAPH_SNAPSHOT_WAIT: float = 300.0
 __PRESTIGE_TO_BASE_PATH: str = 'CharacterService/PrestigeCharacterTo?languagekey=en&characterDesignId='
 
 
@@ -44,6 +55,105 @@ class PrestigeNoResultsError(PrestigeError):
     pass
 
 
+class PrestigeGraph():
+    """
+    All prestige recipes of a snapshot of the character designs, indexed by the crew to prestige into and by the crew to prestige with. Gets built once per snapshot, so looking up recipes doesn't need to query the API. Crew, whose recipes couldn't be retrieved, are recorded as missing.
+    """
+    def __init__(self, characters_data: EntitiesData, recipes_by_char_to_id: Dict[str, List[Tuple[str, str]]], missing_char_to_ids: Iterable[str] = None) -> None:
+        self.__characters_data: EntitiesData = characters_data
+        self.__recipes_by_char_to_id: Dict[str, List[Tuple[str, str]]] = dict(recipes_by_char_to_id)
+        self.__missing_char_to_ids: Set[str] = set(missing_char_to_ids or [])
+        self.__created_at: float = time.monotonic()
+        self.__prestige_from: Dict[str, Dict[str, List[str]]] = {}
+        self.__prestige_from_recipe_counts: Dict[str, int] = {}
+        self.__prestige_to: Dict[str, Dict[str, List[str]]] = {}
+        self.__prestige_to_recipe_counts: Dict[str, int] = {}
+
+        prestige_from: Dict[str, Dict[str, Set[str]]] = {}
+        for char_to_id, recipes in recipes_by_char_to_id.items():
+            self.__prestige_to[char_to_id] = PrestigeGraph.group_prestige_to_recipes(recipes)
+            self.__prestige_to_recipe_counts[char_to_id] = len(recipes)
+            for char_1_id, char_2_id in recipes:
+                prestige_from.setdefault(char_1_id, {}).setdefault(char_to_id, set()).add(char_2_id)
+                self.__prestige_from_recipe_counts[char_1_id] = self.__prestige_from_recipe_counts.get(char_1_id, 0) + 1
+                if char_2_id != char_1_id:
+                    prestige_from.setdefault(char_2_id, {}).setdefault(char_to_id, set()).add(char_1_id)
+                    self.__prestige_from_recipe_counts[char_2_id] = self.__prestige_from_recipe_counts.get(char_2_id, 0) + 1
+
+        for char_from_id, chars_2_ids_by_char_to_id in prestige_from.items():
+            self.__prestige_from[char_from_id] = {char_to_id: list(chars_2_ids) for char_to_id, chars_2_ids in chars_2_ids_by_char_to_id.items()}
+
+
+    @property
+    def created_at(self) -> float:
+        return self.__created_at
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.__missing_char_to_ids
+
+    @property
+    def missing_char_to_ids(self) -> Set[str]:
+        return set(self.__missing_char_to_ids)
+
+    @property
+    def recipes_by_char_to_id(self) -> Dict[str, List[Tuple[str, str]]]:
+        return dict(self.__recipes_by_char_to_id)
+
+
+    def get_prestige_from(self, char_design_id: str) -> Tuple[Dict[str, List[str]], int]:
+        """
+        Returns the ids of the crew to prestige with, grouped by the id of the resulting crew, and the number of recipes.
+        """
+        result = {char_to_id: list(chars_2_ids) for char_to_id, chars_2_ids in self.__prestige_from.get(char_design_id, {}).items()}
+        return result, self.__prestige_from_recipe_counts.get(char_design_id, 0)
+
+
+    def get_prestige_to(self, char_design_id: str) -> Tuple[Dict[str, List[str]], int]:
+        """
+        Returns the pairs of crew yielding the specified crew, grouped by the crew being part of the most recipes, and the number of recipes.
+        """
+        result = {char_1_id: list(chars_2_ids) for char_1_id, chars_2_ids in self.__prestige_to.get(char_design_id, {}).items()}
+        return result, self.__prestige_to_recipe_counts.get(char_design_id, 0)
+
+
+    def has_prestige_from(self, char_design_id: str) -> bool:
+        """
+        The crew a crew can prestige with are only known, if the recipes of all crew have been retrieved.
+        """
+        return self.is_complete
+
+
+    def has_prestige_to(self, char_design_id: str) -> bool:
+        return char_design_id not in self.__missing_char_to_ids
+
+
+    def is_built_from(self, characters_data: EntitiesData) -> bool:
+        return self.__characters_data is characters_data
+
+
+    @staticmethod
+    def group_prestige_to_recipes(recipes: List[Tuple[str, str]]) -> Dict[str, List[str]]:
+        all_recipes = set()
+        for char_1_id, char_2_id in recipes:
+            all_recipes.add((char_1_id, char_2_id))
+            all_recipes.add((char_2_id, char_1_id))
+        char_id_counts = Counter(recipe[0] for recipe in all_recipes)
+        ranks = {char_id: rank for rank, (char_id, _) in enumerate(char_id_counts.most_common())}
+
+        # Every recipe gets listed for the crew being part of more recipes and, if that one gets listed, too, for the other crew
+        grouped_recipes: Dict[str, Set[str]] = {}
+        for char_1_id, char_2_id in all_recipes:
+            if ranks[char_1_id] <= ranks[char_2_id]:
+                grouped_recipes.setdefault(char_1_id, set()).add(char_2_id)
+        result = {char_1_id: set(chars_2_ids) for char_1_id, chars_2_ids in grouped_recipes.items()}
+        for char_1_id, chars_2_ids in grouped_recipes.items():
+            for char_2_id in chars_2_ids:
+                if char_2_id != char_1_id and char_2_id in result:
+                    result[char_2_id].add(char_1_id)
+        return {char_1_id: list(result[char_1_id]) for char_1_id in sorted(result.keys(), key=ranks.get)}
+
+
 
 
 
@@ -126,8 +236,7 @@ async def get_prestige_from_info(ctx: Context, char_name: str, as_embed: bool =
         rarity = char_from_info.get('Rarity')
         if rarity in ['Legendary', 'Special']:
             raise PrestigeError(f'{char_from_info[CHARACTER_DESIGN_DESCRIPTION_PROPERTY_NAME]} can\'t be prestiged to, due to **{rarity}** rarity.')
-        prestige_from_ids, recipe_count = await __get_prestige_from_ids_and_recipe_count(char_from_info)
-        utils.make_dict_value_lists_unique(prestige_from_ids)
+        prestige_from_ids, recipe_count = await __get_prestige_from_ids_and_recipe_count(chars_data, char_from_info[CHARACTER_DESIGN_KEY_NAME])
         prestige_from_infos = sorted(__prepare_prestige_infos(chars_data, prestige_from_ids), key=lambda prestige_from_info: prestige_from_info[CHARACTER_DESIGN_DESCRIPTION_PROPERTY_NAME])
         if prestige_from_infos:
             prestige_from_details_collection = __create_prestige_from_details_collection_from_infos(prestige_from_infos)
@@ -143,8 +252,14 @@ async def get_prestige_from_info(ctx: Context, char_name: str, as_embed: bool =
             raise PrestigeNoResultsError(f'There are no prestige recipes using this crew: `{char_from_info.get(CHARACTER_DESIGN_DESCRIPTION_PROPERTY_NAME)}`')
 
 
-async def __get_prestige_from_ids_and_recipe_count(char_info: EntityInfo) -> Tuple[Dict[str, List[str]], int]:
-    char_design_id = char_info[CHARACTER_DESIGN_KEY_NAME]
+async def __get_prestige_from_ids_and_recipe_count(characters_data: EntitiesData, char_design_id: str) -> Tuple[Dict[str, List[str]], int]:
+    """
+    Looks the recipes up in the prestige graph, if it's ready. Else requests them from the API.
+    """
+    prestige_graph = __get_prestige_graph(characters_data)
+    if prestige_graph is not None and prestige_graph.has_prestige_from(char_design_id):
+        return prestige_graph.get_prestige_from(char_design_id)
+
     raw_data = await core.get_data_from_path(f'{__PRESTIGE_FROM_BASE_PATH}{char_design_id}')
     raw_data_dict = utils.convert.raw_xml_to_dict(raw_data)
     prestige_from_infos = list(raw_data_dict['CharacterService']['PrestigeCharacterFrom']['Prestiges'].values())
@@ -174,8 +289,7 @@ async def get_prestige_to_info(ctx: Context, char_name: str, as_embed: bool = se
         rarity = char_to_info.get('Rarity')
         if rarity in ['Common', 'Special']:
             raise PrestigeError(f'{char_to_info[CHARACTER_DESIGN_DESCRIPTION_PROPERTY_NAME]} can\'t be prestiged into, due to **{rarity}** rarity.')
-        prestige_to_ids, recipe_count = await __get_prestige_to_ids_and_recipe_count(char_to_info)
-        utils.make_dict_value_lists_unique(prestige_to_ids)
+        prestige_to_ids, recipe_count = await __get_prestige_to_ids_and_recipe_count(chars_data, char_to_info[CHARACTER_DESIGN_KEY_NAME])
         prestige_to_infos = sorted(__prepare_prestige_infos(chars_data, prestige_to_ids), key=lambda prestige_to_info: prestige_to_info[CHARACTER_DESIGN_DESCRIPTION_PROPERTY_NAME])
         if prestige_to_infos:
             prestige_to_details_collection = __create_prestige_to_details_collection_from_infos(prestige_to_infos)
@@ -191,41 +305,129 @@ async def get_prestige_to_info(ctx: Context, char_name: str, as_embed: bool = se
             raise PrestigeNoResultsError(f'There are no prestige recipes yielding this crew: `{char_to_info.get(CHARACTER_DESIGN_DESCRIPTION_PROPERTY_NAME)}`')
 
 
-async def __get_prestige_to_ids_and_recipe_count(char_info: EntityInfo) -> Tuple[Dict[str, List[str]], int]:
-    char_design_id = char_info[CHARACTER_DESIGN_KEY_NAME]
+async def __get_prestige_to_ids_and_recipe_count(characters_data: EntitiesData, char_design_id: str) -> Tuple[Dict[str, List[str]], int]:
+    """
+    Looks the recipes up in the prestige graph, if it's ready. Else requests them from the API.
+    """
+    prestige_graph = __get_prestige_graph(characters_data)
+    if prestige_graph is not None and prestige_graph.has_prestige_to(char_design_id):
+        return prestige_graph.get_prestige_to(char_design_id)
+
+    recipes = await __get_prestige_to_recipes(char_design_id)
+    return PrestigeGraph.group_prestige_to_recipes(recipes), len(recipes)
+
+
+
+
+
+# ---------- Prestige graph ----------
+
+async def __create_prestige_graph(characters_data: EntitiesData, previous_prestige_graph: PrestigeGraph = None) -> PrestigeGraph:
+    """
+    Retrieves the prestige recipes of all crew, which can be prestiged into. Recipes of a previous graph for the same character designs or stored by another process get reused, so only the missing ones get retrieved. Crew, whose recipes couldn't be retrieved, get recorded as missing.
+    """
+    char_to_ids = [char_design_id for char_design_id, char_info in characters_data.items() if char_info.get('Rarity') not in ['Common', 'Special']]
+    fingerprint = __get_prestige_graph_fingerprint(characters_data)
+    if previous_prestige_graph is None:
+        recipes_by_char_to_id = await __read_prestige_graph_snapshot(fingerprint, wait=not shards.is_primary_process())
+    else:
+        recipes_by_char_to_id = previous_prestige_graph.recipes_by_char_to_id
+
+    semaphore = asyncio.Semaphore(__PRESTIGE_GRAPH_CONCURRENCY)
+
+    async def get_recipes(char_to_id: str) -> List[Tuple[str, str]]:
+        async with semaphore:
+            return await __get_prestige_to_recipes(char_to_id)
+
+    char_to_ids_to_retrieve = [char_to_id for char_to_id in char_to_ids if char_to_id not in recipes_by_char_to_id]
+    missing_char_to_ids = []
+    if char_to_ids_to_retrieve:
+        results = await asyncio.gather(*[get_recipes(char_to_id) for char_to_id in char_to_ids_to_retrieve], return_exceptions=True)
+        errors = []
+        for char_to_id, recipes in zip(char_to_ids_to_retrieve, results):
+            if isinstance(recipes, BaseException):
+                missing_char_to_ids.append(char_to_id)
+                errors.append(recipes)
+            else:
+                recipes_by_char_to_id[char_to_id] = recipes
+        if errors:
+            print(f'[create_prestige_graph] Could not retrieve the prestige recipes of {len(errors)} of {len(char_to_ids)} crew, e.g. {errors[0].__class__.__name__}: {errors[0]}')
+        if len(errors) < len(char_to_ids_to_retrieve):
+            await __write_prestige_graph_snapshot(fingerprint, recipes_by_char_to_id)
+
+    result = PrestigeGraph(characters_data, recipes_by_char_to_id, missing_char_to_ids=missing_char_to_ids)
+    utils.dbg_prnt(f'[create_prestige_graph] Retrieved {len(char_to_ids_to_retrieve) - len(missing_char_to_ids)} and reused {len(char_to_ids) - len(char_to_ids_to_retrieve)} of {len(char_to_ids)} crew\'s prestige recipes.')
+    return result
+
+
+def __get_prestige_graph(characters_data: EntitiesData) -> Optional[PrestigeGraph]:
+    """
+    Returns the prestige graph for the specified character designs, if it has been built. Else starts building it in the background, unless that's happening already, and returns None. Graphs missing the recipes of some crew get completed in the background every once in a while.
+    """
+    prestige_graph = __prestige_graph
+    if prestige_graph is not None and prestige_graph.is_built_from(characters_data):
+        if not prestige_graph.is_complete and time.monotonic() - prestige_graph.created_at >= __PRESTIGE_GRAPH_RETRY_INTERVAL:
+            __get_prestige_graph_task(characters_data, previous_prestige_graph=prestige_graph)
+        return prestige_graph
+
+    __get_prestige_graph_task(characters_data)
+    return None
+
+
+def __get_prestige_graph_fingerprint(characters_data: EntitiesData) -> str:
+    char_rarities = sorted((char_design_id, char_info.get('Rarity')) for char_design_id, char_info in characters_data.items())
+    return hashlib.md5(json.dumps(char_rarities).encode('utf-8')).hexdigest()
+
+
+def __get_prestige_graph_task(characters_data: EntitiesData, previous_prestige_graph: PrestigeGraph = None) -> asyncio.Task:
+    global __prestige_graph_task
+    if __prestige_graph_task is None or __prestige_graph_task[0] is not characters_data or __prestige_graph_task[1].done():
+        task = asyncio.get_running_loop().create_task(__create_prestige_graph(characters_data, previous_prestige_graph=previous_prestige_graph))
+        task.add_done_callback(__on_create_prestige_graph_done)
+        __prestige_graph_task = (characters_data, task)
+    return __prestige_graph_task[1]
+
+
+async def __get_prestige_to_recipes(char_design_id: str) -> List[Tuple[str, str]]:
     raw_data = await core.get_data_from_path(f'{__PRESTIGE_TO_BASE_PATH}{char_design_id}')
     raw_data_dict = utils.convert.raw_xml_to_dict(raw_data)
-    prestige_to_infos = list(raw_data_dict['CharacterService']['PrestigeCharacterTo']['Prestiges'].values())
-    recipe_count = len(prestige_to_infos)
-    all_recipes = []
-    for value in prestige_to_infos:
-        all_recipes.append((value['CharacterDesignId1'], value['CharacterDesignId2']))
-        all_recipes.append((value['CharacterDesignId2'], value['CharacterDesignId1']))
-    all_recipes = list(set(all_recipes))
-    result = __normalize_prestige_to_data(all_recipes)
-    for char_1_id in result.keys():
-        for char_2_id, char_1_ids in result.items():
-            if char_1_id != char_2_id and char_1_id in char_1_ids:
-                result[char_1_id].append(char_2_id)
-    return result, recipe_count
+    prestige_to_infos = raw_data_dict['CharacterService']['PrestigeCharacterTo']['Prestiges'].values()
+    result = [(value['CharacterDesignId1'], value['CharacterDesignId2']) for value in prestige_to_infos]
+    return result
 
 
-def __normalize_prestige_to_data(all_recipes: List[Tuple[str, str]]) -> Dict[str, List[str]]:
-    all_recipes = list(all_recipes)
-    all_char_ids = [recipe[0] for recipe in all_recipes]
-    char_id_counts = sorted([(char_id, count) for char_id, count in dict(Counter(all_char_ids)).items()], key=lambda x: x[1], reverse=True)
-    result = {}
-    for char_id, _ in char_id_counts:
-        for recipe in list(all_recipes):
-            if recipe[0] == char_id:
-                if recipe[1] not in result.get(char_id, []):
-                    result.setdefault(char_id, []).append(recipe[1])
-                all_recipes.remove(recipe)
-            elif recipe[1] == char_id:
-                if recipe[0] not in result.get(char_id, []):
-                    result.setdefault(char_id, []).append(recipe[0])
-                all_recipes.remove(recipe)
-    return result
+def __on_create_prestige_graph_done(task: asyncio.Task) -> None:
+    global __prestige_graph
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        err = task.exception()
+        print(f'[create_prestige_graph] Could not build the prestige graph: {err.__class__.__name__}: {err}')
+    elif __prestige_graph_task is not None and __prestige_graph_task[1] is task:
+        __prestige_graph = task.result()
+
+
+async def __read_prestige_graph_snapshot(fingerprint: str, wait: bool = False) -> Dict[str, List[Tuple[str, str]]]:
+    """
+    Returns the recipes stored by any process for the same character designs. If `wait` is True, waits a while for another process to store them.
+    """
+    waited = 0.0
+    while True:
+        snapshot = await cache.read_shared_snapshot(__PRESTIGE_GRAPH_SNAPSHOT_FILE_NAME)
+        if snapshot and snapshot.get('fingerprint') == fingerprint:
+            return {char_to_id: [tuple(recipe) for recipe in recipes] for char_to_id, recipes in snapshot['recipes'].items()}
+        if not wait or not cache.SNAPSHOTS_PATH or waited >= __PRESTIGE_GRAPH_SNAPSHOT_WAIT:
+            return {}
+        await asyncio.sleep(__PRESTIGE_GRAPH_SNAPSHOT_POLL_INTERVAL)
+        waited += __PRESTIGE_GRAPH_SNAPSHOT_POLL_INTERVAL
+
+
+async def __write_prestige_graph_snapshot(fingerprint: str, recipes_by_char_to_id: Dict[str, List[Tuple[str, str]]]) -> None:
+    snapshot = {
+        'fingerprint': fingerprint,
+        'recipes': recipes_by_char_to_id,
+    }
+    await cache.write_shared_snapshot(__PRESTIGE_GRAPH_SNAPSHOT_FILE_NAME, snapshot)
 
 
 
@@ -481,7 +683,8 @@ def __create_character_details_from_info(character_info: EntityInfo, characters_
 
 def __create_characters_details_collection_from_infos(characters_designs_infos: List[EntityInfo], characters_data: EntitiesData, collections_data: EntitiesData, level: int) -> entity.EntityDetailsCollection:
     characters_details = [__create_character_details_from_info(character_info, characters_data, collections_data, level) for character_info in characters_designs_infos]
-    result = entity.EntityDetailsCollection(characters_details, big_set_threshold=2)
+    render_cache_key = ('character', tuple(character_info.get(CHARACTER_DESIGN_KEY_NAME) for character_info in characters_designs_infos), level)
+    result = entity.EntityDetailsCollection(characters_details, big_set_threshold=2, render_cache_key=render_cache_key)
     return result
 
 
@@ -546,7 +749,7 @@ def __get_stat_value(min_value: float, max_value: float, level: int, progression
 def __prepare_prestige_infos(characters_data: EntitiesData, prestige_ids: Dict[str, List[str]]) -> List[EntityInfo]:
     result = []
     for char_1_id, chars_2_ids in prestige_ids.items():
-        char_1_info = characters_data[char_1_id]
+        char_1_info = dict(characters_data[char_1_id])
         char_1_info['Prestige'] = [characters_data[char_2_id] for char_2_id in chars_2_ids]
         result.append(char_1_info)
     return result
@@ -572,6 +775,9 @@ collections_designs_retriever = entity.EntityRetriever(
     cache_name='CollectionDesigns'
 )
 
+__prestige_graph: PrestigeGraph = None
+__prestige_graph_task: Tuple[EntitiesData, asyncio.Task] = None
+
 
 __properties: entity.EntityDetailsCreationPropertiesCollection = {
     'character_title': entity.EntityDetailPropertyCollection(
@@ -658,4 +864,8 @@ __properties: entity.EntityDetailsCreationPropertiesCollection = {
 
 
 async def init() -> None:
-    pass
\ No newline at end of file
+    """
+    Starts building the prestige graph in the background.
+    """
+    chars_data = await characters_designs_retriever.get_data_dict3()
+    __get_prestige_graph_task(chars_data)
\ No newline at end of file
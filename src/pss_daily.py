@@ -1,7 +1,8 @@
+import asyncio
 from datetime import date, datetime
 import json
 import random
-from typing import Any, Callable, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from discord import Embed
 from discord.ext.commands import Context
@@ -99,17 +100,28 @@ async def clear_sales() -> None:
     return success
 
 
-async def get_oldest_expired_sale_entity_details(utc_now: datetime, for_embed: bool = False) -> List[str]:
+async def get_oldest_expired_sale_entity_details(utc_now: datetime) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    """
+    Returns the details of the sale expiring next formatted as text and formatted for embeds.
+    """
     db_sales_infos = await __db_get_sales_infos(utc_now=utc_now)
     sales_infos = await __process_db_sales_infos(db_sales_infos, utc_now)
-    sales_infos = reversed(sales_infos)
-    for sales_info in sales_infos:
-        expiring_entity_details = '\n'.join((await sales_info['entity_details'].get_details_as_text(entity.EntityDetailsType.SHORT, for_embed=for_embed)))
-        price = sales_info['price']
-        currency = sales_info['currency']
-        result = f'{expiring_entity_details}: {price} {currency}'
-        return [result]
-    return None
+    if not sales_infos:
+        return None, None
+
+    sales_info = sales_infos[-1]
+    price = sales_info['price']
+    currency = sales_info['currency']
+    expiring_entity_details_text = '\n'.join((await sales_info['entity_details'].get_details_as_text(entity.EntityDetailsType.SHORT, for_embed=False)))
+    expiring_entity_details_embed = '\n'.join((await sales_info['entity_details'].get_details_as_text(entity.EntityDetailsType.SHORT, for_embed=True)))
+    return [f'{expiring_entity_details_text}: {price} {currency}'], [f'{expiring_entity_details_embed}: {price} {currency}']
+
+
+def get_sales_infos_retrieved_at() -> Optional[datetime]:
+    """
+    Returns the date, when the cached sales infos have been retrieved from the database.
+    """
+    return __sales_info_cache_retrieved_at
 
 
 async def get_sales_infos(category_type: str = None, currency_type: str = None) -> SalesCache:
@@ -245,13 +257,15 @@ def get_sales_search_details_with_id(entity_info: EntityInfo) -> str:
 
 
 async def __process_db_sales_infos(db_sales_infos: List[Dict[str, Any]], utc_now: datetime, filter_old: bool = True) -> List[Dict[str, Any]]:
-    chars_data = await crew.characters_designs_retriever.get_data_dict3()
-    collections_data = await crew.collections_designs_retriever.get_data_dict3()
-    items_data = await item.items_designs_retriever.get_data_dict3()
-    researches_data = await research.researches_designs_retriever.get_data_dict3()
-    rooms_data = await room.rooms_designs_retriever.get_data_dict3()
-    rooms_designs_sprites_data = await room.rooms_designs_sprites_retriever.get_data_dict3()
-    trainings_data = await training.trainings_designs_retriever.get_data_dict3()
+    chars_data, collections_data, items_data, researches_data, rooms_data, rooms_designs_sprites_data, trainings_data = await asyncio.gather(
+        crew.characters_designs_retriever.get_data_dict3(),
+        crew.collections_designs_retriever.get_data_dict3(),
+        item.items_designs_retriever.get_data_dict3(),
+        research.researches_designs_retriever.get_data_dict3(),
+        room.rooms_designs_retriever.get_data_dict3(),
+        room.rooms_designs_sprites_retriever.get_data_dict3(),
+        training.trainings_designs_retriever.get_data_dict3(),
+    )
 
     result = []
 
@@ -1,10 +1,13 @@
+import asyncio
 from datetime import datetime
+import json
 import pprint
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
 
 from discord import Embed, Guild, Message
 from discord.ext.commands import Bot, Context
 
+from . import cache
 from . import emojis
 from . import pss_core as core
 from . import pss_crew as crew
@@ -56,18 +59,45 @@ def compare_dropship_messages(message: Message, dropship_text: str, dropship_emb
 
 
 async def get_dropship_text(bot: Bot = None, guild: Guild = None, daily_info: dict = None, utc_now: datetime = None, language_key: str = 'en') -> Tuple[List[str], List[Embed], bool]:
+    """
+    The output gets cached until the daily info, the cached design data, the date, the sales or the running events change.
+    """
+    global __dropship_output
     utc_now = utc_now or utils.get_utc_now()
     if not daily_info:
         daily_info = await daily.get_daily_info(language_key)
 
-    chars_designs_data = await crew.characters_designs_retriever.get_data_dict3()
-    collections_designs_data = await crew.collections_designs_retriever.get_data_dict3()
-    items_designs_data = await item.items_designs_retriever.get_data_dict3()
-    missions_designs_data = await mission.missions_designs_retriever.get_data_dict3()
-    rooms_designs_data = await room.rooms_designs_retriever.get_data_dict3()
-    situations_designs_data = await situation.situations_designs_retriever.get_data_dict3()
-    trainings_designs_data = await training.trainings_designs_retriever.get_data_dict3()
+    chars_designs_data, collections_designs_data, items_designs_data, missions_designs_data, rooms_designs_data, situations_designs_data, trainings_designs_data = await asyncio.gather(
+        crew.characters_designs_retriever.get_data_dict3(),
+        crew.collections_designs_retriever.get_data_dict3(),
+        item.items_designs_retriever.get_data_dict3(),
+        mission.missions_designs_retriever.get_data_dict3(),
+        room.rooms_designs_retriever.get_data_dict3(),
+        situation.situations_designs_retriever.get_data_dict3(),
+        training.trainings_designs_retriever.get_data_dict3(),
+    )
+    events_details = await situation.get_current_events_details(situations_designs_data, chars_designs_data, collections_designs_data, items_designs_data, missions_designs_data, rooms_designs_data, utc_now)
+
+    output_key = __get_dropship_output_key(daily_info, events_details, utc_now)
+    if __dropship_output is not None and __dropship_output[0] == output_key:
+        _, lines, embed_parameters = __dropship_output
+    else:
+        output = await __create_dropship_output(daily_info, events_details, chars_designs_data, collections_designs_data, items_designs_data, rooms_designs_data, trainings_designs_data, utc_now)
+        if output is None:
+            return [], [], False
+        lines, embed_parameters = output
+        __dropship_output = (output_key, lines, embed_parameters)
 
+    colour = utils.discord.get_bot_member_colour(bot, guild)
+    embed = utils.discord.create_embed(colour=colour, **embed_parameters)
+
+    return list(lines), [embed], True
+
+
+async def __create_dropship_output(daily_info: EntityInfo, events_details: List[entity.EntityDetails], chars_designs_data: EntitiesData, collections_designs_data: EntitiesData, items_designs_data: EntitiesData, rooms_designs_data: EntitiesData, trainings_designs_data: EntitiesData, utc_now: datetime) -> Optional[Tuple[List[str], Dict[str, Any]]]:
+    """
+    Returns the lines of the text output and the parameters for creating the embed output. Returns None, if the daily info couldn't be processed.
+    """
     try:
         daily_msg = __get_daily_news_from_info_as_text(daily_info)
         dropship_msg = await __get_dropship_msg_from_info_as_text(daily_info, chars_designs_data, collections_designs_data)
@@ -78,21 +108,20 @@ async def get_dropship_text(bot: Bot = None, guild: Guild = None, daily_info: di
         pp = pprint.PrettyPrinter(indent=4)
         pp.pprint(daily_info)
         print(e)
-        return [], [], False
+        return None
 
     parts_text = [dropship_msg, merchantship_msg, shop_msg, daily_reward_msg]
 
-    expiring_sale_details_text = await daily.get_oldest_expired_sale_entity_details(utc_now, for_embed=False)
+    expiring_sale_details_text, expiring_sale_details_embed = await daily.get_oldest_expired_sale_entity_details(utc_now)
     if expiring_sale_details_text:
         expiring_sale_details_text.append(f'_Visit <{daily.LATE_SALES_PORTAL_HYPERLINK}> to purchase this offer._')
         expiring_sale_details_text.insert(0, '**Sale expiring today**')
 
-    expiring_sale_details_embed = await daily.get_oldest_expired_sale_entity_details(utc_now, for_embed=True)
     if expiring_sale_details_embed:
         expiring_sale_details_embed.append(f'_Visit the [Late Sales Portal]({daily.LATE_SALES_PORTAL_HYPERLINK}) to purchase this offer._')
         expiring_sale_details_embed.insert(0, '**Sale expiring today**')
 
-    current_events_details_text, event_sprite_id = await __get_current_events_details_as_text(situations_designs_data, chars_designs_data, collections_designs_data, items_designs_data, missions_designs_data, rooms_designs_data, utc_now)
+    current_events_details_text, event_sprite_id = await __get_current_events_details_as_text(events_details)
     if current_events_details_text:
         plural = '(s)' if len(current_events_details_text) > 1 else ''
         current_events_details_text.insert(0, f'**Current event{plural} running**')
@@ -119,14 +148,19 @@ async def get_dropship_text(bot: Bot = None, guild: Guild = None, daily_info: di
     icon_url = await sprites.get_download_sprite_link(event_sprite_id) if event_sprite_id else None
     if thumbnail_url == image_url:
         thumbnail_url = None
-    colour = utils.discord.get_bot_member_colour(bot, guild)
-    embed = utils.discord.create_embed(title, description=description, fields=fields, thumbnail_url=thumbnail_url, image_url=image_url, icon_url=icon_url, colour=colour, footer=footer)
-
-    return lines, [embed], True
+    embed_parameters = {
+        'title': title,
+        'description': description,
+        'fields': fields,
+        'thumbnail_url': thumbnail_url,
+        'image_url': image_url,
+        'icon_url': icon_url,
+        'footer': footer,
+    }
+    return lines, embed_parameters
 
 
-async def __get_current_events_details_as_text(situations_designs_data: EntitiesData, chars_designs_data: EntitiesData, collections_designs_data: EntitiesData, items_designs_data: EntitiesData, missions_designs_data: EntitiesData, rooms_designs_data: EntitiesData, utc_now: datetime) -> Optional[Tuple[List[str], str]]:
-    events_details = await situation.get_current_events_details(situations_designs_data, chars_designs_data, collections_designs_data, items_designs_data, missions_designs_data, rooms_designs_data, utc_now)
+async def __get_current_events_details_as_text(events_details: List[entity.EntityDetails]) -> Optional[Tuple[List[str], str]]:
     if events_details:
         result = []
         sprite_id = None
@@ -140,6 +174,12 @@ async def __get_current_events_details_as_text(situations_designs_data: Entities
         return None, None
 
 
+def __get_dropship_output_key(daily_info: EntityInfo, events_details: List[entity.EntityDetails], utc_now: datetime) -> Hashable:
+    events_ids = tuple(event_details.entity_info.get(situation.SITUATION_DESIGN_KEY_NAME) for event_details in events_details)
+    result = (json.dumps(daily_info, sort_keys=True, default=str), cache.get_data_version(), utc_now.date(), daily.get_sales_infos_retrieved_at(), events_ids)
+    return result
+
+
 def __get_daily_news_from_info_as_text(daily_info: EntityInfo) -> List[str]:
     result = ['No news have been provided :(']
     if daily_info and 'News' in daily_info.keys():
@@ -339,6 +379,9 @@ def __create_news_details_from_info(news_info: EntityInfo) -> entity.EntityDetai
 
 # ---------- Initilization ----------
 
+__dropship_output: Tuple[Hashable, List[str], Dict[str, Any]] = None
+
+
 __properties: entity.EntityDetailsCreationPropertiesCollection = {
     'title_news': entity.EntityDetailPropertyCollection(
         entity.EntityDetailProperty('Title', False, omit_if_none=False, entity_property_name='Title')
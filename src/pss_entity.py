@@ -1,13 +1,16 @@
+from collections import OrderedDict
 from enum import IntEnum
 import inspect
 import json
-from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
 from xml.etree import ElementTree
 
 from discord import Embed
 from discord.ext.commands import Context
 
+from . import cache
 from .cache import PssCache
+from . import metrics
 from . import pss_core as core
 from . import pss_entity as entity
 from .pss_exception import Error
@@ -28,8 +31,13 @@ DEFAULT_TITLE_DETAILS_SEPARATOR: str = f' {settings.DEFAULT_HYPHEN} '
 ERROR_ENTITY_DETAILS_TYPE_EMBED_NOT_ALLOWED: str = f'The detail type \'EMBED\' is not valid for this method!'
 ERROR_ENTITY_DETAILS_TYPE_NONE_NOT_ALLOWED: str = f'You have to provide a detail type!'
 
+SEARCH_INDEX_CACHE_SIZE: int = 8
+
 NO_PROPERTY: 'EntityDetailProperty'
 
+__RENDER_CACHE: 'OrderedDict[Hashable, Union[List[Embed], List[str]]]' = OrderedDict()
+__RENDER_CACHE_DATA_VERSION: int = None
+
 
 
 
@@ -612,9 +620,10 @@ class EscapedEntityDetails(EntityDetails):
 
 
 class EntityDetailsCollection():
-    def __init__(self, entities_details: Iterable[entity.EntityDetails], big_set_threshold: int = 0, add_empty_lines: bool = True) -> None:
+    def __init__(self, entities_details: Iterable[entity.EntityDetails], big_set_threshold: int = 0, add_empty_lines: bool = True, render_cache_key: Hashable = None) -> None:
         """
         big_set_threshold: if 0 or less, there's no threshold
+        render_cache_key: if provided, the rendered output gets cached until any PssCache receives new data. The key has to identify the entities and the detail properties used. It must only be provided, if all data passed to the entities details is cached data.
         """
         self.__entities_details: List[entity.EntityDetails] = list(entities_details)
         self.__set_size: int = len(self.__entities_details)
@@ -622,12 +631,49 @@ class EntityDetailsCollection():
         if self.__big_set_threshold < 0:
             self.__big_set_threshold = 0
         self.__add_empty_lines: bool = add_empty_lines or False
+        self.__render_cache_key: Hashable = render_cache_key
 
 
     async def get_entities_details_as_embed(self, ctx: Context, custom_detail_property_separator: str = None, custom_title: str = None, custom_footer_text: str = None, custom_thumbnail_url: str = None, display_inline: bool = True, big_set_threshold: int = None) -> List[Embed]:
         """
         custom_title: only relevant for big sets
         """
+        if self.__render_cache_key is None:
+            return await self.__create_entities_details_as_embed(ctx, custom_detail_property_separator, custom_title, custom_footer_text, custom_thumbnail_url, display_inline, big_set_threshold)
+
+        data_version = cache.get_data_version()
+        colour = utils.discord.get_bot_member_colour(ctx.bot, ctx.guild)
+        render_key = (self.__render_cache_key, 'embed', colour, custom_detail_property_separator, custom_title, custom_footer_text, custom_thumbnail_url, display_inline, big_set_threshold)
+        result = _get_rendered_output(render_key, data_version)
+        if result is None:
+            result = await self.__create_entities_details_as_embed(ctx, custom_detail_property_separator, custom_title, custom_footer_text, custom_thumbnail_url, display_inline, big_set_threshold)
+            _set_rendered_output(render_key, data_version, [embed.copy() for embed in result])
+            return result
+        return [embed.copy() for embed in result]
+
+
+    async def get_entities_details_as_text(self, custom_title: str = None, custom_footer_text: str = None, big_set_details_type: EntityDetailsType = EntityDetailsType.SHORT, big_set_threshold: int = None) -> List[str]:
+        if self.__render_cache_key is None:
+            return await self.__create_entities_details_as_text(custom_title, custom_footer_text, big_set_details_type, big_set_threshold)
+
+        data_version = cache.get_data_version()
+        render_key = (self.__render_cache_key, 'text', custom_title, custom_footer_text, big_set_details_type, big_set_threshold)
+        result = _get_rendered_output(render_key, data_version)
+        if result is None:
+            result = await self.__create_entities_details_as_text(custom_title, custom_footer_text, big_set_details_type, big_set_threshold)
+            _set_rendered_output(render_key, data_version, list(result))
+            return result
+        return list(result)
+
+
+    def _get_is_big_set(self, big_set_threshold: int = None) -> bool:
+        if big_set_threshold is None:
+            big_set_threshold = self.__big_set_threshold
+        result = big_set_threshold and self.__set_size >= big_set_threshold
+        return result
+
+
+    async def __create_entities_details_as_embed(self, ctx: Context, custom_detail_property_separator: str, custom_title: str, custom_footer_text: str, custom_thumbnail_url: str, display_inline: bool, big_set_threshold: int) -> List[Embed]:
         result: List[Embed] = []
         display_names = []
         if self._get_is_big_set(big_set_threshold):
@@ -674,7 +720,7 @@ class EntityDetailsCollection():
         return result
 
 
-    async def get_entities_details_as_text(self, custom_title: str = None, custom_footer_text: str = None, big_set_details_type: EntityDetailsType = EntityDetailsType.SHORT, big_set_threshold: int = None) -> List[str]:
+    async def __create_entities_details_as_text(self, custom_title: str, custom_footer_text: str, big_set_details_type: EntityDetailsType, big_set_threshold: int) -> List[str]:
         result = []
         is_big_set = self._get_is_big_set(big_set_threshold)
         if custom_title:
@@ -696,13 +742,6 @@ class EntityDetailsCollection():
         return result
 
 
-    def _get_is_big_set(self, big_set_threshold: int = None) -> bool:
-        if big_set_threshold is None:
-            big_set_threshold = self.__big_set_threshold
-        result = big_set_threshold and self.__set_size >= big_set_threshold
-        return result
-
-
 
 
 
@@ -714,6 +753,7 @@ class EntityRetriever:
         self.__description_property_name: str = entity_description_property_name
         self.__sorted_key_function: Callable[[dict, dict], str] = sorted_key_function
         self.__fix_data_delegate: Callable[[str], str] = fix_data_delegate
+        self.__search_indexes: 'OrderedDict[int, core.EntitiesSearchIndex]' = OrderedDict()
 
         self.__cache = PssCache(
             self.__base_path,
@@ -737,13 +777,19 @@ class EntityRetriever:
 
 
     async def get_data_dict3(self) -> Dict[str, Dict[str, object]]:
+        """
+        Returns the cached, parsed data. It is shared between all callers and must not be modified.
+        """
         return await self.__cache.get_data_dict3()
 
 
     async def get_entity_info_by_name(self, entity_name: str, entities_data: EntitiesData = None) -> Dict[str, object]:
         entities_data = entities_data or await self.get_data_dict3()
         entity_id = await self.get_entity_id_by_name(entity_name, entities_data=entities_data)
-        return entities_data.get(entity_id, None)
+        result = entities_data.get(entity_id, None)
+        if result is not None:
+            result = dict(result)
+        return result
 
 
     async def get_entities_infos_by_name(self, entity_name: str, entities_data: EntitiesData = None, sorted_key_function: Callable[[dict, dict], str] = None) -> List[Dict[str, object]]:
@@ -752,7 +798,7 @@ class EntityRetriever:
 
         entity_ids = await self.get_entities_ids_by_name(entity_name, entities_data=entities_data)
         entities_data_keys = entities_data.keys()
-        result = [entities_data[entity_id] for entity_id in entity_ids if entity_id in entities_data_keys]
+        result = [dict(entities_data[entity_id]) for entity_id in entity_ids if entity_id in entities_data_keys]
         if sorted_key_function is not None:
             result = sorted(result, key=lambda entity_info: (
                 sorted_key_function(entity_info, entities_data)
@@ -772,7 +818,11 @@ class EntityRetriever:
 
     async def get_entities_ids_by_name(self, entity_name: str, entities_data: EntitiesData = None) -> List[str]:
         entities_data = entities_data or await self.get_data_dict3()
-        results = core.get_ids_from_property_value(entities_data, self.__description_property_name, entity_name, fix_data_delegate=self.__fix_data_delegate)
+        if entities_data and self.__description_property_name and entity_name:
+            search_index = self.__get_search_index(entities_data)
+            results = search_index.get_ids(entity_name)
+        else:
+            results = core.get_ids_from_property_value(entities_data, self.__description_property_name, entity_name, fix_data_delegate=self.__fix_data_delegate)
         return results
 
 
@@ -805,6 +855,22 @@ class EntityRetriever:
         await self.__cache.update_data()
 
 
+    def __get_search_index(self, entities_data: EntitiesData) -> 'core.EntitiesSearchIndex':
+        """
+        Returns the search index for the specified data. Indexes for the SEARCH_INDEX_CACHE_SIZE most recently searched data objects are kept, so the index for the cached data gets rebuilt only after the cache has been refreshed with new data. Data passed to be searched must not be modified afterwards.
+        """
+        key = id(entities_data)
+        result = self.__search_indexes.get(key)
+        # The index references its data, so the id can't have been reused by another object while the index is kept.
+        if result is None or result.data is not entities_data:
+            result = core.create_search_index(entities_data, self.__description_property_name, fix_data_delegate=self.__fix_data_delegate)
+            self.__search_indexes[key] = result
+            while len(self.__search_indexes) > SEARCH_INDEX_CACHE_SIZE:
+                self.__search_indexes.popitem(last=False)
+        self.__search_indexes.move_to_end(key)
+        return result
+
+
 
 
 
@@ -860,6 +926,37 @@ def sort_entities_by(entity_infos: List[EntityInfo], order_info: List[Tuple[str,
         return sorted(result)
 
 
+def _get_rendered_output(render_key: Hashable, data_version: int) -> Optional[Union[List[Embed], List[str]]]:
+    """
+    Returns the cached output for the key, if it has been rendered from the current data. The result must not be modified.
+    """
+    global __RENDER_CACHE_DATA_VERSION
+    if __RENDER_CACHE_DATA_VERSION != data_version:
+        __RENDER_CACHE.clear()
+        __RENDER_CACHE_DATA_VERSION = data_version
+
+    result = __RENDER_CACHE.get(render_key)
+    if result is None:
+        __RENDER_CACHE_MISSES.inc()
+    else:
+        __RENDER_CACHE.move_to_end(render_key)
+        __RENDER_CACHE_HITS.inc()
+    return result
+
+
+def _set_rendered_output(render_key: Hashable, data_version: int, output: Union[List[Embed], List[str]]) -> None:
+    """
+    Caches the output, unless any cache received new data while it was being rendered.
+    """
+    if settings.RENDER_CACHE_MAX_SIZE <= 0 or data_version != __RENDER_CACHE_DATA_VERSION or data_version != cache.get_data_version():
+        return
+
+    __RENDER_CACHE[render_key] = output
+    __RENDER_CACHE.move_to_end(render_key)
+    while len(__RENDER_CACHE) > settings.RENDER_CACHE_MAX_SIZE:
+        __RENDER_CACHE.popitem(last=False)
+
+
 
 
 
@@ -961,4 +1058,7 @@ class LegacyEntityDetails(object):
 
 # ---------- Initialization ----------
 
-NO_PROPERTY = EntityDetailProperty(None, False)
\ No newline at end of file
+NO_PROPERTY = EntityDetailProperty(None, False)
+
+__RENDER_CACHE_HITS: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('entity_render_cache_hits_total', 'Entity details served from previously rendered output.'))
+__RENDER_CACHE_MISSES: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('entity_render_cache_misses_total', 'Entity details, which had to be rendered.'))
\ No newline at end of file
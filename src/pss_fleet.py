@@ -13,6 +13,7 @@ from discord.ext.commands import Context
 from . import emojis
 from . import excel
 from .gdrive import TourneyData
+from . import metrics
 from .pagination import SelectView
 from . import pss_assert
 from . import pss_core as core
@@ -74,15 +75,10 @@ FLEET_SHEET_COLUMN_FORMATS: Dict[str, Optional[str]] = {
 # ---------- Fleet info ----------
 
 def create_fleets_sheet_csv(fleet_users_data: EntitiesData, retrieved_at: datetime, file_name: str) -> str:
-    start = time.perf_counter()
-    fleet_sheet_contents = __get_fleet_sheet_lines(fleet_users_data, retrieved_at, include_player_id=True, include_fleet_id=True, include_division_name=True, include_pvp_stats=True)
-    time1 = time.perf_counter() - start
-    print(f'Creating the fleet users lines took {time1:.2f} seconds.')
-
-    start = time.perf_counter()
-    fleet_sheet_path = excel.create_csv_from_data(fleet_sheet_contents, None, None, file_name=file_name)
-    time2 = time.perf_counter() - start
-    print(f'Creating the csv file took {time2:.2f} seconds ({(time1+time2):.2f} seconds in total).')
+    with metrics.FLEET_SHEET_DURATION.time(sheet_type='csv', stage='data'):
+        fleet_sheet_contents = __get_fleet_sheet_lines(fleet_users_data, retrieved_at, include_player_id=True, include_fleet_id=True, include_division_name=True, include_pvp_stats=True)
+    with metrics.FLEET_SHEET_DURATION.time(sheet_type='csv', stage='file'):
+        fleet_sheet_path = excel.create_csv_from_data(fleet_sheet_contents, None, None, file_name=file_name)
     return fleet_sheet_path
 
 
@@ -95,13 +91,13 @@ async def get_current_tournament_fleet_infos_by_name(fleet_name: str) -> List[En
 
 async def get_fleet_infos_from_tourney_data_by_name(fleet_name: str, fleet_data: EntitiesData) -> List[EntityInfo]:
     fleet_name_lower = fleet_name.lower()
-    result = {fleet_id: fleet_info for (fleet_id, fleet_info) in fleet_data.items() if fleet_name_lower in fleet_info.get(fleet.FLEET_DESCRIPTION_PROPERTY_NAME, '').lower()}
+    result = {fleet_id: dict(fleet_info) for (fleet_id, fleet_info) in fleet_data.items() if fleet_name_lower in fleet_info.get(fleet.FLEET_DESCRIPTION_PROPERTY_NAME, '').lower()}
     fleet_infos_current = await __get_fleets_data_by_name(fleet_name)
     for fleet_info in fleet_infos_current.values():
         fleet_id = fleet_info[fleet.FLEET_KEY_NAME]
         if fleet_id in fleet_data:
             if fleet_id not in result:
-                result[fleet_id] = fleet_data[fleet_id]
+                result[fleet_id] = dict(fleet_data[fleet_id])
             if result[fleet_id][fleet.FLEET_DESCRIPTION_PROPERTY_NAME] != fleet_info[fleet.FLEET_DESCRIPTION_PROPERTY_NAME]:
                 result[fleet_id]['CurrentAllianceName'] = fleet_info[fleet.FLEET_DESCRIPTION_PROPERTY_NAME]
     return list(result.values())
@@ -192,8 +188,9 @@ async def __get_fleet_users_data_by_fleet_id(alliance_id: str, yesterday_tourney
     fleet_users_data_raw = await core.get_data_from_path(path)
     result = utils.convert.xmltree_to_dict3(fleet_users_data_raw)
     if yesterday_tourney_data:
+        yesterday_users_data = yesterday_tourney_data.users_data
         for user_id, user_info in result.items():
-            user_info['YesterdayAllianceScore'] = int(yesterday_tourney_data.users.get(user_id, {}).get('AllianceScore', 0))
+            user_info['YesterdayAllianceScore'] = int(yesterday_users_data.get(user_id, {}).get('AllianceScore', 0))
     return result
 
 
@@ -388,7 +385,7 @@ async def find_fleet(ctx: ApplicationContext, fleet_name: str) -> Tuple[EntityIn
 
 async def find_tournament_fleet(ctx: ApplicationContext, fleet_name: str, tourney_data) -> Tuple[EntityInfo, Interaction]:
     response = await utils.discord.edit_original_response(ctx, ctx.interaction, ['Searching fleet...'])
-    fleet_infos = await get_fleet_infos_from_tourney_data_by_name(fleet_name, tourney_data.fleets)
+    fleet_infos = await get_fleet_infos_from_tourney_data_by_name(fleet_name, tourney_data.fleets_data)
     if fleet_infos:
         fleet_info = None
         if len(fleet_infos) == 1:
@@ -422,16 +419,10 @@ def is_tournament_fleet(fleet_info: EntityInfo) -> bool:
 
 
 def __create_fleet_sheet_xl(fleet_users_data: EntitiesData, retrieved_at: datetime, file_name: str, max_tourney_battle_attempts: int = None, include_player_id: bool = False, include_fleet_id: bool = False, sort_data: bool = True) -> str:
-    start = time.perf_counter()
-    fleet_sheet_lines = __get_fleet_sheet_lines(fleet_users_data, retrieved_at, max_tourney_battle_attempts=max_tourney_battle_attempts, include_player_id=include_player_id, include_fleet_id=include_fleet_id, sort_lines=sort_data)
-    fleet_sheet_data = __get_fleet_sheet_data_from_lines(fleet_sheet_lines)
-    time1 = time.perf_counter() - start
-    print(f'Creating the fleet users data took {time1:.2f} seconds.')
-
-    start = time.perf_counter()
-    fleet_sheet_path = excel.create_xl_from_raw_data_dict(fleet_sheet_data, None, retrieved_at, file_name=file_name)
-    time2 = time.perf_counter() - start
-    print(f'Creating the excel sheet took {time2:.2f} seconds ({time1+time2:.2f} seconds in total).')
+    with metrics.FLEET_SHEET_DURATION.time(sheet_type='xlsx', stage='data'):
+        fleet_sheet_lines = __get_fleet_sheet_lines(fleet_users_data, retrieved_at, max_tourney_battle_attempts=max_tourney_battle_attempts, include_player_id=include_player_id, include_fleet_id=include_fleet_id, sort_lines=sort_data)
+    with metrics.FLEET_SHEET_DURATION.time(sheet_type='xlsx', stage='file'):
+        fleet_sheet_path = excel.create_xl_table_from_lines(fleet_sheet_lines, None, retrieved_at, file_name=file_name)
 
     return fleet_sheet_path
 
@@ -444,16 +435,6 @@ async def __get_fleet_details_by_info(ctx: Context, fleet_info: EntityInfo, flee
         return (await fleet_details.get_details_as_text(entity.EntityDetailsType.LONG))
 
 
-def __get_fleet_sheet_data_from_lines(fleet_sheet_lines: List[List]) -> List[Dict]:
-    fleet_sheet_data = []
-    for i in range(1, len(fleet_sheet_lines)):
-        d = {}
-        for j in range(len(fleet_sheet_lines[0])):
-            d[fleet_sheet_lines[0][j]] = fleet_sheet_lines[i][j]
-        fleet_sheet_data.append(d)
-    return fleet_sheet_data
-
-
 def __get_fleet_sheet_lines(fleet_users_data: EntitiesData, retrieved_at: datetime, max_tourney_battle_attempts: int = None, fleet_name: str = None, include_player_id: bool = False, include_fleet_id: bool = False, include_division_name: bool = False, include_pvp_stats: bool = False, sort_lines: bool = True) -> List[Any]:
     titles = list(FLEET_SHEET_COLUMN_DEFAULT_HEADERS)
     include_tourney_battle_attempts = max_tourney_battle_attempts is not None
@@ -54,6 +54,51 @@ __STATS_AVAILABLE: str = f'These are valid values for the _stat_ parameter: {",
 
 
 
+# ---------- Classes ----------
+
+class RecipeGraph():
+    """
+    All crafting recipes of a snapshot of the item designs: the ingredients of every item, the ingredients required per crafting step and the items every item is an ingredient of. Gets built once per snapshot, so lookups don't need to parse and walk the recipes again.
+    """
+    def __init__(self, items_data: EntitiesData, ingredients_by_item_id: Dict[str, Dict[str, int]], ingredients_per_level_by_item_id: Dict[str, List[Dict[str, int]]]) -> None:
+        self.__items_data: EntitiesData = items_data
+        self.__ingredients: Dict[str, Dict[str, int]] = ingredients_by_item_id
+        self.__ingredients_per_level: Dict[str, List[Dict[str, int]]] = ingredients_per_level_by_item_id
+        self.__used_in: Dict[str, List[str]] = {}
+
+        for item_id, ingredients in ingredients_by_item_id.items():
+            for ingredient_item_id in ingredients.keys():
+                self.__used_in.setdefault(ingredient_item_id, []).append(item_id)
+
+
+    def get_ingredients(self, item_id: str) -> Dict[str, int]:
+        """
+        Returns the amounts of the items required to craft the specified item.
+        """
+        return dict(self.__ingredients.get(item_id, {}))
+
+
+    def get_ingredients_per_level(self, item_id: str) -> List[Dict[str, int]]:
+        """
+        Returns the total amounts of the items required to craft the specified item, for each crafting step down to the basic ingredients. Void particles and fragments are only included for items, which are artifacts or fragments themselves.
+        """
+        return [dict(ingredients) for ingredients in self.__ingredients_per_level.get(item_id, [])]
+
+
+    def get_used_in(self, item_id: str) -> List[str]:
+        """
+        Returns the ids of the items requiring the specified item as an ingredient.
+        """
+        return list(self.__used_in.get(item_id, []))
+
+
+    def is_built_from(self, items_data: EntitiesData) -> bool:
+        return self.__items_data is items_data
+
+
+
+
+
 # ---------- Item info ----------
 
 async def get_item_details_by_name(ctx: Context, item_name: str, as_embed: bool = settings.USE_EMBEDS) -> Union[List[Embed], List[str]]:
@@ -270,6 +315,23 @@ async def get_ingredients_for_item(ctx: Context, item_name: str, as_embed: bool
             return (await ingredients_details_collection.get_entities_details_as_text(custom_footer_text=resources.get_resource('PRICE_NOTE')))
 
 
+def __create_recipe_graph(items_data: EntitiesData) -> RecipeGraph:
+    ingredients_by_item_id = {}
+    for item_id, item_info in items_data.items():
+        ingredients = {ingredient_item_id: int(amount) for ingredient_item_id, amount in get_ingredients_dict(item_info.get('Ingredients')).items()}
+        if ingredients:
+            ingredients_by_item_id[item_id] = ingredients
+
+    ingredients_per_level_by_item_id = {}
+    for item_id in ingredients_by_item_id.keys():
+        include_partial_artifacts = get_include_partial_artifacts(items_data[item_id])
+        ingredients_tree = __parse_ingredients_tree(item_id, ingredients_by_item_id, items_data, include_partial_artifacts)
+        ingredients_per_level_by_item_id[item_id] = [ingredients for ingredients in __flatten_ingredients_tree(ingredients_tree) if ingredients]
+
+    result = RecipeGraph(items_data, ingredients_by_item_id, ingredients_per_level_by_item_id)
+    return result
+
+
 def __flatten_ingredients_tree(ingredients_tree: IngredientsTree) -> List[Dict[str, int]]:
     """Returns a list of dicts"""
     ingredients = {}
@@ -297,24 +359,30 @@ def __flatten_ingredients_tree(ingredients_tree: IngredientsTree) -> List[Dict[s
     return result
 
 
-def __parse_ingredients_tree(ingredients_str: str, items_data: EntitiesData, include_partial_artifacts: bool, parent_amount: int = 1) -> List[IngredientsTree]:
-    """returns a tree structure: [(item_id, item_amount, item_ingredients[])]"""
-    if not ingredients_str:
-        return []
+def __get_recipe_graph(items_data: EntitiesData) -> RecipeGraph:
+    """
+    Returns the recipe graph for the specified item designs. Builds it, if it hasn't been built for these, yet.
+    """
+    global __recipe_graph
+    if __recipe_graph is None or not __recipe_graph.is_built_from(items_data):
+        __recipe_graph = __create_recipe_graph(items_data)
+    return __recipe_graph
+
 
-    # Ingredients format is: [<id>x<amount>][|<id>x<amount>]*
-    ingredients_dict = get_ingredients_dict(ingredients_str)
+def __parse_ingredients_tree(item_id: str, ingredients_by_item_id: Dict[str, Dict[str, int]], items_data: EntitiesData, include_partial_artifacts: bool, parent_amount: int = 1) -> List[IngredientsTree]:
+    """returns a tree structure: [(item_id, item_amount, item_ingredients[])]"""
     result = []
 
-    for item_id, item_amount in ingredients_dict.items():
-        item_info = items_data[item_id]
+    for ingredient_item_id, item_amount in ingredients_by_item_id.get(item_id, {}).items():
+        item_info = items_data.get(ingredient_item_id)
+        if item_info is None:
+            continue
         item_name = item_info[ITEM_DESIGN_DESCRIPTION_PROPERTY_NAME].lower()
-        item_amount = int(item_amount)
         # Filter out void particles and fragments
         if include_partial_artifacts or ('void particle' not in item_name and ' fragment' not in item_name):
             combined_amount = item_amount * parent_amount
-            item_ingredients = __parse_ingredients_tree(item_info['Ingredients'], items_data, include_partial_artifacts, combined_amount)
-            result.append((item_id, combined_amount, item_ingredients))
+            item_ingredients = __parse_ingredients_tree(ingredient_item_id, ingredients_by_item_id, items_data, include_partial_artifacts, combined_amount)
+            result.append((ingredient_item_id, combined_amount, item_ingredients))
 
     return result
 
@@ -377,12 +445,9 @@ def __get_title_upgrades(upgrades_infos_count: int, items_data: EntitiesData) ->
 
 
 def __get_upgrades_for(item_id: str, items_data: EntitiesData) -> List[Optional[EntityInfo]]:
-    # iterate through item_design_data and return every item_design containing the item id in question in property 'Ingredients'
-    result = []
-    for item_info in items_data.values():
-        ingredient_item_ids = list(get_ingredients_dict(item_info['Ingredients']).keys())
-        if item_id in ingredient_item_ids:
-            result.append(item_info)
+    # return every item_design containing the item id in question in property 'Ingredients'
+    recipe_graph = __get_recipe_graph(items_data)
+    result = [items_data[upgrade_item_id] for upgrade_item_id in recipe_graph.get_used_in(item_id)]
     if not result:
         result = [None]
     return result
@@ -394,10 +459,7 @@ def __get_upgrades_for(item_id: str, items_data: EntitiesData) -> List[Optional[
 # ---------- Transformation functions ----------
 
 def __get_all_ingredients(item_info: EntityInfo, items_data: EntitiesData, trainings_data: EntitiesData = None, **kwargs) -> Optional[str]:
-    include_partial_artifacts = get_include_partial_artifacts(item_info)
-    ingredients_tree = __parse_ingredients_tree(item_info['Ingredients'], items_data, include_partial_artifacts)
-    ingredients_dicts = __flatten_ingredients_tree(ingredients_tree)
-    ingredients_dicts = [d for d in ingredients_dicts if d]
+    ingredients_dicts = __get_recipe_graph(items_data).get_ingredients_per_level(item_info[ITEM_DESIGN_KEY_NAME])
     lines = []
     if ingredients_dicts:
         for ingredients_dict in ingredients_dicts:
@@ -445,7 +507,7 @@ async def __get_image_url(item_info: EntityInfo, items_data: EntitiesData, train
 
 
 def __get_ingredients(item_info: EntityInfo, items_data: EntitiesData, trainings_data: EntitiesData = None, **kwargs) -> Optional[str]:
-    ingredients = get_ingredients_dict(item_info.get('Ingredients'))
+    ingredients = __get_recipe_graph(items_data).get_ingredients(item_info[ITEM_DESIGN_KEY_NAME])
     result = []
     for item_id, amount in ingredients.items():
         item_name = items_data[item_id].get(ITEM_DESIGN_DESCRIPTION_PROPERTY_NAME)
@@ -777,7 +839,8 @@ def __create_base_details_from_info(item_info: EntityInfo, items_data: EntitiesD
 
 def __create_base_details_collection_from_infos(items_infos: List[EntityInfo], items_data: EntitiesData, trainings_data: EntitiesData) -> entity.EntityDetailsCollection:
     base_details = __create_base_details_list_from_infos(items_infos, items_data, trainings_data)
-    result = entity.EntityDetailsCollection(base_details, big_set_threshold=3)
+    render_cache_key = ('item_base', tuple(item_info.get(ITEM_DESIGN_KEY_NAME) for item_info in items_infos))
+    result = entity.EntityDetailsCollection(base_details, big_set_threshold=3, render_cache_key=render_cache_key)
     return result
 
 
@@ -842,6 +905,8 @@ items_designs_retriever: entity.EntityRetriever = entity.EntityRetriever(
     fix_data_delegate=__fix_item_name
 )
 
+__recipe_graph: RecipeGraph = None
+
 __properties: entity.EntityDetailsCreationPropertiesCollection = {
     'title': entity.EntityDetailPropertyCollection(
         entity.EntityDetailProperty('Title', False, omit_if_none=False, entity_property_name=ITEM_DESIGN_DESCRIPTION_PROPERTY_NAME)
@@ -915,4 +980,5 @@ __properties: entity.EntityDetailsCreationPropertiesCollection = {
 async def init() -> None:
     global ALLOWED_ITEM_NAMES
     items_data = await items_designs_retriever.get_data_dict3()
-    ALLOWED_ITEM_NAMES = sorted(__get_allowed_item_names(items_data, NOT_ALLOWED_ITEM_NAMES))
\ No newline at end of file
+    ALLOWED_ITEM_NAMES = sorted(__get_allowed_item_names(items_data, NOT_ALLOWED_ITEM_NAMES))
+    __get_recipe_graph(items_data)
\ No newline at end of file
@@ -1,13 +1,12 @@
 from datetime import datetime, timedelta
 import hashlib
-import json
 import random
 from typing import List, Optional
 
-import aiohttp
 from asyncio import Lock
 
 from . import database as db
+from . import http_client
 from . import pss_core as core
 from . import settings
 from . import utils
@@ -127,17 +126,7 @@ class Device():
             'isJailBroken': 'false',
             'languageKey': 'en',
         }
-        if settings.PRINT_DEBUG_WEB_REQUESTS:
-            print(f'[WebRequest] Attempting to get data from url: {url}')
-            print(f'[WebRequest]   with parameters: {json.dumps(query_params, separators=(",", ":"))}')
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, params=query_params) as response:
-                data = await response.text(encoding='utf-8')
-                if settings.PRINT_DEBUG_WEB_REQUESTS:
-                    log_data = data or ''
-                    if log_data and len(log_data) > 100:
-                        log_data = log_data[:100]
-                    print(f'[WebRequest] Returned data: {log_data}')
+        data = await http_client.post_text(url, params=query_params)
 
         result = utils.convert.raw_xml_to_dict(data)
         self.__last_login = utc_now
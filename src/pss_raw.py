@@ -73,7 +73,7 @@ def __flatten_raw_dict_for_excel(raw_dict: EntitiesData) -> List[EntityInfo]:
             for child in value:
                 children.extend(__flatten_raw_dict_for_excel(child))
         else:
-            entity[key] = excel.fix_field(value)
+            entity[key] = value
     if children:
         for child in children:
             result_entity = dict(entity)
@@ -141,6 +141,7 @@ async def __post_raw_file(ctx: Context, retriever: entity.EntityRetriever, entit
     else:
         start = time.perf_counter()
         flattened_data = __flatten_raw_dict_for_excel(raw_data_dict)
+        excel.fix_columns(flattened_data)
         time1 = time.perf_counter() - start
         utils.dbg_prnt(f'Flattening the {entity_name} data took {time1:.2f} seconds.')
 
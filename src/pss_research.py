@@ -164,7 +164,8 @@ def __create_research_details_from_info(research_info: EntityInfo, researches_da
 
 def __create_researches_details_collection_from_infos(researches_designs_infos: List[EntityInfo], researches_data: EntitiesData) -> entity.EntityDetailsCollection:
     researches_details = [__create_research_details_from_info(item_info, researches_data) for item_info in researches_designs_infos]
-    result = entity.EntityDetailsCollection(researches_details, big_set_threshold=BIG_SET_THRESHOLD)
+    render_cache_key = ('research', tuple(research_info.get(RESEARCH_DESIGN_KEY_NAME) for research_info in researches_designs_infos))
+    result = entity.EntityDetailsCollection(researches_details, big_set_threshold=BIG_SET_THRESHOLD, render_cache_key=render_cache_key)
     return result
 
 
@@ -290,7 +290,8 @@ def __create_room_details_list_from_infos(rooms_designs_infos: List[EntityInfo],
 
 def __create_rooms_details_collection_from_infos(rooms_designs_infos: List[EntityInfo], rooms_data: EntitiesData, items_data: EntitiesData, researches_data: EntitiesData, rooms_designs_sprites_data: EntitiesData) -> entity.EntityDetailsCollection:
     rooms_details = __create_room_details_list_from_infos(rooms_designs_infos, rooms_data, items_data, researches_data, rooms_designs_sprites_data)
-    result = entity.EntityDetailsCollection(rooms_details, big_set_threshold=4)
+    render_cache_key = ('room', tuple(room_info.get(ROOM_DESIGN_KEY_NAME) for room_info in rooms_designs_infos))
+    result = entity.EntityDetailsCollection(rooms_details, big_set_threshold=4, render_cache_key=render_cache_key)
     return result
 
 
@@ -1,3 +1,8 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
 from typing import Dict, List, Optional, Tuple, Union
 
 from discord import Embed
@@ -20,6 +25,8 @@ from . import utils
 
 # ---------- Constants ----------
 
+LAYOUT_FILE_NAME_PREFIX: str = 'layout_'
+
 SHIP_BUILDER_PIXEL_PRESTIGE_BASE_PATH: str = 'http://pixel-prestige.com/ship-builder.php?'
 SHIP_BUILDER_PIXYSHIP_BASE_PATH: str = 'https://pixyship.com/builder?'
 
@@ -27,6 +34,9 @@ SHIP_DESIGN_BASE_PATH: str = 'ShipService/ListAllShipDesigns2?languageKey=en'
 SHIP_DESIGN_DESCRIPTION_PROPERTY_NAME: str = 'ShipDesignName'
 SHIP_DESIGN_KEY_NAME: str = 'ShipDesignId'
 
+__LAYOUT_ROOM_DESIGN_PROPERTY_NAMES: List[str] = ['Columns', 'Rows', 'ImageSpriteId', 'ConstructionSpriteId', 'LogoSpriteId', 'MaxSystemPower', 'MaxPowerGenerated', 'RoomShortName']
+__LAYOUT_SHIP_DESIGN_PROPERTY_NAMES: List[str] = [SHIP_DESIGN_KEY_NAME, 'InteriorSpriteId', 'Mask', 'Rows', 'Columns', 'RoomFrameSpriteId', 'DoorFrameLeftSpriteId', 'DoorFrameRightSpriteId']
+
 
 
 
@@ -119,8 +129,133 @@ async def __get_inspect_ship_base_path(user_id: str) -> str:
 # ---------- Sprite helper functions ----------
 
 async def make_ship_layout_sprite(file_name_prefix: str, user_ship_info: entity.EntityInfo, ship_design_info: entity.EntityInfo, rooms_designs_data: entity.EntitiesData, rooms_designs_sprites_ids: Dict[str, str]) -> str:
+    """
+    Layouts are stored by a hash of everything that goes into rendering them, so an unchanged layout will only be rendered once. The least recently used layouts get removed, when the stored layouts exceed settings.SHIP_LAYOUT_CACHE_MAX_BYTES.
+    """
     user_id = user_ship_info['UserId']
+    file_path = os.path.join(sprites.SPRITES_CACHE_PATH, f'{file_name_prefix}_{user_id}_layout.png')
+
+    layout_hash = __get_ship_layout_hash(user_ship_info, ship_design_info, rooms_designs_data, rooms_designs_sprites_ids)
+    layout_file_path = sprites.exists_in_cache(layout_hash, prefix=LAYOUT_FILE_NAME_PREFIX)
+    if layout_file_path:
+        try:
+            os.utime(layout_file_path)
+            shutil.copyfile(layout_file_path, file_path)
+            return file_path
+        except FileNotFoundError:
+            # Another process pruned the layout in the meantime.
+            pass
+
+    await __preload_ship_layout_sprites(user_ship_info, ship_design_info, rooms_designs_data, rooms_designs_sprites_ids)
+    layout_sprite = await __render_ship_layout_sprite(user_ship_info, ship_design_info, rooms_designs_data, rooms_designs_sprites_ids)
+    layout_file_path = sprites.save_sprite(layout_sprite, f'{LAYOUT_FILE_NAME_PREFIX}{layout_hash}')
+    shutil.copyfile(layout_file_path, file_path)
+    __prune_ship_layout_cache(layout_file_path)
+    return file_path
+
+
+def make_interior_grid_sprite(ship_design_info: entity.EntityInfo, width: int, height: int) -> Image.Image:
+    result = sprites.create_empty_sprite(width, height)
+    interior_grid_draw: ImageDraw.ImageDraw = ImageDraw.Draw(result)
+    ship_mask = ship_design_info['Mask']
+    ship_height = int(ship_design_info['Rows'])
+    ship_width = int(ship_design_info['Columns'])
+    ship_area = ship_height * ship_width
+    while len(ship_mask) < ship_area:
+        ship_mask += "0" * ship_width
+    if len(ship_mask) > ship_area:
+        ship_height = int(len(ship_mask) / ship_width)
+    grid_mask = np.array([int(val) for val in ship_mask]).reshape((ship_height, ship_width))
+    grids = np.where(grid_mask)
+    for coordinates in list(zip(grids[1], grids[0])):
+        shape = [
+            coordinates[0] * sprites.TILE_SIZE,
+            coordinates[1] * sprites.TILE_SIZE,
+            (coordinates[0] + 1) * sprites.TILE_SIZE - 1,
+            (coordinates[1] + 1) * sprites.TILE_SIZE - 1
+        ]
+        interior_grid_draw.rectangle(shape, fill=None, outline=(0, 0, 0), width=1)
+    sprites.save_sprite(result, f'{ship_design_info["InteriorSpriteId"]}_grids')
+    return result
+
+
+
+
+
+def __get_room_sprite_ids(ship_room_info: entity.EntityInfo, ship_design_info: entity.EntityInfo, rooms_designs_data: entity.EntitiesData, rooms_designs_sprites_ids: Dict[str, str]) -> List[str]:
+    room_design_info = rooms_designs_data[ship_room_info[room.ROOM_DESIGN_KEY_NAME]]
+    has_decoration_sprite = (int(room_design_info['Columns']), int(room_design_info['Rows'])) != (1, 1)
+    result = [room.get_room_sprite_id(room_design_info, __is_room_under_construction(ship_room_info), has_decoration_sprite, rooms_designs_sprites_ids)]
+    if has_decoration_sprite:
+        result.append(room_design_info.get('LogoSpriteId'))
+        result.append(ship_design_info.get('RoomFrameSpriteId'))
+        result.append(ship_design_info.get('DoorFrameLeftSpriteId'))
+        result.append(ship_design_info.get('DoorFrameRightSpriteId'))
+    return result
 
+
+def __get_ship_layout_hash(user_ship_info: entity.EntityInfo, ship_design_info: entity.EntityInfo, rooms_designs_data: entity.EntitiesData, rooms_designs_sprites_ids: Dict[str, str]) -> str:
+    rooms = sorted(
+        (ship_room_info['Column'], ship_room_info['Row'], ship_room_info[room.ROOM_DESIGN_KEY_NAME], __is_room_under_construction(ship_room_info))
+        for ship_room_info in user_ship_info['Rooms'].values()
+    )
+    rooms_designs = {
+        room_design_id: [rooms_designs_data[room_design_id].get(property_name) for property_name in __LAYOUT_ROOM_DESIGN_PROPERTY_NAMES] + [rooms_designs_sprites_ids.get(room_design_id)]
+        for _, _, room_design_id, _ in rooms
+    }
+    layout = {
+        'ship': [ship_design_info.get(property_name) for property_name in __LAYOUT_SHIP_DESIGN_PROPERTY_NAMES],
+        'colours': [user_ship_info.get(property_name, '0') for property_name in ('BrightnessValue', 'HueValue', 'SaturationValue')],
+        'rooms': rooms,
+        'rooms_designs': rooms_designs,
+    }
+    result = hashlib.sha256(json.dumps(layout, sort_keys=True).encode('utf-8')).hexdigest()
+    return result
+
+
+def __is_room_under_construction(ship_room_info: entity.EntityInfo) -> int:
+    return 1 if ship_room_info.get('RoomStatus') == 'Upgrading' or entity.entity_property_has_value(ship_room_info.get('ConstructionStartDate')) else 0
+
+
+async def __preload_ship_layout_sprites(user_ship_info: entity.EntityInfo, ship_design_info: entity.EntityInfo, rooms_designs_data: entity.EntitiesData, rooms_designs_sprites_ids: Dict[str, str]) -> None:
+    """
+    Downloads all sprites required to render a layout concurrently.
+    """
+    sprite_ids = {ship_design_info['InteriorSpriteId']}
+    for ship_room_info in user_ship_info['Rooms'].values():
+        sprite_ids.update(__get_room_sprite_ids(ship_room_info, ship_design_info, rooms_designs_data, rooms_designs_sprites_ids))
+    await asyncio.gather(*[sprites.download_sprite(sprite_id) for sprite_id in sprite_ids if entity.entity_property_has_value(sprite_id)])
+
+
+def __prune_ship_layout_cache(keep_file_path: str) -> None:
+    """
+    Removes the least recently used layouts from the sprite cache, until they're not larger than settings.SHIP_LAYOUT_CACHE_MAX_BYTES.
+    """
+    file_infos = []
+    total_size = 0
+    for dir_entry in os.scandir(sprites.SPRITES_CACHE_PATH):
+        if not dir_entry.name.startswith(LAYOUT_FILE_NAME_PREFIX) or not dir_entry.name.endswith('.png'):
+            continue
+        try:
+            stat = dir_entry.stat()
+        except FileNotFoundError:
+            continue
+        file_infos.append((stat.st_mtime, stat.st_size, dir_entry.path))
+        total_size += stat.st_size
+
+    for _, size, file_path in sorted(file_infos):
+        if total_size <= settings.SHIP_LAYOUT_CACHE_MAX_BYTES:
+            break
+        if file_path == keep_file_path:
+            continue
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        total_size -= size
+
+
+async def __render_ship_layout_sprite(user_ship_info: entity.EntityInfo, ship_design_info: entity.EntityInfo, rooms_designs_data: entity.EntitiesData, rooms_designs_sprites_ids: Dict[str, str]) -> Image.Image:
     brightness_value = float(user_ship_info.get('BrightnessValue', '0'))
     hue_value = float(user_ship_info.get('HueValue', '0'))
     saturation_value = float(user_ship_info.get('SaturationValue', '0'))
@@ -142,7 +277,7 @@ async def make_ship_layout_sprite(file_name_prefix: str, user_ship_info: entity.
     rooms_decorations_sprites_cache = {}
     for ship_room_info in user_ship_info['Rooms'].values():
         room_design_id = ship_room_info[room.ROOM_DESIGN_KEY_NAME]
-        room_under_construction = 1 if ship_room_info.get('RoomStatus') == 'Upgrading' or entity.entity_property_has_value(ship_room_info.get('ConstructionStartDate')) else 0
+        room_under_construction = __is_room_under_construction(ship_room_info)
 
         room_sprite = rooms_sprites_cache.get(room_design_id, {}).get(room_under_construction)
 
@@ -163,33 +298,7 @@ async def make_ship_layout_sprite(file_name_prefix: str, user_ship_info: entity.
             rooms_sprites_cache.setdefault(room_design_id, {})[room_under_construction] = room_sprite
         interior_sprite.paste(room_sprite, (int(ship_room_info['Column']) * sprites.TILE_SIZE, int(ship_room_info['Row']) * sprites.TILE_SIZE))
 
-    file_path = sprites.save_sprite(interior_sprite, f'{file_name_prefix}_{user_id}_layout')
-    return file_path
-
-
-def make_interior_grid_sprite(ship_design_info: entity.EntityInfo, width: int, height: int) -> Image.Image:
-    result = sprites.create_empty_sprite(width, height)
-    interior_grid_draw: ImageDraw.ImageDraw = ImageDraw.Draw(result)
-    ship_mask = ship_design_info['Mask']
-    ship_height = int(ship_design_info['Rows'])
-    ship_width = int(ship_design_info['Columns'])
-    ship_area = ship_height * ship_width
-    while len(ship_mask) < ship_area:
-        ship_mask += "0" * ship_width
-    if len(ship_mask) > ship_area:
-        ship_height = int(len(ship_mask) / ship_width)
-    grid_mask = np.array([int(val) for val in ship_mask]).reshape((ship_height, ship_width))
-    grids = np.where(grid_mask)
-    for coordinates in list(zip(grids[1], grids[0])):
-        shape = [
-            coordinates[0] * sprites.TILE_SIZE,
-            coordinates[1] * sprites.TILE_SIZE,
-            (coordinates[0] + 1) * sprites.TILE_SIZE - 1,
-            (coordinates[1] + 1) * sprites.TILE_SIZE - 1
-        ]
-        interior_grid_draw.rectangle(shape, fill=None, outline=(0, 0, 0), width=1)
-    sprites.save_sprite(result, f'{ship_design_info["InteriorSpriteId"]}_grids')
-    return result
+    return interior_sprite
 
 
 
@@ -1,11 +1,11 @@
-import aiohttp
-import colorsys
 import os
-from typing import Iterable, Optional
+from typing import Dict, Iterable, Optional, Tuple
 
 from PIL import Image, ImageEnhance, ImageFont
 import numpy as np
 
+from . import http_client
+from . import metrics
 from . import pss_core as core
 from . import pss_entity as entity
 from . import settings
@@ -14,10 +14,6 @@ from .typehints import EntitiesData, EntityInfo
 
 # ---------- Constants ----------
 
-FUNC_HSV_TO_RGB = np.vectorize(colorsys.hsv_to_rgb)
-FUNC_RGB_TO_HSV = np.vectorize(colorsys.rgb_to_hsv)
-
-
 PIXELATED_FONT: ImageFont.ImageFont
 
 POWER_BAR_COLOR = (55, 255, 142)
@@ -39,6 +35,104 @@ TILE_SIZE = 25
 
 
 
+# ---------- Classes ----------
+
+class DecodedSpritesCache():
+    """
+    Keeps the most recently used decoded sprites in memory until the size of their pixel data exceeds `max_bytes`. The cached images are shared and must not be modified.
+    """
+    def __init__(self, max_bytes: int) -> None:
+        self.__max_bytes: int = max_bytes
+        self.__sprites: Dict[str, Image.Image] = {}
+        self.__size: int = 0
+
+        self.__evictions: int = 0
+        self.__hits: int = 0
+        self.__misses: int = 0
+
+
+    @property
+    def count(self) -> int:
+        return len(self.__sprites)
+
+    @property
+    def evictions(self) -> int:
+        return self.__evictions
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.__hits + self.__misses
+        return self.__hits / requests if requests else 0.0
+
+    @property
+    def hits(self) -> int:
+        return self.__hits
+
+    @property
+    def max_bytes(self) -> int:
+        return self.__max_bytes
+
+    @property
+    def misses(self) -> int:
+        return self.__misses
+
+    @property
+    def size(self) -> int:
+        """
+        Size of the cached pixel data in bytes.
+        """
+        return self.__size
+
+
+    def add(self, sprite_id: str, sprite: Image.Image) -> None:
+        self.invalidate(sprite_id)
+        sprite_size = DecodedSpritesCache.__get_sprite_size(sprite)
+        if sprite_size > self.__max_bytes:
+            return
+
+        self.__sprites[sprite_id] = sprite
+        self.__size += sprite_size
+        while self.__size > self.__max_bytes:
+            oldest_sprite_id = next(iter(self.__sprites))
+            self.invalidate(oldest_sprite_id)
+            self.__evictions += 1
+
+
+    def clear(self) -> None:
+        self.__sprites.clear()
+        self.__size = 0
+
+
+    def get(self, sprite_id: str) -> Optional[Image.Image]:
+        sprite = self.__sprites.pop(sprite_id, None)
+        if sprite is None:
+            self.__misses += 1
+            return None
+        # Re-insert to mark the sprite as the most recently used one.
+        self.__sprites[sprite_id] = sprite
+        self.__hits += 1
+        return sprite
+
+
+    def invalidate(self, sprite_id: str) -> bool:
+        """
+        Returns True, if the sprite has been cached.
+        """
+        sprite = self.__sprites.pop(sprite_id, None)
+        if sprite is None:
+            return False
+        self.__size -= DecodedSpritesCache.__get_sprite_size(sprite)
+        return True
+
+
+    @staticmethod
+    def __get_sprite_size(sprite: Image.Image) -> int:
+        return sprite.width * sprite.height * len(sprite.getbands())
+
+
+
+
+
 # ---------- Sprites ----------
 
 
@@ -69,10 +163,9 @@ async def download_sprite(sprite_id: str) -> str:
     target_path = os.path.join(SPRITES_CACHE_PATH, f'{sprite_id}.png')
     if not os.path.isfile(target_path):
         download_url = await get_download_sprite_link(sprite_id)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(download_url) as response:
-                with open(target_path, 'wb') as f:
-                    f.write(await response.read())
+        data = await http_client.get_bytes(download_url)
+        with open(target_path, 'wb') as f:
+            f.write(data)
     return target_path
 
 
@@ -125,10 +218,24 @@ def get_sprite_download_url(sprite_id: int) -> str:
     return f'{SPRITES_BASE_PATH}{sprite_id}'
 
 
+def invalidate_sprite(sprite_id: str) -> bool:
+    """
+    Removes a sprite from the in-memory cache of decoded sprites. Returns True, if the sprite has been cached.
+    """
+    return DECODED_SPRITES_CACHE.invalidate(str(sprite_id))
+
+
 async def load_sprite(sprite_id: str) -> Image.Image:
-    sprite_path = await download_sprite(sprite_id)
-    result = Image.open(sprite_path).convert('RGBA')
-    return result
+    """
+    Returns a copy of the decoded sprite, which may be modified.
+    """
+    sprite_id = str(sprite_id)
+    sprite = DECODED_SPRITES_CACHE.get(sprite_id)
+    if sprite is None:
+        sprite_path = await download_sprite(sprite_id)
+        sprite = Image.open(sprite_path).convert('RGBA')
+        DECODED_SPRITES_CACHE.add(sprite_id, sprite)
+    return sprite.copy()
 
 
 async def load_sprite_from_disk(sprite_id: str, prefix: str = None, suffix: str = None) -> Optional[Image.Image]:
@@ -140,16 +247,21 @@ async def load_sprite_from_disk(sprite_id: str, prefix: str = None, suffix: str
 
 
 def save_sprite(image: Image.Image, file_name_without_extension: str) -> str:
+    """
+    Writes to a temporary file first, so that other processes sharing the cache never read a partially written sprite.
+    """
     target_file_path = os.path.join(SPRITES_CACHE_PATH, f'{file_name_without_extension}.png')
-    image.save(target_file_path)
+    temp_file_path = f'{target_file_path}.{os.getpid()}.tmp'
+    image.save(temp_file_path, format='PNG')
+    os.replace(temp_file_path, target_file_path)
     return target_file_path
 
 
 def shift_hue(arr: Iterable, hue_out: float) -> Iterable:
     r, g, b, a = np.rollaxis(arr, axis=-1)
-    h, s, v = FUNC_RGB_TO_HSV(r, g, b)
+    h, s, v = __rgb_to_hsv(r, g, b)
     h = (h + hue_out) % 1
-    r, g, b = FUNC_HSV_TO_RGB(h, s, v)
+    r, g, b = __hsv_to_rgb(h, s, v)
     arr = np.dstack((r, g, b, a))
     return arr
 
@@ -157,9 +269,71 @@ def shift_hue(arr: Iterable, hue_out: float) -> Iterable:
 
 
 
+# ---------- Helper functions ----------
+
+def _collect_metrics() -> None:
+    __DECODED_SPRITES_CACHE_EVICTIONS.set(DECODED_SPRITES_CACHE.evictions)
+    __DECODED_SPRITES_CACHE_HITS.set(DECODED_SPRITES_CACHE.hits)
+    __DECODED_SPRITES_CACHE_MISSES.set(DECODED_SPRITES_CACHE.misses)
+    __DECODED_SPRITES_CACHE_SIZE.set(DECODED_SPRITES_CACHE.size)
+    __DECODED_SPRITES_CACHE_COUNT.set(DECODED_SPRITES_CACHE.count)
+
+
+def __hsv_to_rgb(h: np.ndarray, s: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Works like `colorsys.hsv_to_rgb`, but on whole arrays.
+    """
+    i = np.floor(h * 6.0)
+    f = h * 6.0 - i
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    i = i.astype(int) % 6
+
+    conditions = [s == 0.0, i == 0, i == 1, i == 2, i == 3, i == 4]
+    r = np.select(conditions, [v, v, q, p, p, t], default=v)
+    g = np.select(conditions, [v, t, v, v, q, p], default=p)
+    b = np.select(conditions, [v, p, p, t, v, v], default=q)
+    return r, g, b
+
+
+def __rgb_to_hsv(r: np.ndarray, g: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Works like `colorsys.rgb_to_hsv`, but on whole arrays.
+    """
+    max_c = np.maximum(np.maximum(r, g), b)
+    min_c = np.minimum(np.minimum(r, g), b)
+    range_c = max_c - min_c
+    v = max_c
+    is_grey = range_c == 0.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(is_grey, 0.0, range_c / max_c)
+        rc = (max_c - r) / range_c
+        gc = (max_c - g) / range_c
+        bc = (max_c - b) / range_c
+    h = np.select([r == max_c, g == max_c], [bc - gc, 2.0 + rc - bc], default=4.0 + gc - rc)
+    h = np.where(is_grey, 0.0, (h / 6.0) % 1.0)
+    return h, s, v
+
+
+
+
+
 
 # ---------- Initialization ----------
 
+DECODED_SPRITES_CACHE: DecodedSpritesCache = DecodedSpritesCache(settings.SPRITE_DECODED_CACHE_MAX_BYTES)
+
+__DECODED_SPRITES_CACHE_COUNT: metrics.Gauge = metrics.REGISTRY.register(metrics.Gauge('sprite_decoded_cache_sprites', 'Number of decoded sprites kept in memory.'))
+__DECODED_SPRITES_CACHE_EVICTIONS: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('sprite_decoded_cache_evictions_total', 'Decoded sprites evicted to stay within the memory budget.'))
+__DECODED_SPRITES_CACHE_HITS: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('sprite_decoded_cache_hits_total', 'Sprites served from memory.'))
+__DECODED_SPRITES_CACHE_MISSES: metrics.Counter = metrics.REGISTRY.register(metrics.Counter('sprite_decoded_cache_misses_total', 'Sprites, which had to be decoded.'))
+__DECODED_SPRITES_CACHE_SIZE: metrics.Gauge = metrics.REGISTRY.register(metrics.Gauge('sprite_decoded_cache_bytes', 'Size of the pixel data of the decoded sprites kept in memory.'))
+
+metrics.REGISTRY.add_collector(_collect_metrics)
+
+
 async def init():
     global PWD
     PWD = os.getcwd()
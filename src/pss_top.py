@@ -1,6 +1,7 @@
+from bisect import bisect_left, bisect_right
 import calendar
 from datetime import datetime
-from typing import List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from discord import Colour, Embed, OptionChoice
 from discord.ext.commands import Context
@@ -47,6 +48,55 @@ TOP_FLEETS_BASE_PATH: str = 'AllianceService/ListAlliancesByRanking?skip=0&take=
 
 
 
+# ---------- Classes ----------
+
+class TargetsIndex():
+    """
+    Users of a tournament data snapshot grouped by division and ordered by star value, stars and trophies (highest first). Star values get calculated once per snapshot, so looking up targets only needs to scan the users within the requested star value range.
+    """
+    def __init__(self, tourney_data: TourneyData, current_fleet_data: EntitiesData) -> None:
+        self.__tourney_data: TourneyData = tourney_data
+        self.__current_fleet_data: EntitiesData = current_fleet_data
+        self.__targets_by_division: Dict[str, List[Tuple[int, int, int, EntityInfo]]] = {}
+        self.__negative_star_values_by_division: Dict[str, List[int]] = {}
+
+        for user_info in tourney_data.users_data.values():
+            current_division_design_id = current_fleet_data.get(user_info.get(fleet.FLEET_KEY_NAME), {}).get(DIVISION_DESIGN_KEY_NAME)
+            user_division_design_id = user_info.get('Alliance', {}).get(DIVISION_DESIGN_KEY_NAME, '0')
+            alliance_division_design_id = current_division_design_id or user_division_design_id
+            star_value, _ = user.get_star_value_from_user_info(user_info, star_count=user_info.get('AllianceScore'))
+            trophies = int(user_info.get('Trophy', 0))
+            highest_trophies = int(user_info.get('HighestTrophy', 0))
+            self.__targets_by_division.setdefault(alliance_division_design_id, []).append((star_value or 0, trophies, highest_trophies, user_info))
+
+        for division_design_id, targets in self.__targets_by_division.items():
+            targets.sort(key=lambda target: (target[0], int(target[3].get('AllianceScore', 0)), target[1]), reverse=True)
+            self.__negative_star_values_by_division[division_design_id] = [-target[0] for target in targets]
+
+
+    def get_targets(self, division_design_id: str, last_month_user_data: EntitiesData, min_star_value: int = None, max_star_value: int = None, min_trophies_value: int = None, max_trophies_value: int = None, max_highest_trophies: int = None) -> List[EntityInfo]:
+        targets = self.__targets_by_division.get(division_design_id, [])
+        negative_star_values = self.__negative_star_values_by_division.get(division_design_id, [])
+        start = bisect_left(negative_star_values, -max_star_value) if max_star_value else 0
+        end = bisect_right(negative_star_values, -min_star_value) if min_star_value else len(targets)
+
+        result = []
+        for star_value, trophies, highest_trophies, user_info in targets[start:end]:
+            if (not min_trophies_value or trophies >= min_trophies_value) and (not max_trophies_value or trophies <= max_trophies_value) and (not max_highest_trophies or highest_trophies <= max_highest_trophies):
+                user_info = dict(user_info)
+                user_info['StarValue'] = star_value
+                user_info['LastMonthStarValue'] = last_month_user_data.get(user_info[user.USER_KEY_NAME], {}).get('AllianceScore') or '-'
+                result.append(user_info)
+        return result
+
+
+    def is_built_from(self, tourney_data: TourneyData, current_fleet_data: EntitiesData) -> bool:
+        return self.__tourney_data is tourney_data and self.__current_fleet_data is current_fleet_data
+
+
+
+
+
 # ---------- Top fleets info ----------
 
 async def get_top_fleets(ctx: Context, take: int = 100, as_embed: bool = settings.USE_EMBEDS) -> Union[List[Embed], List[str]]:
@@ -310,24 +360,9 @@ def get_division_title(division_design_id: str, divisions_designs_infos: Entitie
 
 # ---------- Helper functions ----------
 
-def filter_targets(user_infos: List[EntityInfo], division_design_id: str, last_month_user_data: EntitiesData, current_fleet_data: EntitiesData = {}, min_star_value: int = None, max_star_value: int = None, min_trophies_value: int = None, max_trophies_value: int = None, max_highest_trophies: int = None) -> List[EntityInfo]:
-    result = []
-    for user_info in user_infos:
-        current_division_design_id = current_fleet_data.get(user_info.get(fleet.FLEET_KEY_NAME), {}).get(DIVISION_DESIGN_KEY_NAME)
-        user_division_design_id = user_info.get('Alliance', {}).get(DIVISION_DESIGN_KEY_NAME, '0')
-        alliance_division_design_id = current_division_design_id or user_division_design_id
-        trophies = int(user_info.get('Trophy', 0))
-        highest_trophies = int(user_info.get('HighestTrophy', 0))
-        division_matches = division_design_id == alliance_division_design_id
-        if division_matches and (not min_trophies_value or trophies >= min_trophies_value) and (not max_trophies_value or trophies <= max_trophies_value) and (not max_highest_trophies or highest_trophies <= max_highest_trophies):
-            star_value, _ = user.get_star_value_from_user_info(user_info, star_count=user_info.get('AllianceScore'))
-            if (not min_star_value or star_value >= min_star_value) and (not max_star_value or star_value <= max_star_value):
-                user_id = user_info[user.USER_KEY_NAME]
-                user_info['StarValue'] = star_value or 0
-                user_info['LastMonthStarValue'] = last_month_user_data.get(user_id, {}).get('AllianceScore') or '-'
-                result.append(user_info)
-
-    result = sorted(result, key=lambda user_info: (user_info.get('StarValue', 0), int(user_info.get('AllianceScore', 0)), int(user_info.get('Trophy', 0))), reverse=True)
+def filter_targets(tourney_data: TourneyData, division_design_id: str, last_month_user_data: EntitiesData, current_fleet_data: EntitiesData = {}, min_star_value: int = None, max_star_value: int = None, min_trophies_value: int = None, max_trophies_value: int = None, max_highest_trophies: int = None) -> List[EntityInfo]:
+    targets_index = __get_targets_index(tourney_data, current_fleet_data)
+    result = targets_index.get_targets(division_design_id, last_month_user_data, min_star_value, max_star_value, min_trophies_value, max_trophies_value, max_highest_trophies)
     return result
 
 
@@ -337,6 +372,22 @@ async def get_alliances_with_division() -> EntitiesData:
     return fleet_infos
 
 
+async def get_tourney_alliances_with_division(utc_now: datetime = None) -> EntitiesData:
+    """
+    Fleets don't change divisions during a tournament, so the data gets cached for the rest of the tournament day. Outside of a tournament, the data will always be retrieved.
+    """
+    global __tourney_alliances_with_division_cache
+    utc_now = utc_now or utils.get_utc_now()
+    tourney_day = tourney.get_tourney_day(utc_now)
+    if tourney_day is None:
+        return await get_alliances_with_division()
+
+    cache_key = (utc_now.year, utc_now.month, tourney_day)
+    if __tourney_alliances_with_division_cache is None or __tourney_alliances_with_division_cache[0] != cache_key:
+        __tourney_alliances_with_division_cache = (cache_key, await get_alliances_with_division())
+    return __tourney_alliances_with_division_cache[1]
+
+
 def get_targets_parameters(star_value: str = None, trophies: str = None, max_highest_trophies: int = None) -> Tuple[List[str], Optional[int], Optional[int], Optional[int], Optional[int], Optional[int]]:
     star_values = [int(value) for value in (star_value or '').split('-') if value]
     trophies_values = [int(value) for value in (trophies or '').split('-') if value]
@@ -423,6 +474,13 @@ def __get_fleet_division_designs(divisions_designs_data: EntitiesData) -> Entiti
     return result
 
 
+def __get_targets_index(tourney_data: TourneyData, current_fleet_data: EntitiesData) -> TargetsIndex:
+    global __targets_index
+    if __targets_index is None or not __targets_index.is_built_from(tourney_data, current_fleet_data):
+        __targets_index = TargetsIndex(tourney_data, current_fleet_data)
+    return __targets_index
+
+
 
 
 
@@ -433,4 +491,7 @@ divisions_designs_retriever: entity.EntityRetriever = entity.EntityRetriever(
     DIVISION_DESIGN_KEY_NAME,
     DIVISION_DESIGN_DESCRIPTION_PROPERTY_NAME,
     cache_name='DivisionDesigns'
-)
\ No newline at end of file
+)
+
+__targets_index: TargetsIndex = None
+__tourney_alliances_with_division_cache: Tuple[Tuple[int, int, int], EntitiesData] = None
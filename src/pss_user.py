@@ -85,7 +85,7 @@ async def get_users_infos_by_name(user_name: str) -> List[EntityInfo]:
 
 async def get_user_infos_from_tournament_data_by_name(user_name: str, users_data: EntitiesData) -> List[EntityInfo]:
     user_name_lower = user_name.lower()
-    result = {user_id: user_info for (user_id, user_info) in users_data.items() if user_name_lower in user_info.get(user.USER_DESCRIPTION_PROPERTY_NAME, '').lower()}
+    result = {user_id: dict(user_info) for (user_id, user_info) in users_data.items() if user_name_lower in user_info.get(user.USER_DESCRIPTION_PROPERTY_NAME, '').lower()}
     user_infos_current = await __get_users_data(user_name)
     if user_infos_current:
         for user_info in user_infos_current.values():
@@ -94,7 +94,7 @@ async def get_user_infos_from_tournament_data_by_name(user_name: str, users_data
                 current_user_info = await __get_user_info_by_id(user_id) or {}
                 current_user_name = current_user_info.get(user.USER_DESCRIPTION_PROPERTY_NAME)
                 if user_id not in result:
-                    result[user_id] = users_data[user_id]
+                    result[user_id] = dict(users_data[user_id])
                 if current_user_name and current_user_name != result[user_id][user.USER_DESCRIPTION_PROPERTY_NAME]:
                     result[user_id]['CurrentName'] = current_user_name
     else:
@@ -344,7 +344,7 @@ def __get_user_name(user_info: EntityInfo, **kwargs) -> Optional[str]:
 
 async def find_tournament_user(ctx: ApplicationContext, player_name: str, tourney_data) -> Tuple[EntityInfo, Interaction]:
     response = await utils.discord.edit_original_response(ctx, ctx.interaction, ['Searching player...'])
-    user_infos = await get_user_infos_from_tournament_data_by_name(player_name, tourney_data.users)
+    user_infos = await get_user_infos_from_tournament_data_by_name(player_name, tourney_data.users_data)
 
     if user_infos:
         if len(user_infos) == 1:
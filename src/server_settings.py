@@ -1,14 +1,16 @@
+import asyncio
 import asyncpg
 from datetime import datetime
 from discord import Embed, Guild, Message, TextChannel
 from discord.ext.commands import Bot, Context
 from enum import IntEnum
-from typing import Any, Callable, Dict, ItemsView, KeysView, List, Optional, Tuple, Union, ValuesView
+from typing import Any, Callable, Dict, ItemsView, KeysView, List, Optional, Set, Tuple, Union, ValuesView
 
 from . import database as db
 from . import pss_assert
 from . import pss_entity as entity
 from . import settings as app_settings
+from . import shards
 from . import utils
 
 
@@ -183,7 +185,7 @@ class AutoDailySettings():
             _COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT: None,
             _COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT: None
         }
-        success = await db_update_server_settings(self.guild_id, settings)
+        success = await update_server_settings(self.guild_id, settings)
         if success:
             self.__channel = None
             self.__channel_id = None
@@ -201,7 +203,7 @@ class AutoDailySettings():
             _COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT: None,
             _COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT: None
         }
-        success = await db_update_server_settings(self.guild_id, settings)
+        success = await update_server_settings(self.guild_id, settings)
         if success:
             self.__channel = None
             self.__channel_id = None
@@ -215,7 +217,7 @@ class AutoDailySettings():
         settings = {
             _COLUMN_NAME_DAILY_CHANGE_MODE: DEFAULT_AUTODAILY_CHANGE_MODE
         }
-        success = await db_update_server_settings(self.guild_id, settings)
+        success = await update_server_settings(self.guild_id, settings)
         if success:
             self.__delete_on_change = None
         return success
@@ -227,7 +229,7 @@ class AutoDailySettings():
             _COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT: None,
             _COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT: None
         }
-        success = await db_update_server_settings(self.guild_id, settings)
+        success = await update_server_settings(self.guild_id, settings)
         if success:
             self.__latest_message_id = None
             self.__latest_message_created_at = None
@@ -241,7 +243,7 @@ class AutoDailySettings():
                 _COLUMN_NAME_DAILY_CHANNEL_ID: channel.id,
                 _COLUMN_NAME_DAILY_LATEST_MESSAGE_ID: None
             }
-            success = await db_update_server_settings(self.guild_id, settings)
+            success = await update_server_settings(self.guild_id, settings)
             if success:
                 self.__channel = channel
                 self.__channel_id = channel.id
@@ -269,7 +271,7 @@ class AutoDailySettings():
             settings[_COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT] = None
 
         if settings:
-            success = await db_update_server_settings(self.guild_id, settings)
+            success = await update_server_settings(self.guild_id, settings)
             if success:
                 self.__latest_message_id = settings[_COLUMN_NAME_DAILY_LATEST_MESSAGE_ID]
                 self.__latest_message_modified_at = settings[_COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT]
@@ -286,13 +288,41 @@ class AutoDailySettings():
         settings = {
             _COLUMN_NAME_DAILY_CHANGE_MODE: new_value
         }
-        success = await db_update_server_settings(self.guild_id, settings)
+        success = await update_server_settings(self.guild_id, settings)
         if success:
             self.__change_mode = new_value
         return success
 
 
     async def update(self, channel: TextChannel = None, can_post: bool = None, latest_message: Message = None, change_mode: AutoDailyChangeMode = None, store_now_as_created_at: bool = False) -> bool:
+        settings = self.get_update_settings(channel=channel, can_post=can_post, latest_message=latest_message, change_mode=change_mode, store_now_as_created_at=store_now_as_created_at)
+        success = await update_server_settings(self.guild_id, settings)
+        if success:
+            self.apply_update_settings(settings, channel=channel)
+        return success
+
+
+    def apply_update_settings(self, settings: Dict[str, object], channel: TextChannel = None) -> None:
+        """
+        Applies settings created by `get_update_settings` after they've been stored in the database.
+        """
+        if _COLUMN_NAME_DAILY_CHANNEL_ID in settings:
+            self.__channel = channel
+            self.__channel_id = settings[_COLUMN_NAME_DAILY_CHANNEL_ID]
+        if _COLUMN_NAME_DAILY_CAN_POST in settings:
+            self.__can_post = settings[_COLUMN_NAME_DAILY_CAN_POST]
+        if _COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT in settings:
+            self.__latest_message_id = settings.get(_COLUMN_NAME_DAILY_LATEST_MESSAGE_ID)
+            self.__latest_message_created_at = settings.get(_COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT)
+            self.__latest_message_modified_at = settings.get(_COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT)
+        if _COLUMN_NAME_DAILY_CHANGE_MODE in settings:
+            self.__change_mode = settings[_COLUMN_NAME_DAILY_CHANGE_MODE]
+
+
+    def get_update_settings(self, channel: TextChannel = None, can_post: bool = None, latest_message: Message = None, change_mode: AutoDailyChangeMode = None, store_now_as_created_at: bool = False) -> Dict[str, object]:
+        """
+        Returns the column values that need to be written to the database in order to apply the specified changes.
+        """
         settings: Dict[str, object] = {}
         update_channel = channel is not None and channel != self.channel
         update_can_post = can_post is not None and can_post != self.can_post
@@ -311,20 +341,7 @@ class AutoDailySettings():
                 settings[_COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT] = latest_message.edited_at or latest_message.created_at
         if update_change_mode:
             settings[_COLUMN_NAME_DAILY_CHANGE_MODE] = change_mode
-        success = await db_update_server_settings(self.guild_id, settings)
-        if success:
-            if update_channel:
-                self.__channel = channel
-                self.__channel_id = channel.id
-            if update_can_post:
-                self.__can_post = settings.get(_COLUMN_NAME_DAILY_CAN_POST)
-            if update_latest_message:
-                self.__latest_message_id = settings.get(_COLUMN_NAME_DAILY_LATEST_MESSAGE_ID)
-                self.__latest_message_created_at = settings.get(_COLUMN_NAME_DAILY_LATEST_MESSAGE_CREATED_AT)
-                self.__latest_message_modified_at = settings.get(_COLUMN_NAME_DAILY_LATEST_MESSAGE_MODIFIED_AT)
-            if update_change_mode:
-                self.__delete_on_change = settings[_COLUMN_NAME_DAILY_CHANGE_MODE]
-        return success
+        return settings
 
 
 
@@ -463,7 +480,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_BOT_NEWS_CHANNEL_ID: None
             }
-            success = await db_update_server_settings(self.__guild_id, settings)
+            success = await update_server_settings(self.__guild_id, settings)
             if success:
                 self.__bot_news_channel_id = None
                 self.__bot_news_channel = None
@@ -477,7 +494,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_PREFIX: None
             }
-            success = await db_update_server_settings(self.__guild_id, settings)
+            success = await update_server_settings(self.__guild_id, settings)
             if success:
                 self.__prefix = None
             return success
@@ -490,7 +507,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_USE_EMBEDS: None
             }
-            success = await db_update_server_settings(self.__guild_id, settings)
+            success = await update_server_settings(self.__guild_id, settings)
             if success:
                 self.__use_embeds = None
             return success
@@ -502,7 +519,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_USE_PAGINATION: None
             }
-            success = await db_update_server_settings(self.__guild_id, settings)
+            success = await update_server_settings(self.__guild_id, settings)
             if success:
                 self.__use_pagination = None
             return success
@@ -516,7 +533,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_BOT_NEWS_CHANNEL_ID: channel.id
             }
-            success = await db_update_server_settings(self.__guild_id, settings)
+            success = await update_server_settings(self.__guild_id, settings)
             if success:
                 self.__bot_news_channel_id = channel.id
                 self.__bot_news_channel = channel
@@ -530,7 +547,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_PREFIX: prefix
             }
-            success = await db_update_server_settings(self.__guild_id, settings)
+            success = await update_server_settings(self.__guild_id, settings)
             if success:
                 self.__prefix = prefix
             return success
@@ -551,7 +568,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_USE_EMBEDS: use_embeds
             }
-            success = await db_update_server_settings(self.id, settings)
+            success = await update_server_settings(self.id, settings)
             if success:
                 self.__use_embeds = use_embeds
             return success
@@ -572,7 +589,7 @@ class GuildSettings(object):
             settings = {
                 _COLUMN_NAME_USE_PAGINATION: use_pagination
             }
-            success = await db_update_server_settings(self.id, settings)
+            success = await update_server_settings(self.id, settings)
             if success:
                 self.__use_pagination = use_pagination
             return success
@@ -612,8 +629,10 @@ class GuildSettingsCollection():
 
     async def delete_guild_settings(self, guild_id: int) -> bool:
         success = await _db_delete_server_settings(guild_id)
-        if success and guild_id in self.__data:
-            self.__data.pop(guild_id)
+        if success:
+            _discard_pending_server_settings(guild_id)
+            if guild_id in self.__data:
+                self.__data.pop(guild_id)
         return success
 
 
@@ -652,17 +671,49 @@ class GuildSettingsCollection():
 
 async def clean_up_invalid_server_settings(bot: Bot) -> None:
     """
-    Removes server settings for all guilds the bot is not part of anymore.
+    Removes server settings for all guilds the bot is not part of anymore. Only considers the guilds of the shards run by this process.
     """
     if GUILD_SETTINGS is None:
         raise Exception(f'The guild settings have not been initialized, yet!')
 
     current_guilds = bot.guilds
-    invalid_guild_ids = [guild_settings.id for guild_settings in GUILD_SETTINGS.values() if guild_settings.guild is None or guild_settings.guild not in current_guilds]
+    invalid_guild_ids = [guild_settings.id for guild_settings in GUILD_SETTINGS.values() if shards.is_local_guild(guild_settings.id) and (guild_settings.guild is None or guild_settings.guild not in current_guilds)]
     for invalid_guild_id in invalid_guild_ids:
         await GUILD_SETTINGS.delete_guild_settings(invalid_guild_id)
 
 
+async def flush_server_settings(guild_id: int = None) -> bool:
+    """
+    Writes the pending settings changes of the specified guild or of all guilds to the database. Changes that couldn't be written are queued again, unless they've been superseded in the meantime.
+
+    Returns True, if all pending changes have been written.
+    """
+    async with __PENDING_SERVER_SETTINGS_LOCK:
+        if guild_id is None:
+            pending = dict(__PENDING_SERVER_SETTINGS)
+            __PENDING_SERVER_SETTINGS.clear()
+        elif guild_id in __PENDING_SERVER_SETTINGS:
+            pending = {guild_id: __PENDING_SERVER_SETTINGS.pop(guild_id)}
+        else:
+            return True
+
+        if not pending:
+            return True
+
+        updated_guild_ids = set()
+        try:
+            updated_guild_ids = await db_update_server_settings_batch(pending)
+        finally:
+            for failed_guild_id, settings in pending.items():
+                if failed_guild_id not in updated_guild_ids:
+                    settings.update(__PENDING_SERVER_SETTINGS.get(failed_guild_id, {}))
+                    __PENDING_SERVER_SETTINGS[failed_guild_id] = settings
+    if len(updated_guild_ids) < len(pending):
+        print(f'[flush_server_settings] Could not write the settings of {len(pending) - len(updated_guild_ids)} of {len(pending)} guilds. They will be written with the next flush.')
+        return False
+    return True
+
+
 async def get_autodaily_settings_legacy(bot: Bot, utc_now: datetime, guild_id: int = None, can_post: bool = None, no_post_yet: bool = False) -> List[AutoDailySettings]:
     if guild_id:
         autodaily_settings = await GUILD_SETTINGS.get(bot, guild_id)
@@ -755,6 +806,34 @@ async def reset_prefix(guild_id: int) -> bool:
     return success
 
 
+async def update_autodaily_settings(updates: List[Tuple[AutoDailySettings, Dict[str, object]]]) -> bool:
+    """
+    Applies the settings created by `AutoDailySettings.get_update_settings` for multiple guilds and writes them to the database at once, together with any other pending changes.
+
+    Returns True, if all pending changes have been written.
+    """
+    for autodaily_settings, settings in updates:
+        if settings:
+            __PENDING_SERVER_SETTINGS.setdefault(autodaily_settings.guild_id, {}).update(settings)
+            autodaily_settings.apply_update_settings(settings)
+    return await flush_server_settings()
+
+
+async def update_server_settings(guild_id: int, settings: Dict[str, Any]) -> bool:
+    """
+    Queues changed settings of a guild to be written to the database with the next flush. Multiple changes of the same guild are merged, later values win. The in-memory guild settings are authoritative, so callers apply the changes right away.
+
+    Writes the changes immediately, if write-behind has been disabled.
+    """
+    if not settings:
+        return True
+    if app_settings.SERVER_SETTINGS_FLUSH_INTERVAL <= 0:
+        return await db_update_server_settings(guild_id, settings)
+
+    __PENDING_SERVER_SETTINGS.setdefault(guild_id, {}).update(settings)
+    return True
+
+
 async def __fix_prefixes() -> bool:
     all_prefixes = await db_get_server_settings(guild_id=None, setting_names=[_COLUMN_NAME_GUILD_ID, _COLUMN_NAME_PREFIX])
     all_success = True
@@ -803,6 +882,10 @@ async def __set_prefix(guild_id: int, prefix: str) -> bool:
 # ---------- Helper functions ----------
 
 
+def _discard_pending_server_settings(guild_id: int) -> None:
+    __PENDING_SERVER_SETTINGS.pop(guild_id, None)
+
+
 def _convert_from_on_off(switch: str) -> bool:
     if switch is None:
         return None
@@ -886,6 +969,7 @@ async def db_get_daily_channel_id(guild_id: int) -> int:
 
 
 async def db_get_server_settings(guild_id: int = None, setting_names: list = None, additional_wheres: list = None) -> List[asyncpg.Record]:
+    await flush_server_settings(guild_id)
     additional_wheres = additional_wheres or []
     wheres = []
     if guild_id is not None:
@@ -941,6 +1025,27 @@ async def db_update_server_settings(guild_id: int, settings: Dict[str, Any]) ->
         return True
 
 
+async def db_update_server_settings_batch(settings_by_guild_id: Dict[int, Dict[str, Any]]) -> Set[int]:
+    """
+    Updates the settings of multiple guilds. Guilds with the same set of changed columns are updated with a single prepared statement.
+
+    Returns the ids of the guilds, whose settings have been updated.
+    """
+    updates_by_columns: Dict[Tuple[str, ...], List[List[Any]]] = {}
+    for guild_id, settings in settings_by_guild_id.items():
+        if settings:
+            column_names = tuple(settings.keys())
+            updates_by_columns.setdefault(column_names, []).append([guild_id, *settings.values()])
+
+    result = set()
+    for column_names, args_list in updates_by_columns.items():
+        set_string = ', '.join(f'{column_name} = ${i:d}' for i, column_name in enumerate(column_names, start=2))
+        query = f'UPDATE serversettings SET {set_string} WHERE {_COLUMN_NAME_GUILD_ID} = $1'
+        if await db.try_executemany(query, args_list):
+            result.update(args[0] for args in args_list)
+    return result
+
+
 async def _db_create_server_settings(guild_id: int) -> bool:
     if await _db_get_has_settings(guild_id):
         return True
@@ -1019,6 +1124,10 @@ DEFAULT_AUTODAILY_CHANGE_MODE: AutoDailyChangeMode = AutoDailyChangeMode.EDIT
 
 GUILD_SETTINGS: GuildSettingsCollection = GuildSettingsCollection()
 
+__FLUSH_SERVER_SETTINGS_TASK: asyncio.Task = None
+__PENDING_SERVER_SETTINGS: Dict[int, Dict[str, Any]] = {}
+__PENDING_SERVER_SETTINGS_LOCK: asyncio.Lock = asyncio.Lock()
+
 
 
 
@@ -1026,4 +1135,28 @@ GUILD_SETTINGS: GuildSettingsCollection = GuildSettingsCollection()
 async def init(bot: Bot) -> None:
     await __fix_prefixes()
     await GUILD_SETTINGS.init(bot)
-    utils.dbg_prnt(f'Loaded {len(GUILD_SETTINGS.keys())} guild settings with {len(GUILD_SETTINGS.autodaily_settings)} autodaily settings.')
\ No newline at end of file
+    utils.dbg_prnt(f'Loaded {len(GUILD_SETTINGS.keys())} guild settings with {len(GUILD_SETTINGS.autodaily_settings)} autodaily settings.')
+
+    global __FLUSH_SERVER_SETTINGS_TASK
+    if app_settings.SERVER_SETTINGS_FLUSH_INTERVAL > 0 and __FLUSH_SERVER_SETTINGS_TASK is None:
+        __FLUSH_SERVER_SETTINGS_TASK = asyncio.get_running_loop().create_task(__flush_server_settings_periodically())
+
+
+async def close() -> None:
+    """
+    Stops flushing periodically and writes all pending settings changes.
+    """
+    global __FLUSH_SERVER_SETTINGS_TASK
+    if __FLUSH_SERVER_SETTINGS_TASK is not None:
+        __FLUSH_SERVER_SETTINGS_TASK.cancel()
+        __FLUSH_SERVER_SETTINGS_TASK = None
+    await flush_server_settings()
+
+
+async def __flush_server_settings_periodically() -> None:
+    while True:
+        await asyncio.sleep(app_settings.SERVER_SETTINGS_FLUSH_INTERVAL)
+        try:
+            await flush_server_settings()
+        except Exception as err:
+            print(f'[flush_server_settings] Could not flush guild settings: {err.__class__.__name__}: {err}')
\ No newline at end of file
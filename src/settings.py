@@ -8,11 +8,22 @@ from typing import List
 
 ACCESS_TOKEN: str = os.environ.get('PSS_ACCESS_TOKEN')
 
+AUTODAILY_POST_CONCURRENCY: int = int(os.environ.get('AUTODAILY_POST_CONCURRENCY', 10))
 
-BASE_API_URL: str = 'https://api.pixelstarships.com/'
+
+BASE_API_URL: str = os.environ.get('PSS_BASE_API_URL', 'https://api.pixelstarships.com/')
 BASE_INVITE_URL: str = 'https://discordapp.com/oauth2/authorize?scope=applications.commands%20bot&permissions=388160&client_id='
 
 
+BROADCAST_CONCURRENCY: int = int(os.environ.get('BROADCAST_CONCURRENCY', 10))
+BROADCAST_JOBS_SUB_PATH: str = os.environ.get('BROADCAST_JOBS_SUB_PATH', 'broadcast_jobs')
+BROADCAST_MAX_ATTEMPTS: int = int(os.environ.get('BROADCAST_MAX_ATTEMPTS', 5))
+BROADCAST_REQUESTS_PER_SECOND: float = float(os.environ.get('BROADCAST_REQUESTS_PER_SECOND', 25.0))
+
+
+CACHE_SNAPSHOT_SUB_PATH: str = os.environ.get('CACHE_SNAPSHOT_SUB_PATH', 'cache_snapshots')
+
+
 DATABASE_SSL_MODE: str = os.environ.get('DATABASE_SSL_MODE', 'require')
 DATABASE_URL: str = f'{os.environ.get("DATABASE_URL")}?sslmode={DATABASE_SSL_MODE}'
 
@@ -30,6 +41,7 @@ EXCEL_COLUMN_FORMAT_TEXT: str = '@'
 
 
 FEATURE_AUTODAILY_ENABLED: int = int(os.environ.get('FEATURE_AUTODAILY_ENABLED', 0))
+FEATURE_CACHE_SNAPSHOTS_ENABLED: int = int(os.environ.get('FEATURE_CACHE_SNAPSHOTS_ENABLED', 1))
 FEATURE_TOURNEYDATA_ENABLED: int = int(os.environ.get('FEATURE_TOURNEYDATA_ENABLED', 0))
 
 FLEETS_COMMAND_USERS_RAW: str = os.environ.get('FLEETS_COMMAND_USERS', '[]')
@@ -47,6 +59,15 @@ GDRIVE_SETTINGS_FILE: str = 'settings.yaml'
 GDRIVE_SCOPES: List[str] = ['https://www.googleapis.com/auth/drive']
 
 
+HTTP_CONNECTION_LIMIT: int = int(os.environ.get('HTTP_CONNECTION_LIMIT', 100))
+HTTP_CONNECTION_LIMIT_PER_HOST: int = int(os.environ.get('HTTP_CONNECTION_LIMIT_PER_HOST', 20))
+HTTP_DNS_CACHE_TTL: int = int(os.environ.get('HTTP_DNS_CACHE_TTL', 300))
+HTTP_KEEPALIVE_TIMEOUT: float = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', 60.0))
+HTTP_TIMEOUT_CONNECT: float = float(os.environ.get('HTTP_TIMEOUT_CONNECT', 10.0))
+HTTP_TIMEOUT_SOCK_READ: float = float(os.environ.get('HTTP_TIMEOUT_SOCK_READ', 30.0))
+HTTP_TIMEOUT_TOTAL: float = float(os.environ.get('HTTP_TIMEOUT_TOTAL', 60.0))
+
+
 IGNORE_SERVER_IDS_FOR_COUNTING: List[int] = [
     110373943822540800,
     264445053596991498,
@@ -60,6 +81,8 @@ INTENT_MESSAGE_CONTENT: bool = int(os.environ.get('INTENT_MESSAGE_CONTENT', '0')
 LATEST_SETTINGS_BASE_PATH: str = 'SettingService/GetLatestVersion3?deviceType=DeviceTypeAndroid&languageKey='
 
 
+METRICS_HOST: str = os.environ.get('METRICS_HOST', '127.0.0.1')
+METRICS_PORT: int = int(os.environ.get('METRICS_PORT', 0))
 MIN_ENTITY_NAME_LENGTH: int = 3
 MOST_RECENT_TOURNAMENT_DATA: bool = bool(int(os.environ.get('MOST_RECENT_TOURNAMENT_DATA', 0)))
 
@@ -83,15 +106,29 @@ PSS_RESOURCES_FILES: List[str] = ['src/pss_data/resources.json', 'pss_data/resou
 RAW_COMMAND_USERS_RAW: str = os.environ.get('RAW_COMMAND_USERS', '[]')
 RAW_COMMAND_USERS: List[str] = json.loads(str(RAW_COMMAND_USERS_RAW))
 
+RENDER_CACHE_MAX_SIZE: int = int(os.environ.get('RENDER_CACHE_MAX_SIZE', 1000))
+
+
+SERVER_SETTINGS_FLUSH_INTERVAL: float = float(os.environ.get('SERVER_SETTINGS_FLUSH_INTERVAL', 5.0))
 
 SETTINGS_TABLE_NAME: str = 'settings'
 SETTINGS_TYPES: List[str] = ['boolean', 'float', 'int', 'text', 'timestamputc']
 
+SHARD_COUNT: int = int(os.environ.get('SHARD_COUNT', 0))
+SHARD_IDS: List[int] = json.loads(str(os.environ.get('SHARD_IDS', '[]')))
+SHARD_PROCESS_COUNT: int = int(os.environ.get('SHARD_PROCESS_COUNT', 1))
+SHARD_REPORT_INTERVAL: float = float(os.environ.get('SHARD_REPORT_INTERVAL', 300.0))
+
+SHIP_LAYOUT_CACHE_MAX_BYTES: int = int(os.environ.get('SHIP_LAYOUT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
 SPRITE_CACHE_SUB_PATH: str = 'sprite_cache'
+SPRITE_DECODED_CACHE_MAX_BYTES: int = int(os.environ.get('SPRITE_DECODED_CACHE_MAX_BYTES', 64 * 1024 * 1024))
 
 
 THROW_COMMAND_ERRORS: int = int(os.environ.get('THROW_COMMAND_ERRORS', '0'))
 
+TOURNAMENT_DATA_CACHE_MAX_BYTES: int = int(os.environ.get('TOURNAMENT_DATA_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+TOURNAMENT_DATA_CACHE_SUB_PATH: str = os.environ.get('TOURNAMENT_DATA_CACHE_SUB_PATH', 'tournament_data_cache')
 TOURNAMENT_DATA_START_DATE: datetime = datetime(year=2019, month=10, day=9, hour=12)
 
 
@@ -0,0 +1,312 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from . import settings
+
+
+# ---------- Constants ----------
+
+DISCORD_GATEWAY_BOT_URL: str = 'https://discord.com/api/v10/gateway/bot'
+
+RESTART_BACKOFF_BASE: float = 5.0
+RESTART_BACKOFF_MAX: float = 300.0
+RESTART_RESET_AFTER: float = 600.0
+
+STOP_TIMEOUT: float = 30.0
+
+__LOCAL_SHARD_IDS: frozenset = None
+__STOPPING: bool = False
+
+
+
+
+
+# ---------- Classes ----------
+
+class ShardProcess():
+    """
+    A bot process running a range of shards. Reports its resource usage from /proc, where available.
+    """
+    def __init__(self, index: int, shard_ids: List[int], shard_count: int) -> None:
+        self.__index: int = index
+        self.__shard_ids: List[int] = list(shard_ids)
+        self.__shard_count: int = shard_count
+        self.__process: subprocess.Popen = None
+        self.__started_at: float = None
+        self.__failure_count: int = 0
+        self.__restart_at: float = None
+        self.__cpu_time: float = None
+        self.__cpu_time_sampled_at: float = None
+
+
+    @property
+    def description(self) -> str:
+        if len(self.__shard_ids) == 1:
+            shards = f'shard {self.__shard_ids[0]}'
+        else:
+            shards = f'shards {self.__shard_ids[0]}-{self.__shard_ids[-1]}'
+        return f'process {self.__index} ({shards} of {self.__shard_count})'
+
+    @property
+    def index(self) -> int:
+        return self.__index
+
+    @property
+    def is_running(self) -> bool:
+        return self.__process is not None and self.__process.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        if self.__process is None:
+            return None
+        return self.__process.pid
+
+    @property
+    def restart_at(self) -> Optional[float]:
+        return self.__restart_at
+
+    @property
+    def shard_ids(self) -> List[int]:
+        return list(self.__shard_ids)
+
+
+    def get_env(self) -> Dict[str, str]:
+        result = dict(os.environ)
+        result['SHARD_COUNT'] = str(self.__shard_count)
+        result['SHARD_IDS'] = json.dumps(self.__shard_ids)
+        result['SHARD_PROCESS_COUNT'] = '1'
+        if settings.METRICS_PORT:
+            result['METRICS_PORT'] = str(settings.METRICS_PORT + self.__index)
+        return result
+
+
+    def get_resource_usage(self) -> Optional[Tuple[float, int]]:
+        """
+        Returns the CPU usage in percent of one core since the previous call and the resident memory in bytes. Returns None, if the usage can't be determined.
+        """
+        if not self.is_running:
+            return None
+        try:
+            cpu_time = _read_cpu_time(self.__process.pid)
+            rss = _read_rss(self.__process.pid)
+        except (OSError, ValueError, IndexError):
+            return None
+
+        now = time.monotonic()
+        if self.__cpu_time is None:
+            cpu_percent = cpu_time / max(now - self.__started_at, 0.001) * 100
+        else:
+            cpu_percent = (cpu_time - self.__cpu_time) / max(now - self.__cpu_time_sampled_at, 0.001) * 100
+        self.__cpu_time = cpu_time
+        self.__cpu_time_sampled_at = now
+        return cpu_percent, rss
+
+
+    def on_exited(self) -> None:
+        """
+        Schedules a restart. Processes exiting repeatedly shortly after having been started get restarted after an increasing delay.
+        """
+        if time.monotonic() - self.__started_at > RESTART_RESET_AFTER:
+            self.__failure_count = 0
+        self.__failure_count += 1
+        backoff = min(RESTART_BACKOFF_BASE * 2 ** min(self.__failure_count - 1, 10), RESTART_BACKOFF_MAX)
+        self.__restart_at = time.monotonic() + backoff
+
+
+    def start(self) -> None:
+        self.__process = subprocess.Popen([sys.executable] + sys.argv, env=self.get_env())
+        self.__started_at = time.monotonic()
+        self.__restart_at = None
+        self.__cpu_time = None
+        self.__cpu_time_sampled_at = None
+        print(f'[ShardProcess.start] Started {self.description} with pid {self.__process.pid}.')
+
+
+    def stop(self) -> None:
+        if self.is_running:
+            self.__process.terminate()
+
+
+    def wait(self, timeout: float) -> None:
+        if self.__process is None:
+            return
+        try:
+            self.__process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            print(f'[ShardProcess.wait] {self.description} did not stop within {timeout} seconds, killing it.')
+            self.__process.kill()
+            self.__process.wait()
+
+
+
+
+
+# ---------- Functions ----------
+
+def get_local_shard_ids() -> List[int]:
+    """
+    Returns the ids of the shards run by this process or an empty list, if the number of shards is determined by Discord.
+    """
+    if settings.SHARD_IDS:
+        return list(settings.SHARD_IDS)
+    return list(range(settings.SHARD_COUNT))
+
+
+def get_resource_report(shard_processes: List[ShardProcess]) -> List[str]:
+    """
+    Returns a line per process with its CPU and memory usage.
+    """
+    result = []
+    for shard_process in shard_processes:
+        resource_usage = shard_process.get_resource_usage()
+        if not shard_process.is_running:
+            result.append(f'{shard_process.description}: not running')
+        elif resource_usage is None:
+            result.append(f'{shard_process.description}: pid {shard_process.pid}, resource usage not available')
+        else:
+            cpu_percent, rss = resource_usage
+            result.append(f'{shard_process.description}: pid {shard_process.pid}, cpu {cpu_percent:.1f}%, rss {rss / 1024 / 1024:.1f} MiB')
+    return result
+
+
+def get_shard_id(guild_id: int, shard_count: int) -> int:
+    return (guild_id >> 22) % shard_count
+
+
+def get_shard_ranges(shard_count: int, process_count: int) -> List[List[int]]:
+    """
+    Splits the shards into contiguous ranges of nearly equal size.
+    """
+    process_count = max(1, min(process_count, shard_count))
+    result = []
+    start = 0
+    for index in range(process_count):
+        size = shard_count // process_count + (1 if index < shard_count % process_count else 0)
+        result.append(list(range(start, start + size)))
+        start += size
+    return result
+
+
+def is_coordinator() -> bool:
+    """
+    Returns True, if this process is supposed to start the bot processes instead of running the bot itself.
+    """
+    return settings.SHARD_PROCESS_COUNT > 1 and not settings.SHARD_IDS
+
+
+def is_local_guild(guild_id: int) -> bool:
+    """
+    Returns True, if the guild belongs to one of the shards run by this process.
+    """
+    if not is_sharded_across_processes():
+        return True
+    return get_shard_id(guild_id, settings.SHARD_COUNT) in __get_local_shard_ids()
+
+
+def is_primary_process() -> bool:
+    """
+    Returns True, if this process runs the first shard. The primary process takes care of tasks, which must only be run once across all processes.
+    """
+    return not is_sharded_across_processes() or 0 in __get_local_shard_ids()
+
+
+def is_sharded_across_processes() -> bool:
+    return bool(settings.SHARD_COUNT) and len(__get_local_shard_ids()) < settings.SHARD_COUNT
+
+
+def run_coordinator() -> None:
+    """
+    Starts settings.SHARD_PROCESS_COUNT bot processes, each running a contiguous range of shards, and restarts them, if they exit. Regularly reports CPU and memory usage per process. Stops all processes when being terminated.
+    """
+    shard_count = settings.SHARD_COUNT or max(__get_recommended_shard_count(), settings.SHARD_PROCESS_COUNT)
+    shard_processes = [ShardProcess(index, shard_ids, shard_count) for index, shard_ids in enumerate(get_shard_ranges(shard_count, settings.SHARD_PROCESS_COUNT))]
+    print(f'[run_coordinator] Running {shard_count} shards in {len(shard_processes)} processes.')
+
+    signal.signal(signal.SIGTERM, __on_stop_signal)
+    signal.signal(signal.SIGINT, __on_stop_signal)
+
+    for shard_process in shard_processes:
+        shard_process.start()
+
+    reported_at = time.monotonic()
+    while not __STOPPING:
+        time.sleep(1.0)
+        now = time.monotonic()
+        for shard_process in shard_processes:
+            if shard_process.is_running or __STOPPING:
+                continue
+            if shard_process.restart_at is None:
+                shard_process.on_exited()
+                print(f'[run_coordinator] {shard_process.description} exited, restarting it in {shard_process.restart_at - now:.0f} seconds.')
+            elif now >= shard_process.restart_at:
+                shard_process.start()
+
+        if settings.SHARD_REPORT_INTERVAL > 0 and now - reported_at >= settings.SHARD_REPORT_INTERVAL:
+            reported_at = now
+            for line in get_resource_report(shard_processes):
+                print(f'[run_coordinator] {line}')
+
+    print('[run_coordinator] Stopping all processes.')
+    for shard_process in shard_processes:
+        shard_process.stop()
+    for shard_process in shard_processes:
+        shard_process.wait(STOP_TIMEOUT)
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _read_cpu_time(pid: int) -> float:
+    """
+    Returns the user and system CPU time in seconds spent by the process.
+    """
+    with open(f'/proc/{pid}/stat', 'r') as fp:
+        stat = fp.read()
+    # The process name may contain spaces, so the fields get counted from the end of the name.
+    fields = stat[stat.rindex(')') + 2:].split()
+    utime, stime = int(fields[11]), int(fields[12])
+    return (utime + stime) / os.sysconf('SC_CLK_TCK')
+
+
+def _read_rss(pid: int) -> int:
+    """
+    Returns the resident memory in bytes used by the process.
+    """
+    with open(f'/proc/{pid}/status', 'r') as fp:
+        for line in fp:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    raise ValueError(f'Could not find the resident memory of process {pid}.')
+
+
+def __get_local_shard_ids() -> frozenset:
+    global __LOCAL_SHARD_IDS
+    if __LOCAL_SHARD_IDS is None:
+        __LOCAL_SHARD_IDS = frozenset(get_local_shard_ids())
+    return __LOCAL_SHARD_IDS
+
+
+def __get_recommended_shard_count() -> int:
+    """
+    Asks Discord for the recommended number of shards.
+    """
+    request = urllib.request.Request(DISCORD_GATEWAY_BOT_URL, headers={
+        'Authorization': f'Bot {os.environ.get("DISCORD_BOT_TOKEN")}',
+        'User-Agent': f'DiscordBot (YaDc, {settings.VERSION})',
+    })
+    with urllib.request.urlopen(request, timeout=30) as response:
+        gateway_info = json.loads(response.read().decode('utf-8'))
+    return int(gateway_info['shards'])
+
+
+def __on_stop_signal(signal_number: int, frame) -> None:
+    global __STOPPING
+    __STOPPING = True
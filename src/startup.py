@@ -0,0 +1,158 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+# ---------- Classes ----------
+
+class StartupStep():
+    """
+    An initialization function and the names of the steps that need to be finished before it can run.
+    """
+    def __init__(self, name: str, function: Callable[[], Awaitable[Any]], depends_on: List[str] = None) -> None:
+        self.__name: str = name
+        self.__function: Callable[[], Awaitable[Any]] = function
+        self.__depends_on: List[str] = list(depends_on or [])
+        self.__started_at: float = None
+        self.__finished_at: float = None
+
+
+    @property
+    def depends_on(self) -> List[str]:
+        return list(self.__depends_on)
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        Time in seconds the step took to run, excluding the time spent waiting for its dependencies.
+        """
+        if self.__started_at is None or self.__finished_at is None:
+            return None
+        return self.__finished_at - self.__started_at
+
+    @property
+    def finished_at(self) -> Optional[float]:
+        """
+        Seconds since the startup began, when the step finished.
+        """
+        return self.__finished_at
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def started_at(self) -> Optional[float]:
+        """
+        Seconds since the startup began, when the step started.
+        """
+        return self.__started_at
+
+
+    async def run(self, startup_began_at: float) -> None:
+        self.__started_at = time.perf_counter() - startup_began_at
+        await self.__function()
+        self.__finished_at = time.perf_counter() - startup_began_at
+
+
+
+
+
+# ---------- Functions ----------
+
+async def run(steps: List[StartupStep]) -> None:
+    """
+    Runs the steps as soon as all of their dependencies have finished, so independent steps run concurrently. If a step fails, the steps still running get cancelled and the error gets raised.
+    """
+    steps_by_name = __get_steps_by_name(steps)
+    startup_began_at = time.perf_counter()
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run_step(step: StartupStep) -> None:
+        if step.depends_on:
+            await asyncio.gather(*[tasks[name] for name in step.depends_on])
+        await step.run(startup_began_at)
+
+    for step in __sort_topologically(steps_by_name):
+        tasks[step.name] = asyncio.get_running_loop().create_task(run_step(step))
+
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+
+def get_critical_path(steps: List[StartupStep]) -> List[StartupStep]:
+    """
+    Returns the chain of dependencies, which finished last, beginning with the first step of that chain.
+    """
+    steps_by_name = __get_steps_by_name(steps)
+    finished_steps = [step for step in steps if step.finished_at is not None]
+    if not finished_steps:
+        return []
+
+    result = [max(finished_steps, key=lambda step: step.finished_at)]
+    while result[-1].depends_on:
+        result.append(max((steps_by_name[name] for name in result[-1].depends_on), key=lambda step: step.finished_at or 0.0))
+    return list(reversed(result))
+
+
+def get_report(steps: List[StartupStep]) -> List[str]:
+    """
+    Returns a line per step with its start time and duration and a summary of the critical path.
+    """
+    result = []
+    for step in sorted(steps, key=lambda step: (step.started_at is None, step.started_at or 0.0)):
+        if step.duration is None:
+            result.append(f'{step.name}: did not finish')
+        else:
+            result.append(f'{step.name}: started after {step.started_at:.3f}s, took {step.duration:.3f}s')
+
+    critical_path = get_critical_path(steps)
+    if critical_path:
+        critical_path_names = ' -> '.join(step.name for step in critical_path)
+        result.append(f'Critical path ({critical_path[-1].finished_at:.3f}s): {critical_path_names}')
+    return result
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def __get_steps_by_name(steps: List[StartupStep]) -> Dict[str, StartupStep]:
+    result = {}
+    for step in steps:
+        if step.name in result:
+            raise ValueError(f'There are multiple startup steps named \'{step.name}\'.')
+        result[step.name] = step
+    for step in steps:
+        unknown_names = [name for name in step.depends_on if name not in result]
+        if unknown_names:
+            raise ValueError(f'The startup step \'{step.name}\' depends on unknown steps: {", ".join(unknown_names)}')
+    return result
+
+
+def __sort_topologically(steps_by_name: Dict[str, StartupStep]) -> List[StartupStep]:
+    result = []
+    visited = set()
+    visiting = set()
+
+    def visit(step: StartupStep) -> None:
+        if step.name in visited:
+            return
+        if step.name in visiting:
+            raise ValueError(f'The startup step \'{step.name}\' depends on itself.')
+        visiting.add(step.name)
+        for name in step.depends_on:
+            visit(steps_by_name[name])
+        visiting.remove(step.name)
+        visited.add(step.name)
+        result.append(step)
+
+    for step in steps_by_name.values():
+        visit(step)
+    return result
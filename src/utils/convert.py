@@ -1,4 +1,4 @@
-from typing import Any as _Any, Dict, List, Union
+from typing import Any as _Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import quote as _quote
 from xml.etree import ElementTree as _ElementTree
 
@@ -13,6 +13,16 @@ from ..typehints import EntitiesData
 # ---------- Typehint definitions ----------
 
 _EntityDict = Union[List['_EntityDict'], Dict[str, '_EntityDict']]
+_XmlChild = Tuple[str, Optional[List[str]], Optional[str], _EntityDict]
+_XmlFrame = Tuple[str, Dict[str, str], List[_XmlChild]]
+
+
+
+
+
+# ---------- Constants ----------
+
+ITERPARSE_CHUNK_SIZE: int = 64 * 1024
 
 
 
@@ -36,6 +46,29 @@ def iap_options_mask(iap_options_mask: int) -> str:
         return ''
 
 
+def iterparse_xml_to_dict(raw_xml: str, include_root: bool = True) -> _EntityDict:
+    """
+    Streaming variant of `raw_xml_to_dict` with `fix_attributes=True` and `preserve_lists=False`. Produces the same result, but feeds the xml to a pull parser in chunks and discards every element as soon as it has been converted, so that the complete element tree never has to be held in memory.
+    """
+    parser = _ElementTree.XMLPullParser(events=('start', 'end'))
+    stack: List[_XmlFrame] = []
+    roots: List[_EntityDict] = []
+    for i in range(0, len(raw_xml), ITERPARSE_CHUNK_SIZE):
+        parser.feed(raw_xml[i:i + ITERPARSE_CHUNK_SIZE])
+        __process_pull_parser_events(parser, stack, roots, include_root)
+    parser.close()
+    __process_pull_parser_events(parser, stack, roots, include_root)
+    return roots[0]
+
+
+def iterparse_xmltree_to_dict3(raw_text: str) -> EntitiesData:
+    """
+    Streaming variant of `xmltree_to_dict3`.
+    """
+    result = iterparse_xml_to_dict(raw_text)
+    return __get_dict_at_depth(result, 3)
+
+
 def pss_timestamp_to_excel(pss_timestamp: str) -> str:
     if pss_timestamp:
         dt = _parse.pss_datetime(pss_timestamp)
@@ -182,6 +215,54 @@ def __fix_attribute(attribute: Dict[str, str]) -> Dict[str, str]:
     return result
 
 
+def __convert_xml_frame_to_dict(tag: str, attrib: Dict[str, str], children: List[_XmlChild], include_root: bool) -> _EntityDict:
+    result = {}
+    if attrib:
+        if include_root:
+            result[tag] = __fix_attribute_iterparse(attrib)
+        else:
+            result = __fix_attribute_iterparse(attrib)
+    elif include_root:
+        result[tag] = {}
+
+    tag_count_map = {}
+    for child_tag, _, _, _ in children:
+        tag_count_map[child_tag] = tag_count_map.get(child_tag, 0) + 1
+    children_dict = {}
+
+    for child_tag, id_attr_values, missing_id_attr_name, child_dict in children:
+        key = None
+        if tag_count_map[child_tag] > 1 and (id_attr_values or missing_id_attr_name):
+            if missing_id_attr_name:
+                raise KeyError(missing_id_attr_name)
+            key = '.'.join(sorted(id_attr_values))
+        if not key:
+            key = child_tag
+
+        if key not in children_dict:
+            children_dict[key] = child_dict
+
+    if children_dict:
+        if include_root:
+            result[tag] = children_dict
+        else:
+            result.update(children_dict)
+
+    return result
+
+
+def __fix_attribute_iterparse(attribute: Dict[str, str]) -> Dict[str, str]:
+    result = {}
+
+    for key, value in attribute.items():
+        if key.endswith('Xml') and value:
+            result[key[:-3]] = iterparse_xml_to_dict(value)
+
+        result[key] = value
+
+    return result
+
+
 def __get_child_tag_count(root: _ElementTree.Element) -> Dict[str, int]:
     if root is None:
         return None
@@ -194,8 +275,7 @@ def __get_child_tag_count(root: _ElementTree.Element) -> Dict[str, int]:
     return result
 
 
-def __xmltree_to_dict(raw_text: str, depth: int) -> EntitiesData:
-    result = raw_xml_to_dict(raw_text)
+def __get_dict_at_depth(result: _EntityDict, depth: int) -> EntitiesData:
     while depth > 0:
         found_new_root = False
         for value in result.values():
@@ -206,4 +286,39 @@ def __xmltree_to_dict(raw_text: str, depth: int) -> EntitiesData:
                 break
         if not found_new_root:
             return {}
-    return result
\ No newline at end of file
+    return result
+
+
+def __get_id_attr_values(tag: str, attrib: Dict[str, str]) -> Tuple[Optional[List[str]], Optional[str]]:
+    """
+    Returns the values of the id attributes of an element and the name of the first missing id attribute, if any.
+    """
+    id_attr_names = _pss_data.ID_NAMES_INFO.get(tag)
+    if not id_attr_names:
+        return None, None
+    id_attr_values = []
+    for id_attr_name in id_attr_names:
+        if id_attr_name not in attrib:
+            return None, id_attr_name
+        id_attr_values.append(attrib[id_attr_name])
+    return id_attr_values, None
+
+
+def __process_pull_parser_events(parser: _ElementTree.XMLPullParser, stack: List[_XmlFrame], roots: List[_EntityDict], include_root: bool) -> None:
+    for event, element in parser.read_events():
+        if event == 'start':
+            stack.append((element.tag, dict(element.attrib), []))
+        else:
+            tag, attrib, children = stack.pop()
+            if stack:
+                element_dict = __convert_xml_frame_to_dict(tag, attrib, children, False)
+                id_attr_values, missing_id_attr_name = __get_id_attr_values(tag, attrib)
+                stack[-1][2].append((tag, id_attr_values, missing_id_attr_name, element_dict))
+            else:
+                roots.append(__convert_xml_frame_to_dict(tag, attrib, children, include_root))
+            element.clear()
+
+
+def __xmltree_to_dict(raw_text: str, depth: int) -> EntitiesData:
+    result = raw_xml_to_dict(raw_text)
+    return __get_dict_at_depth(result, depth)
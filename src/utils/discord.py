@@ -30,6 +30,7 @@ from discord.ext.commands import Bot as _Bot
 from discord.ext.commands import Context as _Context
 from discord.ui import View as _View
 
+from .. import metrics as _metrics
 from . import miscellaneous as _utils
 
 
@@ -202,6 +203,7 @@ async def post_output(ctx: _Context, output: _Union[_List[_Embed], _List[str]],
         await post_output_to_channel(ctx.channel, output, output_is_embeds=output_is_embeds, maximum_characters=maximum_characters)
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='post_output_to_channel')
 async def post_output_to_channel(channel: _Union[_TextChannel, _Member, _User], output: _Union[_List[_Embed], _List[str]], output_is_embeds: bool = False, maximum_characters: int = MAXIMUM_CHARACTERS) -> None:
     if output and channel:
         output = __prepare_output(output)
@@ -218,6 +220,7 @@ async def post_output_to_channel(channel: _Union[_TextChannel, _Member, _User],
                     await channel.send(post)
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='post_output_with_files')
 async def post_output_with_files(ctx: _Context, output: _Union[_List[_Embed], _List[str]], file_paths: _List[str], output_is_embeds: bool = False, maximum_characters: int = MAXIMUM_CHARACTERS) -> None:
     if output or file_paths:
         if output:
@@ -250,6 +253,7 @@ def __prepare_output(output: _Union[_List[str], _List[_Embed]]) -> _Union[_List[
     return output
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='reply_with_output')
 async def reply_with_output(ctx: _Context, output: _Union[_List[_Embed], _List[str]], maximum_characters: int = MAXIMUM_CHARACTERS, mention_author: bool = False) -> _Message:
     """
     Returns the last message created or None, of output has not been specified.
@@ -295,6 +299,7 @@ async def original_message_exists(ctx: _Context) -> bool:
 
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='respond_with_output')
 async def respond_with_output(ctx: _ApplicationContext, output: _Union[_List[_Embed], _List[str]], maximum_characters: int = MAXIMUM_CHARACTERS, ephemeral: bool = False, view: _View = _MISSING) -> _Union[_Interaction, _WebhookMessage]:
     """
     Returns the last message created or None, if output has not been specified.
@@ -324,6 +329,7 @@ async def respond_with_output(ctx: _ApplicationContext, output: _Union[_List[_Em
     return result
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='reply_with_output_and_files')
 async def reply_with_output_and_files(ctx: _Context, output: _Union[_List[_Embed], _List[str]], file_paths: _List[str], output_is_embeds: bool = False, maximum_characters: int = MAXIMUM_CHARACTERS, mention_author: bool = False) -> None:
     """
     Returns the last message created or None, if neither output nor files have been specified.
@@ -368,6 +374,7 @@ async def reply_with_output_and_files(ctx: _Context, output: _Union[_List[_Embed
     return result
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='respond_with_output_and_files')
 async def respond_with_output_and_files(ctx: _ApplicationContext, output: _Union[_List[_Embed], _List[str]], file_paths: _List[str], maximum_characters: int = MAXIMUM_CHARACTERS, ephemeral: bool = False) -> _Union[_Interaction, _WebhookMessage]:
     """
     Returns the last message created or None, if output has not been specified.
@@ -398,6 +405,7 @@ async def respond_with_output_and_files(ctx: _ApplicationContext, output: _Union
     return result
 
 
+@_metrics.timed(_metrics.DISCORD_SEND_DURATION, function='edit_original_response')
 async def edit_original_response(
     ctx: _ApplicationContext,
     interaction: _Union[_Interaction, _WebhookMessage],
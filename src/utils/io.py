@@ -1,10 +1,70 @@
+from contextlib import contextmanager as _contextmanager
 from json import load as _json_load
+from typing import Iterator as _Iterator, Optional as _Optional, TextIO as _TextIO
+
+try:
+    import fcntl as _fcntl
+except ImportError:
+    _fcntl = None
 
 
 # ---------- Functions ----------
 
+def acquire_file_lock(file_path: str) -> _TextIO:
+    """
+    Acquires an exclusive lock on a lock file next to the specified file, so that multiple processes sharing that file don't write it at the same time. Blocks until the lock can be acquired. Doesn't lock on platforms without `fcntl`.
+
+    Returns the lock file, which needs to be passed to `release_file_lock`.
+    """
+    result = open(f'{file_path}.lock', 'a')
+    if _fcntl is not None:
+        try:
+            _fcntl.flock(result.fileno(), _fcntl.LOCK_EX)
+        except BaseException:
+            result.close()
+            raise
+    return result
+
+
 def load_json_from_file(file_path: str) -> str:
     result = None
     with open(file_path) as fp:
         result = _json_load(fp)
+    return result
+
+
+@_contextmanager
+def lock_file(file_path: str) -> _Iterator[None]:
+    """
+    Holds the lock for the specified file for the duration of the with-block. See `acquire_file_lock`.
+    """
+    lock_fp = acquire_file_lock(file_path)
+    try:
+        yield
+    finally:
+        release_file_lock(lock_fp)
+
+
+def release_file_lock(lock_fp: _TextIO) -> None:
+    if _fcntl is not None:
+        _fcntl.flock(lock_fp.fileno(), _fcntl.LOCK_UN)
+    lock_fp.close()
+
+
+def try_acquire_file_lock(file_path: str) -> _Optional[_TextIO]:
+    """
+    Like `acquire_file_lock`, but doesn't block.
+
+    Returns None, if another process holds the lock.
+    """
+    result = open(f'{file_path}.lock', 'a')
+    if _fcntl is not None:
+        try:
+            _fcntl.flock(result.fileno(), _fcntl.LOCK_EX | _fcntl.LOCK_NB)
+        except BlockingIOError:
+            result.close()
+            return None
+        except BaseException:
+            result.close()
+            raise
     return result
\ No newline at end of file
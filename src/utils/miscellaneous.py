@@ -1,4 +1,3 @@
-import aiohttp as _aiohttp
 from jellyfish import jaro_winkler as _jaro_winkler
 import subprocess as _subprocess
 from threading import get_ident as _get_ident
@@ -8,6 +7,7 @@ from typing import Iterable as _Iterable
 from typing import List as _List
 from typing import Tuple as _Tuple
 
+from .. import http_client as _http_client
 from .. import settings as _settings
 
 from . import constants as _constants
@@ -18,11 +18,8 @@ from . import datetime as _datetime
 
 async def check_hyperlink(hyperlink: str) -> bool:
     if hyperlink:
-        session: _aiohttp.ClientSession
-        async with _aiohttp.ClientSession() as session:
-            response: _aiohttp.ClientResponse
-            async with session.get(hyperlink) as response:
-                return response.status == 200
+        status = await _http_client.get_status(hyperlink)
+        return status == 200
     else:
         return False
 
@@ -1,9 +1,13 @@
+import os
 from typing import List, Optional, Type
 
 from discord import ApplicationCommand, SlashCommand, SlashCommandGroup
-from discord.ext.commands import Bot
+from discord.ext.commands import AutoShardedBot, Bot
 
 from .gdrive import TourneyDataClient
+from . import http_client
+from . import metrics
+from . import server_settings
 from . import settings
 
 
@@ -14,6 +18,9 @@ class YadcBot(Bot):
         super().__init__(**kwargs)
         self.__tournament_data_client: TourneyDataClient = None
         if settings.FEATURE_TOURNEYDATA_ENABLED:
+            tournament_data_cache_path = None
+            if settings.FEATURE_CACHE_SNAPSHOTS_ENABLED:
+                tournament_data_cache_path = os.path.join(os.getcwd(), settings.TOURNAMENT_DATA_CACHE_SUB_PATH)
             self.__tournament_data_client = TourneyDataClient(
                 settings.GDRIVE_PROJECT_ID,
                 settings.GDRIVE_PRIVATE_KEY_ID,
@@ -24,7 +31,8 @@ class YadcBot(Bot):
                 settings.GDRIVE_FOLDER_ID,
                 settings.GDRIVE_SERVICE_ACCOUNT_FILE,
                 settings.GDRIVE_SETTINGS_FILE,
-                settings.TOURNAMENT_DATA_START_DATE
+                settings.TOURNAMENT_DATA_START_DATE,
+                cache_path=tournament_data_cache_path
             )
 
     @property
@@ -32,6 +40,15 @@ class YadcBot(Bot):
         return self.__tournament_data_client
 
 
+    async def close(self) -> None:
+        await server_settings.close()
+        await super().close()
+        if self.__tournament_data_client:
+            self.__tournament_data_client.close()
+        await http_client.disconnect()
+        await metrics.close()
+
+
     def get_application_command(
         self,
         name: str,
@@ -72,4 +89,14 @@ class YadcBot(Bot):
 
         if isinstance(obj, type) and (not guild_ids or set(obj.guild_ids) <= set(guild_ids)):
             return obj
-        return None
\ No newline at end of file
+        return None
+
+
+
+
+
+class ShardedYadcBot(YadcBot, AutoShardedBot):
+    """
+    Runs multiple shards in a single process. Only used, if the shards to run have been configured.
+    """
+    pass
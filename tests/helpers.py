@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Optional
+import unittest
+
+
+# ---------- Constants ----------
+
+LOOP_LAG_PROBE_INTERVAL: float = 0.005
+
+
+
+
+
+# ---------- Classes ----------
+
+class LoopLagProbe():
+    """
+    Measures how late the event loop resumes a task sleeping in short intervals. A large lag means that the event loop has been blocked by synchronous work.
+    """
+    def __init__(self, interval: float = LOOP_LAG_PROBE_INTERVAL) -> None:
+        self.__interval: float = interval
+        self.__max_lag: float = 0.0
+        self.__task: Optional[asyncio.Task] = None
+        self.__tick_count: int = 0
+
+
+    @property
+    def max_lag(self) -> float:
+        return self.__max_lag
+
+    @property
+    def tick_count(self) -> int:
+        return self.__tick_count
+
+
+    async def __aenter__(self) -> 'LoopLagProbe':
+        self.__task = asyncio.get_running_loop().create_task(self.__probe())
+        # Let the probe start, so that it measures from now on.
+        await asyncio.sleep(0)
+        return self
+
+
+    async def __aexit__(self, *args) -> None:
+        self.__task.cancel()
+        try:
+            await self.__task
+        except asyncio.CancelledError:
+            pass
+
+
+    async def __probe(self) -> None:
+        while True:
+            expected_at = time.perf_counter() + self.__interval
+            await asyncio.sleep(self.__interval)
+            self.__max_lag = max(self.__max_lag, time.perf_counter() - expected_at)
+            self.__tick_count += 1
+
+
+class TimedAsyncTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Runs the tests with the debug mode of the event loop turned off. It slows down creating and running tasks so much, that measured durations would be meaningless.
+    """
+    async def asyncSetUp(self) -> None:
+        asyncio.get_running_loop().set_debug(False)
@@ -0,0 +1,120 @@
+import asyncio
+import datetime
+from unittest import mock
+
+from src import cache
+from src import pss_core as core
+from src import utils
+
+from .helpers import LoopLagProbe, TimedAsyncTestCase
+
+
+# ---------- Constants ----------
+
+ENTITY_COUNT: int = 500
+FETCH_LATENCY: float = 0.05
+LOOP_LAG_LIMIT: float = 0.1
+READER_COUNT: int = 500
+UPDATE_INTERVAL: int = 15
+
+
+
+
+
+# ---------- Classes ----------
+
+class CountingFetch():
+    """
+    Stands in for the download of a cache's data. Each fetch takes FETCH_LATENCY seconds and returns a new version of the data.
+    """
+    def __init__(self) -> None:
+        self.__fetch_count: int = 0
+
+
+    @property
+    def fetch_count(self) -> int:
+        return self.__fetch_count
+
+
+    async def get_data_from_url(self, url: str) -> str:
+        self.__fetch_count += 1
+        version = self.__fetch_count
+        await asyncio.sleep(FETCH_LATENCY)
+        return _create_items_xml(version)
+
+
+    async def get_url_from_path(self, path: str) -> str:
+        return f'https://api.example.com/{path}'
+
+
+class TestPssCacheConcurrency(TimedAsyncTestCase):
+    def setUp(self) -> None:
+        self.fetch = CountingFetch()
+        self.now = utils.get_utc_now()
+        patchers = [
+            mock.patch.object(core, 'get_data_from_url', self.fetch.get_data_from_url),
+            mock.patch.object(core, 'get_url_from_path', self.fetch.get_url_from_path),
+            mock.patch.object(utils, 'get_utc_now', lambda: self.now),
+            mock.patch.object(cache, 'SNAPSHOTS_PATH', None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.pss_cache = cache.PssCache('ItemService/ListItemDesigns2', 'TestItemDesigns', 'ItemDesignId', update_interval=UPDATE_INTERVAL)
+        self.addCleanup(cache.CACHES.remove, self.pss_cache)
+
+
+    async def test_concurrent_reads_of_empty_cache_fetch_once(self) -> None:
+        async with LoopLagProbe() as probe:
+            results = await asyncio.gather(*[self.pss_cache.get_data_dict3() for _ in range(READER_COUNT)])
+
+        self.assertEqual(self.fetch.fetch_count, 1)
+        self.assertEqual(self.pss_cache.parse_count, 1)
+        self.assertEqual(self.pss_cache.misses, READER_COUNT)
+        self.assertEqual(len(results[0]), ENTITY_COUNT)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertLess(probe.max_lag, LOOP_LAG_LIMIT)
+
+
+    async def test_concurrent_reads_of_expired_cache_fetch_once(self) -> None:
+        initial_data = await self.pss_cache.get_data_dict3()
+        self.assertEqual(self.fetch.fetch_count, 1)
+
+        self.now += datetime.timedelta(minutes=UPDATE_INTERVAL + 1)
+        async with LoopLagProbe() as probe:
+            results = await asyncio.gather(*[self.pss_cache.get_data_dict3() for _ in range(READER_COUNT)])
+            # Outdated data gets served right away, while a single refresh runs in the background.
+            self.assertTrue(all(result is initial_data for result in results))
+            self.assertEqual(self.pss_cache.stale_hits, READER_COUNT)
+            await self.pss_cache.update_data()
+
+        self.assertEqual(self.fetch.fetch_count, 2)
+        self.assertEqual(self.pss_cache.refresh_count, 2)
+        self.assertLess(probe.max_lag, LOOP_LAG_LIMIT)
+
+        refreshed_data = await self.pss_cache.get_data_dict3()
+        self.assertIsNot(refreshed_data, initial_data)
+        self.assertEqual(refreshed_data['1']['ItemDesignName'], 'Item 1 v2')
+        self.assertEqual(self.fetch.fetch_count, 2)
+
+
+    async def test_concurrent_reads_during_refresh_join_it(self) -> None:
+        await self.pss_cache.get_data_dict3()
+        self.now += datetime.timedelta(minutes=UPDATE_INTERVAL + 1)
+
+        update_tasks = [asyncio.create_task(self.pss_cache.update_data()) for _ in range(READER_COUNT // 2)]
+        read_tasks = [asyncio.create_task(self.pss_cache.get_data_dict3()) for _ in range(READER_COUNT // 2)]
+        await asyncio.gather(*update_tasks, *read_tasks)
+
+        self.assertEqual(self.fetch.fetch_count, 2)
+        self.assertTrue(all(update_task.result() for update_task in update_tasks))
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_items_xml(version: int) -> str:
+    items = ''.join(f'<ItemDesign ItemDesignId="{item_id}" ItemDesignName="Item {item_id} v{version}" ItemType="Equipment" />' for item_id in range(1, ENTITY_COUNT + 1))
+    return f'<ItemService><ListItemDesigns><ItemDesigns>{items}</ItemDesigns></ListItemDesigns></ItemService>'
@@ -0,0 +1,101 @@
+import os
+import unittest
+from typing import Any, Callable, List, Tuple
+from unittest import mock
+
+from src import utils
+
+
+# ---------- Constants ----------
+
+# Responses of the fake PSS API (fake_api_*.xml) and hand written edge cases.
+CORPUS_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'xml_corpus')
+
+# Small chunk sizes make elements, attributes, entities and multibyte characters span chunks.
+CHUNK_SIZES: Tuple[int, ...] = (1, 7, 64, utils.convert.ITERPARSE_CHUNK_SIZE)
+
+
+
+
+
+# ---------- Classes ----------
+
+class TestIterparseMatchesElementTree(unittest.TestCase):
+    def test_iterparse_xml_to_dict_matches_raw_xml_to_dict(self) -> None:
+        for file_name, raw_xml in _read_corpus():
+            for chunk_size in CHUNK_SIZES:
+                for include_root in (True, False):
+                    with self.subTest(file_name=file_name, chunk_size=chunk_size, include_root=include_root):
+                        self.__assert_same_result(
+                            lambda: utils.convert.raw_xml_to_dict(raw_xml, include_root=include_root),
+                            lambda: utils.convert.iterparse_xml_to_dict(raw_xml, include_root=include_root),
+                            chunk_size,
+                        )
+
+
+    def test_iterparse_xmltree_to_dict3_matches_xmltree_to_dict3(self) -> None:
+        for file_name, raw_xml in _read_corpus():
+            for chunk_size in CHUNK_SIZES:
+                with self.subTest(file_name=file_name, chunk_size=chunk_size):
+                    self.__assert_same_result(
+                        lambda: utils.convert.xmltree_to_dict3(raw_xml),
+                        lambda: utils.convert.iterparse_xmltree_to_dict3(raw_xml),
+                        chunk_size,
+                    )
+
+
+    def test_large_document_spanning_many_chunks(self) -> None:
+        raw_xml = _create_large_xml(3 * utils.convert.ITERPARSE_CHUNK_SIZE)
+        self.assertGreater(len(raw_xml), 3 * utils.convert.ITERPARSE_CHUNK_SIZE)
+
+        expected = utils.convert.xmltree_to_dict3(raw_xml)
+        actual = utils.convert.iterparse_xmltree_to_dict3(raw_xml)
+        self.assertEqual(actual, expected)
+        self.assertEqual(list(actual.keys()), list(expected.keys()))
+
+
+    def test_corpus_is_present(self) -> None:
+        self.assertGreaterEqual(len(_read_corpus()), 20)
+
+
+    def __assert_same_result(self, get_expected: Callable[[], Any], get_actual: Callable[[], Any], chunk_size: int) -> None:
+        try:
+            expected = get_expected()
+        except Exception as err:
+            with mock.patch.object(utils.convert, 'ITERPARSE_CHUNK_SIZE', chunk_size):
+                with self.assertRaises(type(err)):
+                    get_actual()
+            return
+
+        with mock.patch.object(utils.convert, 'ITERPARSE_CHUNK_SIZE', chunk_size):
+            actual = get_actual()
+        self.assertEqual(actual, expected)
+        # Entities get listed in the order of the response.
+        if isinstance(expected, dict):
+            self.assertEqual(list(actual.keys()), list(expected.keys()))
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_large_xml(min_length: int) -> str:
+    entities = []
+    length = 0
+    item_id = 0
+    while length < min_length:
+        item_id += 1
+        entity = f'<ItemDesign ItemDesignId="{item_id}" ItemDesignName="Ärmel &amp; 🚀 {item_id}" RewardXml="&lt;Reward RewardType=&quot;Item&quot; RewardArgument=&quot;{item_id}&quot; /&gt;" />'
+        entities.append(entity)
+        length += len(entity)
+    return f'<ItemService><ListItemDesigns><ItemDesigns>{"".join(entities)}</ItemDesigns></ListItemDesigns></ItemService>'
+
+
+def _read_corpus() -> List[Tuple[str, str]]:
+    result = []
+    for file_name in sorted(os.listdir(CORPUS_PATH)):
+        if file_name.endswith('.xml'):
+            with open(os.path.join(CORPUS_PATH, file_name), 'r', encoding='utf-8') as fp:
+                result.append((file_name, fp.read()))
+    return result
@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timezone
+import json
+import re
+import threading
+import time
+from typing import Dict, List
+from unittest import mock
+
+from src import gdrive
+
+from .helpers import LoopLagProbe, TimedAsyncTestCase
+
+
+# ---------- Constants ----------
+
+DOWNLOAD_LATENCY: float = 0.3
+EARLIEST_DATE: datetime = datetime(2019, 10, 1, tzinfo=timezone.utc)
+LOOP_LAG_LIMIT: float = 0.05
+REQUEST_COUNT: int = 50
+
+QUERY_TITLE_PATTERN: re.Pattern = re.compile(r"title (?P<operator>contains|=) '(?P<title>[^']*)'")
+
+
+
+
+
+# ---------- Classes ----------
+
+class FakeDriveFile(dict):
+    def __init__(self, drive: 'FakeDrive', title: str, content: str) -> None:
+        super().__init__(title=title)
+        self.__drive: 'FakeDrive' = drive
+        self.__content: str = content
+
+
+    def GetContentString(self) -> str:
+        self.__drive.on_download(self['title'])
+        return self.__content
+
+
+class FakeDriveFileList():
+    def __init__(self, files: List[FakeDriveFile]) -> None:
+        self.__files: List[FakeDriveFile] = files
+
+
+    def GetList(self) -> List[FakeDriveFile]:
+        return list(self.__files)
+
+
+class FakeDrive():
+    """
+    Stands in for a slow Google Drive. Downloads block the calling thread for `latency` seconds, like pydrive does.
+    """
+    def __init__(self, contents_by_title: Dict[str, str], latency: float) -> None:
+        self.__files: List[FakeDriveFile] = [FakeDriveFile(self, title, content) for title, content in contents_by_title.items()]
+        self.__latency: float = latency
+        self.__download_counts: Dict[str, int] = {}
+        self.__download_thread_ids: set = set()
+
+
+    @property
+    def download_counts(self) -> Dict[str, int]:
+        return dict(self.__download_counts)
+
+    @property
+    def download_thread_ids(self) -> set:
+        return set(self.__download_thread_ids)
+
+
+    def ListFile(self, parameters: Dict[str, str]) -> FakeDriveFileList:
+        match = QUERY_TITLE_PATTERN.search(parameters['q'])
+        if match['operator'] == '=':
+            files = [g_file for g_file in self.__files if g_file['title'] == match['title']]
+        else:
+            files = [g_file for g_file in self.__files if match['title'] in g_file['title']]
+        return FakeDriveFileList(files)
+
+
+    def on_download(self, title: str) -> None:
+        self.__download_counts[title] = self.__download_counts.get(title, 0) + 1
+        self.__download_thread_ids.add(threading.get_ident())
+        time.sleep(self.__latency)
+
+
+class TestTourneyDataClientRetrieval(TimedAsyncTestCase):
+    def setUp(self) -> None:
+        self.drive = FakeDrive({
+            'pss-top-100_20230131-235900.json': _create_tourney_data_json('2023-01-31 23:59:00'),
+            'pss-top-100_20230228-235900.json': _create_tourney_data_json('2023-02-28 23:59:00'),
+        }, DOWNLOAD_LATENCY)
+        drive = self.drive
+
+        def initialize(client: gdrive.TourneyDataClient) -> None:
+            client._TourneyDataClient__drive = drive
+
+        patcher = mock.patch.object(gdrive.TourneyDataClient, '_TourneyDataClient__initialize', initialize)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = gdrive.TourneyDataClient('project', 'key id', 'key', 'bot@example.com', 'client id', [], 'folder', 'service_account.json', 'settings.yaml', EARLIEST_DATE)
+        self.addCleanup(self.client.close)
+
+
+    async def test_event_loop_keeps_running_during_download(self) -> None:
+        async with LoopLagProbe() as probe:
+            retrieval = asyncio.create_task(self.client.get_data(2023, 1))
+            await asyncio.sleep(DOWNLOAD_LATENCY / 2)
+            self.assertFalse(retrieval.done())
+            tourney_data = await retrieval
+
+        self.assertEqual((tourney_data.year, tourney_data.month), (2023, 1))
+        self.assertLess(probe.max_lag, LOOP_LAG_LIMIT)
+        self.assertGreater(probe.tick_count, DOWNLOAD_LATENCY / 0.005 / 2)
+        self.assertNotIn(threading.get_ident(), self.drive.download_thread_ids)
+
+
+    async def test_concurrent_requests_share_download(self) -> None:
+        results = await asyncio.gather(*[self.client.get_data(2023, 1) for _ in range(REQUEST_COUNT)])
+
+        self.assertEqual(self.drive.download_counts, {'pss-top-100_20230131-235900.json': 1})
+        self.assertTrue(all(result is results[0] for result in results))
+
+        # Retrieved data gets served from memory.
+        self.assertIs(await self.client.get_data(2023, 1), results[0])
+        self.assertEqual(self.drive.download_counts, {'pss-top-100_20230131-235900.json': 1})
+
+
+    async def test_concurrent_requests_for_different_files_download_each_once(self) -> None:
+        requests = [self.client.get_data(2023, month) for month in (1, 2) for _ in range(REQUEST_COUNT)]
+        results = await asyncio.gather(*requests)
+
+        self.assertEqual(self.drive.download_counts, {'pss-top-100_20230131-235900.json': 1, 'pss-top-100_20230228-235900.json': 1})
+        self.assertEqual({(result.year, result.month) for result in results}, {(2023, 1), (2023, 2)})
+
+
+    async def test_cancelled_request_does_not_cancel_shared_download(self) -> None:
+        retrievals = [asyncio.create_task(self.client.get_data(2023, 1)) for _ in range(REQUEST_COUNT)]
+        await asyncio.sleep(DOWNLOAD_LATENCY / 3)
+        retrievals[0].cancel()
+
+        results = await asyncio.gather(*retrievals[1:])
+        self.assertTrue(retrievals[0].cancelled())
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(self.drive.download_counts, {'pss-top-100_20230131-235900.json': 1})
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_tourney_data_json(timestamp: str) -> str:
+    fleets = [[1, 'Fleet 1', 100, 1, 5000, 0, 2, 2]]
+    users = [[user_id, f'User {user_id}', 1, 3000 + user_id, 10, 0, 3600, 7200, 7200, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3500, 0] for user_id in (1, 2)]
+    return json.dumps({'meta': {'schema_version': 9, 'timestamp': timestamp}, 'fleets': fleets, 'users': users})
@@ -0,0 +1,176 @@
+import unittest
+from typing import Dict, List, Optional
+
+from bench import fake_pss_api
+from src import pss_item
+from src.typehints import EntitiesData, EntityInfo
+from src import utils
+
+
+# ---------- Constants ----------
+
+ENTITY_COUNT: int = 400
+
+# Artifacts and fragments keep their void particles and fragments, other items don't. Some ingredients are shared by several recipes and show up on several levels.
+EDGE_CASE_ITEMS: List[Dict[str, str]] = [
+    {'ItemDesignId': '1', 'ItemDesignName': 'Void Particle', 'Ingredients': ''},
+    {'ItemDesignId': '2', 'ItemDesignName': 'Titanium', 'Ingredients': ''},
+    {'ItemDesignId': '3', 'ItemDesignName': 'Carbon', 'Ingredients': ''},
+    {'ItemDesignId': '4', 'ItemDesignName': 'Relic fragment', 'Ingredients': '1x3|2x1'},
+    {'ItemDesignId': '5', 'ItemDesignName': 'Alloy', 'Ingredients': '2x2|3x1'},
+    {'ItemDesignId': '6', 'ItemDesignName': 'Ancient Relic (A)', 'Ingredients': '4x2|5x1|1x5'},
+    {'ItemDesignId': '7', 'ItemDesignName': 'Relic Armor', 'Ingredients': '4x1|5x2|1x1'},
+    {'ItemDesignId': '8', 'ItemDesignName': 'Reinforced Alloy', 'Ingredients': '5x2|2x3'},
+    {'ItemDesignId': '9', 'ItemDesignName': 'Hull Plate', 'Ingredients': '8x1|5x1|3x4'},
+    {'ItemDesignId': '10', 'ItemDesignName': 'Unused', 'Ingredients': None},
+]
+
+
+
+
+
+# ---------- Classes ----------
+
+class TestRecipeGraphMatchesOldImplementation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        api = fake_pss_api.FakePssApi(entity_count=ENTITY_COUNT, latency=0.0)
+        fake_api_items_data = utils.convert.xmltree_to_dict3(api.get_designs_xml('ItemService/ListItemDesigns2'))
+        edge_case_items_data = {item_info['ItemDesignId']: dict(item_info) for item_info in EDGE_CASE_ITEMS}
+        cls.items_datas = {'fake_api': fake_api_items_data, 'edge_cases': edge_case_items_data}
+
+
+    def test_ingredients_per_level_match(self) -> None:
+        for data_name, items_data in self.items_datas.items():
+            recipe_graph = _create_recipe_graph(items_data)
+            for item_id, item_info in items_data.items():
+                with self.subTest(data_name=data_name, item_id=item_id):
+                    expected = _get_ingredients_per_level_old(item_info, items_data)
+                    actual = recipe_graph.get_ingredients_per_level(item_id)
+                    self.assertEqual(actual, expected)
+                    self.assertEqual([list(ingredients.keys()) for ingredients in actual], [list(ingredients.keys()) for ingredients in expected])
+
+
+    def test_ingredients_match(self) -> None:
+        for data_name, items_data in self.items_datas.items():
+            recipe_graph = _create_recipe_graph(items_data)
+            for item_id, item_info in items_data.items():
+                with self.subTest(data_name=data_name, item_id=item_id):
+                    expected = {ingredient_item_id: int(amount) for ingredient_item_id, amount in pss_item.get_ingredients_dict(item_info['Ingredients']).items()}
+                    self.assertEqual(recipe_graph.get_ingredients(item_id), expected)
+
+
+    def test_upgrades_match(self) -> None:
+        get_upgrades_for = getattr(pss_item, '__get_upgrades_for')
+        for data_name, items_data in self.items_datas.items():
+            for item_id in items_data.keys():
+                with self.subTest(data_name=data_name, item_id=item_id):
+                    expected = _get_upgrades_for_old(item_id, items_data)
+                    actual = get_upgrades_for(item_id, items_data)
+                    self.assertEqual(_get_item_ids(actual), _get_item_ids(expected))
+
+
+    def test_fake_api_data_has_recipes(self) -> None:
+        recipe_graph = _create_recipe_graph(self.items_datas['fake_api'])
+        self.assertTrue(any(len(recipe_graph.get_ingredients_per_level(item_id)) > 2 for item_id in self.items_datas['fake_api'].keys()))
+
+
+    def test_partial_artifacts(self) -> None:
+        recipe_graph = _create_recipe_graph(self.items_datas['edge_cases'])
+        self.assertIn('1', recipe_graph.get_ingredients_per_level('6')[0])
+        self.assertNotIn('1', recipe_graph.get_ingredients_per_level('7')[0])
+        self.assertNotIn('4', recipe_graph.get_ingredients_per_level('7')[0])
+
+
+    def test_recipe_graph_gets_rebuilt_for_new_data(self) -> None:
+        get_recipe_graph = getattr(pss_item, '__get_recipe_graph')
+        items_data = self.items_datas['edge_cases']
+        recipe_graph = get_recipe_graph(items_data)
+        self.assertIs(get_recipe_graph(items_data), recipe_graph)
+
+        changed_items_data = {item_id: dict(item_info) for item_id, item_info in items_data.items()}
+        changed_items_data['9']['Ingredients'] = '2x1'
+        changed_recipe_graph = get_recipe_graph(changed_items_data)
+        self.assertIsNot(changed_recipe_graph, recipe_graph)
+        self.assertEqual(changed_recipe_graph.get_ingredients_per_level('9'), [{'2': 1}])
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_recipe_graph(items_data: EntitiesData) -> pss_item.RecipeGraph:
+    return getattr(pss_item, '__create_recipe_graph')(items_data)
+
+
+def _get_item_ids(item_infos: List[Optional[EntityInfo]]) -> List[Optional[str]]:
+    return [item_info['ItemDesignId'] if item_info else None for item_info in item_infos]
+
+
+
+
+
+# ---------- Old implementation ----------
+# The lookups as they were before the recipe graph: the ingredients get parsed and walked for every lookup.
+
+def _flatten_ingredients_tree_old(ingredients_tree: list) -> List[Dict[str, int]]:
+    ingredients = {}
+    ingredients_without_subs = []
+    sub_ingredients = []
+
+    for item_id, item_amount, item_ingredients in ingredients_tree:
+        if item_id in ingredients.keys():
+            ingredients[item_id] += item_amount
+        else:
+            ingredients[item_id] = item_amount
+
+        if item_ingredients:
+            sub_ingredients.extend(item_ingredients)
+        else:
+            ingredients_without_subs.append((item_id, item_amount, item_ingredients))
+
+    result = [ingredients]
+
+    if len(ingredients_without_subs) != len(ingredients_tree):
+        sub_ingredients.extend(ingredients_without_subs)
+        flattened_subs = _flatten_ingredients_tree_old(sub_ingredients)
+        result.extend(flattened_subs)
+
+    return result
+
+
+def _get_ingredients_per_level_old(item_info: EntityInfo, items_data: EntitiesData) -> List[Dict[str, int]]:
+    include_partial_artifacts = pss_item.get_include_partial_artifacts(item_info)
+    ingredients_tree = _parse_ingredients_tree_old(item_info['Ingredients'], items_data, include_partial_artifacts)
+    return [ingredients for ingredients in _flatten_ingredients_tree_old(ingredients_tree) if ingredients]
+
+
+def _get_upgrades_for_old(item_id: str, items_data: EntitiesData) -> List[Optional[EntityInfo]]:
+    result = []
+    for item_info in items_data.values():
+        ingredient_item_ids = list(pss_item.get_ingredients_dict(item_info['Ingredients']).keys())
+        if item_id in ingredient_item_ids:
+            result.append(item_info)
+    if not result:
+        result = [None]
+    return result
+
+
+def _parse_ingredients_tree_old(ingredients_str: str, items_data: EntitiesData, include_partial_artifacts: bool, parent_amount: int = 1) -> list:
+    if not ingredients_str:
+        return []
+
+    ingredients_dict = pss_item.get_ingredients_dict(ingredients_str)
+    result = []
+
+    for item_id, item_amount in ingredients_dict.items():
+        item_info = items_data[item_id]
+        item_name = item_info[pss_item.ITEM_DESIGN_DESCRIPTION_PROPERTY_NAME].lower()
+        item_amount = int(item_amount)
+        if include_partial_artifacts or ('void particle' not in item_name and ' fragment' not in item_name):
+            combined_amount = item_amount * parent_amount
+            item_ingredients = _parse_ingredients_tree_old(item_info['Ingredients'], items_data, include_partial_artifacts, combined_amount)
+            result.append((item_id, combined_amount, item_ingredients))
+
+    return result
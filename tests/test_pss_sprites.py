@@ -0,0 +1,123 @@
+import colorsys
+import unittest
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from src import pss_sprites
+
+
+# ---------- Constants ----------
+
+# Hue values of ships and rooms are within -1 and 1.
+HUES: Tuple[float, ...] = (0.0, 0.05, 0.25, 1 / 3, 0.5, 0.999, 1.0, -0.2, -0.75)
+IMAGE_SIZE: int = 64
+TOLERANCE: float = 1e-9
+
+FUNC_HSV_TO_RGB = np.vectorize(colorsys.hsv_to_rgb)
+FUNC_RGB_TO_HSV = np.vectorize(colorsys.rgb_to_hsv)
+
+
+
+
+
+# ---------- Classes ----------
+
+class TestShiftHueMatchesColorsys(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.image = _create_test_image(IMAGE_SIZE)
+        cls.arr = np.array(np.asarray(cls.image).astype('float'))
+
+
+    def test_shift_hue_matches_colorsys(self) -> None:
+        for hue in HUES:
+            with self.subTest(hue=hue):
+                expected = _shift_hue_old(self.arr, hue)
+                actual = pss_sprites.shift_hue(self.arr, hue)
+                self.assertEqual(actual.shape, expected.shape)
+                np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+    def test_alpha_is_preserved(self) -> None:
+        for hue in HUES:
+            with self.subTest(hue=hue):
+                actual = pss_sprites.shift_hue(self.arr, hue)
+                np.testing.assert_array_equal(actual[..., 3], self.arr[..., 3])
+
+
+    def test_colorize_matches_colorsys(self) -> None:
+        for hue in HUES:
+            with self.subTest(hue=hue):
+                expected = _shift_hue_old(self.arr, hue).astype('uint8')
+                actual = np.asarray(pss_sprites.colorize(self.image, hue))
+                self.assertEqual(actual.dtype, np.uint8)
+                # Values that end up just below an integer may get truncated differently.
+                self.assertLessEqual(int(np.abs(actual.astype(int) - expected.astype(int)).max()), 1)
+                self.assertLess(np.count_nonzero(actual != expected), actual.size // 1000 + 1)
+                np.testing.assert_array_equal(actual[..., 3], np.asarray(self.image)[..., 3])
+
+
+    def test_rgb_to_hsv_matches_colorsys(self) -> None:
+        r, g, b, _ = np.rollaxis(self.arr, axis=-1)
+        expected = FUNC_RGB_TO_HSV(r, g, b)
+        actual = getattr(pss_sprites, '__rgb_to_hsv')(r, g, b)
+        for expected_channel, actual_channel in zip(expected, actual):
+            np.testing.assert_allclose(actual_channel, expected_channel, rtol=0, atol=TOLERANCE)
+
+
+    def test_hsv_to_rgb_matches_colorsys(self) -> None:
+        r, g, b, _ = np.rollaxis(self.arr, axis=-1)
+        h, s, v = FUNC_RGB_TO_HSV(r, g, b)
+        expected = FUNC_HSV_TO_RGB(h, s, v)
+        actual = getattr(pss_sprites, '__hsv_to_rgb')(h, s, v)
+        for expected_channel, actual_channel in zip(expected, actual):
+            np.testing.assert_allclose(actual_channel, expected_channel, rtol=0, atol=TOLERANCE)
+
+
+    def test_test_image_covers_edge_cases(self) -> None:
+        r, g, b, a = np.rollaxis(self.arr, axis=-1)
+        is_grey = (r == g) & (g == b)
+        self.assertTrue(is_grey.any())
+        self.assertTrue((~is_grey).any())
+        self.assertTrue(((r == g) & (r > b)).any())
+        self.assertTrue({0.0, 255.0} <= set(np.unique(a)))
+
+
+
+
+
+# ---------- Helper functions ----------
+
+def _create_test_image(size: int) -> Image.Image:
+    """
+    Returns an image with a hue gradient, grey ramps, pixels where two channels share the maximum, random noise and an alpha ramp.
+    """
+    rng = np.random.RandomState(1)
+    arr = rng.randint(0, 256, size=(size, size, 4)).astype('uint8')
+
+    for x in range(size):
+        r, g, b = colorsys.hsv_to_rgb(x / size, 1.0, 1.0)
+        arr[0, x, :3] = (round(r * 255), round(g * 255), round(b * 255))
+        arr[1, x, :3] = x * 255 // (size - 1)
+        arr[2, x, :3] = (x * 4 % 256, x * 4 % 256, x * 2 % 256)
+        arr[3, x, :3] = (x * 4 % 256, x * 2 % 256, x * 4 % 256)
+        arr[4, x, :3] = (x * 2 % 256, x * 4 % 256, x * 4 % 256)
+    arr[5, :, :3] = 0
+    arr[6, :, :3] = 255
+    arr[:, 0, 3] = 0
+    arr[:, 1, 3] = 255
+    arr[7, :, 3] = np.linspace(0, 255, size).astype('uint8')
+    return Image.fromarray(arr, 'RGBA')
+
+
+def _shift_hue_old(arr: np.ndarray, hue_out: float) -> np.ndarray:
+    """
+    `shift_hue` as it was before the conversions got vectorized: colorsys gets called for every pixel.
+    """
+    r, g, b, a = np.rollaxis(arr, axis=-1)
+    h, s, v = FUNC_RGB_TO_HSV(r, g, b)
+    h = (h + hue_out) % 1
+    r, g, b = FUNC_HSV_TO_RGB(h, s, v)
+    return np.dstack((r, g, b, a))
@@ -0,0 +1,114 @@
+import random
+from typing import Callable, Dict, List
+
+from bench import search_benchmark
+from src import pss_core as core
+from src.typehints import EntitiesData
+from src import utils
+
+from .helpers import TimedAsyncTestCase
+
+
+# ---------- Constants ----------
+
+ENTITY_COUNT: int = 300
+QUERY_COUNT: int = 150
+SEED: int = 1
+
+
+
+
+
+# ---------- Classes ----------
+
+class TestSearchIndexMatchesOldLookup(TimedAsyncTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.retrievers = search_benchmark.get_retrievers()
+        cls.names = search_benchmark.create_names(ENTITY_COUNT)
+        cls.queries = search_benchmark.create_queries(cls.names, QUERY_COUNT, random.Random(SEED))
+
+
+    async def test_retrievers_return_same_ranked_ids(self) -> None:
+        for retriever_name, retriever in self.retrievers.items():
+            entities_data = search_benchmark.create_entities_data(retriever.key_name, retriever.description_property_name, self.names)
+            fix_data_delegate = retriever._EntityRetriever__fix_data_delegate
+            for query in self.queries:
+                with self.subTest(retriever=retriever_name, query=query):
+                    expected = _get_ids_from_property_value_old(entities_data, retriever.description_property_name, query, fix_data_delegate=fix_data_delegate)
+                    actual = await retriever.get_entities_ids_by_name(query, entities_data=entities_data)
+                    self.assertEqual(actual, expected)
+
+
+    def test_exact_matches(self) -> None:
+        retriever = self.retrievers['pss_item.items_designs_retriever']
+        entities_data = search_benchmark.create_entities_data(retriever.key_name, retriever.description_property_name, self.names)
+        fix_data_delegate = retriever._EntityRetriever__fix_data_delegate
+        search_index = core.create_search_index(entities_data, retriever.description_property_name, fix_data_delegate=fix_data_delegate)
+        for query in self.queries + ['DMR Mk 2', 'Gold Rabbit Armour']:
+            with self.subTest(query=query):
+                expected = _get_ids_from_property_value_old(entities_data, retriever.description_property_name, query, fix_data_delegate=fix_data_delegate, match_exact=True)
+                self.assertEqual(search_index.get_ids(query, match_exact=True), expected)
+
+
+    def test_queries_cover_edge_cases(self) -> None:
+        retriever = self.retrievers['pss_item.items_designs_retriever']
+        entities_data = search_benchmark.create_entities_data(retriever.key_name, retriever.description_property_name, self.names)
+        result_counts = [len(_get_ids_from_property_value_old(entities_data, retriever.description_property_name, query)) for query in self.queries]
+        self.assertIn(0, result_counts)
+        self.assertIn(1, result_counts)
+        self.assertTrue(any(result_count > 10 for result_count in result_counts))
+        self.assertGreaterEqual(len(self.retrievers), 15)
+
+
+    async def test_index_follows_replaced_data(self) -> None:
+        retriever = self.retrievers['pss_crew.characters_designs_retriever']
+        property_name = retriever.description_property_name
+        entities_data = search_benchmark.create_entities_data(retriever.key_name, property_name, ['Alpha', 'Beta'])
+        self.assertEqual(await retriever.get_entities_ids_by_name('alp', entities_data=entities_data), ['1'])
+
+        replaced_entities_data = search_benchmark.create_entities_data(retriever.key_name, property_name, ['Gamma', 'Alphabet', 'Alpha'])
+        self.assertEqual(await retriever.get_entities_ids_by_name('alp', entities_data=replaced_entities_data), ['3', '2'])
+        self.assertEqual(await retriever.get_entities_ids_by_name('alp', entities_data=entities_data), ['1'])
+
+
+
+
+
+# ---------- Old implementation ----------
+# The lookup as it was before the search index: every entity gets fixed and compared for every lookup.
+
+def _fix_property_value_old(property_value: str) -> str:
+    return getattr(core, '__fix_property_value')(property_value)
+
+
+def _get_ids_from_property_value_old(data: EntitiesData, property_name: str, property_value: str, fix_data_delegate: Callable[[str], str] = None, match_exact: bool = False) -> List[str]:
+    if not data or not property_name or not property_value:
+        return []
+
+    if not fix_data_delegate:
+        fix_data_delegate = _fix_property_value_old
+
+    fixed_value = fix_data_delegate(property_value)
+    fixed_data = {entry_id: fix_data_delegate(entry_data[property_name]) for entry_id, entry_data in data.items() if entry_data[property_name]}
+
+    if match_exact:
+        results = [key for key, value in fixed_data.items() if value == fixed_value]
+    else:
+        similarity_map: Dict[float, list] = {}
+        for entry_id, entry_property in fixed_data.items():
+            if entry_property.startswith(fixed_value) or fixed_value in entry_property:
+                similarity_value = utils.get_similarity(entry_property, fixed_value)
+                if similarity_value in similarity_map.keys():
+                    similarity_map[similarity_value].append((entry_id, entry_property))
+                else:
+                    similarity_map[similarity_value] = [(entry_id, entry_property)]
+        for similarity_value, entries in similarity_map.items():
+            similarity_map[similarity_value] = sorted(entries, key=lambda entry: entry[1])
+        similarity_values = sorted(list(similarity_map.keys()), reverse=True)
+        results = []
+        for similarity_value in similarity_values:
+            entry_ids = [entry_id for (entry_id, _) in similarity_map[similarity_value]]
+            results.extend(entry_ids)
+
+    return results
@@ -0,0 +1,108 @@
+import asyncio
+from unittest import mock
+
+from bench.fake_database import FakeDatabase
+from src import server_settings
+from src import settings as app_settings
+
+from .helpers import TimedAsyncTestCase
+
+
+# ---------- Constants ----------
+
+GUILD_IDS: list = [100000000000000000 + index for index in range(100)]
+
+
+
+
+
+# ---------- Classes ----------
+
+class TestServerSettingsWriteBehind(TimedAsyncTestCase):
+    def setUp(self) -> None:
+        self.database = FakeDatabase()
+        self.database.add_rows(GUILD_IDS)
+        patcher = mock.patch.object(app_settings, 'SERVER_SETTINGS_FLUSH_INTERVAL', 5.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patch = self.database.patch()
+        patch.__enter__()
+        self.addCleanup(patch.__exit__, None, None, None)
+        for guild_id in GUILD_IDS:
+            self.addCleanup(server_settings._discard_pending_server_settings, guild_id)
+
+
+    async def test_failed_flush_keeps_pending_changes(self) -> None:
+        for guild_id in GUILD_IDS[:3]:
+            await server_settings.update_server_settings(guild_id, {'prefix': f'!{guild_id}'})
+
+        self.database.set_down(True)
+        self.assertFalse(await server_settings.flush_server_settings())
+        self.assertTrue(all(self.database.rows[guild_id].get('prefix') is None for guild_id in GUILD_IDS[:3]))
+
+        self.database.set_down(False)
+        self.assertTrue(await server_settings.flush_server_settings())
+        self.assertTrue(all(self.database.rows[guild_id]['prefix'] == f'!{guild_id}' for guild_id in GUILD_IDS[:3]))
+
+        statement_count = self.database.statement_count
+        self.assertTrue(await server_settings.flush_server_settings())
+        self.assertEqual(self.database.statement_count, statement_count)
+
+
+    async def test_failed_flush_keeps_changes_queued_meanwhile(self) -> None:
+        guild_id = GUILD_IDS[0]
+        database = FakeDatabase(latency=0.05)
+        database.add_rows([guild_id])
+        with database.patch():
+            await server_settings.update_server_settings(guild_id, {'prefix': 'a', 'useembeds': False})
+            flush_task = asyncio.create_task(server_settings.flush_server_settings())
+            await asyncio.sleep(0.01)
+            await server_settings.update_server_settings(guild_id, {'prefix': 'b', 'usepagination': True})
+            database.set_down(True)
+            self.assertFalse(await flush_task)
+
+            database.set_down(False)
+            self.assertTrue(await server_settings.flush_server_settings())
+        row = database.rows[guild_id]
+        self.assertEqual(row['prefix'], 'b')
+        self.assertEqual(row['useembeds'], False)
+        self.assertEqual(row['usepagination'], True)
+
+
+    async def test_raising_flush_keeps_pending_changes(self) -> None:
+        guild_id = GUILD_IDS[0]
+        await server_settings.update_server_settings(guild_id, {'prefix': '$'})
+
+        with mock.patch.object(server_settings, 'db_update_server_settings_batch', side_effect=RuntimeError('connection lost')):
+            with self.assertRaises(RuntimeError):
+                await server_settings.flush_server_settings()
+        self.assertIsNone(self.database.rows[guild_id].get('prefix'))
+
+        self.assertTrue(await server_settings.flush_server_settings())
+        self.assertEqual(self.database.rows[guild_id]['prefix'], '$')
+
+
+    async def test_db_get_server_settings_sees_queued_writes(self) -> None:
+        await server_settings.update_server_settings(GUILD_IDS[0], {'prefix': '?'})
+        await server_settings.update_server_settings(GUILD_IDS[1], {'prefix': '%'})
+        self.assertIsNone(self.database.rows[GUILD_IDS[0]].get('prefix'))
+
+        records = await server_settings.db_get_server_settings(GUILD_IDS[0], setting_names=['prefix'])
+        self.assertEqual(records, [('?',)])
+
+        records = await server_settings.db_get_server_settings(setting_names=['guildid', 'prefix'])
+        prefixes = {guild_id: prefix for guild_id, prefix in records}
+        self.assertEqual(prefixes[GUILD_IDS[0]], '?')
+        self.assertEqual(prefixes[GUILD_IDS[1]], '%')
+
+
+    async def test_flush_writes_guilds_with_same_columns_at_once(self) -> None:
+        for guild_id in GUILD_IDS:
+            await server_settings.update_server_settings(guild_id, {'dailychannelid': guild_id + 1})
+            await server_settings.update_server_settings(guild_id, {'dailycanpost': True})
+        await server_settings.update_server_settings(GUILD_IDS[0], {'prefix': '!'})
+
+        self.assertTrue(await server_settings.flush_server_settings())
+        self.assertEqual(self.database.statement_count, 2)
+        self.assertEqual(self.database.updated_row_count, len(GUILD_IDS))
+        self.assertTrue(all(row['dailychannelid'] == guild_id + 1 and row['dailycanpost'] for guild_id, row in self.database.rows.items()))
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Tuple
+
+from src import startup
+
+from .helpers import TimedAsyncTestCase
+
+
+# ---------- Constants ----------
+
+# The startup steps of the bot with made up durations in seconds.
+STEP_DEFINITIONS: List[Tuple[str, float, List[str]]] = [
+    ('http_client', 0.02, []),
+    ('metrics', 0.01, []),
+    ('cache', 0.05, ['http_client']),
+    ('db', 0.08, []),
+    ('server_settings', 0.03, ['db']),
+    ('clean_up_server_settings', 0.02, ['server_settings']),
+    ('sprites', 0.01, []),
+    ('login', 0.02, ['db']),
+    ('daily', 0.02, ['db']),
+    ('crew', 0.04, ['cache']),
+    ('item', 0.07, ['cache']),
+    ('room', 0.03, ['cache']),
+    ('user', 0.02, ['http_client']),
+]
+
+CRITICAL_PATH: List[str] = ['http_client', 'cache', 'item']
+CRITICAL_PATH_DURATION: float = 0.14
+SCHEDULING_TOLERANCE: float = 0.05
+
+
+
+
+
+# ---------- Classes ----------
+
+class TestStartup(TimedAsyncTestCase):
+    def setUp(self) -> None:
+        self.events: List[Tuple[str, str]] = []
+
+
+    async def test_run_starts_steps_after_their_dependencies(self) -> None:
+        steps = self.__create_steps()
+        start = time.perf_counter()
+        await startup.run(steps)
+        duration = time.perf_counter() - start
+
+        steps_by_name = {step.name: step for step in steps}
+        for step in steps:
+            started_index = self.events.index(('started', step.name))
+            for name in step.depends_on:
+                self.assertLess(self.events.index(('finished', name)), started_index, f'{step.name} started before {name} finished')
+                self.assertGreaterEqual(step.started_at, steps_by_name[name].finished_at)
+
+        sequential_duration = sum(step_duration for _, step_duration, _ in STEP_DEFINITIONS)
+        self.assertGreaterEqual(duration, CRITICAL_PATH_DURATION)
+        self.assertLess(duration, CRITICAL_PATH_DURATION + SCHEDULING_TOLERANCE)
+        self.assertLess(duration, sequential_duration / 2)
+
+
+    async def test_run_starts_independent_steps_right_away(self) -> None:
+        steps = self.__create_steps()
+        await startup.run(steps)
+
+        for step in steps:
+            if not step.depends_on:
+                self.assertLess(step.started_at, SCHEDULING_TOLERANCE)
+
+
+    async def test_get_critical_path(self) -> None:
+        steps = self.__create_steps()
+        self.assertEqual(startup.get_critical_path(steps), [])
+        await startup.run(steps)
+
+        critical_path = startup.get_critical_path(steps)
+        self.assertEqual([step.name for step in critical_path], CRITICAL_PATH)
+        self.assertEqual(critical_path[-1].finished_at, max(step.finished_at for step in steps))
+
+        report = startup.get_report(steps)
+        self.assertEqual(len(report), len(steps) + 1)
+        self.assertTrue(report[-1].endswith(' -> '.join(CRITICAL_PATH)))
+
+
+    async def test_run_raises_for_cycle(self) -> None:
+        steps = [
+            startup.StartupStep('a', self.__create_function('a', 0.0), depends_on=['c']),
+            startup.StartupStep('b', self.__create_function('b', 0.0), depends_on=['a']),
+            startup.StartupStep('c', self.__create_function('c', 0.0), depends_on=['b']),
+        ]
+        with self.assertRaises(ValueError):
+            await startup.run(steps)
+        self.assertEqual(self.events, [])
+
+
+    async def test_run_raises_for_invalid_steps(self) -> None:
+        with self.assertRaises(ValueError):
+            await startup.run([startup.StartupStep('a', self.__create_function('a', 0.0), depends_on=['a'])])
+        with self.assertRaises(ValueError):
+            await startup.run([startup.StartupStep('a', self.__create_function('a', 0.0), depends_on=['unknown'])])
+        with self.assertRaises(ValueError):
+            await startup.run([startup.StartupStep('a', self.__create_function('a', 0.0)), startup.StartupStep('a', self.__create_function('a', 0.0))])
+        self.assertEqual(self.events, [])
+
+
+    async def test_run_cancels_remaining_steps_on_failure(self) -> None:
+        async def fail() -> None:
+            await asyncio.sleep(0.01)
+            raise RuntimeError('db is down')
+
+        steps = [
+            startup.StartupStep('db', fail),
+            startup.StartupStep('login', self.__create_function('login', 0.01), depends_on=['db']),
+            startup.StartupStep('cache', self.__create_function('cache', 0.5)),
+        ]
+        start = time.perf_counter()
+        with self.assertRaises(RuntimeError):
+            await startup.run(steps)
+
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertNotIn(('started', 'login'), self.events)
+        self.assertNotIn(('finished', 'cache'), self.events)
+
+
+    def __create_function(self, name: str, duration: float) -> Callable[[], Awaitable[Any]]:
+        async def function() -> None:
+            self.events.append(('started', name))
+            await asyncio.sleep(duration)
+            self.events.append(('finished', name))
+        return function
+
+
+    def __create_steps(self) -> List[startup.StartupStep]:
+        return [startup.StartupStep(name, self.__create_function(name, duration), depends_on=depends_on) for name, duration, depends_on in STEP_DEFINITIONS]